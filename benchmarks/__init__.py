@@ -0,0 +1,4 @@
+"""Performance benchmarks for the SAP Gateway connector
+
+Run from the repository root with `python -m benchmarks.run`; see run.py.
+"""
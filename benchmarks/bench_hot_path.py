@@ -0,0 +1,283 @@
+"""Benchmarks for the sap_query / sap_get_entity hot path
+
+Suites:
+    concurrency  Tool calls through ToolRegistry at several concurrency levels
+    auth         Cold (login per call) vs warm (reused session) SAPClient
+    payload      End-to-end sap_query latency and phase split by result size
+    transform    json_compact transform and result serialization cost
+    transport    Response compression and HTTP/1.1 vs HTTP/2 over a bandwidth-limited link
+    agent        The synchronous agent.py tool functions (needs google-adk)
+"""
+
+import asyncio
+import contextlib
+import dataclasses
+import io
+import json
+import time
+from typing import Any, Dict, List
+
+from sap_agent.sap_gw_connector.core.connections import close_connectors
+from sap_agent.sap_gw_connector.core.http2 import HTTP2_AVAILABLE
+from sap_agent.sap_gw_connector.core.sap_client import SAPClient
+from sap_agent.sap_gw_connector.observability.metrics import SAP_RESPONSE_WIRE_BYTES
+from sap_agent.sap_gw_connector.observability.stats import (
+    LatencyHistogram,
+    collect_phase_timings,
+)
+from sap_agent.sap_gw_connector.protocol.schemas import ToolCallRequest
+from sap_agent.sap_gw_connector.tools import tool_registry
+from sap_agent.sap_gw_connector.tools.query_tool import SAPQueryTool
+
+from .harness import (
+    GatewayProcess,
+    check_tool_response,
+    connector_environment,
+    run_load,
+    summarize,
+)
+
+# Small entity set used for latency/throughput runs
+CALL_SERVICE = "Z_CUSTOMER_SRV"
+CALL_SERVICE_PATH = "/SAP/Z_CUSTOMER_SRV"
+CALL_ENTITY = "CustomerSet"
+CALL_ROWS = 100
+
+# Entity set sized for the largest payload run
+PAYLOAD_SERVICE = "Z_SALES_ORDER_GENAI_SRV"
+PAYLOAD_SERVICE_PATH = "/SAP/Z_SALES_ORDER_GENAI_SRV"
+PAYLOAD_ENTITY = "zsd004Set"
+
+CONCURRENCY_LEVELS = (1, 4, 16, 64)
+
+# Link speed for the transport suite unless the gateway already limits it
+# (100 Mbit/s, in bytes per second)
+TRANSPORT_BANDWIDTH = 12_500_000
+TRANSPORT_CONCURRENCY = 32
+# SAPConnectionConfig overrides per transport variant
+TRANSPORT_VARIANTS: Dict[str, Dict[str, Any]] = {
+    "http1_identity": {"compression": False},
+    "http1_compressed": {"compression": True},
+    "http2_compressed": {"compression": True, "http2": True},
+}
+PAYLOAD_SIZES = (1, 100, 1_000, 10_000, 100_000)
+QUICK_PAYLOAD_SIZES = (1, 100, 1_000, 10_000)
+
+
+def payload_sizes(quick: bool) -> tuple:
+    """Result sizes benchmarked in this mode"""
+    return QUICK_PAYLOAD_SIZES if quick else PAYLOAD_SIZES
+
+
+def _entity_key(index: int) -> str:
+    return f"{index % CALL_ROWS + 1:010d}"
+
+
+def _repetitions(rows: int, quick: bool) -> int:
+    budget = 20_000 if quick else 200_000
+    return max(3, min(50, budget // max(rows, 1)))
+
+
+async def bench_concurrency(gateway: GatewayProcess, quick: bool) -> Dict[str, Any]:
+    """Tool calls through the registry, as the stdio/HTTP transports issue them"""
+    calls = {
+        "sap_query": lambda index: {
+            "service": CALL_SERVICE,
+            "entity_set": CALL_ENTITY,
+            "top": 20,
+        },
+        "sap_get_entity": lambda index: {
+            "service": CALL_SERVICE,
+            "entity_set": CALL_ENTITY,
+            "entity_key": _entity_key(index),
+        },
+    }
+    results: Dict[str, Any] = {}
+    with connector_environment(gateway):
+        for tool_name, arguments in calls.items():
+
+            async def call(index: int, tool_name: str = tool_name, arguments: Any = arguments) -> None:
+                response = await tool_registry.call_tool(
+                    ToolCallRequest(name=tool_name, arguments=arguments(index))
+                )
+                check_tool_response(response)
+
+            results[tool_name] = {}
+            for level in CONCURRENCY_LEVELS:
+                total = max(level * (5 if quick else 20), 20 if quick else 100)
+                await call(0)  # warm-up
+                results[tool_name][f"c{level}"] = await run_load(call, level, total)
+    return results
+
+
+async def bench_auth(gateway: GatewayProcess, quick: bool) -> Dict[str, Any]:
+    """Cold (new client and login per call) vs warm (one authenticated client)"""
+    config = gateway.connection_config()
+    total = 20 if quick else 100
+
+    async def query(client: SAPClient) -> None:
+        await client.query_entity_set(CALL_SERVICE_PATH, CALL_ENTITY, top=10)
+
+    async def cold(index: int) -> None:
+        async with SAPClient(config) as client:
+            await query(client)
+
+    with connector_environment(gateway):
+        results = {"cold": await run_load(cold, 1, total)}
+        async with SAPClient(config) as client:
+            await query(client)
+            results["warm"] = await run_load(lambda index: query(client), 1, total)
+    return results
+
+
+async def bench_payload(gateway: GatewayProcess, quick: bool) -> Dict[str, Any]:
+    """sap_query latency by result size, with the per-phase split"""
+    tool = SAPQueryTool()
+    results: Dict[str, Any] = {}
+    with connector_environment(gateway):
+        # First query generates the mock rows; keep it out of the numbers
+        await tool.execute({"service": PAYLOAD_SERVICE, "entity_set": PAYLOAD_ENTITY, "top": 1})
+        for rows in payload_sizes(quick):
+            histogram = LatencyHistogram()
+            phases: Dict[str, float] = {}
+            response_chars = 0
+            repetitions = _repetitions(rows, quick)
+            wall_start = time.perf_counter()
+            for _ in range(repetitions):
+                start = time.perf_counter()
+                with collect_phase_timings() as timings:
+                    result = await tool.execute(
+                        {"service": PAYLOAD_SERVICE, "entity_set": PAYLOAD_ENTITY, "top": rows}
+                    )
+                if result.get("success") is False:
+                    raise RuntimeError(result.get("error"))
+                # The registry hands results to the transport as str()
+                response_chars = len(str(result))
+                histogram.record(time.perf_counter() - start)
+                for phase, seconds in timings.durations.items():
+                    phases[phase] = phases.get(phase, 0.0) + seconds
+            summary = summarize(histogram, time.perf_counter() - wall_start)
+            summary["rows"] = result.get("count", 0)
+            summary["response_chars"] = response_chars
+            summary["phase_mean_seconds"] = {
+                phase: seconds / repetitions for phase, seconds in phases.items()
+            }
+            results[f"rows_{rows}"] = summary
+    return results
+
+
+async def bench_transform(gateway: GatewayProcess, quick: bool) -> Dict[str, Any]:
+    """CPU cost of shaping and serializing query results, without the network"""
+    tool = SAPQueryTool()
+    results: Dict[str, Any] = {}
+    async with SAPClient(gateway.connection_config()) as client:
+        for rows in payload_sizes(quick):
+            raw = await client.query_entity_set(PAYLOAD_SERVICE_PATH, PAYLOAD_ENTITY, top=rows)
+            compact = tool._transform_response(raw, "json_compact")
+            steps = {
+                "json_compact": lambda raw=raw: tool._transform_response(raw, "json_compact"),
+                "str": lambda compact=compact: str(compact),
+                "json_dumps": lambda compact=compact: json.dumps(compact),
+            }
+            entry: Dict[str, Any] = {}
+            for step, func in steps.items():
+                histogram = LatencyHistogram()
+                for _ in range(_repetitions(rows, quick)):
+                    start = time.perf_counter()
+                    func()
+                    histogram.record(time.perf_counter() - start)
+                entry[step] = histogram.to_dict()
+            results[f"rows_{rows}"] = entry
+    return results
+
+
+def _wire_bytes_total() -> float:
+    return sum(entry["sum"] for entry in SAP_RESPONSE_WIRE_BYTES.collect())
+
+
+async def bench_transport(gateway: GatewayProcess, quick: bool) -> Dict[str, Any]:
+    """Latency and bytes transferred with and without compression, and over HTTP/2
+
+    Runs its own gateway with a simulated link bandwidth. The mock gateway
+    only speaks HTTP/1.1, so the HTTP/2 variant measures the httpx client
+    path; multiplexing needs a gateway that offers h2.
+    """
+    settings = dataclasses.replace(
+        gateway.settings, bandwidth=gateway.settings.bandwidth or TRANSPORT_BANDWIDTH
+    )
+    sizes = [rows for rows in payload_sizes(quick) if rows >= 100]
+    results: Dict[str, Any] = {"bandwidth_bytes_per_second": settings.bandwidth}
+    with GatewayProcess(settings) as limited, connector_environment(limited):
+        for variant, overrides in TRANSPORT_VARIANTS.items():
+            if overrides.get("http2") and not HTTP2_AVAILABLE:
+                results[variant] = {"skipped": "httpx[http2] is not installed"}
+                continue
+            config = limited.connection_config().model_copy(update=overrides)
+            entry: Dict[str, Any] = {}
+            async with SAPClient(config) as client:
+                await client.query_entity_set(PAYLOAD_SERVICE_PATH, PAYLOAD_ENTITY, top=1)
+                for rows in sizes:
+                    histogram = LatencyHistogram()
+                    repetitions = _repetitions(rows, quick)
+                    wire_before = _wire_bytes_total()
+                    wall_start = time.perf_counter()
+                    for _ in range(repetitions):
+                        start = time.perf_counter()
+                        await client.query_entity_set(
+                            PAYLOAD_SERVICE_PATH, PAYLOAD_ENTITY, top=rows
+                        )
+                        histogram.record(time.perf_counter() - start)
+                    summary = summarize(histogram, time.perf_counter() - wall_start)
+                    summary["wire_bytes_per_call"] = (
+                        _wire_bytes_total() - wire_before
+                    ) / repetitions
+                    entry[f"rows_{rows}"] = summary
+
+                async def call(index: int, client: SAPClient = client) -> None:
+                    await client.query_entity_set(CALL_SERVICE_PATH, CALL_ENTITY, top=20)
+
+                total = TRANSPORT_CONCURRENCY * (5 if quick else 20)
+                entry[f"c{TRANSPORT_CONCURRENCY}"] = await run_load(
+                    call, TRANSPORT_CONCURRENCY, total
+                )
+            results[variant] = entry
+    return results
+
+
+def bench_agent(gateway: GatewayProcess, quick: bool) -> Dict[str, Any]:
+    """Sequential calls of the agent.py tool functions (runs their own event loop)"""
+    try:
+        from sap_agent import agent
+    except ImportError as e:
+        return {"skipped": f"agent module unavailable: {e}"}
+
+    total = 20 if quick else 100
+    calls = {
+        "sap_query": lambda index: agent.sap_query(CALL_SERVICE, CALL_ENTITY, top=20),
+        "sap_get_entity": lambda index: agent.sap_get_entity(
+            CALL_SERVICE, CALL_ENTITY, _entity_key(index)
+        ),
+    }
+    results: Dict[str, Any] = {}
+    with connector_environment(gateway):
+        for name, func in calls.items():
+            histogram = LatencyHistogram()
+            errors = 0
+            failures: List[str] = []
+            # ensure_sap_config() prints debug lines on every call
+            with contextlib.redirect_stdout(io.StringIO()):
+                func(0)
+                wall_start = time.perf_counter()
+                for index in range(total):
+                    start = time.perf_counter()
+                    result = func(index)
+                    histogram.record(time.perf_counter() - start)
+                    if isinstance(result, dict) and result.get("success") is False:
+                        errors += 1
+                        failures.append(str(result.get("error")))
+            results[name] = summarize(histogram, time.perf_counter() - wall_start, errors)
+            if failures:
+                results[name]["first_error"] = failures[0]
+    # The tool functions share connection pools on the loop they run on
+    asyncio.get_event_loop().run_until_complete(close_connectors())
+    return results
@@ -0,0 +1,251 @@
+"""Startup benchmarks: import-time profile and time to first response
+
+Suites:
+    startup  Fresh agent processes (eager and SAP_AGENT_LAZY_INIT) timed from
+             spawn to the first sap_query result, fresh stdio servers timed
+             from spawn to their initialize, tools/list and first tools/call
+             responses, plus both modules' import time by package
+
+The import profile is Python's `-X importtime` output summed by package;
+run it on its own with
+
+    python -m benchmarks.bench_startup sap_agent.agent
+"""
+
+import json
+import os
+import subprocess
+import sys
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from .harness import REPO_ROOT, UNLIMITED_ADMISSION, GatewayProcess
+
+# Time from spawning the agent process to its first sap_query result (seconds)
+TIME_TO_FIRST_RESPONSE_TARGET = 2.0
+
+STDIO_MODULE = "sap_agent.sap_gw_connector.transports.stdio"
+
+STARTUP_MODES: Dict[str, Dict[str, str]] = {
+    "eager": {"SAP_AGENT_LAZY_INIT": "false"},
+    "lazy": {"SAP_AGENT_LAZY_INIT": "true"},
+}
+
+# Packages whose modules are reported one level deeper (namespace packages
+# and this repository)
+PACKAGE_DEPTH = {"google": 3, "sap_agent": 3}
+
+# Imports the agent, answers one query and reports its own timings
+FIRST_RESPONSE_SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+from sap_agent import agent
+imported = time.perf_counter()
+result = agent.sap_query(sys.argv[1], sys.argv[2], top=1)
+answered = time.perf_counter()
+print("RESULT " + json.dumps({
+    "import": imported - start,
+    "first_call": answered - imported,
+    "error": result.get("error") if result.get("success") is False else None,
+}), flush=True)
+"""
+
+
+def _package(module: str) -> str:
+    parts = module.split(".")
+    return ".".join(parts[: PACKAGE_DEPTH.get(parts[0], 1)])
+
+
+def parse_importtime(output: str) -> List[Tuple[str, int, int]]:
+    """(module, self us, cumulative us) from `python -X importtime` stderr"""
+    modules = []
+    for line in output.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        modules.append((name.strip(), int(self_us), int(cumulative_us)))
+    return modules
+
+
+def import_profile(
+    module: str, env: Optional[Dict[str, str]] = None, top: int = 15
+) -> Dict[str, Any]:
+    """Import a module in a fresh interpreter and sum import time by package
+
+    Returns:
+        total seconds, module count and the `top` packages by self time
+    """
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=REPO_ROOT,
+        env={**os.environ, "PYTHONPATH": str(REPO_ROOT), **(env or {})},
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    modules = parse_importtime(completed.stderr)
+    packages: Dict[str, List[int]] = {}
+    for name, self_us, _ in modules:
+        entry = packages.setdefault(_package(name), [0, 0])
+        entry[0] += self_us
+        entry[1] += 1
+    ranked = sorted(packages.items(), key=lambda item: item[1][0], reverse=True)
+    return {
+        "seconds": sum(self_us for _, self_us, _ in modules) / 1e6,
+        "modules": len(modules),
+        "packages": {
+            name: {"seconds": self_us / 1e6, "modules": count}
+            for name, (self_us, count) in ranked[:top]
+        },
+    }
+
+
+def time_to_first_response(
+    env: Dict[str, str], service: str, entity_set: str, timeout: float = 120.0
+) -> Dict[str, Any]:
+    """Spawn an agent process and time it until its first sap_query result"""
+    start = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-c", FIRST_RESPONSE_SCRIPT, service, entity_set],
+        cwd=REPO_ROOT,
+        env={**os.environ, "PYTHONPATH": str(REPO_ROOT), **env},
+        stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL,
+        text=True,
+    )
+    try:
+        assert process.stdout is not None
+        for line in process.stdout:
+            if line.startswith("RESULT "):
+                result: Dict[str, Any] = json.loads(line[len("RESULT "):])
+                result["total"] = time.perf_counter() - start
+                return result
+        raise RuntimeError(f"Agent process exited with {process.wait()} before answering")
+    finally:
+        process.kill()
+        process.wait(timeout=timeout)
+
+
+def stdio_startup(
+    gateway: GatewayProcess, env: Dict[str, str], service: str, entity_set: str
+) -> Dict[str, float]:
+    """Spawn a stdio server and time its initialize, tools/list and first tools/call
+
+    Returns:
+        Seconds from spawn to each response
+    """
+    settings = gateway.settings
+    command = [
+        sys.executable, "-m", STDIO_MODULE,
+        "--sap-host", gateway.host, "--sap-port", str(gateway.port),
+        "--sap-client", settings.client,
+        "--sap-username", settings.username, "--sap-password", settings.password,
+    ]  # fmt: skip
+    requests = [
+        ("initialize", {
+            "protocolVersion": "2024-11-05",
+            "capabilities": {},
+            "clientInfo": {"name": "bench_startup", "version": "0"},
+        }),
+        ("tools/list", {}),
+        ("tools/call", {
+            "name": "sap_query",
+            "arguments": {"service": service, "entity_set": entity_set, "top": 1},
+        }),
+    ]  # fmt: skip
+    start = time.perf_counter()
+    process = subprocess.Popen(
+        command,
+        cwd=REPO_ROOT,
+        env={**os.environ, "PYTHONPATH": str(REPO_ROOT), "SAP_SCHEME": "http", **env},
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL,
+        text=True,
+    )
+    assert process.stdin is not None and process.stdout is not None
+    timings: Dict[str, float] = {}
+    try:
+        for request_id, (method, params) in enumerate(requests, 1):
+            message = {"jsonrpc": "2.0", "id": request_id, "method": method, "params": params}
+            process.stdin.write(json.dumps(message) + "\n")
+            process.stdin.flush()
+            for line in process.stdout:
+                if not line.startswith("{"):
+                    continue  # stray prints
+                response = json.loads(line)
+                if response.get("id") == request_id:
+                    break
+            else:
+                raise RuntimeError(f"Stdio server exited with {process.wait()} during {method}")
+            # Tools report most failures in the result text rather than isError
+            if "error" in response or "'success': False" in json.dumps(response["result"]):
+                raise RuntimeError(f"{method} failed: {response}")
+            timings[method.replace("/", "_")] = time.perf_counter() - start
+            if method == "initialize":
+                notification = {"jsonrpc": "2.0", "method": "notifications/initialized"}
+                process.stdin.write(json.dumps(notification) + "\n")
+        return timings
+    finally:
+        process.kill()
+        process.wait()
+
+
+def _distribution(values: List[float]) -> Dict[str, float]:
+    values = sorted(values)
+    return {"mean": sum(values) / len(values), "p50": values[len(values) // 2], "max": values[-1]}
+
+
+def bench_startup(gateway: GatewayProcess, quick: bool) -> Dict[str, Any]:
+    """Import profile and time to first response of fresh agent processes"""
+    from .bench_hot_path import CALL_ENTITY, CALL_SERVICE
+
+    runs = 3 if quick else 10
+    env = {**UNLIMITED_ADMISSION, **gateway.environment()}
+    results: Dict[str, Any] = {
+        "target_seconds": TIME_TO_FIRST_RESPONSE_TARGET,
+        "import_profile": import_profile("sap_agent.agent", env),
+    }
+    for mode, mode_env in STARTUP_MODES.items():
+        samples = [
+            time_to_first_response({**env, **mode_env}, CALL_SERVICE, CALL_ENTITY)
+            for _ in range(runs)
+        ]
+        errors = [sample["error"] for sample in samples if sample["error"]]
+        time_to_first = _distribution([sample["total"] for sample in samples])
+        results[mode] = {
+            "runs": runs,
+            "errors": len(errors),
+            "time_to_first_response": time_to_first,
+            "import_seconds": sum(sample["import"] for sample in samples) / runs,
+            "first_call_seconds": sum(sample["first_call"] for sample in samples) / runs,
+            "target_met": not errors and time_to_first["p50"] <= TIME_TO_FIRST_RESPONSE_TARGET,
+        }
+        if errors:
+            results[mode]["first_error"] = errors[0]
+
+    stdio_samples = [
+        stdio_startup(gateway, env, CALL_SERVICE, CALL_ENTITY) for _ in range(runs)
+    ]
+    results["stdio"] = {
+        "runs": runs,
+        "import_profile": import_profile(STDIO_MODULE, env),
+        **{
+            step: _distribution([sample[step] for sample in stdio_samples])
+            for step in stdio_samples[0]
+        },
+    }
+    return results
+
+
+def main() -> None:
+    """Print the import-time profile of a module by package"""
+    module = sys.argv[1] if len(sys.argv) > 1 else "sap_agent.agent"
+    profile = import_profile(module)
+    print(f"{module}: {profile['seconds']:.3f}s in {profile['modules']} modules")
+    for name, entry in profile["packages"].items():
+        print(f"  {entry['seconds']:8.3f}s  {entry['modules']:5d}  {name}")
+
+
+if __name__ == "__main__":
+    main()
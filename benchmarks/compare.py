@@ -0,0 +1,66 @@
+"""Compare two benchmark result files
+
+Usage:
+    python -m benchmarks.compare OLD.json NEW.json [--threshold 10]
+
+Prints every latency percentile and throughput figure present in both runs,
+with the relative change. Changes beyond the threshold (percent) are flagged;
+slower latency or lower throughput is a regression.
+"""
+
+import argparse
+import json
+from pathlib import Path
+from typing import Any, Dict, Iterator, Tuple
+
+LOWER_IS_BETTER = ("mean", "p50", "p90", "p95", "p99", "max", "wall_seconds")
+HIGHER_IS_BETTER = ("throughput_per_second",)
+
+
+def flatten(data: Any, prefix: str = "") -> Iterator[Tuple[str, float]]:
+    """Yield (dotted.path, value) for every numeric leaf"""
+    if isinstance(data, dict):
+        for key, value in data.items():
+            yield from flatten(value, f"{prefix}.{key}" if prefix else str(key))
+    elif isinstance(data, (int, float)) and not isinstance(data, bool):
+        yield prefix, float(data)
+
+
+def compare(old: Dict[str, Any], new: Dict[str, Any], threshold: float) -> int:
+    """Print a comparison table; returns the number of regressions"""
+    old_values = dict(flatten(old.get("suites", {})))
+    new_values = dict(flatten(new.get("suites", {})))
+    regressions = 0
+
+    print(f"old: {old.get('meta', {}).get('git_commit')}  new: {new.get('meta', {}).get('git_commit')}")
+    print(f"{'metric':<70} {'old':>12} {'new':>12} {'change':>9}")
+    for path in sorted(old_values.keys() & new_values.keys()):
+        metric = path.rsplit(".", 1)[-1]
+        if metric not in LOWER_IS_BETTER + HIGHER_IS_BETTER:
+            continue
+        before, after = old_values[path], new_values[path]
+        change = (after - before) / before * 100 if before else 0.0
+        worse = change > threshold if metric in LOWER_IS_BETTER else change < -threshold
+        better = change < -threshold if metric in LOWER_IS_BETTER else change > threshold
+        flag = "  REGRESSION" if worse else ("  improved" if better else "")
+        regressions += worse
+        print(f"{path:<70} {before:>12.6g} {after:>12.6g} {change:>8.1f}%{flag}")
+    return regressions
+
+
+def main() -> None:
+    """CLI entry point"""
+    parser = argparse.ArgumentParser(description="Compare two benchmark result files")
+    parser.add_argument("old", type=Path)
+    parser.add_argument("new", type=Path)
+    parser.add_argument("--threshold", type=float, default=10.0, help="Percent change to flag")
+    args = parser.parse_args()
+
+    old = json.loads(args.old.read_text(encoding="utf-8"))
+    new = json.loads(args.new.read_text(encoding="utf-8"))
+    regressions = compare(old, new, args.threshold)
+    print(f"\n{regressions} regression(s) beyond {args.threshold:g}%")
+
+
+if __name__ == "__main__":
+    main()
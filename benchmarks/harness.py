@@ -0,0 +1,242 @@
+"""Shared helpers for the connector benchmarks
+
+The mock gateway runs in a child process so its request handling does not
+compete with the connector for the GIL, and the connector is pointed at it
+through the same SAP_* environment variables used in production.
+"""
+
+import asyncio
+import json
+import logging
+import multiprocessing
+import os
+import platform
+import subprocess
+import sys
+import time
+from contextlib import contextmanager
+from dataclasses import asdict
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, Iterator, Optional
+
+from sap_agent.sap_gw_connector.config import settings as connector_settings
+from sap_agent.sap_gw_connector.config.settings import SAPConnectionConfig
+from sap_agent.sap_gw_connector.core.connections import close_connectors
+from sap_agent.sap_gw_connector.observability.stats import LatencyHistogram
+from sap_agent.sap_gw_connector.testing.gateway import (
+    MockGatewaySettings,
+    MockSAPGateway,
+)
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+
+# Client-side admission limits are off during benchmarks unless set in the
+# environment, so results measure the connector rather than the rate limit
+UNLIMITED_ADMISSION = {
+    "SECURITY_RATE_LIMIT_PER_MINUTE": "0",
+    "SECURITY_MAX_CONCURRENT_SESSIONS": "0",
+}
+
+
+def _serve_gateway(settings: MockGatewaySettings, ready: Any) -> None:
+    """Child process entry point: serve the mock gateway until terminated"""
+    logging.basicConfig(level=logging.WARNING)
+
+    async def serve() -> None:
+        gateway = MockSAPGateway(settings=settings)
+        ready.put(await gateway.start())
+        await asyncio.Event().wait()
+
+    asyncio.run(serve())
+
+
+class GatewayProcess:
+    """Mock SAP Gateway running in a separate process
+
+    Example:
+        >>> with GatewayProcess(MockGatewaySettings(rows=1000)) as gateway:
+        ...     with connector_environment(gateway):
+        ...         ...
+    """
+
+    def __init__(self, settings: Optional[MockGatewaySettings] = None):
+        self.settings = settings or MockGatewaySettings()
+        self.host = "127.0.0.1"
+        self.port: Optional[int] = None
+        self._process: Optional[multiprocessing.process.BaseProcess] = None
+
+    def __enter__(self) -> "GatewayProcess":
+        context = multiprocessing.get_context("spawn")
+        ready = context.Queue()
+        self._process = context.Process(
+            target=_serve_gateway, args=(self.settings, ready), daemon=True
+        )
+        self._process.start()
+        self.port = ready.get(timeout=60)
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        if self._process is not None:
+            self._process.terminate()
+            self._process.join(timeout=10)
+            self._process = None
+
+    def _bound_port(self) -> int:
+        if self.port is None:
+            raise RuntimeError("GatewayProcess is not running; use it as a context manager")
+        return self.port
+
+    def environment(self) -> Dict[str, str]:
+        """SAP_* environment variables pointing at this gateway"""
+        return {
+            "SAP_HOST": self.host,
+            "SAP_PORT": str(self._bound_port()),
+            "SAP_SCHEME": "http",
+            "SAP_CLIENT": self.settings.client,
+            "SAP_USERNAME": self.settings.username,
+            "SAP_PASSWORD": self.settings.password,
+        }
+
+    def connection_config(self) -> SAPConnectionConfig:
+        """Connection settings pointing at this gateway"""
+        return SAPConnectionConfig(  # type: ignore[call-arg]
+            host=self.host,
+            port=self._bound_port(),
+            scheme="http",
+            client=self.settings.client,
+            username=self.settings.username,
+            password=self.settings.password,
+        )
+
+
+@contextmanager
+def connector_environment(gateway: GatewayProcess) -> Iterator[None]:
+    """Point the connector's environment-based configuration at a gateway"""
+    env = gateway.environment()
+    env.update(
+        {name: value for name, value in UNLIMITED_ADMISSION.items() if name not in os.environ}
+    )
+    saved = {name: os.environ.get(name) for name in env}
+    os.environ.update(env)
+    connector_settings.reload_config()
+    try:
+        yield
+    finally:
+        for name, value in saved.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+        connector_settings.config = None
+
+
+def run_async(awaitable: Awaitable[Any]) -> Any:
+    """Run a coroutine on a new event loop, closing the shared SAP connections after"""
+
+    async def main() -> Any:
+        try:
+            return await awaitable
+        finally:
+            await close_connectors()
+
+    return asyncio.run(main())
+
+
+def check_tool_response(response: Any) -> None:
+    """Raise if a ToolCallResponse reports a failure
+
+    Tools report most failures as a {'success': False, ...} result rather
+    than isError, so the result text is checked too.
+    """
+    text = response.content[0]["text"] if response.content else ""
+    if response.isError or "'success': False" in text:
+        raise RuntimeError(text)
+
+
+def summarize(
+    histogram: LatencyHistogram, wall_seconds: float, errors: int = 0
+) -> Dict[str, Any]:
+    """Summarize a latency histogram and the wall time of the run"""
+    return {
+        "calls": histogram.count,
+        "errors": errors,
+        "wall_seconds": wall_seconds,
+        "throughput_per_second": histogram.count / wall_seconds if wall_seconds else 0.0,
+        "latency": histogram.to_dict(),
+    }
+
+
+async def run_load(
+    call: Callable[[int], Awaitable[Any]], concurrency: int, total: int
+) -> Dict[str, Any]:
+    """Issue `total` calls with at most `concurrency` in flight
+
+    A call counts as an error when it raises.
+
+    Returns:
+        Summary with throughput and latency percentiles
+    """
+    histogram = LatencyHistogram()
+    errors = 0
+    indexes = iter(range(total))
+
+    async def worker() -> None:
+        nonlocal errors
+        for index in indexes:
+            start = time.perf_counter()
+            try:
+                await call(index)
+            except Exception:
+                errors += 1
+            histogram.record(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return summarize(histogram, time.perf_counter() - start, errors)
+
+
+def _git(*args: str) -> Optional[str]:
+    try:
+        output = subprocess.run(
+            ["git", *args],
+            cwd=REPO_ROOT,
+            capture_output=True,
+            text=True,
+            check=True,
+            timeout=30,
+        ).stdout
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return output.strip()
+
+
+def run_metadata(settings: MockGatewaySettings) -> Dict[str, Any]:
+    """Describe the code and machine a benchmark run was made on"""
+    status = _git("status", "--porcelain", "--untracked-files=no")
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "git_commit": _git("rev-parse", "HEAD"),
+        "git_dirty": bool(status) if status is not None else None,
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "gateway": asdict(settings),
+    }
+
+
+def write_results(results: Dict[str, Any], path: Optional[Path] = None) -> Path:
+    """Write benchmark results as JSON
+
+    Defaults to benchmarks/results/<timestamp>-<commit>.json so runs on
+    different commits sit side by side.
+    """
+    if path is None:
+        meta = results.get("meta", {})
+        stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S")
+        commit = (meta.get("git_commit") or "unknown")[:10]
+        path = RESULTS_DIR / f"{stamp}-{commit}.json"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(results, indent=2, sort_keys=True), encoding="utf-8")
+    return path
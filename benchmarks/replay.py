@@ -0,0 +1,180 @@
+"""Replay a recorded tool-call trace against the mock gateway
+
+Record a trace from a live agent or stdio server by setting
+SAP_TRACE_RECORD_PATH (see sap_gw_connector/observability/recorder.py), then:
+
+    python -m benchmarks.replay trace.jsonl                 # recorded rate
+    python -m benchmarks.replay trace.jsonl --speed 10      # 10x the recorded rate
+    python -m benchmarks.replay trace.jsonl --latency-ms 30 --output replay.json
+
+Calls are issued open-loop at their recorded offsets divided by --speed, so
+a slow connector builds up a backlog instead of slowing the offered load.
+Latency is measured from each call's scheduled start. Entity keys are mapped
+onto mock keys (keeping the recorded repeat pattern) unless --keep-keys is
+given.
+"""
+
+import argparse
+import asyncio
+import logging
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+from sap_agent.sap_gw_connector.observability.recorder import load_trace
+from sap_agent.sap_gw_connector.observability.stats import LatencyHistogram
+from sap_agent.sap_gw_connector.protocol.schemas import ToolCallRequest
+from sap_agent.sap_gw_connector.testing.gateway import MockGatewaySettings
+from sap_agent.sap_gw_connector.tools import tool_registry
+
+from .harness import (
+    GatewayProcess,
+    check_tool_response,
+    connector_environment,
+    run_async,
+    run_metadata,
+    summarize,
+    write_results,
+)
+
+MAX_ERROR_SAMPLES = 3
+
+
+def remap_keys(events: List[Dict[str, Any]], rows: int) -> List[Dict[str, Any]]:
+    """Map recorded entity keys onto keys that exist in the mock gateway
+
+    Distinct keys get distinct mock keys (modulo the generated row count) in
+    order of first use, so repeated lookups stay repeated.
+    """
+    key_map: Dict[Any, str] = {}
+    remapped = []
+    for event in events:
+        args = event.get("args", {})
+        if "entity_key" in args:
+            original = (args.get("service"), args.get("entity_set"), args["entity_key"])
+            if original not in key_map:
+                key_map[original] = f"{len(key_map) % rows + 1:010d}"
+            event = dict(event, args=dict(args, entity_key=key_map[original]))
+        remapped.append(event)
+    return remapped
+
+
+class _ToolResults:
+    def __init__(self) -> None:
+        self.latency = LatencyHistogram()
+        self.recorded = LatencyHistogram()
+        self.errors = 0
+        self.error_samples: List[str] = []
+
+    def to_dict(self, wall_seconds: float) -> Dict[str, Any]:
+        summary = summarize(self.latency, wall_seconds, self.errors)
+        summary["recorded_latency"] = self.recorded.to_dict()
+        summary["error_samples"] = self.error_samples
+        return summary
+
+
+async def replay(events: List[Dict[str, Any]], speed: float) -> Dict[str, Any]:
+    """Replay trace events open-loop at `speed` times the recorded rate"""
+    per_tool: Dict[str, _ToolResults] = {}
+    overall = LatencyHistogram()
+    schedule_lag = LatencyHistogram()
+    errors = 0
+
+    async def run_one(event: Dict[str, Any], scheduled: float) -> None:
+        nonlocal errors
+        schedule_lag.record(max(time.perf_counter() - scheduled, 0.0))
+        results = per_tool.setdefault(event["tool"], _ToolResults())
+        if "dur" in event:
+            results.recorded.record(event["dur"])
+        try:
+            response = await tool_registry.call_tool(
+                ToolCallRequest(name=event["tool"], arguments=event.get("args", {}))
+            )
+            check_tool_response(response)
+        except Exception as e:
+            errors += 1
+            results.errors += 1
+            if len(results.error_samples) < MAX_ERROR_SAMPLES:
+                results.error_samples.append(str(e)[:300])
+        latency = time.perf_counter() - scheduled
+        results.latency.record(latency)
+        overall.record(latency)
+
+    tasks = []
+    start = time.perf_counter()
+    for event in events:
+        scheduled = start + event["t"] / speed
+        delay = scheduled - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        tasks.append(asyncio.create_task(run_one(event, scheduled)))
+    await asyncio.gather(*tasks)
+    wall_seconds = time.perf_counter() - start
+
+    span = events[-1]["t"] / speed if events else 0.0
+    result = summarize(overall, wall_seconds, errors)
+    result["offered_rate_per_second"] = len(events) / span if span else None
+    result["schedule_lag"] = schedule_lag.to_dict()
+    result["tools"] = {
+        name: results.to_dict(wall_seconds) for name, results in sorted(per_tool.items())
+    }
+    return result
+
+
+def print_report(result: Dict[str, Any]) -> None:
+    """Print a short latency and error summary"""
+    print(f"{'tool':<20} {'calls':>6} {'errors':>6} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'rec p50':>9}")
+    rows = dict(result["tools"], overall=result)
+    for name, summary in rows.items():
+        latency = summary["latency"]
+        recorded = summary.get("recorded_latency", {}).get("p50")
+        print(
+            f"{name:<20} {summary['calls']:>6} {summary['errors']:>6} "
+            f"{latency['p50'] * 1000:>9.1f} {latency['p95'] * 1000:>9.1f} "
+            f"{latency['p99'] * 1000:>9.1f} "
+            f"{recorded * 1000 if recorded is not None else float('nan'):>9.1f}"
+        )
+    offered = result["offered_rate_per_second"]
+    print(
+        f"offered {offered or 0:.1f}/s, achieved {result['throughput_per_second']:.1f}/s, "
+        f"schedule lag p99 {result['schedule_lag']['p99'] * 1000:.1f} ms"
+    )
+
+
+def main() -> None:
+    """CLI entry point"""
+    parser = argparse.ArgumentParser(description="Replay a tool-call trace")
+    parser.add_argument("trace", type=Path, help="Trace file recorded by TraceRecorder")
+    parser.add_argument("--speed", type=float, default=1.0, help="Multiple of the recorded rate")
+    parser.add_argument("--limit", type=int, help="Replay only the first N calls")
+    parser.add_argument("--rows", type=int, default=1000, help="Mock rows per entity set")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Mock gateway latency")
+    parser.add_argument("--jitter-ms", type=float, default=0.0, help="Random extra latency")
+    parser.add_argument("--keep-keys", action="store_true", help="Do not remap entity keys")
+    parser.add_argument("--output", type=Path, help="Results JSON path")
+    args = parser.parse_args()
+    if args.speed <= 0:
+        parser.error("--speed must be positive")
+
+    logging.basicConfig(level=logging.WARNING)
+    events = load_trace(args.trace)[: args.limit]
+    if not args.keep_keys:
+        events = remap_keys(events, args.rows)
+
+    settings = MockGatewaySettings(
+        latency=args.latency_ms / 1000.0,
+        latency_jitter=args.jitter_ms / 1000.0,
+        rows=args.rows,
+    )
+    results: Dict[str, Any] = {"meta": run_metadata(settings), "suites": {}}
+    results["meta"].update(trace=str(args.trace), speed=args.speed, calls=len(events))
+
+    with GatewayProcess(settings) as gateway, connector_environment(gateway):
+        results["suites"]["replay"] = run_async(replay(events, args.speed))
+
+    print_report(results["suites"]["replay"])
+    print(f"Results written to {write_results(results, args.output)}")
+
+
+if __name__ == "__main__":
+    main()
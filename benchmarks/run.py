@@ -0,0 +1,94 @@
+"""Run the connector benchmarks against the local mock gateway
+
+Usage:
+    python -m benchmarks.run                    # all suites
+    python -m benchmarks.run --quick            # smaller runs, payloads up to 10k rows
+    python -m benchmarks.run --suite payload --suite transform
+    python -m benchmarks.run --latency-ms 20    # simulate network round trips
+    python -m benchmarks.run --suite transport --bandwidth-mbps 50
+    python -m benchmarks.run --suite startup    # agent import profile and time to first response
+    python -m benchmarks.run --output baseline.json
+
+Results are written as JSON (default benchmarks/results/<timestamp>-<commit>.json);
+compare two runs with `python -m benchmarks.compare OLD.json NEW.json`.
+"""
+
+import argparse
+import inspect
+import logging
+import sys
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict
+
+from sap_agent.sap_gw_connector.testing.gateway import MockGatewaySettings
+
+from . import bench_hot_path, bench_startup
+from .harness import GatewayProcess, run_async, run_metadata, write_results
+
+# Suite name -> function(gateway, quick)
+SUITES: Dict[str, Callable[..., Any]] = {
+    "concurrency": bench_hot_path.bench_concurrency,
+    "auth": bench_hot_path.bench_auth,
+    "payload": bench_hot_path.bench_payload,
+    "transform": bench_hot_path.bench_transform,
+    "transport": bench_hot_path.bench_transport,
+    "agent": bench_hot_path.bench_agent,
+    "startup": bench_startup.bench_startup,
+}
+
+
+def gateway_settings(args: argparse.Namespace) -> MockGatewaySettings:
+    """Mock gateway settings sized for the selected suites"""
+    largest = max(bench_hot_path.payload_sizes(args.quick))
+    return MockGatewaySettings(
+        latency=args.latency_ms / 1000.0,
+        latency_jitter=args.jitter_ms / 1000.0,
+        bandwidth=args.bandwidth_mbps * 125_000,
+        rows=bench_hot_path.CALL_ROWS,
+        rows_per_entity={bench_hot_path.PAYLOAD_ENTITY: largest},
+        page_size=largest,
+    )
+
+
+def run(args: argparse.Namespace) -> Dict[str, Any]:
+    """Run the selected suites and collect their results"""
+    settings = gateway_settings(args)
+    results: Dict[str, Any] = {"meta": run_metadata(settings), "suites": {}}
+    results["meta"]["quick"] = args.quick
+
+    with GatewayProcess(settings) as gateway:
+        for name in args.suite or list(SUITES):
+            suite = SUITES[name]
+            print(f"Running {name} ...", file=sys.stderr)
+            start = time.perf_counter()
+            if inspect.iscoroutinefunction(suite):
+                results["suites"][name] = run_async(suite(gateway, args.quick))
+            else:
+                results["suites"][name] = suite(gateway, args.quick)
+            print(f"  done in {time.perf_counter() - start:.1f}s", file=sys.stderr)
+    return results
+
+
+def main() -> None:
+    """CLI entry point"""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--suite", action="append", choices=list(SUITES), help="Suite to run (repeatable)"
+    )
+    parser.add_argument("--quick", action="store_true", help="Smaller, faster runs")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Mock gateway latency")
+    parser.add_argument("--jitter-ms", type=float, default=0.0, help="Random extra latency")
+    parser.add_argument(
+        "--bandwidth-mbps", type=float, default=0.0, help="Simulated link bandwidth (0: unlimited)"
+    )
+    parser.add_argument("--output", type=Path, help="Results JSON path")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    results = run(args)
+    print(f"Results written to {write_results(results, args.output)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1 +1,15 @@
-from . import agent
+"""SAP agent package
+
+The agent module (and google.adk with it) is imported on first access of
+`sap_agent.agent`, so processes that only use sap_gw_connector, such as the
+gateway servers, do not load it.
+"""
+
+import importlib
+from typing import Any
+
+
+def __getattr__(name: str) -> Any:
+    if name == "agent":
+        return importlib.import_module(f"{__name__}.agent")
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -4,20 +4,58 @@ This agent provides SAP OData integration using direct Python functions,
 making it compatible with Agent Engine deployment.
 
 Supports both local development and Agent Engine deployment environments.
+
+With SAP_AGENT_SERVICE_CATALOG=true a compact list of the configured services
+and entity sets is added to the agent instruction on first use, so the model
+does not need a sap_list_services call at the start of each conversation.
+
+With SAP_AGENT_LAZY_INIT=true the import-time setup (Secret Manager and
+metadata server calls, services.yaml lookup and parsing, SAP client imports
+and a connection warm-up) runs in a background thread instead of blocking
+the import, and nest_asyncio is applied on the first tool call. Tool calls
+wait for the warm-up to finish. Measure the effect with
+`python -m benchmarks.run --suite startup`.
 """
 
-import os
-import json
 import asyncio
+import json
+import os
+import threading
+import time
 from pathlib import Path
-from typing import Optional, Dict, Any, List
+from typing import TYPE_CHECKING, Any, ContextManager, Dict, List, Optional, Tuple
+
+from google.adk.agents.llm_agent import Agent
+from google.adk.agents.readonly_context import ReadonlyContext
+from google.adk.tools.tool_context import ToolContext
+
+if TYPE_CHECKING:
+    from sap_agent.sap_gw_connector.core.query_planner import QueryPlan
+
+
+def _env_flag(name: str, default: bool = False) -> bool:
+    """Read a boolean environment variable."""
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+LAZY_INIT = _env_flag("SAP_AGENT_LAZY_INIT")
+SERVICE_CATALOG = _env_flag("SAP_AGENT_SERVICE_CATALOG")
+
+
+def _apply_nest_asyncio() -> None:
+    """Enable nested event loops for Agent Engine compatibility."""
+    try:
+        import nest_asyncio
+        nest_asyncio.apply()
+    except ImportError:
+        pass  # nest_asyncio not available, may fail in nested async contexts
+
 
-# Enable nested event loops for Agent Engine compatibility
-try:
-    import nest_asyncio
-    nest_asyncio.apply()
-except ImportError:
-    pass  # nest_asyncio not available, may fail in nested async contexts
+if not LAZY_INIT:
+    _apply_nest_asyncio()
 
 # Import Google Secret Manager (lazy loading to avoid startup issues)
 HAS_SECRET_MANAGER = False
@@ -35,8 +73,6 @@ def _get_secret_manager():
             HAS_SECRET_MANAGER = False
     return secretmanager
 
-from google.adk.agents.llm_agent import Agent
-
 
 # =============================================================================
 # Secret Management
@@ -103,6 +139,7 @@ def load_secrets_from_manager(force: bool = False) -> bool:
 
 def ensure_sap_config():
     """Ensure SAP configuration is available. Call this before any SAP operation."""
+    _ensure_initialized()
     print(f"Debug ensure_sap_config: SAP_HOST={os.getenv('SAP_HOST')}, "
           f"PROJECT_ID={os.getenv('GOOGLE_CLOUD_PROJECT')}")
 
@@ -151,18 +188,19 @@ def configure_services_path():
              print(f"Warning: services.yaml not found in {services_yaml} or {local_yaml}")
 
 
-# Attempt to load secrets and config at startup
-# Only try Secret Manager if SAP_HOST is not already set via env_vars
-# This prevents permission errors during Agent Engine startup when env_vars are used
-if not os.getenv("SAP_HOST"):
-    # Silently try to load - don't crash if it fails
-    try:
-        load_secrets_from_manager()
-    except Exception as e:
-        print(f"Note: Could not load from Secret Manager (may use env_vars instead): {e}")
-else:
-    print(f"SAP credentials already configured via environment variables")
-configure_services_path()
+def _initialize() -> None:
+    """Load secrets and configure the services path."""
+    # Only try Secret Manager if SAP_HOST is not already set via env_vars
+    # This prevents permission errors during Agent Engine startup when env_vars are used
+    if not os.getenv("SAP_HOST"):
+        # Silently try to load - don't crash if it fails
+        try:
+            load_secrets_from_manager()
+        except Exception as e:
+            print(f"Note: Could not load from Secret Manager (may use env_vars instead): {e}")
+    else:
+        print("SAP credentials already configured via environment variables")
+    configure_services_path()
 
 
 # =============================================================================
@@ -208,6 +246,87 @@ def get_services_config_path() -> Optional[Path]:
     return None
 
 
+# =============================================================================
+# Startup
+# =============================================================================
+
+_warm_up_thread: Optional[threading.Thread] = None
+_initialized = False
+_init_lock = threading.Lock()
+
+
+def _warm_up() -> None:
+    """Background setup in lazy mode: secrets, config, SAP client and connections.
+
+    Connection pools belong to an event loop, so the connections opened here
+    are closed again; the SSL context and DNS answers stay cached.
+    """
+    start = time.perf_counter()
+    try:
+        _initialize()
+
+        from sap_agent.sap_gw_connector.config.loader import get_services_config
+        from sap_agent.sap_gw_connector.core.connections import close_connectors
+        from sap_agent.sap_gw_connector.core.sap_client import warm_up_systems
+
+        get_services_config(get_services_config_path())
+        if os.getenv("SAP_HOST"):
+            async def _connect() -> None:
+                try:
+                    await warm_up_systems()
+                finally:
+                    await close_connectors()
+
+            asyncio.run(_connect())
+    except Exception as e:
+        print(f"Warning: SAP agent warm-up failed: {e}")
+    print(f"SAP agent warm-up finished in {time.perf_counter() - start:.3f}s")
+
+
+def _ensure_initialized() -> None:
+    """Finish lazy initialization before the first SAP tool call."""
+    global _initialized
+    if _initialized:
+        return
+    if _warm_up_thread is not None:
+        _warm_up_thread.join()
+    with _init_lock:
+        if not _initialized:
+            _apply_nest_asyncio()
+            _initialized = True
+
+
+if LAZY_INIT:
+    # Overlaps the network calls and imports with the rest of the agent's startup
+    _warm_up_thread = threading.Thread(target=_warm_up, name="sap-agent-warm-up", daemon=True)
+    _warm_up_thread.start()
+else:
+    # Attempt to load secrets and config at startup
+    _initialize()
+    _initialized = True
+
+
+def _track_tool(
+    tool_name: str, arguments: Optional[Dict[str, Any]] = None
+) -> ContextManager[Any]:
+    """Record latency, phase timings and the trace of an agent tool call."""
+    from sap_agent.sap_gw_connector.tools.base import tool_registry
+
+    return tool_registry.track(tool_name, arguments)
+
+
+def _session_scope(tool_context: Optional[ToolContext]) -> ContextManager[None]:
+    """Attribute the SAP requests of a tool call to its ADK session.
+
+    Requests waiting for the client-side rate limit are admitted in turns
+    across sessions, so one busy conversation cannot starve the others.
+    """
+    from sap_agent.sap_gw_connector.core.admission import session_scope
+
+    session_id = tool_context.session.id if tool_context is not None else None
+    return session_scope(session_id)
+
+
 def _transform_response(data: Dict[str, Any], output_format: str = "json_compact") -> Dict[str, Any]:
     """Transform OData response based on requested format.
 
@@ -227,35 +346,33 @@ def _transform_response(data: Dict[str, Any], output_format: str = "json_compact
     if not results:
         # Handle single entity response (no results array)
         if "d" in data and isinstance(data["d"], dict):
-            entity = data["d"]
-            clean_entity = {}
-            for key, value in entity.items():
-                # Skip metadata
-                if key == "__metadata":
-                    continue
-                # Skip deferred navigation links
-                if isinstance(value, dict) and "__deferred" in value:
-                    continue
-                clean_entity[key] = value
-            return {"result": clean_entity}
+            return {"result": _clean_entity(data["d"])}
         return data
 
     # Process results array
-    clean_results: List[Dict[str, Any]] = []
-    for item in results:
-        clean_item: Dict[str, Any] = {}
-        for key, value in item.items():
-            # Skip metadata
-            if key == "__metadata":
-                continue
+    clean_results: List[Dict[str, Any]] = [_clean_entity(item) for item in results]
+
+    return {"results": clean_results, "count": len(clean_results)}
+
+
+def _clean_entity(entity: Dict[str, Any]) -> Dict[str, Any]:
+    """Entity without __metadata and deferred navigation links."""
+    clean_entity: Dict[str, Any] = {}
+    for key, value in entity.items():
+        # Skip metadata
+        if key == "__metadata":
+            continue
+        if isinstance(value, dict):
             # Skip deferred navigation links
-            if isinstance(value, dict) and "__deferred" in value:
+            if "__deferred" in value:
                 continue
             # Keep expanded navigation properties (they have actual data)
-            clean_item[key] = value
-        clean_results.append(clean_item)
-
-    return {"results": clean_results, "count": len(clean_results)}
+            if isinstance(value.get("results"), list):
+                value = [_clean_entity(item) for item in value["results"]]
+            elif "__metadata" in value:
+                value = _clean_entity(value)
+        clean_entity[key] = value
+    return clean_entity
 
 
 # =============================================================================
@@ -269,42 +386,45 @@ def sap_list_services() -> Dict[str, Any]:
         Dictionary containing:
         - success: Boolean indicating operation success
         - count: Number of services found
-        - services: List of service configurations with id, name, path, version, description, and entities
+        - services: List of service configurations with id, name, path, version, description, system, and entities
         - source: Configuration source identifier
     """
     try:
-        from sap_agent.sap_gw_connector.config.loader import get_services_config
-
-        config_path = get_services_config_path()
-        services_config = get_services_config(config_path)
-
-        # Build service list with details
-        services = []
-        for service in services_config.services:
-            services.append(
-                {
-                    "id": service.id,
-                    "name": service.name,
-                    "path": service.path,
-                    "version": service.version,
-                    "description": service.description,
-                    "entities": [
-                        {
-                            "name": entity.name,
-                            "key_field": entity.key_field,
-                            "description": entity.description,
-                        }
-                        for entity in service.entities
-                    ],
-                }
-            )
+        with _track_tool("sap_list_services"):
+            _ensure_initialized()
+            from sap_agent.sap_gw_connector.config.loader import get_services_config
+
+            config_path = get_services_config_path()
+            services_config = get_services_config(config_path)
+
+            # Build service list with details
+            services = []
+            for service in services_config.services:
+                services.append(
+                    {
+                        "id": service.id,
+                        "name": service.name,
+                        "path": service.path,
+                        "version": service.version,
+                        "description": service.description,
+                        "system": service.system,
+                        "entities": [
+                            {
+                                "name": entity.name,
+                                "key_field": entity.key_field,
+                                "description": entity.description,
+                            }
+                            for entity in service.entities
+                        ],
+                    }
+                )
 
-        return {
-            "success": True,
-            "count": len(services),
-            "services": services,
-            "source": "services.yaml configuration",
-        }
+            return {
+                "success": True,
+                "count": len(services),
+                "services": services,
+                "source": "services.yaml configuration",
+            }
 
     except Exception as e:
         return {"success": False, "error": str(e)}
@@ -317,7 +437,9 @@ def sap_query(
     select: Optional[str] = None,
     top: Optional[int] = None,
     skip: Optional[int] = None,
-    format: str = "json_compact"
+    format: str = "json_compact",
+    expand: Optional[str] = None,
+    tool_context: Optional[ToolContext] = None,
 ) -> Dict[str, Any]:
     """Query SAP OData service entity sets with optional filters.
 
@@ -325,62 +447,92 @@ def sap_query(
         service: OData service name (e.g., 'sales_order')
         entity_set: Entity set name to query (e.g., 'zsd004Set')
         filter: OData filter expression (optional, e.g., "Status eq 'OPEN'")
-        select: Comma-separated list of fields to select (optional)
-        top: Maximum number of records to return (optional)
+        select: Comma-separated list of fields to select (optional, defaults to the
+            entity's default fields)
+        top: Maximum number of records to return (optional, capped at SAP_QUERY_MAX_TOP)
         skip: Number of records to skip for pagination (optional)
         format: Output format - 'json' for raw OData response, 'json_compact' removes metadata (default)
+        expand: Comma-separated navigation properties to return with each record
+            (optional, e.g., 'ToItems' for orders with their items)
 
     Returns:
-        Dictionary containing query results with 'results' array and 'count',
-        or error information if the query fails
+        Dictionary containing query results with 'results' array and 'count'
+        and the 'plan' used to answer the query, or error information if the
+        query fails
     """
     try:
-        # Ensure SAP credentials are loaded from Secret Manager
-        ensure_sap_config()
-
-        from sap_agent.sap_gw_connector.config.settings import get_config
-        from sap_agent.sap_gw_connector.config.loader import get_services_config
-        from sap_agent.sap_gw_connector.core.sap_client import SAPClient
-
-        # Get SAP connection configuration
-        config = get_config(require_sap=True)
-        sap_config = config.sap
+        with _track_tool("sap_query", {
+            "service": service,
+            "entity_set": entity_set,
+            "filter": filter,
+            "select": select,
+            "top": top,
+            "skip": skip,
+            "format": format,
+            "expand": expand,
+        }):
+            # Ensure SAP credentials are loaded from Secret Manager
+            ensure_sap_config()
+
+            from sap_agent.sap_gw_connector.config.loader import get_services_config
+            from sap_agent.sap_gw_connector.core.sap_client import SAPClient
+
+            config_path = get_services_config_path()
+            services_config = get_services_config(config_path)
+
+            # Find service path
+            service_info = services_config.get_service(service)
+            if not service_info:
+                available = services_config.list_service_ids()
+                return {
+                    "success": False,
+                    "error": f"Service '{service}' not found. Available: {', '.join(available)}"
+                }
 
-        config_path = get_services_config_path()
-        services_config = get_services_config(config_path)
+            select_fields = select.split(",") if select else None
 
-        # Find service path
-        service_info = services_config.get_service(service)
-        if not service_info:
-            available = services_config.list_service_ids()
-            return {
-                "success": False,
-                "error": f"Service '{service}' not found. Available: {', '.join(available)}"
-            }
-        service_path = service_info.path
-
-        # Build query parameters
-        filters = {"$filter": filter} if filter else None
-        select_fields = select.split(",") if select else None
-
-        # Execute query using async wrapper
-        async def _execute_query():
-            async with SAPClient(config=sap_config) as client:
-                result = await client.query_entity_set(
-                    service_path=service_path,
-                    entity_set=entity_set,
-                    filters=filters,
-                    select_fields=select_fields,
-                    top=top,
-                    skip=skip,
+            # Execute query using async wrapper, after planning it (default
+            # $select, $top limit, key reads, cache, $expand); replicated
+            # master data is served locally when the filter is simple
+            async def _execute_query() -> Tuple[Dict[str, Any], "QueryPlan"]:
+                from sap_agent.sap_gw_connector.core.query_planner import (
+                    execute_plan,
+                    plan_query,
                 )
-                return result
-
-        # Run async function
-        result = asyncio.get_event_loop().run_until_complete(_execute_query())
-
-        # Transform response based on format
-        return _transform_response(result, format)
+                from sap_agent.sap_gw_connector.replica.reads import read_query
+
+                async with SAPClient.for_service(service_info) as client:
+                    plan = plan_query(
+                        service_info, entity_set, filter, select_fields, top, skip,
+                        client.config.query_max_top, expand,
+                    )
+                    result = None
+                    if not plan.expand:
+                        result = await read_query(
+                            service_info, entity_set, plan.filter, plan.select, plan.top, plan.skip
+                        )
+                    if result is not None:
+                        plan.strategy = "replica"
+                    else:
+                        result = await execute_plan(client, plan)
+                    return result, plan
+
+            # Run async function
+            with _session_scope(tool_context):
+                result, plan = asyncio.get_event_loop().run_until_complete(_execute_query())
+
+            # Transform response based on format
+            from sap_agent.sap_gw_connector.observability.stats import measure_phase
+            from sap_agent.sap_gw_connector.observability.tracing import start_span
+
+            with start_span(
+                "sap.transform", {"sap.output_format": format}
+            ), measure_phase("transform"):
+                response = _transform_response(result, format)
+            if plan.strategy == "replica" and format != "json":
+                response["source"] = "replica"
+            response["plan"] = plan.explain()
+            return response
 
     except Exception as e:
         return {"success": False, "error": str(e)}
@@ -390,15 +542,20 @@ def sap_get_entity(
     service: str,
     entity_set: str,
     entity_key: str,
-    select: Optional[str] = None
+    select: Optional[str] = None,
+    expand: Optional[str] = None,
+    tool_context: Optional[ToolContext] = None,
 ) -> Dict[str, Any]:
     """Retrieve a single entity from SAP OData service by key.
 
     Args:
         service: OData service name (e.g., 'sales_order')
         entity_set: Entity set name (e.g., 'zsd004Set')
-        entity_key: Entity key value (e.g., '91000092' for OrderID)
+        entity_key: Entity key value (e.g., '91000092' for OrderID); for composite
+            keys name each property (e.g., "Ebeln='4500000010',Ebelp='00010'")
         select: Comma-separated list of fields to select (optional)
+        expand: Comma-separated navigation properties to return with the
+            entity (optional, e.g., 'ToItems')
 
     Returns:
         Dictionary containing:
@@ -410,71 +567,208 @@ def sap_get_entity(
         - error: Error message if operation failed
     """
     try:
-        # Ensure SAP credentials are loaded from Secret Manager
-        ensure_sap_config()
+        with _track_tool("sap_get_entity", {
+            "service": service,
+            "entity_set": entity_set,
+            "entity_key": entity_key,
+            "select": select,
+            "expand": expand,
+        }):
+            # Ensure SAP credentials are loaded from Secret Manager
+            ensure_sap_config()
+
+            from sap_agent.sap_gw_connector.config.loader import get_services_config
+            from sap_agent.sap_gw_connector.core.sap_client import SAPClient
+
+            config_path = get_services_config_path()
+            services_config = get_services_config(config_path)
+
+            # Validate service exists
+            service_config = services_config.get_service(service)
+            if not service_config:
+                available_services = services_config.list_service_ids()
+                return {
+                    "success": False,
+                    "error": f"Service '{service}' not found. Available: {', '.join(available_services)}",
+                }
 
-        from sap_agent.sap_gw_connector.config.settings import get_config
-        from sap_agent.sap_gw_connector.config.loader import get_services_config
-        from sap_agent.sap_gw_connector.core.sap_client import SAPClient
+            # Validate entity exists in service
+            entity_config = service_config.get_entity(entity_set)
+            if not entity_config:
+                available_entities = [e.name for e in service_config.entities]
+                return {
+                    "success": False,
+                    "error": f"Entity set '{entity_set}' not found in service '{service}'. "
+                             f"Available: {', '.join(available_entities)}",
+                }
 
-        config = get_config(require_sap=True)
+            # Use service path from configuration
+            service_path = service_config.path
 
-        config_path = get_services_config_path()
-        services_config = get_services_config(config_path)
+            # Parse select fields if provided
+            select_fields = None
+            if select:
+                select_fields = [f.strip() for f in select.split(",")]
+
+            async def _execute_get() -> Dict[str, Any]:
+                from sap_agent.sap_gw_connector.core.expand import (
+                    expand_paths,
+                    get_expanded,
+                )
+                from sap_agent.sap_gw_connector.replica.reads import read_entity
+
+                # Replicated master data is served locally (without navigations)
+                cached = None
+                if not expand:
+                    cached = await read_entity(service_config, entity_set, entity_key, select_fields)
+                if cached is not None:
+                    return {
+                        "success": True,
+                        "service": service,
+                        "entity_set": entity_set,
+                        "entity_key": entity_key,
+                        "key_field": entity_config.key_field,
+                        "data": cached,
+                        "source": "replica",
+                    }
+
+                async with SAPClient.for_service(service_config) as client:
+                    # Authenticate first
+                    auth_success = await client.authenticate()
+                    if not auth_success:
+                        return {"success": False, "error": "Authentication failed"}
+
+                    # Get entity by key, with its navigations inline or
+                    # fetched with $batch where the service does not expand them
+                    paths = await expand_paths(client, service_config, entity_set, expand)
+                    if paths:
+                        result, _ = await get_expanded(
+                            client, service_config, entity_set, entity_key, paths, select_fields
+                        )
+                    else:
+                        result = await client.get_entity(
+                            service_path=service_path,
+                            entity_set=entity_set,
+                            entity_key=entity_key,
+                            select_fields=select_fields,
+                        )
+
+                    return {
+                        "success": True,
+                        "service": service,
+                        "entity_set": entity_set,
+                        "entity_key": entity_key,
+                        "key_field": entity_config.key_field,
+                        "data": result,
+                    }
+
+            # Run async function
+            with _session_scope(tool_context):
+                return asyncio.get_event_loop().run_until_complete(_execute_get())
+
+    except Exception as e:
+        return {"success": False, "error": str(e)}
 
-        # Validate service exists
-        service_config = services_config.get_service(service)
-        if not service_config:
-            available_services = services_config.list_service_ids()
-            return {
-                "success": False,
-                "error": f"Service '{service}' not found. Available: {', '.join(available_services)}",
-            }
 
-        # Validate entity exists in service
-        entity_config = service_config.get_entity(entity_set)
-        if not entity_config:
-            available_entities = [e.name for e in service_config.entities]
+def sap_multi_query(
+    reads: List[Dict[str, Any]],
+    max_parallel: Optional[int] = None,
+    tool_context: Optional[ToolContext] = None,
+) -> Dict[str, Any]:
+    """Run several independent SAP reads concurrently in one call.
+
+    Use it instead of consecutive sap_query / sap_get_entity calls when the
+    reads do not depend on each other (e.g., an order, its customer and the
+    stock of its material).
+
+    Args:
+        reads: Reads to run (at most 20). Each is a dictionary with 'service',
+            'entity_set' and either 'entity_key' (read by key, like
+            sap_get_entity) or optional 'filter', 'top' and 'skip' (query, like
+            sap_query); optional 'select', 'expand', 'format' and an 'id' naming
+            the read in the results
+        max_parallel: Reads in flight at once per SAP system (optional)
+
+    Returns:
+        Dictionary containing:
+        - success: True if every read succeeded
+        - total, succeeded, failed: Number of reads
+        - results: One result per read, in order, with its id, success and
+          the data (or error) as sap_query or sap_get_entity would return it
+    """
+    try:
+        with _track_tool("sap_multi_query", {"reads": reads, "max_parallel": max_parallel}):
+            # Ensure SAP credentials are loaded from Secret Manager
+            ensure_sap_config()
+
+            from sap_agent.sap_gw_connector.config.loader import get_services_config
+            from sap_agent.sap_gw_connector.core.multi_query import (
+                parse_reads,
+                run_reads,
+            )
+
+            services_config = get_services_config(get_services_config_path())
+            specs = parse_reads(reads or [])
+
+            # Run the reads concurrently, one SAP client per system
+            with _session_scope(tool_context):
+                results = asyncio.get_event_loop().run_until_complete(
+                    run_reads(services_config, specs, max_parallel)
+                )
+
+            failed = sum(1 for result in results if not result.success)
             return {
-                "success": False,
-                "error": f"Entity set '{entity_set}' not found in service '{service}'. "
-                         f"Available: {', '.join(available_entities)}",
+                "success": not failed,
+                "total": len(results),
+                "succeeded": len(results) - failed,
+                "failed": failed,
+                "results": [result.to_dict(_transform_response) for result in results],
             }
 
-        # Use service path from configuration
-        service_path = service_config.path
-
-        # Parse select fields if provided
-        select_fields = None
-        if select:
-            select_fields = [f.strip() for f in select.split(",")]
-
-        async def _execute_get():
-            async with SAPClient(config.sap) as client:
-                # Authenticate first
-                auth_success = await client.authenticate()
-                if not auth_success:
-                    return {"success": False, "error": "Authentication failed"}
-
-                # Get entity by key
-                result = await client.get_entity(
-                    service_path=service_path,
-                    entity_set=entity_set,
-                    entity_key=entity_key,
-                    select_fields=select_fields,
-                )
+    except Exception as e:
+        return {"success": False, "error": str(e)}
+
+
+def sap_stats(tool: Optional[str] = None) -> Dict[str, Any]:
+    """Report latency statistics for the SAP tools in this agent process.
+
+    Args:
+        tool: Only report statistics for this tool name (optional)
 
+    Returns:
+        Dictionary containing:
+        - success: Boolean indicating operation success
+        - statistics: Per-tool call count, error rate, p50/p95/p99 latency and
+          per-phase timings (auth, network, download, parse, transform)
+        - circuit_breakers: State of the per-host and per-service circuit breakers
+        - admission: Requests in flight and queued behind the client-side rate limit
+        - load_balancers: Health, load and latency of each SAP application server
+    """
+    try:
+        from sap_agent.sap_gw_connector.core.admission import get_admission_states
+        from sap_agent.sap_gw_connector.core.circuit_breaker import get_circuit_states
+        from sap_agent.sap_gw_connector.core.load_balancer import (
+            get_load_balancer_states,
+        )
+        from sap_agent.sap_gw_connector.tools.base import tool_registry
+
+        statistics = tool_registry.get_statistics()
+        if tool:
+            if tool not in statistics:
                 return {
-                    "success": True,
-                    "service": service,
-                    "entity_set": entity_set,
-                    "entity_key": entity_key,
-                    "key_field": entity_config.key_field,
-                    "data": result,
+                    "success": False,
+                    "error": f"No statistics for tool '{tool}'. "
+                             f"Available: {', '.join(statistics)}",
                 }
+            statistics = {tool: statistics[tool]}
 
-        # Run async function
-        return asyncio.get_event_loop().run_until_complete(_execute_get())
+        return {
+            "success": True,
+            "statistics": statistics,
+            "circuit_breakers": get_circuit_states(),
+            "admission": get_admission_states(),
+            "load_balancers": get_load_balancer_states(),
+        }
 
     except Exception as e:
         return {"success": False, "error": str(e)}
@@ -491,6 +785,8 @@ You have access to SAP OData tools that enable integration. Use these tools to:
 - Query SAP data via OData services using sap_query
 - List available SAP entity sets and services using sap_list_services
 - Retrieve specific entities by key using sap_get_entity
+- Run several independent reads at once using sap_multi_query
+- Report tool latency statistics using sap_stats (only when the user asks about performance)
 - Help users understand SAP entity structures and relationships
 
 ## Guidelines
@@ -498,7 +794,8 @@ You have access to SAP OData tools that enable integration. Use these tools to:
 2. Use sap_list_services to discover available services and their entities
 3. Use sap_query for searching/filtering multiple records
 4. Use sap_get_entity for retrieving a specific record by its key
-5. Present data in a clear, formatted manner
+5. When you need several reads that do not depend on each other's results, send them together in one sap_multi_query call instead of one call each
+6. Present data in a clear, formatted manner
 
 ## Response Format
 - Always explain what data you're retrieving before executing queries
@@ -510,8 +807,67 @@ You have access to SAP OData tools that enable integration. Use these tools to:
 - If authentication fails, suggest checking SAP credentials
 - If a service is not found, use sap_list_services to show available services
 - If a query returns no data, suggest alternative filters or entities
+- If an error says an SAP circuit is open, the system is failing; tell the user and do not retry immediately
+- If an error says a request was not admitted because of the rate limit, SAP is busy; wait before issuing more queries
 '''
 
+# Longest service catalog added to the instruction; the rest is left to sap_list_services
+SERVICE_CATALOG_MAX_CHARS = 4000
+
+_service_catalog: Optional[str] = None
+
+
+def build_service_catalog(max_chars: int = SERVICE_CATALOG_MAX_CHARS) -> str:
+    """Compact catalog of the services in services.yaml, one line per service.
+
+    Each line reads `- SERVICE_ID (version, description): EntitySet(key_field)
+    [navigations], ...`.
+    """
+    from sap_agent.sap_gw_connector.config.loader import get_services_config
+
+    services_config = get_services_config(get_services_config_path())
+    lines: List[str] = []
+    for service in services_config.services:
+        entities = ", ".join(
+            f"{entity.name}({entity.key_field})"
+            + (f" [{', '.join(entity.navigations)}]" if entity.navigations else "")
+            for entity in service.entities
+        )
+        about = f"{service.version}, {service.description}" if service.description else service.version
+        lines.append(f"- {service.id} ({about}): {entities}")
+
+    catalog: List[str] = []
+    size = 0
+    for line in lines:
+        if size + len(line) > max_chars:
+            catalog.append(f"- ... {len(lines) - len(catalog)} more services (see sap_list_services)")
+            break
+        catalog.append(line)
+        size += len(line) + 1
+    return "\n".join(catalog)
+
+
+def agent_instruction(context: Optional[ReadonlyContext] = None) -> str:
+    """AGENT_INSTRUCTION with the service catalog, built once per process."""
+    global _service_catalog
+    if _service_catalog is None:
+        try:
+            _ensure_initialized()
+            _service_catalog = build_service_catalog()
+        except Exception as e:
+            print(f"Warning: Could not build the SAP service catalog: {e}")
+            _service_catalog = ""
+    if not _service_catalog:
+        return AGENT_INSTRUCTION
+    return (
+        AGENT_INSTRUCTION
+        + "\n## Available Services\n"
+        + "Service id (OData version, description): entity sets with their (key field) "
+        + "and [navigations]. Use sap_list_services only for details not listed here.\n"
+        + _service_catalog
+        + "\n"
+    )
+
 
 # =============================================================================
 # Root Agent Definition
@@ -521,11 +877,14 @@ root_agent = Agent(
     model=MODEL_NAME,
     name='sap_agent',
     description='SAP Gateway integration agent for OData queries and operations',
-    instruction=AGENT_INSTRUCTION,
+    # The catalog is built on the first model request, not at import
+    instruction=agent_instruction if SERVICE_CATALOG else AGENT_INSTRUCTION,
     tools=[
         sap_list_services,
         sap_query,
         sap_get_entity,
+        sap_multi_query,
+        sap_stats,
     ],
 )
 
@@ -538,11 +897,21 @@ def get_agent_config() -> dict:
     """Get current agent configuration for debugging/logging."""
     return {
         "model": MODEL_NAME,
-        "tools": ["sap_list_services", "sap_query", "sap_get_entity"],
+        "tools": ["sap_list_services", "sap_query", "sap_get_entity", "sap_multi_query", "sap_stats"],
         "deployment_mode": "direct_functions",
+        "service_catalog": SERVICE_CATALOG,
     }
 
 
+def dump_metrics(fmt: str = "prometheus") -> Any:
+    """Dump connector metrics ('prometheus' text or 'json' dict) for debugging/logging."""
+    from sap_agent.sap_gw_connector.observability.metrics import (
+        dump_metrics as _dump_metrics,
+    )
+
+    return _dump_metrics(fmt)
+
+
 if __name__ == "__main__":
     # Print configuration for debugging
     config = get_agent_config()
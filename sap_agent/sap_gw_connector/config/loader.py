@@ -46,9 +46,18 @@ class ServicesConfigLoader:
 
         # Determine config file path
         if self.config_path is None:
-            # Default location: config/services.yaml relative to package
             package_dir = Path(__file__).parent.parent
-            self.config_path = package_dir.parent.parent / "config" / "services.yaml"
+            candidates = [
+                # Uploaded with the agent (Agent Engine)
+                Path.cwd() / "agent_config" / "services.yaml",
+                # Next to the agent module (local development)
+                package_dir.parent / "services.yaml",
+                # config/services.yaml relative to the project
+                package_dir.parent.parent / "config" / "services.yaml",
+            ]
+            self.config_path = next(
+                (path for path in candidates if path.exists()), candidates[-1]
+            )
 
         # Check for services.yaml embedded in the package (for Agent Engine deployment)
         if not self.config_path.exists():
@@ -1,10 +1,48 @@
 """Pydantic models for SAP service configuration from YAML"""
 
+import re
 from typing import Dict, List, Optional
 
 from pydantic import BaseModel, Field, field_validator
 
 
+_PROPERTY_NAME_PATTERN = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
+
+class ReplicaConfig(BaseModel):
+    """Local replica of an entity set, for master data that rarely changes"""
+
+    refresh_interval: float = Field(3600.0, description="Seconds between syncs from SAP")
+    max_staleness: Optional[float] = Field(
+        None,
+        description="Serve reads from the replica only if synced within this many "
+        "seconds (default: twice refresh_interval)",
+    )
+    indexes: List[str] = Field(
+        default_factory=list,
+        description="Properties indexed for sap_query filters (the key is always indexed)",
+    )
+
+    @field_validator("refresh_interval")
+    @classmethod
+    def validate_refresh_interval(cls, v: float) -> float:
+        if v <= 0:
+            raise ValueError("refresh_interval must be positive")
+        return v
+
+    @field_validator("indexes")
+    @classmethod
+    def validate_indexes(cls, v: List[str]) -> List[str]:
+        for name in v:
+            if not _PROPERTY_NAME_PATTERN.match(name):
+                raise ValueError(f"Invalid property name in indexes: {name!r}")
+        return v
+
+    @property
+    def staleness_limit(self) -> float:
+        return self.max_staleness if self.max_staleness is not None else 2 * self.refresh_interval
+
+
 class EntityConfig(BaseModel):
     """Configuration for an OData entity set"""
 
@@ -17,6 +55,14 @@ class EntityConfig(BaseModel):
     default_select: Optional[List[str]] = Field(
         None, description="Default fields to select"
     )
+    change_field: Optional[str] = Field(
+        None,
+        description="Change date/time property for incremental sync when the "
+        "service has no delta links",
+    )
+    replica: Optional[ReplicaConfig] = Field(
+        None, description="Serve reads from a local replica refreshed on a schedule"
+    )
 
     @field_validator("name")
     @classmethod
@@ -40,6 +86,9 @@ class ServiceConfig(BaseModel):
         default_factory=dict, description="Custom HTTP headers for this service"
     )
     description: Optional[str] = Field(None, description="Service description")
+    system: Optional[str] = Field(
+        None, description="ID of the SAP system serving this service (default system if unset)"
+    )
 
     @field_validator("version")
     @classmethod
@@ -104,6 +153,69 @@ class AuthEndpointConfig(BaseModel):
         return "/sap/opu/odata/IWFND/CATALOGSERVICE;v=2/$metadata"
 
 
+class ServerConfig(BaseModel):
+    """An application server of an SAP system"""
+
+    host: str = Field(..., description="Application server hostname")
+    port: Optional[int] = Field(None, description="Port (defaults to the system port)")
+
+
+class SystemConfig(BaseModel):
+    """Connection profile for an SAP system (e.g. DEV, QAS, PRD)
+
+    Settings left unset here, and always the credentials, are read from
+    environment variables prefixed with `env_prefix` (SAP_<ID>_ by default).
+    """
+
+    id: str = Field(..., description="System identifier (e.g., PRD)")
+    description: Optional[str] = Field(None, description="System description")
+    servers: List[ServerConfig] = Field(
+        default_factory=list,
+        description="Application servers (defaults to SAP_<ID>_HOSTS or SAP_<ID>_HOST)",
+    )
+    port: Optional[int] = Field(None, description="Default port of the servers")
+    scheme: Optional[str] = Field(None, description="URL scheme (http or https)")
+    client: Optional[str] = Field(None, description="SAP client number")
+    verify_ssl: Optional[bool] = Field(None, description="Verify SSL certificates")
+    env_prefix: Optional[str] = Field(
+        None, description="Environment variable prefix (default SAP_<ID>_)"
+    )
+    load_balancing: str = Field(
+        "least_outstanding",
+        description="Server selection: least_outstanding or latency_weighted",
+    )
+    pool_size: Optional[int] = Field(
+        None, description="Connections per server (default SAP_<ID>_POOL_SIZE or 10)"
+    )
+    health_check_path: str = Field(
+        "/sap/public/ping", description="Path probed to check a server is up"
+    )
+    health_check_interval: float = Field(
+        30.0, description="Seconds before a failed server is probed again"
+    )
+
+    @field_validator("id")
+    @classmethod
+    def validate_id(cls, v: str) -> str:
+        if not v or not v.strip():
+            raise ValueError("System ID cannot be empty")
+        return v.strip()
+
+    @field_validator("load_balancing")
+    @classmethod
+    def validate_load_balancing(cls, v: str) -> str:
+        if v not in ["least_outstanding", "latency_weighted"]:
+            raise ValueError("load_balancing must be least_outstanding or latency_weighted")
+        return v
+
+    @field_validator("pool_size")
+    @classmethod
+    def validate_pool_size(cls, v: Optional[int]) -> Optional[int]:
+        if v is not None and v < 1:
+            raise ValueError("pool_size must be at least 1")
+        return v
+
+
 class GatewayConfig(BaseModel):
     """Configuration for SAP Gateway URL patterns"""
 
@@ -140,6 +252,12 @@ class ServicesYAMLConfig(BaseModel):
     services: List[ServiceConfig] = Field(
         default_factory=list, description="List of SAP OData services"
     )
+    systems: List[SystemConfig] = Field(
+        default_factory=list, description="SAP system connection profiles"
+    )
+    default_system: Optional[str] = Field(
+        None, description="System used by services without a system"
+    )
 
     def get_service(self, service_id: str) -> Optional[ServiceConfig]:
         """Get service configuration by ID"""
@@ -148,6 +266,13 @@ class ServicesYAMLConfig(BaseModel):
                 return service
         return None
 
+    def get_system(self, system_id: str) -> Optional[SystemConfig]:
+        """Get system configuration by ID"""
+        for system in self.systems:
+            if system.id == system_id:
+                return system
+        return None
+
     def list_service_ids(self) -> List[str]:
         """Get list of all service IDs"""
         return [service.id for service in self.services]
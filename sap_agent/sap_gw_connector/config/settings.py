@@ -4,7 +4,7 @@ import os
 from pathlib import Path
 from typing import Optional
 
-from pydantic import Field, field_validator
+from pydantic import Field, PrivateAttr, field_validator
 from pydantic_settings import BaseSettings
 
 
@@ -13,6 +13,9 @@ class SAPConnectionConfig(BaseSettings):
 
     host: str = Field(..., description="SAP server hostname")
     port: int = Field(44300, description="SAP server port")
+    scheme: str = Field(
+        "https", description="URL scheme (use http only for local test gateways)"
+    )
     client: str = Field("100", description="SAP client number")
     username: str = Field(..., description="SAP username")
     password: str = Field(..., description="SAP password")
@@ -21,6 +24,75 @@ class SAPConnectionConfig(BaseSettings):
     )
     timeout: int = Field(30, description="Request timeout in seconds")
     retry_attempts: int = Field(3, description="Number of retry attempts")
+    retry_backoff_base: float = Field(
+        0.2, description="Base delay in seconds for full-jitter exponential backoff"
+    )
+    retry_backoff_max: float = Field(
+        10.0, description="Upper bound in seconds for a single backoff delay"
+    )
+    retry_after_max: float = Field(
+        30.0, description="Longest Retry-After in seconds to wait; longer fails fast"
+    )
+    retry_budget_ratio: float = Field(
+        0.2, description="Retries allowed per host as a fraction of recent requests"
+    )
+    circuit_failure_threshold: int = Field(
+        5, description="Consecutive failures that open a circuit (0 disables)"
+    )
+    circuit_reset_timeout: float = Field(
+        30.0, description="Seconds an open circuit fails fast before probing"
+    )
+    circuit_half_open_probes: int = Field(
+        1, description="Concurrent probe requests allowed in the half-open state"
+    )
+    hedge_after: float = Field(
+        0.0,
+        description="Send a second GET if the first is slower than this many seconds "
+        "(0 disables hedging)",
+    )
+    coalesce_reads: bool = Field(
+        True,
+        description="Share one request and parsed result between identical "
+        "concurrent GETs",
+    )
+    query_max_top: int = Field(
+        1000,
+        description="Largest $top sent for an entity set query; queries without "
+        "$top get this one (0 disables the limit)",
+    )
+    query_cache_ttl: float = Field(
+        30.0,
+        description="Seconds complete query results are kept to answer narrower "
+        "queries locally (0 disables)",
+    )
+    compression: bool = Field(
+        True,
+        description="Ask for gzip/deflate compressed responses (and br when Brotli "
+        "is installed)",
+    )
+    pool_size: int = Field(10, description="Connections per SAP application server")
+    batch_size: int = Field(
+        100, description="Operations per $batch changeset in bulk writes"
+    )
+    batch_parallelism: int = Field(
+        4, description="$batch requests a bulk write keeps in flight at once"
+    )
+    multi_query_parallelism: int = Field(
+        4, description="Reads sap_multi_query keeps in flight at once per SAP system"
+    )
+    keepalive_timeout: float = Field(
+        55.0,
+        description="Seconds idle connections stay open for reuse (keep below the "
+        "ICM keep-alive timeout, 60s by default)",
+    )
+    dns_cache_ttl: float = Field(
+        300.0, description="Seconds resolved SAP host addresses are cached (0 disables)"
+    )
+    http2: bool = Field(
+        False,
+        description="Send requests over HTTP/2 where the gateway offers it "
+        "(needs httpx[http2]; falls back to HTTP/1.1)",
+    )
 
     model_config = {"env_prefix": "SAP_"}
 
@@ -38,6 +110,33 @@ class SAPConnectionConfig(BaseSettings):
             raise ValueError("Port must be between 1 and 65535")
         return v
 
+    @field_validator(
+        "retry_backoff_base", "retry_backoff_max", "retry_after_max",
+        "retry_budget_ratio", "hedge_after", "keepalive_timeout", "dns_cache_ttl",
+    )
+    @classmethod
+    def validate_non_negative(cls, v: float) -> float:
+        if v < 0:
+            raise ValueError("Retry, hedging and connection settings cannot be negative")
+        return v
+
+    @field_validator("scheme")
+    @classmethod
+    def validate_scheme(cls, v: str) -> str:
+        if v.lower() not in ["http", "https"]:
+            raise ValueError("Scheme must be http or https")
+        return v.lower()
+
+    @field_validator("pool_size", "batch_size", "batch_parallelism", "multi_query_parallelism")
+    @classmethod
+    def validate_pool_size(cls, v: int) -> int:
+        if v < 1:
+            raise ValueError(
+                "pool_size, batch_size, batch_parallelism and multi_query_parallelism "
+                "must be at least 1"
+            )
+        return v
+
 
 class GWServerConfig(BaseSettings):
     """Gateway server configuration"""
@@ -51,6 +150,12 @@ class GWServerConfig(BaseSettings):
     services_config_path: Optional[str] = Field(
         None, description="Path to services YAML configuration file"
     )
+    warm_up: bool = Field(
+        True, description="Resolve and connect to the SAP systems at startup"
+    )
+    replica_path: str = Field(
+        "sap_replica.db", description="SQLite file holding local entity set replicas"
+    )
 
     model_config = {"env_prefix": "SAP_GW_"}
 
@@ -67,8 +172,21 @@ class SecurityConfig(BaseSettings):
     """Security configuration"""
 
     session_timeout: int = Field(3600, description="Session timeout in seconds")
-    max_concurrent_sessions: int = Field(100, description="Maximum concurrent sessions")
-    rate_limit_per_minute: int = Field(60, description="Rate limit per minute")
+    max_concurrent_sessions: int = Field(
+        100, description="Maximum concurrent SAP requests (and sessions) per host (0 disables)"
+    )
+    rate_limit_per_minute: int = Field(
+        60, description="SAP requests per minute per host and user (0 disables)"
+    )
+    rate_limit_burst: int = Field(
+        10, description="SAP requests allowed at once before the rate limit applies"
+    )
+    service_rate_limit_per_minute: int = Field(
+        0, description="SAP requests per minute per OData service (0 disables)"
+    )
+    queue_timeout: float = Field(
+        30.0, description="Seconds a request may wait for admission before failing"
+    )
     encryption_key: Optional[str] = Field(
         None, description="Encryption key for sensitive data"
     )
@@ -82,6 +200,16 @@ class SecurityConfig(BaseSettings):
             raise ValueError("Session timeout must be positive")
         return v
 
+    @field_validator(
+        "max_concurrent_sessions", "rate_limit_per_minute", "rate_limit_burst",
+        "service_rate_limit_per_minute", "queue_timeout",
+    )
+    @classmethod
+    def validate_non_negative(cls, v: float) -> float:
+        if v < 0:
+            raise ValueError("Rate limit and admission settings cannot be negative")
+        return v
+
 
 class AppConfig(BaseSettings):
     """Main application configuration"""
@@ -91,6 +219,9 @@ class AppConfig(BaseSettings):
     server: GWServerConfig
     security: SecurityConfig
 
+    # Whether `sap` holds development placeholders (SAP settings missing)
+    _sap_placeholder: bool = PrivateAttr(default=False)
+
     model_config = {
         "env_file": ".env",
         "env_nested_delimiter": "__",
@@ -102,6 +233,7 @@ class AppConfig(BaseSettings):
     def load_from_env(cls, require_sap: bool = True) -> "AppConfig":
         """Load configuration from environment variables"""
         # Try to load SAP config, use defaults if not available and not required
+        placeholder = False
         try:
             sap_config = SAPConnectionConfig()  # type: ignore[call-arg]
         except Exception as e:
@@ -111,12 +243,20 @@ class AppConfig(BaseSettings):
             sap_config = SAPConnectionConfig(  # type: ignore[call-arg]
                 host="localhost", username="test", password="test"
             )
+            placeholder = True
 
-        return cls(
+        app_config = cls(
             sap=sap_config,
             server=GWServerConfig(),  # type: ignore[call-arg]
             security=SecurityConfig(),  # type: ignore[call-arg]
         )
+        app_config._sap_placeholder = placeholder
+        return app_config
+
+    @property
+    def sap_configured(self) -> bool:
+        """False when `sap` is the development placeholder, not real settings"""
+        return not self._sap_placeholder
 
     def validate_required_env_vars(self) -> None:
         """Validate that all required environment variables are set"""
@@ -0,0 +1,172 @@
+"""SAP system connection profiles
+
+A system (DEV, QAS, PRD, ...) is one SAP client reachable through one or
+more application servers. Profiles come from the `systems` section of
+services.yaml and from the environment:
+
+    default_system: PRD
+    systems:
+      - id: PRD
+        servers:
+          - host: sapprd-app1
+          - host: sapprd-app2
+        port: 44300
+        load_balancing: latency_weighted
+      - id: QAS
+    services:
+      - id: Z_SALES_ORDER_GENAI_SRV
+        system: QAS
+
+Settings not given in YAML, and always the credentials, are read from
+environment variables prefixed SAP_<ID>_ (SAP_QAS_HOST, SAP_QAS_USERNAME,
+SAP_QAS_PASSWORD, ...). SAP_<ID>_HOSTS lists servers as comma-separated
+host[:port]. SAP_SYSTEMS=DEV,QAS declares systems configured only in the
+environment.
+
+Services without a system use `default_system`, or the "default" system
+built from the application's SAP connection settings: the plain SAP_*
+variables, or the arguments the stdio server was started with (SAP_HOSTS
+adds application servers).
+"""
+
+import os
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+from pydantic import ValidationError
+
+from .loader import ServiceConfigurationError, get_services_config
+from .schemas import ServiceConfig, ServicesYAMLConfig, SystemConfig
+from .settings import SAPConnectionConfig, get_config, get_services_config_path
+
+DEFAULT_SYSTEM = "default"
+
+
+@dataclass
+class SystemProfile:
+    """Resolved connection profile of one SAP system"""
+
+    id: str
+    connection: SAPConnectionConfig
+    servers: List[Tuple[str, int]]
+    load_balancing: str = "least_outstanding"
+    health_check_path: str = "/sap/public/ping"
+    health_check_interval: float = 30.0
+    description: Optional[str] = None
+
+
+def _env_system_ids() -> List[str]:
+    value = os.getenv("SAP_SYSTEMS", "")
+    return [system_id.strip() for system_id in value.split(",") if system_id.strip()]
+
+
+def _parse_hosts(value: str) -> List[Tuple[str, Optional[int]]]:
+    """Parse comma-separated host[:port] entries
+
+    Example:
+        >>> _parse_hosts("app1:44300, app2")
+        [('app1', 44300), ('app2', None)]
+    """
+    servers: List[Tuple[str, Optional[int]]] = []
+    for entry in value.split(","):
+        entry = entry.strip()
+        if not entry:
+            continue
+        host, _, port = entry.rpartition(":") if ":" in entry else (entry, "", "")
+        servers.append((host, int(port) if port else None))
+    return servers
+
+
+def list_system_ids(services_config: Optional[ServicesYAMLConfig] = None) -> List[str]:
+    """IDs of all configured systems, including the default system"""
+    services_config = services_config or get_services_config(get_services_config_path())
+    system_ids = [system.id for system in services_config.systems]
+    system_ids += [system_id for system_id in _env_system_ids() if system_id not in system_ids]
+    default = services_config.default_system or DEFAULT_SYSTEM
+    if default not in system_ids:
+        system_ids.insert(0, default)
+    return system_ids
+
+
+def get_system_profile(
+    system_id: Optional[str] = None,
+    services_config: Optional[ServicesYAMLConfig] = None,
+) -> SystemProfile:
+    """Resolve the connection profile of a system (the default system if None)
+
+    Raises:
+        ServiceConfigurationError: If the system is unknown or its
+            connection settings are incomplete
+    """
+    services_config = services_config or get_services_config(get_services_config_path())
+    system_id = system_id or services_config.default_system or DEFAULT_SYSTEM
+    system = services_config.get_system(system_id)
+    if system is None:
+        if system_id != DEFAULT_SYSTEM and system_id not in _env_system_ids():
+            raise ServiceConfigurationError(
+                f"Unknown SAP system '{system_id}'. "
+                f"Available: {', '.join(list_system_ids(services_config))}"
+            )
+        system = SystemConfig(id=system_id)
+
+    prefix = system.env_prefix or (
+        "SAP_" if system_id == DEFAULT_SYSTEM else f"SAP_{system_id.upper()}_"
+    )
+    servers: List[Tuple[str, Optional[int]]] = [
+        (server.host, server.port) for server in system.servers
+    ] or _parse_hosts(os.getenv(f"{prefix}HOSTS", ""))
+
+    overrides: Dict[str, Any] = {
+        name: value
+        for name, value in (
+            ("port", system.port),
+            ("scheme", system.scheme),
+            ("client", system.client),
+            ("verify_ssl", system.verify_ssl),
+            ("pool_size", system.pool_size),
+        )
+        if value is not None
+    }
+    if servers:
+        overrides["host"] = servers[0][0]
+        if servers[0][1] is not None:
+            overrides["port"] = servers[0][1]
+
+    try:
+        if prefix == "SAP_" and system.env_prefix is None:
+            # Same settings as the rest of the application (possibly set
+            # programmatically, as the stdio server does)
+            app_config = get_config(require_sap=False)
+            if not app_config.sap_configured:
+                raise ServiceConfigurationError(
+                    f"No connection settings for SAP system '{system_id}': "
+                    "set SAP_HOST, SAP_USERNAME and SAP_PASSWORD"
+                )
+            connection = SAPConnectionConfig(**{**app_config.sap.model_dump(), **overrides})
+        else:
+            connection = SAPConnectionConfig(_env_prefix=prefix, **overrides)  # type: ignore[call-arg]
+    except ValidationError as e:
+        raise ServiceConfigurationError(
+            f"Incomplete connection settings for SAP system '{system_id}' "
+            f"(environment prefix {prefix}): {e}"
+        ) from e
+
+    resolved = [(host, port or connection.port) for host, port in servers] or [
+        (connection.host, connection.port)
+    ]
+    return SystemProfile(
+        id=system_id,
+        connection=connection,
+        servers=resolved,
+        load_balancing=system.load_balancing,
+        health_check_path=system.health_check_path,
+        health_check_interval=system.health_check_interval,
+        description=system.description,
+    )
+
+
+def get_service_system(
+    service: ServiceConfig, services_config: Optional[ServicesYAMLConfig] = None
+) -> SystemProfile:
+    """Connection profile of the system a service is mapped to"""
+    return get_system_profile(service.system, services_config)
@@ -0,0 +1,355 @@
+"""Client-side rate limiting and admission control for SAP Gateway requests
+
+Every request to SAP passes through the AdmissionController of its host and
+user before it is sent:
+
+- Token bucket per host and user (SECURITY_RATE_LIMIT_PER_MINUTE, bursts of
+  SECURITY_RATE_LIMIT_BURST) and optionally per OData service
+  (SECURITY_SERVICE_RATE_LIMIT_PER_MINUTE)
+- At most SECURITY_MAX_CONCURRENT_SESSIONS requests in flight; each tool call
+  opens its own SAP session, so this also bounds concurrent SAP sessions
+- Requests that cannot start immediately queue per agent session and are
+  admitted round-robin across sessions, so one busy session cannot starve
+  the others
+- A request still queued after SECURITY_QUEUE_TIMEOUT seconds fails with
+  SAPRateLimitError instead of reaching SAP late
+
+Controllers are shared by all clients in the process and work across event
+loops, since the agent runs each tool call with run_until_complete.
+"""
+
+import asyncio
+import threading
+import time
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from typing import Any, AsyncIterator, Deque, Dict, Iterator, Optional
+
+from sap_agent.sap_gw_connector.config.settings import SecurityConfig
+from sap_agent.sap_gw_connector.core.exceptions import SAPRateLimitError
+from sap_agent.sap_gw_connector.observability.metrics import (
+    SAP_ADMISSION_QUEUED,
+    SAP_ADMISSION_REJECTIONS,
+    SAP_ADMISSION_WAIT,
+)
+
+DEFAULT_SESSION = "default"
+
+# Agent session the current tool call belongs to, for fair queueing
+_current_session: ContextVar[str] = ContextVar("sap_session", default=DEFAULT_SESSION)
+
+
+def current_session() -> str:
+    """Agent session of the current tool call"""
+    return _current_session.get()
+
+
+@contextmanager
+def session_scope(session_id: Optional[str]) -> Iterator[None]:
+    """Attribute SAP requests made inside the block to an agent session"""
+    token = _current_session.set(session_id or DEFAULT_SESSION)
+    try:
+        yield
+    finally:
+        _current_session.reset(token)
+
+
+class TokenBucket:
+    """Token bucket refilled continuously at `rate_per_minute`
+
+    Not thread-safe; AdmissionController calls it under its lock.
+    """
+
+    def __init__(self, rate_per_minute: float, burst: int):
+        self._tokens = float(max(burst, 1))
+        self._updated = time.monotonic()
+        self.configure(rate_per_minute, burst)
+
+    def configure(self, rate_per_minute: float, burst: int) -> None:
+        self.rate = rate_per_minute / 60.0
+        self.capacity = float(max(burst, 1))
+        self._tokens = min(self._tokens, self.capacity)
+
+    @property
+    def enabled(self) -> bool:
+        return self.rate > 0
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def ready(self, now: float) -> bool:
+        """Whether a token is available"""
+        if not self.enabled:
+            return True
+        self._refill(now)
+        return self._tokens >= 1.0
+
+    def take(self, now: float) -> None:
+        """Consume a token (call after ready() returned True)"""
+        if self.enabled:
+            self._refill(now)
+            self._tokens -= 1.0
+
+    def time_until_token(self, now: float) -> float:
+        """Seconds until the next token is available"""
+        if not self.enabled:
+            return 0.0
+        self._refill(now)
+        return max(1.0 - self._tokens, 0.0) / self.rate
+
+    @property
+    def tokens(self) -> float:
+        return self._tokens
+
+
+class _Waiter:
+    """A queued request; `granted` is only changed under the controller lock"""
+
+    __slots__ = ("service", "loop", "wakeup", "granted")
+
+    def __init__(self, service: str, loop: asyncio.AbstractEventLoop):
+        self.service = service
+        self.loop = loop
+        self.wakeup: asyncio.Future = loop.create_future()
+        self.granted = False
+
+
+def _wake(future: asyncio.Future) -> None:
+    if not future.done():
+        future.set_result(None)
+
+
+class AdmissionController:
+    """Rate limits, concurrency limit and fair queue for one SAP host and user"""
+
+    def __init__(
+        self,
+        name: str,
+        host: str,
+        rate_limit_per_minute: int = 60,
+        rate_limit_burst: int = 10,
+        service_rate_limit_per_minute: int = 0,
+        max_concurrent: int = 100,
+        queue_timeout: float = 30.0,
+    ):
+        self.name = name
+        self.host = host
+        self.bucket = TokenBucket(rate_limit_per_minute, rate_limit_burst)
+        self._service_buckets: Dict[str, TokenBucket] = {}
+        self.configure(
+            rate_limit_per_minute,
+            rate_limit_burst,
+            service_rate_limit_per_minute,
+            max_concurrent,
+            queue_timeout,
+        )
+        # Waiting requests per agent session; the order is the round-robin turn
+        self._queues: "OrderedDict[str, Deque[_Waiter]]" = OrderedDict()
+        self._queued = 0
+        self._in_flight = 0
+        self._admitted = 0
+        self._rejected = 0
+        self._lock = threading.Lock()
+
+    def configure(
+        self,
+        rate_limit_per_minute: int,
+        rate_limit_burst: int,
+        service_rate_limit_per_minute: int,
+        max_concurrent: int,
+        queue_timeout: float,
+    ) -> None:
+        """Apply (possibly reloaded) limits"""
+        self.bucket.configure(rate_limit_per_minute, rate_limit_burst)
+        self.service_rate_limit_per_minute = service_rate_limit_per_minute
+        self.rate_limit_burst = rate_limit_burst
+        for bucket in self._service_buckets.values():
+            bucket.configure(service_rate_limit_per_minute, rate_limit_burst)
+        self.max_concurrent = max_concurrent
+        self.queue_timeout = queue_timeout
+
+    def _service_bucket(self, service: str) -> Optional[TokenBucket]:
+        if not service or self.service_rate_limit_per_minute <= 0:
+            return None
+        bucket = self._service_buckets.get(service)
+        if bucket is None:
+            bucket = self._service_buckets[service] = TokenBucket(
+                self.service_rate_limit_per_minute, self.rate_limit_burst
+            )
+        return bucket
+
+    @asynccontextmanager
+    async def admit(self, service: str = "") -> AsyncIterator[None]:
+        """Hold an admission for one SAP request
+
+        Raises:
+            SAPRateLimitError: If the request was not admitted within the
+                queue timeout
+        """
+        await self._acquire(service)
+        try:
+            yield
+        finally:
+            self._release()
+
+    async def _acquire(self, service: str) -> None:
+        session = current_session()
+        waiter = _Waiter(service, asyncio.get_running_loop())
+        start = time.monotonic()
+        deadline = start + self.queue_timeout
+        with self._lock:
+            self._queues.setdefault(session, deque()).append(waiter)
+            self._queued += 1
+        SAP_ADMISSION_QUEUED.inc(host=self.host)
+        try:
+            while True:
+                with self._lock:
+                    now = time.monotonic()
+                    wake_in = self._dispatch(now)
+                    if waiter.granted:
+                        break
+                    if now >= deadline:
+                        self._rejected += 1
+                        raise SAPRateLimitError(
+                            f"SAP request to {self.host} not admitted within "
+                            f"{self.queue_timeout:g}s: client-side rate limit "
+                            f"or concurrency limit reached",
+                            status_code=429,
+                            response_data={"queue_timeout": True, "host": self.host},
+                        )
+                    waiter.wakeup = waiter.loop.create_future()
+                timeout = deadline - now
+                if wake_in is not None:
+                    timeout = min(timeout, wake_in)
+                try:
+                    await asyncio.wait_for(asyncio.shield(waiter.wakeup), timeout)
+                except asyncio.TimeoutError:
+                    pass
+        except BaseException as e:
+            with self._lock:
+                if waiter.granted:
+                    # Cancelled after being admitted: give the slot back
+                    self._in_flight -= 1
+                    self._dispatch(time.monotonic())
+                else:
+                    self._remove(session, waiter)
+            if isinstance(e, SAPRateLimitError):
+                SAP_ADMISSION_REJECTIONS.inc(host=self.host)
+            raise
+        finally:
+            SAP_ADMISSION_QUEUED.dec(host=self.host)
+        SAP_ADMISSION_WAIT.observe(time.monotonic() - start, host=self.host)
+
+    def _remove(self, session: str, waiter: _Waiter) -> None:
+        queue = self._queues.get(session)
+        if queue is not None and waiter in queue:
+            queue.remove(waiter)
+            self._queued -= 1
+            if not queue:
+                del self._queues[session]
+
+    def _release(self) -> None:
+        with self._lock:
+            self._in_flight -= 1
+            if self._dispatch(time.monotonic()) is not None:
+                # Waiters asleep on the concurrency limit must now wait for
+                # a token instead; wake them to recompute their timeout
+                for queue in self._queues.values():
+                    for waiter in queue:
+                        waiter.loop.call_soon_threadsafe(_wake, waiter.wakeup)
+
+    def _dispatch(self, now: float) -> Optional[float]:
+        """Admit queued requests, one per session per turn
+
+        Called with the lock held. Returns the seconds until a rate limit
+        token frees up when requests are still waiting on one, else None.
+        """
+        wake_in: Optional[float] = None
+        admitted = True
+        while admitted and self._queues:
+            admitted = False
+            for session in list(self._queues):
+                if self.max_concurrent and self._in_flight >= self.max_concurrent:
+                    return None
+                if not self.bucket.ready(now):
+                    return self.bucket.time_until_token(now)
+
+                queue = self._queues[session]
+                waiter = None
+                for candidate in queue:
+                    service_bucket = self._service_bucket(candidate.service)
+                    if service_bucket is None or service_bucket.ready(now):
+                        waiter = candidate
+                        break
+                    delay = service_bucket.time_until_token(now)
+                    wake_in = delay if wake_in is None else min(wake_in, delay)
+                if waiter is None:
+                    continue
+
+                self.bucket.take(now)
+                service_bucket = self._service_bucket(waiter.service)
+                if service_bucket is not None:
+                    service_bucket.take(now)
+                queue.remove(waiter)
+                self._queued -= 1
+                self._in_flight += 1
+                self._admitted += 1
+                waiter.granted = True
+                waiter.loop.call_soon_threadsafe(_wake, waiter.wakeup)
+
+                # Move the session to the back of the round-robin turn
+                del self._queues[session]
+                if queue:
+                    self._queues[session] = queue
+                admitted = True
+        return wake_in
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Current usage for statistics"""
+        with self._lock:
+            self.bucket.ready(time.monotonic())
+            return {
+                "in_flight": self._in_flight,
+                "queued": self._queued,
+                "sessions_waiting": len(self._queues),
+                "tokens": round(self.bucket.tokens, 2) if self.bucket.enabled else None,
+                "admitted": self._admitted,
+                "rejected": self._rejected,
+            }
+
+
+# Admission controllers shared by all clients, keyed by user@host
+_admission_controllers: Dict[str, AdmissionController] = {}
+_admission_controllers_lock = threading.Lock()
+
+
+def get_admission_controller(
+    host: str, username: str, security: SecurityConfig
+) -> AdmissionController:
+    """Get the admission controller shared by all clients of a host and user"""
+    name = f"{username}@{host}"
+    limits = (
+        security.rate_limit_per_minute,
+        security.rate_limit_burst,
+        security.service_rate_limit_per_minute,
+        security.max_concurrent_sessions,
+        security.queue_timeout,
+    )
+    with _admission_controllers_lock:
+        controller = _admission_controllers.get(name)
+        if controller is None:
+            controller = _admission_controllers[name] = AdmissionController(
+                name, host, *limits
+            )
+        else:
+            controller.configure(*limits)
+        return controller
+
+
+def get_admission_states() -> Dict[str, Dict[str, Any]]:
+    """Snapshot of every admission controller, keyed by user@host"""
+    with _admission_controllers_lock:
+        controllers = list(_admission_controllers.values())
+    return {controller.name: controller.snapshot() for controller in controllers}
@@ -9,7 +9,10 @@ from typing import TYPE_CHECKING, Dict, Optional
 import aiohttp
 
 from sap_agent.sap_gw_connector.config.settings import SAPConnectionConfig
+from sap_agent.sap_gw_connector.core.connections import get_connector
 from sap_agent.sap_gw_connector.core.exceptions import SAPAuthenticationError, SAPConnectionError
+from sap_agent.sap_gw_connector.observability.metrics import SAP_AUTH_REFRESHES
+from sap_agent.sap_gw_connector.observability.tracing import start_span
 
 if TYPE_CHECKING:
     from sap_agent.sap_gw_connector.config.schemas import AuthEndpointConfig, ServicesYAMLConfig
@@ -52,36 +55,47 @@ class SAPAuthenticator:
         self._current_token: Optional[AuthToken] = None
         self._auth_lock = asyncio.Lock()
 
-        # Build base URL (always use https, SSL verification is controlled separately)
-        self.base_url = f"https://{self.config.host}:{self.config.port}"
+        # Build base URL (SSL verification is controlled separately)
+        self.base_url = f"{self.config.scheme}://{self.config.host}:{self.config.port}"
 
-    async def get_valid_token(self) -> AuthToken:
-        """Get a valid authentication token, refreshing if necessary"""
+    async def get_valid_token(
+        self, connector: Optional[aiohttp.BaseConnector] = None
+    ) -> AuthToken:
+        """Get a valid authentication token, refreshing if necessary
+
+        Args:
+            connector: Connection pool to log in through (default: the shared
+                pool of this host)
+        """
         async with self._auth_lock:
             if self._current_token and self._current_token.is_valid:
                 return self._current_token
 
             logger.info("Authenticating with SAP Gateway...")
-            self._current_token = await self._authenticate()
+            SAP_AUTH_REFRESHES.inc(host=self.config.host)
+            with start_span(
+                "sap.auth.login",
+                {"server.address": self.config.host, "sap.client": self.config.client},
+            ):
+                self._current_token = await self._authenticate(connector)
             return self._current_token
 
-    async def _authenticate(self) -> AuthToken:
+    async def _authenticate(self, connector: Optional[aiohttp.BaseConnector] = None) -> AuthToken:
         """Perform SAP authentication and get CSRF token"""
         timeout = aiohttp.ClientTimeout(total=self.config.timeout)
+        if connector is None:
+            connector = get_connector(
+                f"{self.config.host}:{self.config.port}",
+                self.config.verify_ssl,
+                limit=self.config.pool_size,
+                limit_per_host=self.config.pool_size,
+                keepalive_timeout=self.config.keepalive_timeout,
+                dns_cache_ttl=self.config.dns_cache_ttl,
+            )
 
-        # Create SSL context when verification is disabled (for self-signed certs)
-        ssl_context = None
-        if not self.config.verify_ssl:
-            import ssl
-
-            ssl_context = ssl.create_default_context()
-            ssl_context.check_hostname = False
-            ssl_context.verify_mode = ssl.CERT_NONE
-            logger.warning("SSL certificate verification is disabled")
-
+        # Own session for the login cookies, on the shared connection pool
         async with aiohttp.ClientSession(
-            timeout=timeout,
-            connector=aiohttp.TCPConnector(ssl=ssl_context if ssl_context else True),
+            timeout=timeout, connector=connector, connector_owner=False
         ) as session:
 
             # Step 1: Get initial session and CSRF token
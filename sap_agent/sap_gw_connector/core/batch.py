@@ -0,0 +1,302 @@
+"""OData $batch requests with changesets
+
+Builds multipart/mixed $batch bodies from write operations and parses the
+responses. Each changeset is atomic on the gateway: if one of its operations
+fails, SAP rolls back the others and answers the whole changeset with that
+operation's error.
+
+SAPClient.bulk_write in sap_client.py chunks operations into changesets and
+sends them with bounded parallelism. GET operations (reads of navigation
+properties, see expand.py) are sent as retrieval parts outside changesets.
+
+Example:
+    >>> operation = BatchOperation.from_dict(
+    ...     {"operation": "update", "key": "91000092", "data": {"Status": "B"}},
+    ...     "zsd004Set",
+    ... )
+    >>> operation.method, operation.resource
+    ('PUT', "zsd004Set('91000092')")
+"""
+
+import json
+import uuid
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple, Union
+from urllib.parse import quote, urlencode
+
+from sap_agent.sap_gw_connector.core.exceptions import SAPRequestError, SAPValidationError
+
+# Operation names accepted by BatchOperation.from_dict -> HTTP method; a
+# partial update is PATCH on OData v4 and MERGE on v2
+OPERATION_METHODS = {"create": "POST", "update": "PUT", "patch": "PATCH", "delete": "DELETE"}
+
+
+@dataclass
+class BatchOperation:
+    """One write in a changeset, or a retrieval (GET)"""
+
+    method: str
+    entity_set: str
+    # Key value(s) as given; key_predicate is the typed predicate (see
+    # keys.py) set by SAPClient.bulk_write, else the key is sent as a string
+    key: Optional[Union[str, Dict[str, Any]]] = None
+    data: Optional[Dict[str, Any]] = None
+    headers: Dict[str, str] = field(default_factory=dict)
+    key_predicate: Optional[str] = None
+    # Navigation property read from the entity, and query options (GET)
+    navigation: Optional[str] = None
+    params: Dict[str, str] = field(default_factory=dict)
+
+    @classmethod
+    def from_dict(
+        cls, spec: Dict[str, Any], entity_set: str, version: str = "v2"
+    ) -> "BatchOperation":
+        """Operation from {"operation": create|update|patch|delete, "key", "data", "etag"}
+
+        Raises:
+            SAPValidationError: If the operation is unknown or lacks its key or data
+        """
+        name = str(spec.get("operation", "")).lower()
+        method = OPERATION_METHODS.get(name)
+        if method is None:
+            raise SAPValidationError(
+                f"Unknown operation '{spec.get('operation')}'; "
+                f"expected one of: {', '.join(OPERATION_METHODS)}"
+            )
+        if method == "PATCH" and version != "v4":
+            method = "MERGE"
+        key = spec.get("key")
+        data = spec.get("data")
+        if method != "POST" and key is None:
+            raise SAPValidationError(f"Operation '{name}' needs a key")
+        if method != "DELETE" and not isinstance(data, dict):
+            raise SAPValidationError(f"Operation '{name}' needs a data object")
+        return cls(
+            method=method,
+            entity_set=entity_set,
+            key=None if key is None else key if isinstance(key, dict) else str(key),
+            data=data if method != "DELETE" else None,
+            headers={"If-Match": str(spec["etag"])} if spec.get("etag") else {},
+        )
+
+    @property
+    def resource(self) -> str:
+        """Resource path relative to the service"""
+        if self.key_predicate is not None:
+            resource = f"{self.entity_set}({self.key_predicate})"
+        elif isinstance(self.key, dict):
+            predicate = ",".join(f"{name}='{value}'" for name, value in self.key.items())
+            resource = f"{self.entity_set}({predicate})"
+        elif self.key is not None:
+            resource = f"{self.entity_set}('{self.key}')"
+        else:
+            resource = self.entity_set
+        if self.navigation:
+            resource = f"{resource}/{self.navigation}"
+        if self.params:
+            resource = f"{resource}?{urlencode(self.params, quote_via=quote, safe='$,/')}"
+        return resource
+
+    def to_http(self, content_id: int) -> str:
+        """The operation as an application/http changeset part"""
+        lines = [
+            "Content-Type: application/http",
+            "Content-Transfer-Encoding: binary",
+            f"Content-ID: {content_id}",
+            "",
+            f"{self.method} {self.resource} HTTP/1.1",
+            "Accept: application/json",
+        ]
+        body = ""
+        if self.data is not None:
+            body = json.dumps(self.data)
+            lines.append("Content-Type: application/json")
+            lines.append(f"Content-Length: {len(body.encode())}")
+        lines.extend(f"{name}: {value}" for name, value in self.headers.items())
+        lines.append("")
+        lines.append(body)
+        return "\r\n".join(lines)
+
+
+@dataclass
+class BatchResponse:
+    """Response to one operation in a $batch"""
+
+    status: int
+    headers: Dict[str, str]
+    body: str
+
+    @property
+    def ok(self) -> bool:
+        return self.status < 400
+
+    def json(self) -> Any:
+        """Parsed body, None if empty"""
+        return json.loads(self.body) if self.body.strip() else None
+
+    def error_message(self) -> str:
+        """Message of an OData error body, else the body itself"""
+        try:
+            error = json.loads(self.body)["error"]
+            return str(error["message"]["value"])
+        except (ValueError, KeyError, TypeError):
+            return self.body.strip() or f"HTTP {self.status}"
+
+
+def build_batch(changesets: List[List[BatchOperation]]) -> Tuple[str, str]:
+    """Build a $batch body with one changeset per list of operations
+
+    A list holding a single GET is sent as a retrieval part, since reads
+    cannot be part of a changeset.
+
+    Returns:
+        Content-Type header (with the boundary) and body
+    """
+    batch_boundary = f"batch_{uuid.uuid4().hex}"
+    parts = []
+    content_id = 0
+    for operations in changesets:
+        if len(operations) == 1 and operations[0].method == "GET":
+            content_id += 1
+            parts.append(f"--{batch_boundary}\r\n{operations[0].to_http(content_id)}\r\n")
+            continue
+        changeset_boundary = f"changeset_{uuid.uuid4().hex}"
+        changeset = []
+        for operation in operations:
+            content_id += 1
+            changeset.append(f"--{changeset_boundary}\r\n{operation.to_http(content_id)}\r\n")
+        parts.append(
+            f"--{batch_boundary}\r\n"
+            f"Content-Type: multipart/mixed; boundary={changeset_boundary}\r\n\r\n"
+            + "".join(changeset)
+            + f"--{changeset_boundary}--\r\n"
+        )
+    body = "".join(parts) + f"--{batch_boundary}--\r\n"
+    return f"multipart/mixed; boundary={batch_boundary}", body
+
+
+def _split_multipart(body: str, boundary: str) -> List[str]:
+    parts = []
+    for chunk in body.split(f"--{boundary}")[1:]:
+        if chunk.startswith("--"):
+            break
+        parts.append(chunk.strip("\r\n"))
+    return parts
+
+
+def _split_headers(text: str) -> Tuple[Dict[str, str], str]:
+    head, _, rest = text.replace("\r\n", "\n").partition("\n\n")
+    headers: Dict[str, str] = {}
+    for line in head.split("\n"):
+        name, sep, value = line.partition(":")
+        if sep:
+            headers[name.strip().lower()] = value.strip()
+    return headers, rest
+
+
+def _boundary_of(content_type: str) -> Optional[str]:
+    for parameter in content_type.split(";")[1:]:
+        name, _, value = parameter.strip().partition("=")
+        if name.lower() == "boundary":
+            return value.strip('"')
+    return None
+
+
+def _parse_http_response(part: str) -> BatchResponse:
+    _, http_text = _split_headers(part)
+    status_line, _, rest = http_text.partition("\n")
+    try:
+        status = int(status_line.split(" ")[1])
+    except (IndexError, ValueError) as e:
+        raise SAPRequestError(f"Invalid $batch response line: {status_line.strip()}") from e
+    headers, body = _split_headers(rest)
+    return BatchResponse(status=status, headers=headers, body=body.strip())
+
+
+def parse_batch_response(body: str) -> List[List[BatchResponse]]:
+    """Parse a $batch response body
+
+    Returns:
+        One list per top-level part: the responses to each operation of a
+        changeset that succeeded, or a single error response for a
+        changeset that failed (or for a part outside any changeset)
+
+    Raises:
+        SAPRequestError: If the body is not a multipart response
+    """
+    first_line = body.lstrip().split("\n", 1)[0].strip()
+    if not first_line.startswith("--"):
+        raise SAPRequestError(f"Invalid $batch response: {body[:200]}")
+    responses = []
+    for part in _split_multipart(body, first_line[2:]):
+        headers, content = _split_headers(part)
+        boundary = _boundary_of(headers.get("content-type", ""))
+        if headers.get("content-type", "").startswith("multipart/mixed") and boundary:
+            responses.append(
+                [_parse_http_response(item) for item in _split_multipart(content, boundary)]
+            )
+        else:
+            responses.append([_parse_http_response(part)])
+    return responses
+
+
+@dataclass
+class BatchItemResult:
+    """Outcome of one operation of a bulk write"""
+
+    index: int
+    operation: BatchOperation
+    success: bool
+    status: Optional[int] = None
+    data: Any = None
+    error: Optional[str] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        result: Dict[str, Any] = {
+            "index": self.index,
+            "method": self.operation.method,
+            "resource": self.operation.resource,
+            "success": self.success,
+            "status": self.status,
+        }
+        if self.success:
+            result["data"] = self.data
+        else:
+            result["error"] = self.error
+        return result
+
+
+@dataclass
+class BulkWriteResult:
+    """Per-operation outcomes of a bulk write, in the order of the operations"""
+
+    items: List[BatchItemResult]
+    # $batch requests sent, including retries and split changesets
+    batches: int = 0
+
+    @property
+    def succeeded(self) -> List[BatchItemResult]:
+        return [item for item in self.items if item.success]
+
+    @property
+    def failed(self) -> List[BatchItemResult]:
+        return [item for item in self.items if not item.success]
+
+    def failed_operations(self) -> List[BatchOperation]:
+        """Operations to resubmit"""
+        return [item.operation for item in self.failed]
+
+    def to_dict(self, include_succeeded: bool = False) -> Dict[str, Any]:
+        """Summary with every failed item (and succeeded ones if asked)"""
+        failed = self.failed
+        result: Dict[str, Any] = {
+            "success": not failed,
+            "total": len(self.items),
+            "succeeded": len(self.items) - len(failed),
+            "failed": len(failed),
+            "batches": self.batches,
+            "failures": [item.to_dict() for item in failed],
+        }
+        if include_succeeded:
+            result["results"] = [item.to_dict() for item in self.succeeded]
+        return result
@@ -0,0 +1,281 @@
+"""Circuit breakers for SAP Gateway requests
+
+One breaker per SAP application server (host:port) and one per system host
++ service path. The server breaker counts transport failures (connection
+errors, timeouts); a service breaker counts timeouts and 5xx responses, so
+one broken backend service does not cut off the others and one unreachable
+application server does not cut off the service on the remaining servers.
+
+After `failure_threshold` consecutive failures a breaker opens and requests
+fail fast with SAPConnectionError instead of waiting out timeouts and
+retries. After `reset_timeout` seconds it lets `half_open_probes` requests
+through; a successful probe closes it again, a failed one re-opens it.
+
+Breakers are shared by all clients in the process, since the agent creates a
+new SAPClient for every tool call.
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+from enum import Enum
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from sap_agent.sap_gw_connector.core.exceptions import (
+    SAPConnectionError,
+    SAPError,
+    SAPTimeoutError,
+)
+from sap_agent.sap_gw_connector.observability.metrics import (
+    SAP_CIRCUIT_REJECTIONS,
+    SAP_CIRCUIT_STATE,
+)
+
+
+class CircuitState(str, Enum):
+    """Circuit breaker states"""
+
+    CLOSED = "closed"
+    HALF_OPEN = "half_open"
+    OPEN = "open"
+
+
+# Gauge values for sap_circuit_state
+_STATE_VALUES = {CircuitState.CLOSED: 0, CircuitState.HALF_OPEN: 1, CircuitState.OPEN: 2}
+
+
+def is_circuit_failure(
+    error: SAPError, count_server_errors: bool = True, count_connection_errors: bool = True
+) -> bool:
+    """Whether an error indicates the server or service is unhealthy
+
+    Client errors (4xx) and authentication failures mean the gateway
+    answered, so they do not count.
+    """
+    if error.response_data.get("circuit_open"):
+        return False
+    if isinstance(error, SAPTimeoutError):
+        return True
+    if isinstance(error, SAPConnectionError):
+        return count_connection_errors
+    return (
+        count_server_errors
+        and error.status_code is not None
+        and error.status_code >= 500
+    )
+
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker with half-open probing"""
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = 5,
+        reset_timeout: float = 30.0,
+        half_open_probes: int = 1,
+        count_server_errors: bool = True,
+        count_connection_errors: bool = True,
+    ):
+        self.name = name
+        self.count_server_errors = count_server_errors
+        self.count_connection_errors = count_connection_errors
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.half_open_probes = half_open_probes
+        self._state = CircuitState.CLOSED
+        self._consecutive_failures = 0
+        self._opened_at = 0.0
+        self._probes_in_flight = 0
+        self._times_opened = 0
+        self._rejected = 0
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.failure_threshold > 0
+
+    @property
+    def state(self) -> CircuitState:
+        """Current state (an expired open circuit reports half-open)"""
+        with self._lock:
+            return self._current_state(time.monotonic())
+
+    def _current_state(self, now: float) -> CircuitState:
+        if (
+            self._state == CircuitState.OPEN
+            and now - self._opened_at >= self.reset_timeout
+        ):
+            self._set_state(CircuitState.HALF_OPEN)
+        return self._state
+
+    def _set_state(self, state: CircuitState) -> None:
+        self._state = state
+        if state == CircuitState.OPEN:
+            self._opened_at = time.monotonic()
+            self._times_opened += 1
+        elif state == CircuitState.CLOSED:
+            self._consecutive_failures = 0
+        SAP_CIRCUIT_STATE.set(_STATE_VALUES[state], circuit=self.name)
+
+    def _reject(self, now: float) -> SAPConnectionError:
+        self._rejected += 1
+        SAP_CIRCUIT_REJECTIONS.inc(circuit=self.name)
+        retry_in = max(self.reset_timeout - (now - self._opened_at), 0.0)
+        if self._state == CircuitState.HALF_OPEN:
+            message = f"SAP circuit '{self.name}' is half-open; a probe request is in progress"
+        else:
+            message = (
+                f"SAP circuit '{self.name}' is open after {self._consecutive_failures} "
+                f"consecutive failures; failing fast for another {retry_in:.1f}s"
+            )
+        return SAPConnectionError(
+            message,
+            response_data={"circuit_open": True, "circuit": self.name, "retry_in": retry_in},
+        )
+
+    def before_call(self) -> bool:
+        """Admit a call or raise SAPConnectionError
+
+        Returns:
+            True if the call is a half-open probe
+
+        Raises:
+            SAPConnectionError: If the circuit is open
+        """
+        if not self.enabled:
+            return False
+        with self._lock:
+            now = time.monotonic()
+            state = self._current_state(now)
+            if state == CircuitState.CLOSED:
+                return False
+            if state == CircuitState.HALF_OPEN and self._probes_in_flight < self.half_open_probes:
+                self._probes_in_flight += 1
+                return True
+            raise self._reject(now)
+
+    def record(self, probe: bool, success: bool) -> None:
+        """Record the outcome of an admitted call"""
+        if not self.enabled:
+            return
+        with self._lock:
+            if probe:
+                self._probes_in_flight -= 1
+            if success:
+                if self._state != CircuitState.CLOSED:
+                    self._set_state(CircuitState.CLOSED)
+                self._consecutive_failures = 0
+                return
+            self._consecutive_failures += 1
+            if probe or (
+                self._state == CircuitState.CLOSED
+                and self._consecutive_failures >= self.failure_threshold
+            ):
+                self._set_state(CircuitState.OPEN)
+
+    def release(self, probe: bool) -> None:
+        """Give back an admitted call that finished without an outcome"""
+        if probe:
+            with self._lock:
+                self._probes_in_flight -= 1
+
+    def reset(self) -> None:
+        """Close the circuit"""
+        with self._lock:
+            self._probes_in_flight = 0
+            self._set_state(CircuitState.CLOSED)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Current state for statistics"""
+        with self._lock:
+            now = time.monotonic()
+            state = self._current_state(now)
+            snapshot: Dict[str, Any] = {
+                "state": state.value,
+                "consecutive_failures": self._consecutive_failures,
+                "times_opened": self._times_opened,
+                "rejected": self._rejected,
+            }
+            if state == CircuitState.OPEN:
+                snapshot["retry_in"] = max(self.reset_timeout - (now - self._opened_at), 0.0)
+            return snapshot
+
+
+# Circuit breakers shared by all clients, keyed by name
+_circuit_breakers: Dict[str, CircuitBreaker] = {}
+_circuit_breakers_lock = threading.Lock()
+
+
+def get_circuit_breaker(
+    name: str,
+    failure_threshold: int = 5,
+    reset_timeout: float = 30.0,
+    half_open_probes: int = 1,
+    count_server_errors: bool = True,
+    count_connection_errors: bool = True,
+) -> CircuitBreaker:
+    """Get (creating on first use) the shared breaker with this name"""
+    with _circuit_breakers_lock:
+        breaker = _circuit_breakers.get(name)
+        if breaker is None:
+            breaker = _circuit_breakers[name] = CircuitBreaker(
+                name,
+                count_server_errors=count_server_errors,
+                count_connection_errors=count_connection_errors,
+            )
+        breaker.failure_threshold = failure_threshold
+        breaker.reset_timeout = reset_timeout
+        breaker.half_open_probes = half_open_probes
+        return breaker
+
+
+def get_circuit_states() -> Dict[str, Dict[str, Any]]:
+    """Snapshot of every circuit breaker, keyed by name"""
+    with _circuit_breakers_lock:
+        breakers = list(_circuit_breakers.values())
+    return {breaker.name: breaker.snapshot() for breaker in breakers}
+
+
+def reset_circuit_breakers() -> None:
+    """Close every circuit breaker"""
+    with _circuit_breakers_lock:
+        breakers = list(_circuit_breakers.values())
+    for breaker in breakers:
+        breaker.reset()
+
+
+@contextmanager
+def circuit_guard(breakers: Sequence[CircuitBreaker]) -> Iterator[None]:
+    """Admit a call through all breakers and record its outcome on each
+
+    Raises:
+        SAPConnectionError: If any of the circuits is open
+    """
+    permits: List[Tuple[CircuitBreaker, bool]] = []
+    try:
+        for breaker in breakers:
+            permits.append((breaker, breaker.before_call()))
+    except SAPConnectionError:
+        for breaker, probe in permits:
+            breaker.release(probe)
+        raise
+
+    error: Optional[SAPError] = None
+    completed = False
+    try:
+        yield
+        completed = True
+    except SAPError as e:
+        error = e
+        completed = True
+        raise
+    finally:
+        for breaker, probe in permits:
+            if not completed:
+                breaker.release(probe)
+            else:
+                failed = error is not None and is_circuit_failure(
+                    error, breaker.count_server_errors, breaker.count_connection_errors
+                )
+                breaker.record(probe, success=not failed)
@@ -0,0 +1,108 @@
+"""In-flight deduplication of identical SAP reads
+
+When several agent sessions ask for the same entity or query at the same
+time, the first caller (the leader) sends the GET and parses the response;
+callers arriving while it is in flight wait for that result instead of
+sending their own request. Requests are keyed by SAP system, user, client,
+full URL, query parameters and headers, so results are never shared
+across credentials.
+
+A shared result is parsed once and every caller, including the leader, gets
+its own copy, so one caller mutating its result cannot affect another. A
+result nobody shared is returned as is.
+
+The fetch runs as its own task: a caller that is cancelled does not cancel
+it for the others, unless it was the last one waiting. Coalescers are kept
+per event loop, since the agent creates a new SAPClient for every tool call.
+"""
+
+import asyncio
+import threading
+import weakref
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+from sap_agent.sap_gw_connector.observability.metrics import SAP_COALESCED_REQUESTS
+
+
+def copy_json(value: Any) -> Any:
+    """Copy parsed JSON (or xmltodict output); only dicts and lists are mutable"""
+    if isinstance(value, dict):
+        return {key: copy_json(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [copy_json(item) for item in value]
+    return value
+
+
+class _InFlight:
+    """A fetch in progress and the callers waiting for it"""
+
+    def __init__(self, task: "asyncio.Future[Any]"):
+        self.task = task
+        self.waiters = 0
+        self.shared = False
+
+
+class RequestCoalescer:
+    """Identical reads in flight on one event loop, by key"""
+
+    def __init__(self) -> None:
+        self._in_flight: Dict[Hashable, _InFlight] = {}
+
+    def __len__(self) -> int:
+        return len(self._in_flight)
+
+    async def run(
+        self,
+        key: Hashable,
+        fetch: Callable[[], Awaitable[Any]],
+        service: str = "",
+        entity: str = "",
+    ) -> Any:
+        """Await fetch(), or join an identical fetch already in flight
+
+        Raises:
+            Whatever fetch() raised, in every waiting caller
+        """
+        entry = self._in_flight.get(key)
+        if entry is None or entry.task.done():
+            entry = _InFlight(asyncio.ensure_future(fetch()))
+            self._in_flight[key] = entry
+            entry.task.add_done_callback(lambda _: self._forget(key, entry))
+        else:
+            entry.shared = True
+            SAP_COALESCED_REQUESTS.inc(service=service, entity=entity)
+
+        entry.waiters += 1
+        try:
+            result = await asyncio.shield(entry.task)
+        except asyncio.CancelledError:
+            entry.waiters -= 1
+            if entry.waiters == 0 and not entry.task.done():
+                entry.task.cancel()
+            raise
+        return copy_json(result) if entry.shared else result
+
+    def _forget(self, key: Hashable, entry: _InFlight) -> None:
+        if self._in_flight.get(key) is entry:
+            del self._in_flight[key]
+        if not entry.task.cancelled():
+            # Retrieved by the waiters; avoids "exception never retrieved"
+            # when all of them were cancelled
+            entry.task.exception()
+
+
+# Coalescers by event loop
+_coalescers: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, RequestCoalescer]" = (
+    weakref.WeakKeyDictionary()
+)
+_coalescers_lock = threading.Lock()
+
+
+def get_coalescer() -> RequestCoalescer:
+    """Get the coalescer of the running event loop"""
+    loop = asyncio.get_running_loop()
+    with _coalescers_lock:
+        coalescer = _coalescers.get(loop)
+        if coalescer is None:
+            coalescer = _coalescers[loop] = RequestCoalescer()
+        return coalescer
@@ -0,0 +1,138 @@
+"""Connection setup shared by all SAP clients in the process
+
+The agent creates a new SAPClient for every tool call. Without sharing, each
+call would build an SSL context (loading the CA store), resolve the SAP host
+and open fresh TCP + TLS connections for the login and the request. Instead:
+
+- One ssl.SSLContext per verification mode is built on first use, with TLS
+  session tickets enabled
+- DNS answers are cached process-wide for SAP_DNS_CACHE_TTL seconds
+- Connection pools (aiohttp connectors) are shared by all clients and logins
+  of a system on the same event loop, and keep idle connections open for
+  SAP_KEEPALIVE_TIMEOUT seconds, so a tool call usually finds an
+  established TLS connection and skips the handshake entirely. (asyncio does
+  not expose client-side TLS session reuse, so keeping connections alive is
+  what saves the handshake.)
+
+SAPClient.warm_up / warm_up_systems in sap_client.py use these pools to
+pre-resolve and pre-connect at startup.
+"""
+
+import asyncio
+import logging
+import socket
+import ssl
+import threading
+import time
+import weakref
+from typing import Dict, List, Tuple
+
+import aiohttp
+from aiohttp.abc import AbstractResolver, ResolveResult
+from aiohttp.resolver import DefaultResolver
+
+logger = logging.getLogger(__name__)
+
+# SSL contexts by verification mode
+_ssl_contexts: Dict[bool, ssl.SSLContext] = {}
+_ssl_contexts_lock = threading.Lock()
+
+
+def get_ssl_context(verify_ssl: bool) -> ssl.SSLContext:
+    """Shared SSL context for SAP connections, built on first use"""
+    with _ssl_contexts_lock:
+        context = _ssl_contexts.get(verify_ssl)
+        if context is None:
+            context = ssl.create_default_context()
+            if not verify_ssl:
+                # For self-signed gateway certificates
+                context.check_hostname = False
+                context.verify_mode = ssl.CERT_NONE
+                logger.warning("SSL certificate verification is disabled")
+            context.options &= ~ssl.OP_NO_TICKET
+            _ssl_contexts[verify_ssl] = context
+        return context
+
+
+# DNS answers by (host, port, family): (expires at, results)
+_dns_cache: Dict[Tuple[str, int, int], Tuple[float, List[ResolveResult]]] = {}
+_dns_cache_lock = threading.Lock()
+
+
+class CachingResolver(AbstractResolver):
+    """Resolver answering from the process-wide DNS cache"""
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._resolver = DefaultResolver()
+
+    async def resolve(
+        self, host: str, port: int = 0, family: socket.AddressFamily = socket.AF_INET
+    ) -> List[ResolveResult]:
+        key = (host, port, int(family))
+        now = time.monotonic()
+        with _dns_cache_lock:
+            entry = _dns_cache.get(key)
+        if entry is not None and entry[0] > now:
+            return entry[1]
+        results = await self._resolver.resolve(host, port, family)
+        if self.ttl > 0:
+            with _dns_cache_lock:
+                _dns_cache[key] = (now + self.ttl, results)
+        return results
+
+    async def close(self) -> None:
+        await self._resolver.close()
+
+
+def clear_dns_cache() -> None:
+    """Forget all cached DNS answers"""
+    with _dns_cache_lock:
+        _dns_cache.clear()
+
+
+# Connectors by event loop, then by pool name and verification mode
+_ConnectorMap = Dict[Tuple[str, bool], aiohttp.TCPConnector]
+_connectors: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, _ConnectorMap]" = (
+    weakref.WeakKeyDictionary()
+)
+_connectors_lock = threading.Lock()
+
+
+def get_connector(
+    name: str,
+    verify_ssl: bool,
+    limit: int,
+    limit_per_host: int,
+    keepalive_timeout: float = 55.0,
+    dns_cache_ttl: float = 300.0,
+) -> aiohttp.TCPConnector:
+    """Get the connection pool shared on the running event loop
+
+    Pass it to aiohttp.ClientSession with connector_owner=False. Limits
+    apply when the pool is created.
+    """
+    loop = asyncio.get_running_loop()
+    key = (name, verify_ssl)
+    with _connectors_lock:
+        connectors = _connectors.setdefault(loop, {})
+        connector = connectors.get(key)
+        if connector is None or connector.closed:
+            connector = connectors[key] = aiohttp.TCPConnector(
+                ssl=get_ssl_context(verify_ssl),
+                limit=limit,
+                limit_per_host=limit_per_host,
+                keepalive_timeout=keepalive_timeout,
+                resolver=CachingResolver(dns_cache_ttl),
+                use_dns_cache=False,
+            )
+        return connector
+
+
+async def close_connectors() -> None:
+    """Close the shared connection pools of the running event loop"""
+    with _connectors_lock:
+        connectors = list(_connectors.pop(asyncio.get_running_loop(), {}).values())
+    for connector in connectors:
+        await connector.close()
+
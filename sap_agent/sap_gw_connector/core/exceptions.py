@@ -35,13 +35,31 @@ class SAPRequestError(SAPError):
     pass
 
 
+class SAPConcurrencyError(SAPRequestError):
+    """Raised when an If-Match ETag is stale: the entity changed since it was read"""
+
+    pass
+
+
 class SAPTimeoutError(SAPError):
     """Raised when SAP request times out"""
 
     pass
 
 
+class SAPRateLimitError(SAPError):
+    """Raised when a request waits too long for client-side admission"""
+
+    pass
+
+
 class SAPValidationError(SAPError):
     """Raised when request validation fails"""
 
     pass
+
+
+class ODataFilterError(SAPValidationError):
+    """Raised when a $filter expression is invalid or cannot be evaluated locally"""
+
+    pass
@@ -0,0 +1,351 @@
+"""$expand of navigation properties, with a batched fallback
+
+expand_paths() checks the navigation paths an agent asks for against the
+entity's navigations in services.yaml, or against the service $metadata
+when services.yaml lists none. Only the first segment of a path such as
+ToItems/ToProduct is checked, since the target entity type of a navigation
+is not configured.
+
+query_expanded() and get_expanded() send the request with $expand. Not
+every SAP Gateway service can expand a navigation: services without an
+expanded-entity-set implementation answer $expand with an error, or leave
+the navigation deferred. The parents are then read without it, and the
+children of every parent are fetched with $batch GETs of
+Parent(key)/Navigation instead of one tool call per parent (batch_size
+reads per $batch, batch_parallelism $batch requests in flight). Such
+navigations are remembered for the process, so later requests go to the
+batched fetch directly.
+
+Example:
+    >>> parse_expand("ToItems, ToPartner/ToAddress")
+    ['ToItems', 'ToPartner/ToAddress']
+"""
+
+import asyncio
+import logging
+import re
+import threading
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Awaitable,
+    Callable,
+    Dict,
+    Hashable,
+    List,
+    Optional,
+    Set,
+    Tuple,
+    Union,
+)
+
+from sap_agent.sap_gw_connector.config.schemas import ServiceConfig
+from sap_agent.sap_gw_connector.core.batch import BatchOperation
+from sap_agent.sap_gw_connector.core.exceptions import (
+    SAPRequestError,
+    SAPValidationError,
+)
+from sap_agent.sap_gw_connector.core.keys import KeyValue, format_key, key_of
+from sap_agent.sap_gw_connector.core.metadata import (
+    EntitySetModel,
+    get_entity_set_model,
+)
+from sap_agent.sap_gw_connector.observability.metrics import SAP_NAVIGATION_FETCHES
+
+if TYPE_CHECKING:
+    from sap_agent.sap_gw_connector.core.sap_client import SAPClient
+
+logger = logging.getLogger(__name__)
+
+_PATH_PATTERN = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*(?:/[A-Za-z_][A-Za-z0-9_]*)*$")
+
+# Statuses with which a service rejects $expand it does not implement
+_EXPAND_REJECTED = (400, 501)
+
+# (system, service path, entity set, navigation) SAP does not expand
+_not_expandable: Set[Tuple[Hashable, str, str, str]] = set()
+_lock = threading.Lock()
+
+
+def parse_expand(expand: Union[str, List[str], None]) -> List[str]:
+    """Navigation paths of a comma-separated $expand (or a list of them)
+
+    Raises:
+        SAPValidationError: If a path is not a navigation path
+    """
+    if not expand:
+        return []
+    items = expand.split(",") if isinstance(expand, str) else expand
+    paths: List[str] = []
+    for item in items:
+        path = item.strip()
+        if not path:
+            continue
+        if not _PATH_PATTERN.match(path):
+            raise SAPValidationError(f"Invalid navigation path in $expand: {path!r}")
+        if path not in paths:
+            paths.append(path)
+    return paths
+
+
+async def navigation_names(
+    client: "SAPClient", service: ServiceConfig, entity_set: str
+) -> Set[str]:
+    """Navigation properties of an entity set: from services.yaml, else $metadata"""
+    entity = service.get_entity(entity_set)
+    if entity is not None and entity.navigations:
+        return set(entity.navigations)
+    entity_model = await get_entity_set_model(client, service.path, entity_set)
+    return set(entity_model.navigations) if entity_model is not None else set()
+
+
+async def expand_paths(
+    client: "SAPClient",
+    service: ServiceConfig,
+    entity_set: str,
+    expand: Union[str, List[str], None],
+) -> List[str]:
+    """Parse and check the navigation paths to expand
+
+    Raises:
+        SAPValidationError: If a path does not start with a navigation of
+            the entity set
+    """
+    paths = parse_expand(expand)
+    if not paths:
+        return paths
+    names = await navigation_names(client, service, entity_set)
+    for path in paths:
+        navigation = path.split("/", 1)[0]
+        if navigation not in names:
+            raise SAPValidationError(
+                f"'{navigation}' is not a navigation property of {entity_set}; "
+                f"expected one of: {', '.join(sorted(names)) or '(none)'}"
+            )
+    return paths
+
+
+def _rows(data: Dict[str, Any], version: str) -> List[Dict[str, Any]]:
+    """Entities of a query or single entity response"""
+    body = data if version == "v4" else data.get("d", {})
+    if isinstance(body, list):
+        return body
+    if "results" in body:
+        return list(body["results"])
+    if "value" in body:
+        return list(body["value"])
+    return [body] if body else []
+
+
+def _children(data: Any, version: str) -> Any:
+    """Navigation content as it appears when expanded inline"""
+    if not isinstance(data, dict):
+        return data
+    if version == "v4":
+        if "value" in data:
+            return data["value"]
+        return {k: v for k, v in data.items() if k != "@odata.context"}
+    return data.get("d", data)
+
+
+def _is_deferred(row: Dict[str, Any], navigation: str, version: str) -> bool:
+    value = row.get(navigation)
+    if version == "v4":
+        return navigation not in row
+    return isinstance(value, dict) and "__deferred" in value
+
+
+def _key_names(
+    service: ServiceConfig, entity_set: str, entity_model: Optional[EntitySetModel]
+) -> List[str]:
+    if entity_model is not None and entity_model.keys:
+        return entity_model.key_names
+    entity = service.get_entity(entity_set)
+    return [entity.key_field] if entity is not None else []
+
+
+def _entity_resource(
+    row: Dict[str, Any],
+    service: ServiceConfig,
+    entity_set: str,
+    entity_model: Optional[EntitySetModel],
+) -> str:
+    """Path of an entity below the service, from its URI or key properties"""
+    uri = row.get("__metadata", {}).get("uri") or row.get("@odata.id")
+    if uri and f"{service.path}/" in uri:
+        return uri.split(f"{service.path}/", 1)[1]
+    key = key_of(row, _key_names(service, entity_set, entity_model))
+    if key is None:
+        raise SAPValidationError(
+            f"Cannot read navigations of {entity_set}: rows carry neither a URI nor the key"
+        )
+    keys = entity_model.keys if entity_model is not None else ()
+    return f"{entity_set}({format_key(key, keys, service.version)})"
+
+
+def _with_navigations(
+    select_fields: Optional[List[str]],
+    inline: List[str],
+    service: ServiceConfig,
+    key_names: List[str],
+) -> Optional[List[str]]:
+    """$select for an expanded request
+
+    Expanded navigations must be selected too, and on v4 (no __metadata
+    URI) the key is needed to read the children of each row.
+    """
+    if not select_fields:
+        return select_fields
+    extra = [path.split("/", 1)[0] for path in inline]
+    if service.version == "v4":
+        extra.extend(key_names)
+    return select_fields + [name for name in dict.fromkeys(extra) if name not in select_fields]
+
+
+async def fetch_navigations(
+    client: "SAPClient",
+    service: ServiceConfig,
+    entity_set: str,
+    rows: List[Dict[str, Any]],
+    paths: List[str],
+) -> None:
+    """Fetch navigations of rows with $batch GETs and set them on the rows
+
+    Raises:
+        SAPRequestError: If a read of a navigation failed
+    """
+    nested: Dict[str, List[str]] = {}
+    for path in paths:
+        navigation, _, rest = path.partition("/")
+        nested.setdefault(navigation, [])
+        if rest:
+            nested[navigation].append(rest)
+
+    entity_model = await get_entity_set_model(client, service.path, entity_set)
+    reads: List[Tuple[Dict[str, Any], str, BatchOperation]] = []
+    for row in rows:
+        resource = _entity_resource(row, service, entity_set, entity_model)
+        for navigation, expand in nested.items():
+            params = {"$expand": ",".join(expand)} if expand else {}
+            reads.append(
+                (row, navigation, BatchOperation("GET", resource, navigation=navigation, params=params))
+            )
+
+    semaphore = asyncio.Semaphore(client.config.batch_parallelism)
+    chunk_size = client.config.batch_size
+
+    async def run_chunk(chunk: List[Tuple[Dict[str, Any], str, BatchOperation]]) -> None:
+        async with semaphore:
+            responses = await client.execute_batch(
+                service.path, [[operation] for _, _, operation in chunk]
+            )
+        for (row, navigation, operation), (response,) in zip(chunk, responses, strict=True):
+            if not response.ok:
+                raise SAPRequestError(
+                    f"Reading {operation.resource} failed: {response.error_message()}",
+                    status_code=response.status,
+                )
+            row[navigation] = _children(response.json(), service.version)
+
+    await asyncio.gather(
+        *(run_chunk(reads[start:start + chunk_size]) for start in range(0, len(reads), chunk_size))
+    )
+    for navigation in nested:
+        SAP_NAVIGATION_FETCHES.inc(len(rows), entity=entity_set, navigation=navigation, mode="batch")
+
+
+async def _read_expanded(
+    client: "SAPClient",
+    service: ServiceConfig,
+    entity_set: str,
+    paths: List[str],
+    select_fields: Optional[List[str]],
+    send: Callable[[Optional[List[str]], Optional[List[str]]], Awaitable[Dict[str, Any]]],
+) -> Tuple[Dict[str, Any], List[str]]:
+    def memo_key(path: str) -> Tuple[Hashable, str, str, str]:
+        return (client.balancer.name, service.path, entity_set, path.split("/", 1)[0])
+
+    with _lock:
+        batched = [path for path in paths if memo_key(path) in _not_expandable]
+    inline = [path for path in paths if path not in batched]
+    key_names: List[str] = []
+    if service.version == "v4" and select_fields:
+        key_names = _key_names(
+            service, entity_set, await get_entity_set_model(client, service.path, entity_set)
+        )
+
+    data: Optional[Dict[str, Any]] = None
+    if inline:
+        try:
+            data = await send(inline, _with_navigations(select_fields, inline, service, key_names))
+        except SAPRequestError as e:
+            if e.status_code not in _EXPAND_REJECTED:
+                raise
+            logger.warning(f"$expand={','.join(inline)} on {entity_set} failed, reading with $batch: {e}")
+            data = await send(None, _with_navigations(select_fields, [], service, key_names))
+            batched, inline = batched + inline, []
+            with _lock:
+                _not_expandable.update(memo_key(path) for path in batched)
+    else:
+        data = await send(None, _with_navigations(select_fields, [], service, key_names))
+
+    rows = _rows(data, service.version)
+    if rows and inline:
+        # Ignored $expand: the navigation came back deferred
+        deferred = [
+            path for path in inline
+            if all(_is_deferred(row, path.split("/", 1)[0], service.version) for row in rows)
+        ]
+        if deferred:
+            logger.info(f"{entity_set} left {','.join(deferred)} deferred, reading with $batch")
+            batched += deferred
+            inline = [path for path in inline if path not in deferred]
+            with _lock:
+                _not_expandable.update(memo_key(path) for path in deferred)
+    for navigation in dict.fromkeys(path.split("/", 1)[0] for path in inline):
+        SAP_NAVIGATION_FETCHES.inc(len(rows), entity=entity_set, navigation=navigation, mode="inline")
+
+    if rows and batched:
+        await fetch_navigations(client, service, entity_set, rows, batched)
+    return data, batched
+
+
+async def query_expanded(
+    client: "SAPClient",
+    service: ServiceConfig,
+    entity_set: str,
+    paths: List[str],
+    filters: Optional[Dict[str, Any]] = None,
+    select_fields: Optional[List[str]] = None,
+    top: Optional[int] = None,
+    skip: Optional[int] = None,
+) -> Tuple[Dict[str, Any], List[str]]:
+    """Query an entity set with the navigation paths expanded
+
+    Returns:
+        The response with the navigations inline, and the paths that were
+        fetched with $batch instead of $expand
+    """
+
+    async def send(expand: Optional[List[str]], select: Optional[List[str]]) -> Dict[str, Any]:
+        return await client.query_entity_set(
+            service.path, entity_set, filters, select, top, skip, expand=expand
+        )
+
+    return await _read_expanded(client, service, entity_set, paths, select_fields, send)
+
+
+async def get_expanded(
+    client: "SAPClient",
+    service: ServiceConfig,
+    entity_set: str,
+    entity_key: KeyValue,
+    paths: List[str],
+    select_fields: Optional[List[str]] = None,
+) -> Tuple[Dict[str, Any], List[str]]:
+    """Read an entity by key with the navigation paths expanded (see query_expanded)"""
+
+    async def send(expand: Optional[List[str]], select: Optional[List[str]]) -> Dict[str, Any]:
+        return await client.get_entity(service.path, entity_set, entity_key, select, expand=expand)
+
+    return await _read_expanded(client, service, entity_set, paths, select_fields, send)
@@ -0,0 +1,126 @@
+"""Optional HTTP/2 transport for SAP Gateway requests
+
+aiohttp only speaks HTTP/1.1, where every concurrent request needs its own
+connection. With SAP_HTTP2=true, SAPClient sends OData requests through an
+httpx client instead, which negotiates HTTP/2 via ALPN and multiplexes
+concurrent requests over one connection per application server. Gateways
+(or plain-http test gateways) that do not offer h2 are spoken to over
+HTTP/1.1 by the same client.
+
+Needs httpx with the h2 package (pip install "httpx[http2]"); without it
+SAPClient logs a warning and stays on aiohttp. Logins and health probes
+always use aiohttp.
+"""
+
+import asyncio
+import ssl
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, Mapping, Optional, Union
+
+from sap_agent.sap_gw_connector.core.exceptions import SAPConnectionError
+
+try:
+    import h2  # noqa: F401
+    import httpx
+except ImportError:  # pragma: no cover - optional dependency
+    httpx = None  # type: ignore[assignment]
+
+HTTP2_AVAILABLE = httpx is not None
+
+
+class HTTP2Response:
+    """Fully read httpx response, with the parts of aiohttp's API SAPClient uses"""
+
+    def __init__(
+        self,
+        status: int,
+        headers: Mapping[str, str],
+        body: bytes,
+        encoding: Optional[str],
+        wire_bytes: int,
+        http_version: str,
+    ):
+        self.status = status
+        self.headers = headers
+        self.http_version = http_version
+        self.wire_bytes = wire_bytes
+        self._body = body
+        self._encoding = encoding or "utf-8"
+
+    async def read(self) -> bytes:
+        return self._body
+
+    async def text(self) -> str:
+        return self._body.decode(self._encoding, errors="replace")
+
+
+class HTTP2Session:
+    """httpx client shared by the requests of one SAPClient"""
+
+    def __init__(
+        self,
+        ssl_context: Union[ssl.SSLContext, bool],
+        timeout: float,
+        max_connections: int,
+    ):
+        if httpx is None:
+            raise RuntimeError("HTTP/2 needs httpx[http2]: pip install 'httpx[http2]'")
+        self._client = httpx.AsyncClient(
+            http2=True,
+            verify=ssl_context,
+            timeout=timeout,
+            limits=httpx.Limits(max_connections=max_connections),
+            follow_redirects=True,
+        )
+
+    @property
+    def closed(self) -> bool:
+        return self._client.is_closed
+
+    @asynccontextmanager
+    async def request(
+        self,
+        method: str,
+        url: str,
+        headers: Dict[str, str],
+        data: Optional[str] = None,
+        params: Optional[Dict[str, str]] = None,
+        cookies: Optional[Dict[str, str]] = None,
+    ) -> AsyncIterator[HTTP2Response]:
+        """Send a request and read the (decompressed) body
+
+        Timeouts raise asyncio.TimeoutError like aiohttp does.
+
+        Raises:
+            SAPConnectionError: If the connection failed
+        """
+        headers = dict(headers)
+        if cookies:
+            # Per-request cookies, as every application server has its own login
+            headers["Cookie"] = "; ".join(f"{name}={value}" for name, value in cookies.items())
+        try:
+            async with self._client.stream(
+                method, url, headers=headers, content=data, params=params or None
+            ) as response:
+                body = await response.aread()
+                result = HTTP2Response(
+                    response.status_code,
+                    response.headers,
+                    body,
+                    response.encoding,
+                    response.num_bytes_downloaded,
+                    response.http_version,
+                )
+        except httpx.TimeoutException as e:
+            raise asyncio.TimeoutError(str(e)) from e
+        except httpx.ConnectError as e:
+            raise SAPConnectionError(
+                f"Connection error: {str(e)}", response_data={"not_sent": True}
+            ) from e
+        except httpx.HTTPError as e:
+            raise SAPConnectionError(f"Connection error: {str(e)}") from e
+        yield result
+
+    async def close(self) -> None:
+        await self._client.aclose()
+
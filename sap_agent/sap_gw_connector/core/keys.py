@@ -0,0 +1,200 @@
+"""OData key predicates with typed and composite keys
+
+format_key() builds the key predicate of an entity URL from the key
+properties of the entity set and their EDM types (from $metadata, see
+metadata.py), so composite-key entities are read by key instead of with a
+filtered query:
+
+- single key: ('4500000010'), (10), (guid'...'), (datetime'2024-05-01T00:00:00')
+- composite key: (Carrid='LH',Connid='0400',Fldate=datetime'2024-05-01T00:00:00')
+
+A key is a single value, a dict of key property values, or a string in
+predicate form: Ebeln='4500000010',Ebelp='00010' (values may be unquoted,
+they are typed from $metadata, or sent as strings without it). Literals
+follow the OData version: type suffixes and guid/datetime prefixes on v2,
+plain literals on v4.
+
+Example:
+    >>> format_key("Carrid=LH,Connid=0400", [("Carrid", "Edm.String"), ("Connid", "Edm.String")])
+    "Carrid='LH',Connid='0400'"
+    >>> format_key(17, [("Bookid", "Edm.Int32")])
+    '17'
+"""
+
+import re
+import uuid
+from datetime import datetime, timezone
+from decimal import Decimal, InvalidOperation
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+
+from sap_agent.sap_gw_connector.core.exceptions import SAPValidationError
+from sap_agent.sap_gw_connector.core.odata_filter import parse_timestamp
+
+KeyValue = Union[str, int, float, Decimal, bool, datetime, uuid.UUID, Dict[str, Any]]
+
+_INTEGER_TYPES = {"Edm.Byte", "Edm.SByte", "Edm.Int16", "Edm.Int32"}
+# Literal suffixes of OData v2
+_V2_SUFFIXES = {"Edm.Int64": "L", "Edm.Decimal": "M", "Edm.Double": "d", "Edm.Single": "f"}
+_PREFIXED_LITERAL = re.compile(r"^(?:datetime|datetimeoffset|guid|time)'(.*)'$", re.IGNORECASE)
+_NAME_PATTERN = re.compile(r"^\s*([A-Za-z_][A-Za-z0-9_]*)\s*=(.*)$", re.DOTALL)
+
+
+def _split_outside_quotes(text: str, separator: str) -> List[str]:
+    parts: List[str] = []
+    current: List[str] = []
+    in_quotes = False
+    for char in text:
+        if char == "'":
+            in_quotes = not in_quotes
+        if char == separator and not in_quotes:
+            parts.append("".join(current))
+            current = []
+        else:
+            current.append(char)
+    parts.append("".join(current))
+    return parts
+
+
+def _unquote(literal: str) -> str:
+    literal = literal.strip()
+    prefixed = _PREFIXED_LITERAL.match(literal)
+    if prefixed:
+        return prefixed.group(1)
+    if len(literal) >= 2 and literal.startswith("'") and literal.endswith("'"):
+        return literal[1:-1].replace("''", "'")
+    return literal
+
+
+def parse_key(text: str, names: Sequence[str]) -> Union[str, Dict[str, str]]:
+    """Key values of a key string: a dict for predicate form, else the value
+
+    With key property names, only Name=value pairs of those names make the
+    predicate form, so a single string key may itself contain '='. Without
+    them (no $metadata), any list of Name=value pairs does.
+    """
+    text = text.strip()
+    if text.startswith("(") and text.endswith(")"):
+        text = text[1:-1]
+    pairs = [_NAME_PATTERN.match(part) for part in _split_outside_quotes(text, ",")]
+    if all(match is not None and (not names or match.group(1) in names) for match in pairs):
+        return {match.group(1): _unquote(match.group(2)) for match in pairs if match is not None}
+    return _unquote(text)
+
+
+def _invalid(name: str, value: Any, edm_type: str) -> SAPValidationError:
+    return SAPValidationError(f"Key {name}: {value!r} is not a valid {edm_type}")
+
+
+def format_literal(value: Any, edm_type: str = "Edm.String", version: str = "v2", name: str = "key") -> str:
+    """URI literal of a key value of an EDM type
+
+    Raises:
+        SAPValidationError: If the value cannot be converted to the type
+    """
+    if value is None:
+        raise SAPValidationError(f"Key {name} has no value")
+    v2 = version != "v4"
+    try:
+        if edm_type in _INTEGER_TYPES:
+            return str(int(str(value)))
+        if edm_type == "Edm.Int64":
+            return f"{int(str(value).rstrip('Ll'))}{'L' if v2 else ''}"
+        if edm_type in ("Edm.Decimal", "Edm.Double", "Edm.Single"):
+            number = Decimal(str(value).rstrip("MmDdFf"))
+            if not number.is_finite():
+                raise _invalid(name, value, edm_type)
+            return f"{number}{_V2_SUFFIXES[edm_type] if v2 else ''}"
+    except (ValueError, InvalidOperation) as e:
+        raise _invalid(name, value, edm_type) from e
+    if edm_type == "Edm.Boolean":
+        text = str(value).lower()
+        if text not in ("true", "false"):
+            raise _invalid(name, value, edm_type)
+        return text
+    if edm_type == "Edm.Guid":
+        try:
+            guid = str(uuid.UUID(str(value)))
+        except ValueError as e:
+            raise _invalid(name, value, edm_type) from e
+        return f"guid'{guid}'" if v2 else guid
+    if edm_type in ("Edm.DateTime", "Edm.DateTimeOffset", "Edm.Date"):
+        timestamp = parse_timestamp(value)
+        if timestamp is None:
+            raise _invalid(name, value, edm_type)
+        timestamp = timestamp.astimezone(timezone.utc)
+        if edm_type == "Edm.Date":
+            return timestamp.date().isoformat()
+        if edm_type == "Edm.DateTime":
+            # SAP expects the UTC time without an offset
+            return f"datetime'{timestamp.replace(tzinfo=None).isoformat()}'"
+        text = timestamp.isoformat().replace("+00:00", "Z")
+        return f"datetimeoffset'{text}'" if v2 else text
+    if edm_type == "Edm.Time" and v2:
+        text = str(value)
+        if not text.startswith("PT"):
+            match = re.fullmatch(r"(\d{1,2}):(\d{2})(?::(\d{2}))?", text)
+            if not match:
+                raise _invalid(name, value, edm_type)
+            hours, minutes, seconds = match.group(1), match.group(2), match.group(3) or "00"
+            text = f"PT{int(hours):02d}H{minutes}M{seconds}S"
+        return f"time'{text}'"
+    if edm_type == "Edm.TimeOfDay":
+        return str(value)
+    return "'" + str(value).replace("'", "''") + "'"
+
+
+def format_key(
+    key: KeyValue,
+    properties: Sequence[Tuple[str, str]],
+    version: str = "v2",
+) -> str:
+    """Key predicate (without parentheses) of an entity
+
+    Args:
+        key: A single value, a dict of key property values, or a string in
+            predicate form
+        properties: (name, EDM type) of the key properties; if empty (no
+            $metadata) all values are formatted as strings
+
+    Raises:
+        SAPValidationError: If key properties are missing, unknown or of
+            the wrong type
+    """
+    names = [name for name, _ in properties]
+    if isinstance(key, str):
+        key = parse_key(key, names)
+    if not properties:
+        if isinstance(key, dict):
+            return ",".join(f"{name}={format_literal(value, name=name)}" for name, value in key.items())
+        return format_literal(key)
+
+    if not isinstance(key, dict):
+        if len(properties) > 1:
+            raise SAPValidationError(
+                f"Composite key: give a value for each of {', '.join(names)}, "
+                f"such as {','.join(f'{name}=...' for name in names)}"
+            )
+        name, edm_type = properties[0]
+        return format_literal(key, edm_type, version, name)
+
+    unknown = [name for name in key if name not in names]
+    missing = [name for name in names if name not in key]
+    if unknown or missing:
+        raise SAPValidationError(
+            f"Key must have exactly the properties {', '.join(names)}"
+            + (f"; missing {', '.join(missing)}" if missing else "")
+            + (f"; unknown {', '.join(unknown)}" if unknown else "")
+        )
+    if len(properties) == 1:
+        name, edm_type = properties[0]
+        return format_literal(key[name], edm_type, version, name)
+    return ",".join(
+        f"{name}={format_literal(key[name], edm_type, version, name)}" for name, edm_type in properties
+    )
+
+
+def key_of(row: Dict[str, Any], names: Sequence[str]) -> Optional[Dict[str, Any]]:
+    """Key values of an entity, None if it lacks a key property"""
+    if not names or any(name not in row for name in names):
+        return None
+    return {name: row[name] for name in names}
@@ -0,0 +1,276 @@
+"""Application server selection for SAP systems
+
+Requests to a system are spread over its application servers:
+
+- least_outstanding: the server with the fewest requests in flight (ties go
+  to the lower latency)
+- latency_weighted: random choice weighted by 1 / (latency x (in flight + 1)),
+  using an exponentially weighted moving average of request latency
+
+A server whose request fails at the transport level (connection error or
+timeout) is taken out of rotation. After `health_check_interval` seconds it
+is probed with a GET of `health_check_path` and returns to rotation once the
+probe gets any response below 500. If every server is down, the one that
+failed longest ago is tried anyway.
+
+Load balancers are shared by all clients in the process, keyed by system.
+"""
+
+import asyncio
+import logging
+import random
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import aiohttp
+
+from sap_agent.sap_gw_connector.core.exceptions import (
+    SAPConnectionError,
+    SAPTimeoutError,
+)
+from sap_agent.sap_gw_connector.observability.metrics import (
+    SAP_SERVER_IN_FLIGHT,
+    SAP_SERVER_UP,
+)
+
+logger = logging.getLogger(__name__)
+
+STRATEGIES = ("least_outstanding", "latency_weighted")
+# Weight of the newest sample in the latency moving average
+LATENCY_DECAY = 0.2
+PROBE_TIMEOUT = 5.0
+
+
+class ServerState:
+    """Load and health of one application server"""
+
+    def __init__(self, host: str, port: int, scheme: str):
+        self.host = host
+        self.port = port
+        self.name = f"{host}:{port}"
+        self.base_url = f"{scheme}://{host}:{port}"
+        self.outstanding = 0
+        self.latency: Optional[float] = None
+        self.healthy = True
+        self.failed_at = 0.0
+        self.requests = 0
+        self.failures = 0
+
+
+class LoadBalancer:
+    """Picks application servers of one SAP system and tracks their health"""
+
+    def __init__(
+        self,
+        name: str,
+        servers: Sequence[Tuple[str, int]],
+        scheme: str = "https",
+        strategy: str = "least_outstanding",
+        health_check_path: str = "/sap/public/ping",
+        health_check_interval: float = 30.0,
+    ):
+        if strategy not in STRATEGIES:
+            raise ValueError(f"Unknown load balancing strategy: {strategy}")
+        self.name = name
+        self.strategy = strategy
+        self.health_check_path = health_check_path
+        self.health_check_interval = health_check_interval
+        self.servers = [ServerState(host, port, scheme) for host, port in servers]
+        if not self.servers:
+            raise ValueError(f"SAP system '{name}' has no application servers")
+        self._lock = threading.Lock()
+        for server in self.servers:
+            SAP_SERVER_UP.set(1, system=self.name, server=server.name)
+
+    @property
+    def primary(self) -> ServerState:
+        """The first configured server, which request URLs are built against"""
+        return self.servers[0]
+
+    def url_for(self, server: ServerState, url: str) -> str:
+        """Point a URL built against any server of the system at `server`
+
+        Request URLs are built against the primary server, but next links
+        returned by SAP name the server that answered.
+        """
+        for other in self.servers:
+            if other is not server and url.startswith(other.base_url + "/"):
+                return server.base_url + url[len(other.base_url):]
+        return url
+
+    def pick(self) -> ServerState:
+        """Choose the server for the next request"""
+        with self._lock:
+            candidates = [server for server in self.servers if server.healthy]
+            if not candidates:
+                return min(self.servers, key=lambda server: server.failed_at)
+            return self._choose(candidates)
+
+    def pick_other(self, server: ServerState) -> Optional[ServerState]:
+        """Choose a healthy server other than server, None if there is none"""
+        with self._lock:
+            candidates = [
+                other for other in self.servers if other.healthy and other is not server
+            ]
+            return self._choose(candidates) if candidates else None
+
+    def _choose(self, candidates: List[ServerState]) -> ServerState:
+        if len(candidates) == 1:
+            return candidates[0]
+        if self.strategy == "least_outstanding":
+            return min(
+                candidates,
+                key=lambda server: (server.outstanding, server.latency or 0.0, random.random()),
+            )
+        known = [server.latency for server in candidates if server.latency is not None]
+        # Servers without samples yet are treated as the fastest
+        default = min(known) if known else 1.0
+        weights = [
+            1.0 / (max(server.latency or default, 1e-6) * (server.outstanding + 1))
+            for server in candidates
+        ]
+        return random.choices(candidates, weights=weights)[0]
+
+    @contextmanager
+    def track(self, server: ServerState) -> Iterator[None]:
+        """Count a request in flight on a server and record its outcome"""
+        with self._lock:
+            server.outstanding += 1
+            server.requests += 1
+        SAP_SERVER_IN_FLIGHT.inc(system=self.name, server=server.name)
+        start = time.perf_counter()
+        try:
+            yield
+        except (SAPConnectionError, SAPTimeoutError) as e:
+            self.mark_down(server, str(e))
+            raise
+        else:
+            self._record_latency(server, time.perf_counter() - start)
+        finally:
+            with self._lock:
+                server.outstanding -= 1
+            SAP_SERVER_IN_FLIGHT.dec(system=self.name, server=server.name)
+
+    def _record_latency(self, server: ServerState, seconds: float) -> None:
+        with self._lock:
+            if server.latency is None:
+                server.latency = seconds
+            else:
+                server.latency += LATENCY_DECAY * (seconds - server.latency)
+
+    def mark_down(self, server: ServerState, reason: str = "") -> None:
+        """Take a server out of rotation until a health probe succeeds"""
+        with self._lock:
+            server.failures += 1
+            server.failed_at = time.monotonic()
+            if not server.healthy:
+                return
+            server.healthy = False
+        SAP_SERVER_UP.set(0, system=self.name, server=server.name)
+        logger.warning(f"SAP server {server.name} of system {self.name} is down: {reason}")
+
+    def _mark_up(self, server: ServerState) -> None:
+        with self._lock:
+            if server.healthy:
+                return
+            server.healthy = True
+        SAP_SERVER_UP.set(1, system=self.name, server=server.name)
+        logger.info(f"SAP server {server.name} of system {self.name} is back up")
+
+    def due_for_probe(self) -> List[ServerState]:
+        """Down servers whose health check is due; claims the probe"""
+        now = time.monotonic()
+        due = []
+        with self._lock:
+            for server in self.servers:
+                if not server.healthy and now - server.failed_at >= self.health_check_interval:
+                    # Restart the interval so concurrent callers do not probe too
+                    server.failed_at = now
+                    due.append(server)
+        return due
+
+    async def probe(
+        self, session: aiohttp.ClientSession, servers: Sequence[ServerState]
+    ) -> Dict[str, bool]:
+        """Health check servers concurrently; returns up/down by server name"""
+
+        async def probe_one(server: ServerState) -> bool:
+            try:
+                async with session.get(
+                    server.base_url + self.health_check_path,
+                    timeout=aiohttp.ClientTimeout(total=PROBE_TIMEOUT),
+                    allow_redirects=False,
+                ) as response:
+                    healthy = response.status < 500
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                logger.debug(f"Health check of {server.name} failed: {e}")
+                healthy = False
+            if healthy:
+                self._mark_up(server)
+            else:
+                self.mark_down(server, "health check failed")
+            return healthy
+
+        results = await asyncio.gather(*(probe_one(server) for server in servers))
+        return {server.name: healthy for server, healthy in zip(servers, results, strict=True)}
+
+    async def check_health(self, session: aiohttp.ClientSession) -> Dict[str, bool]:
+        """Health check every server of the system"""
+        return await self.probe(session, self.servers)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Current load and health for statistics"""
+        with self._lock:
+            return {
+                "strategy": self.strategy,
+                "servers": {
+                    server.name: {
+                        "healthy": server.healthy,
+                        "outstanding": server.outstanding,
+                        "latency": server.latency,
+                        "requests": server.requests,
+                        "failures": server.failures,
+                    }
+                    for server in self.servers
+                },
+            }
+
+
+# Load balancers shared by all clients, keyed by system
+_load_balancers: Dict[str, LoadBalancer] = {}
+_load_balancers_lock = threading.Lock()
+
+
+def get_load_balancer(
+    name: str,
+    servers: Sequence[Tuple[str, int]],
+    scheme: str = "https",
+    strategy: str = "least_outstanding",
+    health_check_path: str = "/sap/public/ping",
+    health_check_interval: float = 30.0,
+) -> LoadBalancer:
+    """Get the load balancer shared by all clients of a system
+
+    A balancer is rebuilt when the system's server list changes.
+    """
+    with _load_balancers_lock:
+        balancer = _load_balancers.get(name)
+        base_urls = [f"{scheme}://{host}:{port}" for host, port in servers]
+        if balancer is None or [server.base_url for server in balancer.servers] != base_urls:
+            balancer = _load_balancers[name] = LoadBalancer(
+                name, servers, scheme, strategy, health_check_path, health_check_interval
+            )
+        else:
+            balancer.strategy = strategy
+            balancer.health_check_path = health_check_path
+            balancer.health_check_interval = health_check_interval
+        return balancer
+
+
+def get_load_balancer_states() -> Dict[str, Dict[str, Any]]:
+    """Snapshot of every load balancer, keyed by system"""
+    with _load_balancers_lock:
+        balancers = list(_load_balancers.values())
+    return {balancer.name: balancer.snapshot() for balancer in balancers}
@@ -0,0 +1,133 @@
+"""Entity set model of an OData service, from its $metadata
+
+ServiceModel keeps what the connector needs from $metadata: the OData
+version and, per entity set, its key properties with their EDM types
+(keys.py formats key predicates from them), its property types and its
+navigation properties (expand.py checks $expand against them).
+
+get_service_model() fetches $metadata once per SAP system and service path
+and keeps the model for the process. If the service answers $metadata
+with an error (or a document that cannot be parsed), it returns None,
+callers fall back to services.yaml, and the fetch is retried after
+METADATA_RETRY_INTERVAL seconds. Connection errors and timeouts are raised.
+"""
+
+import logging
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any, Dict, FrozenSet, Hashable, List, Optional, Tuple
+
+from sap_agent.sap_gw_connector.core.exceptions import SAPRequestError, SAPValidationError
+
+if TYPE_CHECKING:
+    from sap_agent.sap_gw_connector.core.sap_client import SAPClient
+
+logger = logging.getLogger(__name__)
+
+# Seconds before a failed $metadata fetch is tried again
+METADATA_RETRY_INTERVAL = 300.0
+
+
+@dataclass(frozen=True)
+class EntitySetModel:
+    """Keys, properties and navigations of an entity set"""
+
+    name: str
+    # (name, EDM type) of the key properties, in $metadata order
+    keys: Tuple[Tuple[str, str], ...]
+    properties: Dict[str, str] = field(default_factory=dict)
+    navigations: FrozenSet[str] = frozenset()
+
+    @property
+    def key_names(self) -> List[str]:
+        return [name for name, _ in self.keys]
+
+
+@dataclass
+class ServiceModel:
+    """Entity sets of a service"""
+
+    version: str
+    entity_sets: Dict[str, EntitySetModel]
+
+
+def _as_list(value: Any) -> List[Any]:
+    if value is None:
+        return []
+    return value if isinstance(value, list) else [value]
+
+
+def parse_service_model(metadata: Dict[str, Any]) -> ServiceModel:
+    """Model of a service from its $metadata as parsed by xmltodict"""
+    edmx = metadata.get("edmx:Edmx", {})
+    version = "v4" if str(edmx.get("@Version", "1.0")).startswith("4") else "v2"
+    schemas = _as_list(edmx.get("edmx:DataServices", {}).get("Schema"))
+
+    types: Dict[str, Dict[str, Any]] = {}
+    for schema in schemas:
+        for entity_type in _as_list(schema.get("EntityType")):
+            types[entity_type.get("@Name", "")] = entity_type
+
+    entity_sets: Dict[str, EntitySetModel] = {}
+    for schema in schemas:
+        for container in _as_list(schema.get("EntityContainer")):
+            for entity_set in _as_list(container.get("EntitySet")):
+                type_name = entity_set.get("@EntityType", "").rsplit(".", 1)[-1]
+                entity_type = types.get(type_name, {})
+                properties = {
+                    prop.get("@Name", ""): prop.get("@Type", "Edm.String")
+                    for prop in _as_list(entity_type.get("Property"))
+                }
+                key_refs = _as_list((entity_type.get("Key") or {}).get("PropertyRef"))
+                keys = tuple(
+                    (ref.get("@Name", ""), properties.get(ref.get("@Name", ""), "Edm.String"))
+                    for ref in key_refs
+                )
+                navigations = frozenset(
+                    nav.get("@Name", "") for nav in _as_list(entity_type.get("NavigationProperty"))
+                )
+                name = entity_set.get("@Name", "")
+                entity_sets[name] = EntitySetModel(name, keys, properties, navigations)
+    return ServiceModel(version=version, entity_sets=entity_sets)
+
+
+# Models by (system, service path), and the time of failed fetches
+_models: Dict[Tuple[Hashable, str], ServiceModel] = {}
+_failed_at: Dict[Tuple[Hashable, str], float] = {}
+_lock = threading.Lock()
+
+
+async def get_service_model(client: "SAPClient", service_path: str) -> Optional[ServiceModel]:
+    """Model of a service, None if the service does not return its $metadata
+
+    Raises:
+        SAPConnectionError, SAPTimeoutError: If SAP cannot be reached
+    """
+    key = (client.balancer.name, service_path)
+    with _lock:
+        model = _models.get(key)
+        failed_at = _failed_at.get(key)
+    if model is not None:
+        return model
+    if failed_at is not None and time.monotonic() - failed_at < METADATA_RETRY_INTERVAL:
+        return None
+    try:
+        model = parse_service_model(await client.get_service_metadata(service_path))
+    except (SAPRequestError, SAPValidationError) as e:
+        logger.warning(f"Cannot read $metadata of {service_path}, using services.yaml: {e}")
+        with _lock:
+            _failed_at[key] = time.monotonic()
+        return None
+    with _lock:
+        _models[key] = model
+        _failed_at.pop(key, None)
+    return model
+
+
+async def get_entity_set_model(
+    client: "SAPClient", service_path: str, entity_set: str
+) -> Optional[EntitySetModel]:
+    """Model of an entity set, None if unknown or $metadata cannot be read"""
+    model = await get_service_model(client, service_path)
+    return model.entity_sets.get(entity_set) if model is not None else None
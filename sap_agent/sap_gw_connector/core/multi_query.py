@@ -0,0 +1,271 @@
+"""Concurrent entity set reads for one tool call
+
+Answering a question often takes several independent reads, such as an
+order, its customer and the stock of its material. sap_multi_query sends
+them in one tool call instead of one LLM round trip each: run_reads() runs
+the reads concurrently, with one SAPClient per SAP system shared by the
+reads of all its services (one session, login and connection pool), and at
+most max_parallel reads per system in flight (multi_query_parallelism by
+default).
+
+A read is a query, planned like sap_query (see query_planner.py), or a read
+by key like sap_get_entity; both are answered from local replicas where
+those tools would be. A failed read is reported in its result and does not
+stop the others.
+
+Example:
+    >>> [spec.operation for spec in parse_reads([
+    ...     {"service": "sales", "entity_set": "OrderSet", "entity_key": "91000092"},
+    ...     {"service": "stock", "entity_set": "StockSet", "filter": "Matnr eq 'M-01'"},
+    ... ])]
+    ['get', 'query']
+"""
+
+import asyncio
+import logging
+import time
+from contextlib import AsyncExitStack
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional
+
+from sap_agent.sap_gw_connector.config.schemas import ServiceConfig, ServicesYAMLConfig
+from sap_agent.sap_gw_connector.core.exceptions import SAPValidationError
+from sap_agent.sap_gw_connector.core.expand import expand_paths, get_expanded
+from sap_agent.sap_gw_connector.core.query_planner import QueryPlan, execute_plan, plan_query
+from sap_agent.sap_gw_connector.core.sap_client import SAPClient
+from sap_agent.sap_gw_connector.replica.reads import read_entity, read_query
+
+logger = logging.getLogger(__name__)
+
+# Reads accepted in one call
+MAX_READS = 20
+
+_OPERATIONS = ("query", "get")
+
+
+@dataclass
+class ReadSpec:
+    """One read of a multi-entity call
+
+    Attributes:
+        operation: "query" (sap_query) or "get" (sap_get_entity by key)
+        id: Name of the read in the combined result (defaults to its index)
+    """
+
+    operation: str
+    service: str
+    entity_set: str
+    id: str
+    filter: Optional[str] = None
+    select: Optional[List[str]] = None
+    top: Optional[int] = None
+    skip: Optional[int] = None
+    expand: Optional[str] = None
+    entity_key: Optional[str] = None
+    format: str = "json_compact"
+
+    @classmethod
+    def from_dict(cls, spec: Dict[str, Any], index: int = 0) -> "ReadSpec":
+        """Read from its tool call form; a read with an entity_key defaults to get
+
+        Raises:
+            SAPValidationError: If the read is incomplete or of an unknown operation
+        """
+        operation = spec.get("operation") or ("get" if spec.get("entity_key") else "query")
+        if operation not in _OPERATIONS:
+            raise SAPValidationError(
+                f"Read {index}: unknown operation '{operation}'; expected one of: "
+                f"{', '.join(_OPERATIONS)}"
+            )
+        missing = [name for name in ("service", "entity_set") if not spec.get(name)]
+        if operation == "get" and not spec.get("entity_key"):
+            missing.append("entity_key")
+        if missing:
+            raise SAPValidationError(f"Read {index}: missing {', '.join(missing)}")
+        select = spec.get("select")
+        return cls(
+            operation=operation,
+            service=spec["service"],
+            entity_set=spec["entity_set"],
+            id=str(spec.get("id", index)),
+            filter=spec.get("filter"),
+            select=[name.strip() for name in select.split(",") if name.strip()] if select else None,
+            top=spec.get("top"),
+            skip=spec.get("skip"),
+            expand=spec.get("expand"),
+            entity_key=spec.get("entity_key"),
+            format=spec.get("format", "json_compact"),
+        )
+
+
+def parse_reads(specs: List[Dict[str, Any]]) -> List[ReadSpec]:
+    """Reads of a tool call
+
+    Raises:
+        SAPValidationError: If there are no reads, too many, or an invalid one
+    """
+    if not specs:
+        raise SAPValidationError("No reads given")
+    if len(specs) > MAX_READS:
+        raise SAPValidationError(f"{len(specs)} reads given; at most {MAX_READS} per call")
+    reads = [ReadSpec.from_dict(spec, index) for index, spec in enumerate(specs)]
+    ids = [read.id for read in reads]
+    duplicates = sorted({read_id for read_id in ids if ids.count(read_id) > 1})
+    if duplicates:
+        raise SAPValidationError(f"Duplicate read ids: {', '.join(duplicates)}")
+    return reads
+
+
+@dataclass
+class ReadResult:
+    """Outcome of one read"""
+
+    spec: ReadSpec
+    data: Optional[Dict[str, Any]] = None
+    # Plan of a query
+    plan: Optional[QueryPlan] = None
+    # "replica" when answered from a local replica
+    source: str = "sap"
+    error: Optional[str] = None
+    duration: float = 0.0
+
+    @property
+    def success(self) -> bool:
+        return self.error is None
+
+    def to_dict(
+        self, transform: Callable[[Dict[str, Any], str], Dict[str, Any]]
+    ) -> Dict[str, Any]:
+        """Result as sap_query or sap_get_entity would report it
+
+        Args:
+            transform: The query tool's response transformation (format)
+        """
+        spec = self.spec
+        result: Dict[str, Any] = {
+            "id": spec.id,
+            "operation": spec.operation,
+            "service": spec.service,
+            "entity_set": spec.entity_set,
+            "success": self.success,
+            "duration": round(self.duration, 3),
+        }
+        if self.error is not None:
+            result["error"] = self.error
+            return result
+        assert self.data is not None
+        if spec.operation == "get":
+            result["entity_key"] = spec.entity_key
+            result["data"] = self.data
+        else:
+            result.update(transform(self.data, spec.format))
+            if self.plan is not None:
+                result["plan"] = self.plan.explain()
+        if self.source == "replica":
+            result["source"] = "replica"
+        return result
+
+
+async def _query(client: SAPClient, service: ServiceConfig, result: ReadResult) -> None:
+    spec = result.spec
+    plan = plan_query(
+        service, spec.entity_set, spec.filter, spec.select, spec.top, spec.skip,
+        client.config.query_max_top, spec.expand,
+    )
+    data = None
+    if not plan.expand:
+        data = await read_query(service, plan.entity_set, plan.filter, plan.select, plan.top, plan.skip)
+    if data is not None:
+        plan.strategy = "replica"
+        result.source = "replica"
+    else:
+        data = await execute_plan(client, plan)
+    result.data, result.plan = data, plan
+
+
+async def _get(client: SAPClient, service: ServiceConfig, result: ReadResult) -> None:
+    spec = result.spec
+    assert spec.entity_key is not None
+    if service.get_entity(spec.entity_set) is None:
+        raise SAPValidationError(
+            f"Entity set '{spec.entity_set}' not found in service '{spec.service}'. "
+            f"Available: {', '.join(e.name for e in service.entities)}"
+        )
+    if not spec.expand:
+        cached = await read_entity(service, spec.entity_set, spec.entity_key, spec.select)
+        if cached is not None:
+            result.data, result.source = cached, "replica"
+            return
+    paths = await expand_paths(client, service, spec.entity_set, spec.expand)
+    if paths:
+        result.data, _ = await get_expanded(
+            client, service, spec.entity_set, spec.entity_key, paths, spec.select
+        )
+    else:
+        result.data = await client.get_entity(service.path, spec.entity_set, spec.entity_key, spec.select)
+
+
+async def run_reads(
+    services_config: ServicesYAMLConfig,
+    reads: List[ReadSpec],
+    max_parallel: Optional[int] = None,
+) -> List[ReadResult]:
+    """Run reads concurrently, at most max_parallel per SAP system at once
+
+    Returns:
+        The result of every read, in the order of the reads
+    """
+    results = [ReadResult(spec) for spec in reads]
+    services: Dict[int, ServiceConfig] = {}
+    for index, result in enumerate(results):
+        service = services_config.get_service(result.spec.service)
+        if service is None:
+            result.error = (
+                f"Service '{result.spec.service}' not found. "
+                f"Available: {', '.join(services_config.list_service_ids())}"
+            )
+        else:
+            services[index] = service
+
+    async with AsyncExitStack() as stack:
+        # One client and limit per system, shared by the reads of its services
+        clients: Dict[Optional[str], SAPClient] = {}
+        limits: Dict[Optional[str], asyncio.Semaphore] = {}
+        # Systems without a usable connection profile
+        unavailable: Dict[Optional[str], str] = {}
+        for service in services.values():
+            if service.system in clients or service.system in unavailable:
+                continue
+            try:
+                client = await stack.enter_async_context(SAPClient.for_service(service))
+            except Exception as e:
+                unavailable[service.system] = str(e)
+                continue
+            clients[service.system] = client
+            limits[service.system] = asyncio.Semaphore(
+                max_parallel or client.config.multi_query_parallelism
+            )
+
+        async def run(index: int, service: ServiceConfig) -> None:
+            result = results[index]
+            if service.system in unavailable:
+                result.error = unavailable[service.system]
+                return
+            client = clients[service.system]
+            async with limits[service.system]:
+                start = time.perf_counter()
+                try:
+                    if result.spec.operation == "get":
+                        await _get(client, service, result)
+                    else:
+                        await _query(client, service, result)
+                except Exception as e:
+                    logger.warning(
+                        f"Read {result.spec.id} of {result.spec.entity_set} failed: {e}"
+                    )
+                    result.error = str(e)
+                finally:
+                    result.duration = time.perf_counter() - start
+
+        await asyncio.gather(*(run(index, service) for index, service in services.items()))
+    return results
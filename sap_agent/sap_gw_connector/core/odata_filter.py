@@ -0,0 +1,696 @@
+"""OData $filter parser and evaluator
+
+parse_filter turns a $filter expression into an AST; compile_filter turns
+the AST into a predicate over row dicts (or a mask over columnar arrays),
+so filtered queries can be answered from local data (replicas, cached
+results). Filters sent to SAP are not checked here: SAP accepts syntax this
+parser does not (such as the v4 in operator).
+
+Supported:
+
+- Comparisons eq, ne, gt, ge, lt, le; logical and, or, not; parentheses.
+  As in OData, not binds tighter than comparisons: write not (A eq 'x')
+- Arithmetic add, sub, mul, div, mod
+- String literals ('O''Neil'), numbers (with m/d/f/L suffixes), true,
+  false, null, guid'...', and date literals: datetime'...' and
+  datetimeoffset'...' (v2), bare 2024-01-01 / 2024-01-01T10:00:00Z (v4)
+- substringof (v2), contains, startswith, endswith, indexof, length,
+  tolower, toupper, trim, concat, substring, year, month, day, hour,
+  minute, second, round, floor, ceiling
+- Navigation paths (ToCustomer/Name) and any/all lambdas; these parse
+  (for validation), but lambdas cannot be evaluated locally
+
+Row values are compared the way SAP compares the typed properties: a
+number literal compares numerically with a decimal sent as a string, and a
+date literal compares with /Date(ms)/, ISO 8601 or YYYYMMDD values. null
+only equals null; ordering comparisons with null are false.
+
+Example:
+    >>> predicate = compile_filter("Land1 eq 'DE' and not startswith(Name1, 'X')")
+    >>> predicate({"Land1": "DE", "Name1": "ACME"})
+    True
+    >>> sorted(parse_filter("Netwr gt 100 or Waerk eq 'EUR'").properties())
+    ['Netwr', 'Waerk']
+"""
+
+import math
+import re
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    Mapping,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+    Union,
+)
+
+from sap_agent.sap_gw_connector.core.exceptions import ODataFilterError
+
+COMPARISON_OPERATORS = ("eq", "ne", "gt", "ge", "lt", "le")
+ARITHMETIC_OPERATORS = ("add", "sub", "mul", "div", "mod")
+
+
+def parse_timestamp(value: Any) -> Optional[datetime]:
+    """Parse an OData date/time value: /Date(ms)/, ISO 8601 or YYYYMMDD
+
+    Example:
+        >>> parse_timestamp("/Date(1704067200000)/").isoformat()
+        '2024-01-01T00:00:00+00:00'
+    """
+    if isinstance(value, datetime):
+        return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+    if not isinstance(value, str):
+        return None
+    match = re.fullmatch(r"/Date\((-?\d+)(?:[+-]\d+)?\)/", value)
+    if match:
+        return datetime.fromtimestamp(int(match.group(1)) / 1000, tz=timezone.utc)
+    if re.fullmatch(r"\d{8}", value):
+        value = f"{value[:4]}-{value[4:6]}-{value[6:]}"
+    try:
+        parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+# ----------------------------------------------------------------------
+# AST
+# ----------------------------------------------------------------------
+
+
+class Node:
+    """A $filter expression node"""
+
+    def to_odata(self) -> str:
+        raise NotImplementedError
+
+    def children(self) -> Tuple["Node", ...]:
+        return ()
+
+    def properties(self) -> Set[str]:
+        """Properties (or navigation paths) the expression reads"""
+        names: Set[str] = set()
+        for child in self.children():
+            names |= child.properties()
+        return names
+
+    def __str__(self) -> str:
+        return self.to_odata()
+
+
+@dataclass(frozen=True)
+class Literal(Node):
+    """A constant; text is its OData form"""
+
+    value: Any
+    text: str
+
+    def to_odata(self) -> str:
+        return self.text
+
+
+@dataclass(frozen=True)
+class Property(Node):
+    """A property or navigation path (ToCustomer/Name)"""
+
+    path: str
+
+    def to_odata(self) -> str:
+        return self.path
+
+    def properties(self) -> Set[str]:
+        return {self.path}
+
+
+@dataclass(frozen=True)
+class Compare(Node):
+    op: str
+    left: Node
+    right: Node
+
+    def to_odata(self) -> str:
+        return f"{_operand(self.left, 5)} {self.op} {_operand(self.right, 5)}"
+
+    def children(self) -> Tuple[Node, ...]:
+        return (self.left, self.right)
+
+
+@dataclass(frozen=True)
+class Arithmetic(Node):
+    op: str
+    left: Node
+    right: Node
+
+    def to_odata(self) -> str:
+        precedence = _precedence(self)
+        return (
+            f"{_operand(self.left, precedence)} {self.op} "
+            f"{_operand(self.right, precedence + 1)}"
+        )
+
+    def children(self) -> Tuple[Node, ...]:
+        return (self.left, self.right)
+
+
+@dataclass(frozen=True)
+class BoolOp(Node):
+    """and / or"""
+
+    op: str
+    left: Node
+    right: Node
+
+    def to_odata(self) -> str:
+        precedence = _precedence(self)
+        return f"{_operand(self.left, precedence)} {self.op} {_operand(self.right, precedence)}"
+
+    def children(self) -> Tuple[Node, ...]:
+        return (self.left, self.right)
+
+
+@dataclass(frozen=True)
+class Not(Node):
+    operand: Node
+
+    def to_odata(self) -> str:
+        return f"not {_operand(self.operand, 7)}"
+
+    def children(self) -> Tuple[Node, ...]:
+        return (self.operand,)
+
+
+@dataclass(frozen=True)
+class Call(Node):
+    """A function call such as substringof('x', Name)"""
+
+    name: str
+    args: Tuple[Node, ...]
+
+    def to_odata(self) -> str:
+        return f"{self.name}({', '.join(arg.to_odata() for arg in self.args)})"
+
+    def children(self) -> Tuple[Node, ...]:
+        return self.args
+
+
+@dataclass(frozen=True)
+class Lambda(Node):
+    """ToItems/any(i: i/Menge gt 10); parsed but not evaluated locally"""
+
+    path: str
+    op: str
+    variable: Optional[str]
+    predicate: Optional[Node]
+
+    def to_odata(self) -> str:
+        if self.predicate is None:
+            return f"{self.path}/{self.op}()"
+        return f"{self.path}/{self.op}({self.variable}: {self.predicate.to_odata()})"
+
+    def properties(self) -> Set[str]:
+        return {self.path}
+
+
+def _precedence(node: Node) -> int:
+    if isinstance(node, BoolOp):
+        return 1 if node.op == "or" else 2
+    if isinstance(node, Compare):
+        return 4
+    if isinstance(node, Arithmetic):
+        return 5 if node.op in ("add", "sub") else 6
+    if isinstance(node, Not):
+        return 7
+    return 8
+
+
+def _operand(node: Node, minimum: int) -> str:
+    """node.to_odata(), in parentheses if it binds looser than minimum"""
+    text = node.to_odata()
+    return f"({text})" if _precedence(node) < minimum else text
+
+
+def conjuncts(node: Node) -> List[Node]:
+    """The terms of a chain of ands (the node itself if it is not one)
+
+    Example:
+        >>> [str(term) for term in conjuncts(parse_filter("A eq 1 and (B eq 2 and C eq 3)"))]
+        ['A eq 1', 'B eq 2', 'C eq 3']
+    """
+    if isinstance(node, BoolOp) and node.op == "and":
+        return conjuncts(node.left) + conjuncts(node.right)
+    return [node]
+
+
+def conjunction(terms: Sequence[Node]) -> Optional[Node]:
+    """The and of terms, None if there are none"""
+    result: Optional[Node] = None
+    for term in terms:
+        result = term if result is None else BoolOp("and", result, term)
+    return result
+
+
+# ----------------------------------------------------------------------
+# Parser
+# ----------------------------------------------------------------------
+
+_TOKEN_PATTERN = re.compile(
+    r"""
+    (?P<space>\s+)
+    | (?P<typed>(?:datetimeoffset|datetime|guid|time|binary|X)'(?:[^']|'')*')
+    | (?P<string>'(?:[^']|'')*')
+    | (?P<date>\d{4}-\d{2}-\d{2}(?:T\d{2}:\d{2}(?::\d{2}(?:\.\d+)?)?(?:Z|[+-]\d{2}:\d{2})?)?)
+    | (?P<number>-?\d+(?:\.\d+)?(?:[eE][+-]?\d+)?[mMdDfFlL]?)
+    | (?P<name>[A-Za-z_][A-Za-z0-9_.]*(?:/[A-Za-z_$][A-Za-z0-9_.]*)*)
+    | (?P<punct>[(),:])
+    """,
+    re.VERBOSE | re.IGNORECASE,
+)
+
+_Token = Tuple[str, str, int]
+
+
+def _tokenize(text: str) -> List[_Token]:
+    tokens: List[_Token] = []
+    position = 0
+    while position < len(text):
+        match = _TOKEN_PATTERN.match(text, position)
+        if match is None:
+            if text[position] == "'":
+                raise ODataFilterError(f"Unterminated string at position {position}: {text}")
+            raise ODataFilterError(
+                f"Unexpected character {text[position]!r} at position {position}: {text}"
+            )
+        kind = match.lastgroup
+        assert kind is not None
+        if kind != "space":
+            tokens.append((kind, match.group(), position))
+        position = match.end()
+    tokens.append(("end", "", len(text)))
+    return tokens
+
+
+def _literal(kind: str, text: str) -> Literal:
+    if kind == "string":
+        return Literal(text[1:-1].replace("''", "'"), text)
+    if kind == "typed":
+        prefix, _, quoted = text.partition("'")
+        raw = quoted[:-1].replace("''", "'")
+        if prefix.lower() in ("datetime", "datetimeoffset"):
+            value = parse_timestamp(raw)
+            if value is None:
+                raise ODataFilterError(f"Invalid date literal: {text}")
+            return Literal(value, text)
+        if prefix.lower() == "guid":
+            return Literal(raw.lower(), text)
+        return Literal(raw, text)
+    if kind == "date":
+        value = parse_timestamp(text)
+        if value is None:
+            raise ODataFilterError(f"Invalid date literal: {text}")
+        return Literal(value, text)
+    number = text.rstrip("mMdDfFlL")
+    if re.fullmatch(r"-?\d+", number):
+        return Literal(int(number), text)
+    return Literal(float(number), text)
+
+
+_KEYWORD_LITERALS = {"true": True, "false": False, "null": None}
+
+
+class _Parser:
+    def __init__(self, text: str):
+        self.text = text
+        self.tokens = _tokenize(text)
+        self.index = 0
+
+    def _peek(self) -> _Token:
+        return self.tokens[self.index]
+
+    def _next(self) -> _Token:
+        token = self.tokens[self.index]
+        self.index += 1
+        return token
+
+    def _is_keyword(self, *words: str) -> bool:
+        kind, value, _ = self._peek()
+        return kind == "name" and value.lower() in words
+
+    def _expect(self, value: str) -> None:
+        _, text, position = self._next()
+        if text != value:
+            found = text or "end of filter"
+            raise ODataFilterError(f"Expected '{value}' at position {position}, found {found!r}")
+
+    def parse(self) -> Node:
+        node = self._or()
+        kind, value, position = self._peek()
+        if kind != "end":
+            raise ODataFilterError(f"Unexpected {value!r} at position {position}: {self.text}")
+        return node
+
+    def _or(self) -> Node:
+        node = self._and()
+        while self._is_keyword("or"):
+            self._next()
+            node = BoolOp("or", node, self._and())
+        return node
+
+    def _and(self) -> Node:
+        node = self._comparison()
+        while self._is_keyword("and"):
+            self._next()
+            node = BoolOp("and", node, self._comparison())
+        return node
+
+    def _comparison(self) -> Node:
+        node = self._additive()
+        if self._is_keyword(*COMPARISON_OPERATORS):
+            op = self._next()[1].lower()
+            node = Compare(op, node, self._additive())
+        return node
+
+    def _additive(self) -> Node:
+        node = self._multiplicative()
+        while self._is_keyword("add", "sub"):
+            op = self._next()[1].lower()
+            node = Arithmetic(op, node, self._multiplicative())
+        return node
+
+    def _multiplicative(self) -> Node:
+        node = self._unary()
+        while self._is_keyword("mul", "div", "mod"):
+            op = self._next()[1].lower()
+            node = Arithmetic(op, node, self._unary())
+        return node
+
+    def _unary(self) -> Node:
+        if self._is_keyword("not"):
+            self._next()
+            return Not(self._unary())
+        return self._primary()
+
+    def _primary(self) -> Node:
+        kind, value, position = self._next()
+        if kind == "punct" and value == "(":
+            node = self._or()
+            self._expect(")")
+            return node
+        if kind in ("string", "typed", "date", "number"):
+            return _literal(kind, value)
+        if kind != "name":
+            found = value or "end of filter"
+            raise ODataFilterError(f"Expected an operand at position {position}, found {found!r}")
+        if value.lower() in _KEYWORD_LITERALS:
+            return Literal(_KEYWORD_LITERALS[value.lower()], value.lower())
+        if self._peek()[1] != "(":
+            return Property(value)
+        self._next()
+        path, _, last = value.rpartition("/")
+        if path and last.lower() in ("any", "all"):
+            return self._lambda(path, last.lower())
+        args: List[Node] = []
+        if self._peek()[1] != ")":
+            args.append(self._or())
+            while self._peek()[1] == ",":
+                self._next()
+                args.append(self._or())
+        self._expect(")")
+        return Call(value.lower(), tuple(args))
+
+    def _lambda(self, path: str, op: str) -> Node:
+        if self._peek()[1] == ")":
+            self._next()
+            return Lambda(path, op, None, None)
+        kind, variable, position = self._next()
+        if kind != "name":
+            raise ODataFilterError(f"Expected a lambda variable at position {position}")
+        self._expect(":")
+        predicate = self._or()
+        self._expect(")")
+        return Lambda(path, op, variable, predicate)
+
+
+def parse_filter(text: str) -> Node:
+    """Parse a $filter expression
+
+    Raises:
+        ODataFilterError: If the expression is not valid OData
+    """
+    if not text or not text.strip():
+        raise ODataFilterError("Empty $filter expression")
+    return _Parser(text).parse()
+
+
+# ----------------------------------------------------------------------
+# Evaluation
+# ----------------------------------------------------------------------
+
+
+def _number(value: Any) -> Any:
+    """A number from a numeric string (Edm.Decimal is a string in v2 JSON)"""
+    if isinstance(value, str):
+        try:
+            return float(value)
+        except ValueError:
+            return value
+    return value
+
+
+def _coerce(left: Any, right: Any) -> Tuple[Any, Any]:
+    """Bring a row value and a literal to comparable types"""
+    if isinstance(left, datetime) or isinstance(right, datetime):
+        return parse_timestamp(left), parse_timestamp(right)
+    if isinstance(left, bool) or isinstance(right, bool):
+        return left, right
+    if isinstance(left, (int, float)) or isinstance(right, (int, float)):
+        return _number(left), _number(right)
+    return left, right
+
+
+def _compare(op: str, left: Any, right: Any) -> bool:
+    left, right = _coerce(left, right)
+    if left is None or right is None:
+        if op == "eq":
+            return left is None and right is None
+        if op == "ne":
+            return not (left is None and right is None)
+        return False
+    try:
+        if op == "eq":
+            return bool(left == right)
+        if op == "ne":
+            return bool(left != right)
+        if op == "gt":
+            return bool(left > right)
+        if op == "ge":
+            return bool(left >= right)
+        if op == "lt":
+            return bool(left < right)
+        return bool(left <= right)
+    except TypeError:
+        return op == "ne"
+
+
+def _arithmetic(op: str, left: Any, right: Any) -> Any:
+    left, right = _number(left), _number(right)
+    if not isinstance(left, (int, float)) or not isinstance(right, (int, float)):
+        return None
+    try:
+        if op == "add":
+            return left + right
+        if op == "sub":
+            return left - right
+        if op == "mul":
+            return left * right
+        if op == "div":
+            return left / right
+        return left % right
+    except ZeroDivisionError:
+        return None
+
+
+def _strings(function: Callable[..., Any]) -> Callable[..., Any]:
+    """function over string arguments; None if any argument is not a string"""
+
+    def call(*args: Any) -> Any:
+        if not all(isinstance(arg, str) for arg in args):
+            return None
+        return function(*args)
+
+    return call
+
+
+def _date_part(name: str) -> Callable[[Any], Any]:
+    def call(value: Any) -> Any:
+        parsed = parse_timestamp(value)
+        return getattr(parsed, name) if parsed is not None else None
+
+    return call
+
+
+def _rounding(function: Callable[[float], Any]) -> Callable[[Any], Any]:
+    def call(value: Any) -> Any:
+        value = _number(value)
+        return function(value) if isinstance(value, (int, float)) else None
+
+    return call
+
+
+def _substring(value: Any, start: Any, length: Any = None) -> Any:
+    if not isinstance(value, str) or not isinstance(start, int):
+        return None
+    return value[start:] if length is None else value[start : start + int(length)]
+
+
+# Function name -> (implementation, allowed argument counts)
+FUNCTIONS: Dict[str, Tuple[Callable[..., Any], Tuple[int, ...]]] = {
+    "substringof": (_strings(lambda needle, haystack: needle in haystack), (2,)),
+    "contains": (_strings(lambda haystack, needle: needle in haystack), (2,)),
+    "startswith": (_strings(lambda value, prefix: value.startswith(prefix)), (2,)),
+    "endswith": (_strings(lambda value, suffix: value.endswith(suffix)), (2,)),
+    "indexof": (_strings(lambda value, needle: value.find(needle)), (2,)),
+    "length": (_strings(len), (1,)),
+    "tolower": (_strings(str.lower), (1,)),
+    "toupper": (_strings(str.upper), (1,)),
+    "trim": (_strings(str.strip), (1,)),
+    "concat": (_strings(lambda left, right: left + right), (2,)),
+    "substring": (_substring, (2, 3)),
+    "year": (_date_part("year"), (1,)),
+    "month": (_date_part("month"), (1,)),
+    "day": (_date_part("day"), (1,)),
+    "hour": (_date_part("hour"), (1,)),
+    "minute": (_date_part("minute"), (1,)),
+    "second": (_date_part("second"), (1,)),
+    "round": (_rounding(round), (1,)),
+    "floor": (_rounding(math.floor), (1,)),
+    "ceiling": (_rounding(math.ceil), (1,)),
+}
+
+
+def _lookup(row: Mapping[str, Any], path: str) -> Any:
+    value: Any = row
+    for name in path.split("/"):
+        if not isinstance(value, Mapping):
+            return None
+        value = value.get(name)
+    return value
+
+
+def _scalar(node: Node) -> Tuple[Callable[..., Any], Tuple[Node, ...]]:
+    """The function computing a node from the values of its children"""
+    if isinstance(node, Compare):
+        op = node.op
+        return (lambda left, right: _compare(op, left, right)), node.children()
+    if isinstance(node, Arithmetic):
+        op = node.op
+        return (lambda left, right: _arithmetic(op, left, right)), node.children()
+    if isinstance(node, BoolOp):
+        if node.op == "and":
+            return (lambda left, right: bool(left) and bool(right)), node.children()
+        return (lambda left, right: bool(left) or bool(right)), node.children()
+    if isinstance(node, Not):
+        return (lambda operand: not operand), node.children()
+    if isinstance(node, Call):
+        if node.name not in FUNCTIONS:
+            raise ODataFilterError(f"Function '{node.name}' cannot be evaluated locally")
+        function, arities = FUNCTIONS[node.name]
+        if len(node.args) not in arities:
+            raise ODataFilterError(
+                f"Function '{node.name}' takes {' or '.join(map(str, arities))} arguments"
+            )
+        return function, node.args
+    raise ODataFilterError(f"'{node.to_odata()}' cannot be evaluated locally")
+
+
+RowFunction = Callable[[Mapping[str, Any]], Any]
+ColumnFunction = Callable[[Mapping[str, Sequence[Any]], int], List[Any]]
+
+
+def _compile_row(node: Node) -> RowFunction:
+    if isinstance(node, Literal):
+        value = node.value
+        return lambda row: value
+    if isinstance(node, Property):
+        path = node.path
+        if "/" not in path:
+            return lambda row: row.get(path)
+        return lambda row: _lookup(row, path)
+    if isinstance(node, BoolOp):
+        # Short-circuit, as rows are evaluated one at a time
+        left, right = _compile_row(node.left), _compile_row(node.right)
+        if node.op == "and":
+            return lambda row: bool(left(row)) and bool(right(row))
+        return lambda row: bool(left(row)) or bool(right(row))
+    function, children = _scalar(node)
+    compiled = [_compile_row(child) for child in children]
+    if len(compiled) == 1:
+        (only,) = compiled
+        return lambda row: function(only(row))
+    if len(compiled) == 2:
+        first, second = compiled
+        return lambda row: function(first(row), second(row))
+    return lambda row: function(*(argument(row) for argument in compiled))
+
+
+def _compile_columns(node: Node) -> ColumnFunction:
+    if isinstance(node, Literal):
+        value = node.value
+        return lambda columns, length: [value] * length
+    if isinstance(node, Property):
+        path = node.path
+        return lambda columns, length: list(columns.get(path, [None] * length))
+    function, children = _scalar(node)
+    compiled = [_compile_columns(child) for child in children]
+
+    def evaluate(columns: Mapping[str, Sequence[Any]], length: int) -> List[Any]:
+        arguments = [argument(columns, length) for argument in compiled]
+        return [function(*values) for values in zip(*arguments, strict=True)]
+
+    return evaluate
+
+
+class CompiledFilter:
+    """A $filter compiled into a predicate over rows or columns"""
+
+    def __init__(self, node: Node):
+        self.node = node
+        self._row = _compile_row(node)
+        self._columns = _compile_columns(node)
+
+    @property
+    def properties(self) -> Set[str]:
+        return self.node.properties()
+
+    def __call__(self, row: Mapping[str, Any]) -> bool:
+        return bool(self._row(row))
+
+    def filter(self, rows: Iterable[Mapping[str, Any]]) -> List[Mapping[str, Any]]:
+        """The rows the filter matches, in order"""
+        predicate = self._row
+        return [row for row in rows if predicate(row)]
+
+    def mask(self, columns: Mapping[str, Sequence[Any]]) -> List[bool]:
+        """Match of every row of columnar data (equal-length arrays by property)"""
+        length = len(next(iter(columns.values()))) if columns else 0
+        return [bool(value) for value in self._columns(columns, length)]
+
+    def __repr__(self) -> str:
+        return f"CompiledFilter({self.node.to_odata()!r})"
+
+
+def compile_filter(expression: Union[str, Node]) -> CompiledFilter:
+    """Compile a $filter expression (or a parsed one) for local evaluation
+
+    Raises:
+        ODataFilterError: If the expression is invalid or uses something
+            that cannot be evaluated locally (lambdas, unknown functions)
+    """
+    node = parse_filter(expression) if isinstance(expression, str) else expression
+    return CompiledFilter(node)
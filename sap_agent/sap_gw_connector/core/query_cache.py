@@ -0,0 +1,110 @@
+"""Recent complete query results, for answering narrower queries locally
+
+After an entity set query returns every matching row (no __next link,
+fewer rows than $top, no $skip), its rows are kept for query_cache_ttl
+seconds. A later query on the same entity set whose filter adds terms to
+the cached query's filter, and whose $select and filter only use cached
+properties, is answered by filtering the cached rows (see
+query_planner.py) instead of calling SAP.
+
+Results are keyed by SAP system, user and client like coalesced reads, so
+they are never shared across credentials. Writes through SAPClient drop
+the results of the entity set they touch.
+"""
+
+import re
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, FrozenSet, Hashable, List, Optional, Tuple
+
+# Results kept per process, oldest dropped first
+MAX_ENTRIES = 64
+
+
+@dataclass
+class CachedQuery:
+    """Rows of a complete query result"""
+
+    # Conjuncts of the $filter, as OData text
+    terms: FrozenSet[str]
+    # $select properties, None for all
+    select: Optional[FrozenSet[str]]
+    rows: List[Dict[str, Any]]
+    expires_at: float
+
+
+_EntityKey = Tuple[Hashable, str, str]
+
+
+class QueryResultCache:
+    """Complete query results by identity, service path and entity set"""
+
+    def __init__(self, max_entries: int = MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple[_EntityKey, FrozenSet[str], Optional[FrozenSet[str]]], CachedQuery]" = (
+            OrderedDict()
+        )
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def put(
+        self,
+        identity: Hashable,
+        service_path: str,
+        entity_set: str,
+        entry: CachedQuery,
+    ) -> None:
+        key = ((identity, service_path, entity_set), entry.terms, entry.select)
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def candidates(
+        self, identity: Hashable, service_path: str, entity_set: str
+    ) -> List[CachedQuery]:
+        """Unexpired results of the entity set, most recent first"""
+        entity_key = (identity, service_path, entity_set)
+        now = time.monotonic()
+        found = []
+        with self._lock:
+            for key in reversed(list(self._entries)):
+                entry = self._entries[key]
+                if entry.expires_at <= now:
+                    del self._entries[key]
+                elif key[0] == entity_key:
+                    found.append(entry)
+        return found
+
+    def invalidate(self, path: str) -> None:
+        """Drop the results (for all identities) a write to path may change
+
+        Args:
+            path: Path of the written resource below the OData base, such as
+                /SAP/Z_SRV/zsd004Set('1'); a $batch drops the whole service
+        """
+        path = path.split("?", 1)[0]
+        with self._lock:
+            for key in list(self._entries):
+                _, service_path, entity_set = key[0]
+                if path == f"{service_path}/$batch" or re.match(
+                    rf"{re.escape(service_path)}/{re.escape(entity_set)}(?:$|[(/])", path
+                ):
+                    del self._entries[key]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+_cache = QueryResultCache()
+
+
+def get_query_cache() -> QueryResultCache:
+    """Get the query result cache shared by the process"""
+    return _cache
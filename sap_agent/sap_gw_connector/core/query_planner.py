@@ -0,0 +1,369 @@
+"""Planning of entity set queries before they are sent to SAP
+
+plan_query rewrites what the agent asked for into a cheaper request:
+
+- no $select: the entity's default_select from services.yaml is used
+- no $top, or a larger one: $top is clamped to SAP_QUERY_MAX_TOP
+- a $filter fixing every key property with eq (`Ebeln eq '4500000010' and
+  Ebelp eq '00010'`; key properties from $metadata): the entity is read by
+  key, and any other terms are checked on it locally. Without $metadata
+  the query is sent as is, since key_field may be only part of the key
+- $expand: navigation paths are checked against the entity's navigations
+  and expanded inline or fetched with $batch (see expand.py)
+
+execute_plan then answers the query from a cached superset when it can
+(see query_cache.py): an earlier complete result of the same entity set
+whose filter is part of this one's and which has every property needed
+(never for expanded queries). Otherwise it sends the key read or the
+query, and caches a complete result.
+
+QueryPlan.explain() describes the choices for the tool output.
+
+Example:
+    >>> from sap_agent.sap_gw_connector.config.schemas import EntityConfig
+    >>> service = ServiceConfig(
+    ...     id="Z_MATERIAL_SRV", name="Materials", path="/SAP/Z_MATERIAL_SRV",
+    ...     entities=[EntityConfig(name="MaterialSet", key_field="Matnr")],
+    ... )
+    >>> plan = plan_query(service, "MaterialSet", "Mtart eq 'FERT'", None, 5000, None, 1000)
+    >>> plan.top, plan.notes
+    (1000, ['$top 5000 clamped to 1000'])
+"""
+
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any, Dict, FrozenSet, List, Optional
+
+from sap_agent.sap_gw_connector.config.schemas import ServiceConfig
+from sap_agent.sap_gw_connector.core.coalescing import copy_json
+from sap_agent.sap_gw_connector.core.exceptions import ODataFilterError, SAPRequestError
+from sap_agent.sap_gw_connector.core.expand import (
+    expand_paths,
+    get_expanded,
+    parse_expand,
+    query_expanded,
+)
+from sap_agent.sap_gw_connector.core.metadata import get_entity_set_model
+from sap_agent.sap_gw_connector.core.odata_filter import (
+    Compare,
+    CompiledFilter,
+    Literal,
+    Node,
+    Property,
+    compile_filter,
+    conjunction,
+    conjuncts,
+    parse_filter,
+)
+from sap_agent.sap_gw_connector.core.query_cache import CachedQuery, get_query_cache
+
+if TYPE_CHECKING:
+    from sap_agent.sap_gw_connector.core.sap_client import SAPClient
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class QueryPlan:
+    """How an entity set query is answered
+
+    Attributes:
+        strategy: "query" (sent as is), "key_read" (read by key), "cache"
+            (filtered from a cached superset) or "replica" (set by callers
+            that answered it from a local replica)
+    """
+
+    service: ServiceConfig
+    entity_set: str
+    filter: Optional[str]
+    select: Optional[List[str]]
+    top: Optional[int]
+    skip: Optional[int]
+    strategy: str = "query"
+    # Key properties of a key read, and the rest of the filter, checked locally
+    key: Optional[Dict[str, Any]] = None
+    local_filter: Optional[Node] = None
+    # Navigation paths to expand
+    expand: List[str] = field(default_factory=list)
+    notes: List[str] = field(default_factory=list)
+
+    @property
+    def terms(self) -> Optional[FrozenSet[str]]:
+        """Conjuncts of the filter, as OData text; None if it cannot be parsed"""
+        if not self.filter:
+            return frozenset()
+        try:
+            return frozenset(term.to_odata() for term in conjuncts(parse_filter(self.filter)))
+        except ODataFilterError:
+            return None
+
+    def explain(self) -> Dict[str, Any]:
+        return {
+            "strategy": self.strategy,
+            "filter": self.filter,
+            "select": ",".join(self.select) if self.select else None,
+            "top": self.top,
+            "skip": self.skip,
+            "expand": ",".join(self.expand) if self.expand else None,
+            "notes": self.notes,
+        }
+
+
+def _key_terms(terms: List[Node], names: List[str]) -> Optional[List[Compare]]:
+    """`<key property> eq <literal>` terms fixing every key property, if any"""
+    found: Dict[str, Compare] = {}
+    for term in terms:
+        if not isinstance(term, Compare) or term.op != "eq":
+            continue
+        left, right = term.left, term.right
+        if isinstance(left, Literal):
+            left, right = right, left
+        if (
+            isinstance(left, Property)
+            and left.path in names
+            and isinstance(right, Literal)
+            and right.value is not None
+        ):
+            found.setdefault(left.path, term)
+    if not names or len(found) != len(names):
+        return None
+    return [found[name] for name in names]
+
+
+def _key_value(term: Compare) -> Any:
+    literal = term.right if isinstance(term.right, Literal) else term.left
+    assert isinstance(literal, Literal)
+    return literal.value
+
+
+def plan_query(
+    service: ServiceConfig,
+    entity_set: str,
+    filter_expr: Optional[str],
+    select: Optional[List[str]],
+    top: Optional[int],
+    skip: Optional[int],
+    max_top: int,
+    expand: Optional[str] = None,
+) -> QueryPlan:
+    """Plan a query of an entity set
+
+    Args:
+        max_top: Largest $top to send (0 for no limit)
+        expand: Comma-separated navigation paths to expand
+
+    Raises:
+        SAPValidationError: If expand is not a list of navigation paths
+    """
+    select = [name.strip() for name in select if name.strip()] if select else None
+    plan = QueryPlan(service, entity_set, filter_expr or None, select, top, skip)
+    plan.expand = parse_expand(expand)
+    entity = service.get_entity(entity_set)
+
+    if not select and entity is not None and entity.default_select:
+        plan.select = list(entity.default_select)
+        plan.notes.append("No $select given: used default_select from services.yaml")
+
+    if max_top > 0 and (top is None or top > max_top):
+        plan.top = max_top
+        if top is None:
+            plan.notes.append(f"No $top given: limited to {max_top} rows")
+        else:
+            plan.notes.append(f"$top {top} clamped to {max_top}")
+    return plan
+
+
+async def _plan_key_read(client: "SAPClient", plan: QueryPlan) -> None:
+    """Read by key when the filter fixes every key property with eq
+
+    Key properties come from the service $metadata only: key_field names
+    just one property of a composite key (POItemSet: Ebelp of Ebeln, Ebelp).
+    """
+    if plan.strategy != "query" or not plan.filter or plan.skip:
+        return
+    entity_model = await get_entity_set_model(client, plan.service.path, plan.entity_set)
+    if entity_model is None or not entity_model.keys:
+        return
+    names = entity_model.key_names
+
+    try:
+        terms = conjuncts(parse_filter(plan.filter))
+    except ODataFilterError:
+        # Not understood locally (e.g. the v4 in operator): SAP checks it
+        return
+    key_terms = _key_terms(terms, names)
+    if key_terms is None:
+        return
+    rest = [term for term in terms if not any(term is key_term for key_term in key_terms)]
+    local_filter = conjunction(rest)
+    try:
+        if local_filter is not None:
+            compile_filter(local_filter)
+    except ODataFilterError:
+        return
+    plan.strategy = "key_read"
+    plan.key = {name: _key_value(term) for name, term in zip(names, key_terms, strict=True)}
+    plan.local_filter = local_filter
+    plan.notes.append(
+        " and ".join(term.to_odata() for term in key_terms)
+        + f": read {plan.entity_set} by key"
+        + (f", then checked {local_filter.to_odata()} locally" if local_filter else "")
+    )
+
+
+def _rows_of(data: Dict[str, Any]) -> Optional[List[Dict[str, Any]]]:
+    """Rows of a complete query response, None if paged or not a collection"""
+    if "d" in data:
+        body = data["d"]
+        if isinstance(body, list):
+            return body
+        if not isinstance(body, dict) or "__next" in body or "results" not in body:
+            return None
+        return list(body["results"])
+    if "@odata.nextLink" in data or "value" not in data:
+        return None
+    return list(data["value"])
+
+
+def _response(service: ServiceConfig, rows: List[Dict[str, Any]]) -> Dict[str, Any]:
+    return {"value": rows} if service.version == "v4" else {"d": {"results": rows}}
+
+
+def _project(
+    row: Dict[str, Any], select: Optional[List[str]], expand: Optional[List[str]] = None
+) -> Dict[str, Any]:
+    if not select:
+        return row
+    keep = set(select) | {"__metadata"} | {path.split("/", 1)[0] for path in expand or ()}
+    return {name: value for name, value in row.items() if name in keep or name.startswith("@odata.")}
+
+
+def _identity(client: "SAPClient") -> Any:
+    return (client.balancer.name, client.config.username, client.config.client)
+
+
+def _from_cache(client: "SAPClient", plan: QueryPlan) -> Optional[Dict[str, Any]]:
+    """The result from a cached superset, None if there is none"""
+    terms = plan.terms
+    if terms is None:
+        return None
+    needed = set(plan.select or ())
+    for entry in get_query_cache().candidates(
+        _identity(client), plan.service.path, plan.entity_set
+    ):
+        if not entry.terms <= terms:
+            continue
+        rest = sorted(terms - entry.terms)
+        try:
+            predicate: Optional[CompiledFilter] = (
+                compile_filter(" and ".join(f"({term})" for term in rest)) if rest else None
+            )
+        except ODataFilterError:
+            continue
+        if entry.select is not None and (
+            plan.select is None
+            or not needed <= entry.select
+            or (predicate is not None and not predicate.properties <= entry.select)
+        ):
+            continue
+        rows = entry.rows if predicate is None else predicate.filter(entry.rows)
+        start = plan.skip or 0
+        end = start + plan.top if plan.top is not None else None
+        plan.strategy = "cache"
+        plan.notes.append(
+            "Filtered locally from a cached result of "
+            + (" and ".join(sorted(entry.terms)) or "the unfiltered entity set")
+        )
+        return _response(plan.service, [_project(dict(row), plan.select) for row in rows[start:end]])
+    return None
+
+
+async def _key_read(client: "SAPClient", plan: QueryPlan) -> Dict[str, Any]:
+    assert plan.key is not None
+    fields = None
+    if plan.select:
+        # Also fetch what the local part of the filter reads
+        extra = plan.local_filter.properties() if plan.local_filter is not None else set()
+        fields = plan.select + sorted(extra - set(plan.select))
+    try:
+        if plan.expand:
+            data, batched = await get_expanded(
+                client, plan.service, plan.entity_set, plan.key, plan.expand, fields
+            )
+            _note_batched(plan, batched)
+        else:
+            data = await client.get_entity(plan.service.path, plan.entity_set, plan.key, fields)
+    except SAPRequestError as e:
+        if e.status_code != 404:
+            raise
+        return _response(plan.service, [])
+    entity = data.get("d", data) if isinstance(data, dict) else data
+    rows = [entity]
+    if plan.local_filter is not None and not compile_filter(plan.local_filter)(entity):
+        rows = []
+    if plan.top == 0:
+        rows = []
+    return _response(plan.service, [_project(row, plan.select, plan.expand) for row in rows])
+
+
+def _note_batched(plan: QueryPlan, batched: List[str]) -> None:
+    if batched:
+        plan.notes.append(
+            f"{plan.entity_set} does not expand {', '.join(batched)}: read with $batch GETs"
+        )
+
+
+async def execute_plan(client: "SAPClient", plan: QueryPlan) -> Dict[str, Any]:
+    """Answer a planned query: from a cached superset, by key, or from SAP
+
+    Raises:
+        SAPValidationError: If an expand path is not a navigation of the entity set
+    """
+    if plan.expand:
+        await expand_paths(client, plan.service, plan.entity_set, plan.expand)
+    await _plan_key_read(client, plan)
+    # Cached rows carry no navigations
+    ttl = client.config.query_cache_ttl if not plan.expand else 0
+    if ttl > 0 and plan.strategy == "query":
+        cached = _from_cache(client, plan)
+        if cached is not None:
+            return cached
+
+    if plan.strategy == "key_read":
+        return await _key_read(client, plan)
+
+    filters = {"$filter": plan.filter} if plan.filter else None
+    if plan.expand:
+        data, batched = await query_expanded(
+            client, plan.service, plan.entity_set, plan.expand,
+            filters, plan.select, plan.top, plan.skip,
+        )
+        _note_batched(plan, batched)
+        return data
+
+    data = await client.query_entity_set(
+        service_path=plan.service.path,
+        entity_set=plan.entity_set,
+        filters=filters,
+        select_fields=plan.select,
+        top=plan.top,
+        skip=plan.skip,
+    )
+
+    # Filters that cannot be parsed have no terms and are not cached
+    terms = plan.terms
+    rows = _rows_of(data) if ttl > 0 and not plan.skip else None
+    if rows is not None and terms is not None and (plan.top is None or len(rows) < plan.top):
+        get_query_cache().put(
+            _identity(client),
+            plan.service.path,
+            plan.entity_set,
+            CachedQuery(
+                terms=terms,
+                select=frozenset(plan.select) if plan.select else None,
+                rows=copy_json(rows),
+                expires_at=time.monotonic() + ttl,
+            ),
+        )
+    return data
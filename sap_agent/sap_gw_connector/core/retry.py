@@ -0,0 +1,175 @@
+"""Retry policy for SAP Gateway requests
+
+Decides whether a failed attempt is retried and how long to wait:
+
+- Full-jitter exponential backoff: sleep uniform(0, min(max, base * 2**n))
+- Retry-After (seconds or HTTP date) on 429/503 is honoured up to a cap;
+  a longer requested wait fails immediately instead of blocking the tool
+- Per-host retry budget: retries (and hedged requests) are limited to a
+  fraction of the requests sent to that host recently, so an outage does
+  not multiply the load by the number of retry attempts
+"""
+
+import random
+import threading
+import time
+from collections import deque
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Deque, Dict, Optional
+
+from sap_agent.sap_gw_connector.config.settings import SAPConnectionConfig
+from sap_agent.sap_gw_connector.core.exceptions import (
+    SAPConnectionError,
+    SAPError,
+    SAPRequestError,
+)
+
+# Statuses that signal a transient condition on the gateway side
+RETRYABLE_STATUSES = frozenset({429, 502, 503, 504})
+# Statuses where the gateway did not process the request, so retrying a
+# non-idempotent request cannot apply it twice
+NOT_PROCESSED_STATUSES = frozenset({401, 429, 503})
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE"})
+
+BUDGET_WINDOW_SECONDS = 10.0
+# Retries always allowed per window, so low-traffic hosts can still retry
+BUDGET_MIN_RETRIES = 10
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Parse a Retry-After header into seconds
+
+    Example:
+        >>> parse_retry_after("5")
+        5.0
+    """
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max((retry_at - datetime.now(timezone.utc)).total_seconds(), 0.0)
+
+
+class RetryBudget:
+    """Caps retries to a fraction of the requests sent over a sliding window"""
+
+    def __init__(
+        self,
+        ratio: float,
+        min_retries: int = BUDGET_MIN_RETRIES,
+        window: float = BUDGET_WINDOW_SECONDS,
+    ):
+        self.ratio = ratio
+        self.min_retries = min_retries
+        self.window = window
+        self._requests: Deque[float] = deque()
+        self._retries: Deque[float] = deque()
+        self._lock = threading.Lock()
+
+    def _prune(self, now: float) -> None:
+        cutoff = now - self.window
+        while self._requests and self._requests[0] < cutoff:
+            self._requests.popleft()
+        while self._retries and self._retries[0] < cutoff:
+            self._retries.popleft()
+
+    def record_request(self) -> None:
+        """Count a first attempt towards the budget"""
+        now = time.monotonic()
+        with self._lock:
+            self._prune(now)
+            self._requests.append(now)
+
+    def try_acquire(self) -> bool:
+        """Take one retry from the budget; False when it is exhausted"""
+        now = time.monotonic()
+        with self._lock:
+            self._prune(now)
+            allowed = self.min_retries + self.ratio * len(self._requests)
+            if len(self._retries) >= allowed:
+                return False
+            self._retries.append(now)
+            return True
+
+    def snapshot(self) -> Dict[str, float]:
+        """Current window usage"""
+        with self._lock:
+            self._prune(time.monotonic())
+            return {
+                "requests": len(self._requests),
+                "retries": len(self._retries),
+                "allowed": self.min_retries + self.ratio * len(self._requests),
+            }
+
+
+# Retry budgets shared by all clients of a host
+_retry_budgets: Dict[str, RetryBudget] = {}
+_retry_budgets_lock = threading.Lock()
+
+
+def get_retry_budget(host: str, ratio: float) -> RetryBudget:
+    """Get the retry budget shared by all clients of a host"""
+    with _retry_budgets_lock:
+        budget = _retry_budgets.get(host)
+        if budget is None:
+            budget = _retry_budgets[host] = RetryBudget(ratio)
+        budget.ratio = ratio
+        return budget
+
+
+class RetryPolicy:
+    """Retry decisions and delays for one client"""
+
+    def __init__(self, config: SAPConnectionConfig):
+        self.max_attempts = max(config.retry_attempts, 1)
+        self.backoff_base = config.retry_backoff_base
+        self.backoff_max = config.retry_backoff_max
+        self.retry_after_max = config.retry_after_max
+        self.hedge_after = config.hedge_after
+        self.budget = get_retry_budget(config.host, config.retry_budget_ratio)
+
+    def retry_reason(self, method: str, error: SAPError) -> Optional[str]:
+        """Reason label if the error is worth retrying, None otherwise"""
+        idempotent = method.upper() in IDEMPOTENT_METHODS
+        if error.response_data.get("circuit_open"):
+            return None
+        if isinstance(error, SAPConnectionError):
+            # Failures before anything was sent are safe for any method
+            if idempotent or error.response_data.get("not_sent"):
+                return "connection_error"
+            return None
+        if isinstance(error, SAPRequestError) and error.status_code is not None:
+            if error.status_code == 401:
+                return "unauthorized"
+            if error.status_code in RETRYABLE_STATUSES and (
+                idempotent or error.status_code in NOT_PROCESSED_STATUSES
+            ):
+                return f"http_{error.status_code}"
+        return None
+
+    def backoff(self, attempt: int, error: SAPError) -> Optional[float]:
+        """Delay before retry number `attempt` (1-based); None to give up"""
+        if error.status_code == 401:
+            # Fresh token, nothing to wait for
+            return 0.0
+        retry_after = error.response_data.get("retry_after")
+        if retry_after is not None:
+            if retry_after > self.retry_after_max:
+                return None
+            return float(retry_after)
+        ceiling = min(self.backoff_max, self.backoff_base * 2 ** (attempt - 1))
+        return random.uniform(0, ceiling)
+
+    def can_hedge(self, method: str) -> bool:
+        """Whether requests of this method may be hedged"""
+        return self.hedge_after > 0 and method.upper() == "GET"
@@ -3,36 +3,174 @@
 import asyncio
 import json
 import logging
-from typing import Any, Dict, List, Optional, Union, cast
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union, cast
+from urllib.parse import parse_qsl, urlsplit
 
 import aiohttp
 import xmltodict
 
-from sap_agent.sap_gw_connector.config.schemas import GatewayConfig
-from sap_agent.sap_gw_connector.config.loader import get_services_config
-from sap_agent.sap_gw_connector.config.settings import SAPConnectionConfig, get_services_config_path
+from sap_agent.sap_gw_connector.config.schemas import GatewayConfig, ServiceConfig
+from sap_agent.sap_gw_connector.config.loader import (
+    ServiceConfigurationError,
+    get_services_config,
+)
+from sap_agent.sap_gw_connector.config.settings import (
+    SAPConnectionConfig,
+    SecurityConfig,
+    get_config,
+    get_services_config_path,
+)
+from sap_agent.sap_gw_connector.config.systems import (
+    SystemProfile,
+    get_service_system,
+    get_system_profile,
+    list_system_ids,
+)
+from sap_agent.sap_gw_connector.core.admission import get_admission_controller
 from sap_agent.sap_gw_connector.core.auth import SAPAuthenticator
+from sap_agent.sap_gw_connector.core.batch import (
+    BatchItemResult,
+    BatchOperation,
+    BatchResponse,
+    BulkWriteResult,
+    build_batch,
+    parse_batch_response,
+)
+from sap_agent.sap_gw_connector.core.circuit_breaker import (
+    CircuitBreaker,
+    circuit_guard,
+    get_circuit_breaker,
+)
+from sap_agent.sap_gw_connector.core.coalescing import get_coalescer
+from sap_agent.sap_gw_connector.core.connections import get_connector, get_ssl_context
 from sap_agent.sap_gw_connector.core.exceptions import (
     SAPAuthenticationError,
+    SAPConcurrencyError,
     SAPConnectionError,
+    SAPError,
     SAPRequestError,
     SAPTimeoutError,
     SAPValidationError,
 )
+from sap_agent.sap_gw_connector.core.http2 import (
+    HTTP2_AVAILABLE,
+    HTTP2Response,
+    HTTP2Session,
+)
+from sap_agent.sap_gw_connector.core.keys import KeyValue, format_key
+from sap_agent.sap_gw_connector.core.load_balancer import ServerState, get_load_balancer
+from sap_agent.sap_gw_connector.core.metadata import get_service_model
+from sap_agent.sap_gw_connector.core.query_cache import get_query_cache
+from sap_agent.sap_gw_connector.core.retry import (
+    RETRYABLE_STATUSES,
+    RetryPolicy,
+    parse_retry_after,
+)
+from sap_agent.sap_gw_connector.observability.metrics import (
+    SAP_BATCH_OPERATIONS,
+    SAP_CONNECTION_LIMIT,
+    SAP_RETRIES,
+    SAP_RETRIES_SUPPRESSED,
+    track_sap_request,
+)
+from sap_agent.sap_gw_connector.observability.stats import measure_phase, record_phase
+from sap_agent.sap_gw_connector.observability.tracing import start_span, url_template
 
 logger = logging.getLogger(__name__)
 
 
+def _brotli_available() -> bool:
+    """Whether aiohttp and httpx can decode br (either needs a Brotli package)"""
+    for module in ("brotli", "brotlicffi"):
+        try:
+            __import__(module)
+            return True
+        except ImportError:
+            continue
+    return False
+
+
+# Response encodings offered to SAP; both clients decompress while streaming
+ACCEPT_ENCODING = "gzip, deflate, br" if _brotli_available() else "gzip, deflate"
+
+
+def _wire_bytes(response: Any, decoded: int) -> int:
+    """Size of a read response body as received, before decompression"""
+    wire_bytes = getattr(response, "wire_bytes", None)
+    if wire_bytes is None:
+        # aiohttp >= 3.12 counts the compressed bytes it decoded
+        wire_bytes = getattr(response.content, "total_raw_bytes", None)
+    if wire_bytes is None:
+        length = response.headers.get("Content-Length")
+        wire_bytes = int(length) if length and length.isdigit() else decoded
+    return wire_bytes
+
+
+def _service_and_entity(url: str) -> Tuple[str, str]:
+    """Extract low-cardinality service and entity set labels from an OData URL
+
+    Example:
+        >>> _service_and_entity("https://sap:44300/sap/opu/odata/SAP/Z_SRV/zsd004Set('1')")
+        ('/SAP/Z_SRV', 'zsd004Set')
+    """
+    path = urlsplit(url).path
+    marker = "/sap/opu/odata"
+    index = path.lower().find(marker)
+    if index >= 0:
+        path = path[index + len(marker):]
+    segments = [segment for segment in path.split("/") if segment]
+    service = "/" + "/".join(segments[:2]) if segments else ""
+    entity = segments[2].split("(", 1)[0] if len(segments) > 2 else ""
+    return service, entity
+
+
+def _entity_body(entity: Dict[str, Any]) -> Dict[str, Any]:
+    """An entity without its v2 {"d": ...} envelope"""
+    body = entity.get("d", entity)
+    return body if isinstance(body, dict) else entity
+
+
+def etag_of(entity: Dict[str, Any]) -> Optional[str]:
+    """ETag of an entity as read (__metadata.etag on v2, @odata.etag on v4)
+
+    Example:
+        >>> etag_of({"d": {"__metadata": {"etag": "W/\"'1'\""}, "Vbeln": "1"}})
+        'W/"\'1\'"'
+    """
+    body = _entity_body(entity)
+    etag = body.get("@odata.etag") or body.get("__metadata", {}).get("etag")
+    return cast(Optional[str], etag)
+
+
+def changed_properties(original: Dict[str, Any], changes: Dict[str, Any]) -> Dict[str, Any]:
+    """The changes whose value differs from the entity as read"""
+    body = _entity_body(original)
+    return {
+        name: value
+        for name, value in changes.items()
+        if name not in body or body[name] != value
+    }
+
+
 class SAPClient:
-    """SAP Gateway OData client with authentication and session management"""
+    """SAP Gateway OData client with authentication and session management
+
+    With a system profile, requests are load balanced over the system's
+    application servers; each server gets its own login.
+    """
 
     def __init__(
         self,
         config: SAPConnectionConfig,
         gateway_config: Optional[GatewayConfig] = None,
+        security_config: Optional[SecurityConfig] = None,
+        system: Optional[SystemProfile] = None,
     ):
         self.config = config
+        self.system = system
         self._session: Optional[aiohttp.ClientSession] = None
+        self._http2: Optional[HTTP2Session] = None
         self._session_lock = asyncio.Lock()
 
         # Load gateway configuration
@@ -52,11 +190,51 @@ class SAPClient:
             services_config=self.services_config,
         )
 
+        if system is not None:
+            self.balancer = get_load_balancer(
+                system.id,
+                system.servers,
+                config.scheme,
+                system.load_balancing,
+                system.health_check_path,
+                system.health_check_interval,
+            )
+        else:
+            self.balancer = get_load_balancer(
+                f"{config.host}:{config.port}", [(config.host, config.port)], config.scheme
+            )
+        # One login per application server; the primary uses self.authenticator
+        self._authenticators: Dict[str, SAPAuthenticator] = {
+            self.balancer.primary.name: self.authenticator
+        }
+
+        self.retry_policy = RetryPolicy(config)
+        self.admission = get_admission_controller(
+            config.host,
+            config.username,
+            security_config or get_config(require_sap=False).security,
+        )
+
         # Build base URLs using gateway configuration
-        self.base_url = f"https://{config.host}:{config.port}"
+        self.base_url = f"{config.scheme}://{config.host}:{config.port}"
         self.odata_base = self.gateway_config.base_url_pattern.format(
             host=config.host, port=config.port
         )
+        # The connection scheme wins over the one in the URL pattern
+        odata_url = urlsplit(self.odata_base)
+        if odata_url.scheme != config.scheme:
+            self.odata_base = odata_url._replace(scheme=config.scheme).geturl()
+
+    @classmethod
+    def for_service(cls, service: ServiceConfig, **kwargs: Any) -> "SAPClient":
+        """Client for the SAP system a service is mapped to
+
+        Raises:
+            ServiceConfigurationError: If the system is unknown or its
+                connection settings are incomplete
+        """
+        system = get_service_system(service)
+        return cls(system.connection, system=system, **kwargs)
 
     async def __aenter__(self) -> "SAPClient":
         """Async context manager entry"""
@@ -78,26 +256,38 @@ class SAPClient:
             if self._session is None or self._session.closed:
                 timeout = aiohttp.ClientTimeout(total=self.config.timeout)
 
-                # Create SSL context when verification is disabled (for self-signed certs)
-                ssl_context = None
-                if not self.config.verify_ssl:
-                    import ssl
-
-                    ssl_context = ssl.create_default_context()
-                    ssl_context.check_hostname = False
-                    ssl_context.verify_mode = ssl.CERT_NONE
-                    logger.warning("SSL certificate verification is disabled")
-
-                connector = aiohttp.TCPConnector(
-                    ssl=ssl_context if ssl_context else True,
-                    limit=100,  # Connection pool limit
-                    limit_per_host=10,
+                # One pool per system, split evenly over its servers and shared
+                # with the other clients (and logins) of the system
+                pool_size = self.config.pool_size
+                connector = get_connector(
+                    self.balancer.name,
+                    self.config.verify_ssl,
+                    limit=pool_size * len(self.balancer.servers),
+                    limit_per_host=pool_size,
+                    keepalive_timeout=self.config.keepalive_timeout,
+                    dns_cache_ttl=self.config.dns_cache_ttl,
                 )
+                for server in self.balancer.servers:
+                    SAP_CONNECTION_LIMIT.set(pool_size, host=server.host)
 
                 self._session = aiohttp.ClientSession(
-                    timeout=timeout, connector=connector
+                    timeout=timeout, connector=connector, connector_owner=False
                 )
 
+                if self.config.http2:
+                    if HTTP2_AVAILABLE:
+                        # Multiplexed streams need far fewer connections
+                        self._http2 = HTTP2Session(
+                            ssl_context=get_ssl_context(self.config.verify_ssl),
+                            timeout=self.config.timeout,
+                            max_connections=pool_size * len(self.balancer.servers),
+                        )
+                    else:
+                        logger.warning(
+                            "SAP_HTTP2 is set but httpx[http2] is not installed; "
+                            "using HTTP/1.1"
+                        )
+
         return self._session
 
     async def close(self) -> None:
@@ -106,17 +296,103 @@ class SAPClient:
             if self._session and not self._session.closed:
                 await self._session.close()
                 self._session = None
+            if self._http2 is not None:
+                await self._http2.close()
+                self._http2 = None
 
     async def authenticate(self) -> bool:
         """Authenticate with SAP Gateway"""
         try:
-            await self.authenticator.get_valid_token()
+            session = await self._ensure_session()
+            await self.authenticator.get_valid_token(session.connector)
             logger.info("SAP authentication successful")
             return True
         except Exception as e:
             logger.error(f"SAP authentication failed: {str(e)}")
             return False
 
+    async def warm_up(self) -> Dict[str, Dict[str, Any]]:
+        """Resolve and connect to every application server of the system
+
+        Sends a GET of the health check path to each server, leaving an
+        established (TLS) connection in the shared pool for the next request.
+
+        Returns:
+            Timings in seconds (dns, connect) or the error, by server name
+        """
+        session = await self._ensure_session()
+        connector = cast(aiohttp.TCPConnector, session.connector)
+        resolver = getattr(connector, "_resolver", None)
+
+        async def warm_up_server(server: ServerState) -> Dict[str, Any]:
+            result: Dict[str, Any] = {}
+            try:
+                if resolver is not None:
+                    start = time.perf_counter()
+                    await resolver.resolve(server.host, server.port)
+                    result["dns"] = time.perf_counter() - start
+                start = time.perf_counter()
+                async with session.get(
+                    server.base_url + self.balancer.health_check_path,
+                    allow_redirects=False,
+                ) as response:
+                    await response.read()
+                    result["connect"] = time.perf_counter() - start
+                    result["status"] = response.status
+            except (aiohttp.ClientError, asyncio.TimeoutError, OSError) as e:
+                result["error"] = str(e) or type(e).__name__
+            return result
+
+        results = await asyncio.gather(
+            *(warm_up_server(server) for server in self.balancer.servers)
+        )
+        return {server.name: result for server, result in zip(self.balancer.servers, results)}
+
+    def _server_circuit(self, server: ServerState) -> CircuitBreaker:
+        """Circuit breaker of an application server (transport failures only)"""
+        return get_circuit_breaker(
+            server.name,
+            self.config.circuit_failure_threshold,
+            self.config.circuit_reset_timeout,
+            self.config.circuit_half_open_probes,
+            count_server_errors=False,
+        )
+
+    def _circuits(self, url: str, server: ServerState) -> List[CircuitBreaker]:
+        """Circuit breakers guarding a request: the server and its service"""
+        settings = (
+            self.config.circuit_failure_threshold,
+            self.config.circuit_reset_timeout,
+            self.config.circuit_half_open_probes,
+        )
+        service, _ = _service_and_entity(url)
+        circuits = [self._server_circuit(server)]
+        if service:
+            circuits.append(
+                get_circuit_breaker(
+                    f"{self.config.host}{service}", *settings, count_connection_errors=False
+                )
+            )
+        return circuits
+
+    async def _probe_servers(self, servers: List[ServerState]) -> None:
+        """Health check down servers; close the circuit of those back up"""
+        results = await self.balancer.probe(await self._ensure_session(), servers)
+        for server in servers:
+            if results[server.name]:
+                self._server_circuit(server).reset()
+
+    def _authenticator_for(self, server: ServerState) -> SAPAuthenticator:
+        """Authenticator holding the login on one application server"""
+        authenticator = self._authenticators.get(server.name)
+        if authenticator is None:
+            authenticator = self._authenticators[server.name] = SAPAuthenticator(
+                config=self.config.model_copy(update={"host": server.host, "port": server.port}),
+                auth_endpoint=self.gateway_config.auth_endpoint,
+                services_config=self.services_config,
+            )
+        return authenticator
+
     async def _make_request(
         self,
         method: str,
@@ -124,123 +400,348 @@ class SAPClient:
         headers: Optional[Dict[str, str]] = None,
         data: Optional[Union[str, Dict[str, Any]]] = None,
         params: Optional[Dict[str, str]] = None,
-        retry_count: int = 0,
         read_response: bool = True,
-    ) -> Union[aiohttp.ClientResponse, str]:
-        """Make authenticated HTTP request to SAP
+    ) -> Union[aiohttp.ClientResponse, HTTP2Response, str]:
+        """Make authenticated HTTP request to SAP, retrying transient failures
 
         Args:
             read_response: If True, reads response body as text and returns it.
                          If False, returns the response object (caller must read).
         """
+        # Prepare data
+        if isinstance(data, dict):
+            data = json.dumps(data)
+            headers = {**(headers or {}), "Content-Type": "application/json"}
 
-        if retry_count >= self.config.retry_attempts:
-            raise SAPRequestError(
-                f"Max retry attempts ({self.config.retry_attempts}) exceeded"
+        # Ensure sap-client parameter is always included
+        if params is None:
+            params = {}
+        if "sap-client" not in params:
+            params["sap-client"] = self.config.client
+
+        if method != "GET" and url.startswith(self.odata_base):
+            # Cached query results of the written entity set are now stale
+            get_query_cache().invalidate(url[len(self.odata_base):])
+
+        policy = self.retry_policy
+        policy.budget.record_request()
+        service, _ = _service_and_entity(url)
+        attempt = 0
+        while True:
+            due = self.balancer.due_for_probe()
+            if due:
+                await self._probe_servers(due)
+            # Pick per attempt, so a retry after a connection error goes to
+            # another server
+            server = self.balancer.pick()
+            try:
+                # Every attempt waits for admission, so retries count
+                # towards the rate limits as well
+                async with self.admission.admit(service):
+                    with circuit_guard(self._circuits(url, server)), self.balancer.track(server):
+                        if read_response and policy.can_hedge(method):
+                            return await self._send_hedged(
+                                method, url, headers, data, params, attempt, server, service
+                            )
+                        return await self._send(
+                            method, url, headers, data, params, attempt, read_response,
+                            server=server,
+                        )
+            except SAPError as e:
+                reason = policy.retry_reason(method, e)
+                attempt += 1
+                if reason is None or attempt >= policy.max_attempts:
+                    raise
+
+                delay = policy.backoff(attempt, e)
+                if delay is None:
+                    SAP_RETRIES_SUPPRESSED.inc(
+                        host=self.config.host, reason="retry_after_too_long"
+                    )
+                    raise
+                if reason != "unauthorized" and not policy.budget.try_acquire():
+                    logger.warning(
+                        f"Retry budget for {self.config.host} exhausted, "
+                        f"not retrying {method} {url_template(url)}"
+                    )
+                    SAP_RETRIES_SUPPRESSED.inc(
+                        host=self.config.host, reason="budget_exhausted"
+                    )
+                    raise
+
+                logger.warning(
+                    f"Request failed ({reason}), retrying in {delay:.2f}s "
+                    f"({attempt}/{policy.max_attempts - 1}): {str(e)}"
+                )
+                SAP_RETRIES.inc(host=self.config.host, reason=reason)
+                if delay > 0:
+                    await asyncio.sleep(delay)
+
+    async def _get_parsed(
+        self,
+        url: str,
+        headers: Dict[str, str],
+        params: Optional[Dict[str, str]] = None,
+        parse: Callable[[str], Any] = json.loads,
+    ) -> Any:
+        """GET and parse a response, sharing both with identical GETs in flight
+
+        Callers get their own copy of a shared result (see core/coalescing.py).
+        """
+
+        async def fetch() -> Any:
+            response_text = await self._make_request(
+                "GET", url, headers=headers, params=dict(params or {}), read_response=True
             )
+            with measure_phase("parse"):
+                return parse(cast(str, response_text))
+
+        if not self.config.coalesce_reads:
+            return await fetch()
+
+        key = (
+            self.balancer.name,
+            self.config.username,
+            self.config.client,
+            url,
+            tuple(sorted((params or {}).items())),
+            tuple(sorted(headers.items())),
+        )
+        service, entity = _service_and_entity(url)
+        return await get_coalescer().run(key, fetch, service, entity)
+
+    async def _send_hedged(
+        self,
+        method: str,
+        url: str,
+        headers: Optional[Dict[str, str]],
+        data: Optional[str],
+        params: Dict[str, str],
+        attempt: int,
+        server: ServerState,
+        service: str,
+    ) -> str:
+        """Send a request, racing a second copy if the first is slow to answer
+
+        The hedge goes to another healthy application server (none is sent
+        if there is no other), waits for its own admission like any request,
+        and is taken from the retry budget, so hedging stops when the gateway
+        is already failing. The first successful response wins.
+        """
+        primary = asyncio.ensure_future(
+            self._send(method, url, headers, data, params, attempt, True, server=server)
+        )
+        tasks = [primary]
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=self.retry_policy.hedge_after)
+            other = None if done else self.balancer.pick_other(server)
+            if other is None or not self.retry_policy.budget.try_acquire():
+                return cast(str, await primary)
+
+            async def hedge(other: ServerState) -> str:
+                async with self.admission.admit(service):
+                    with circuit_guard(self._circuits(url, other)), self.balancer.track(other):
+                        return cast(
+                            str,
+                            await self._send(
+                                method, url, headers, data, params, attempt, True,
+                                hedged=True, server=other,
+                            ),
+                        )
+
+            SAP_RETRIES.inc(host=self.config.host, reason="hedge")
+            tasks.append(asyncio.ensure_future(hedge(other)))
+            pending = set(tasks)
+            error: Optional[BaseException] = None
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    if task.exception() is None:
+                        return cast(str, task.result())
+                    error = error or task.exception()
+            raise cast(BaseException, error)
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+    async def _send(
+        self,
+        method: str,
+        url: str,
+        headers: Optional[Dict[str, str]],
+        data: Optional[str],
+        params: Dict[str, str],
+        attempt: int,
+        read_response: bool,
+        hedged: bool = False,
+        server: Optional[ServerState] = None,
+    ) -> Union[aiohttp.ClientResponse, HTTP2Response, str]:
+        """Send one attempt of a request to an application server (the primary if None)
+
+        Raises:
+            SAPRequestError: On 401 (after invalidating the token) and other
+                error statuses; Retry-After is kept in response_data
+            SAPConnectionError: If the connection failed
+            SAPTimeoutError: If the request timed out
+        """
+        server = server or self.balancer.primary
+        authenticator = self._authenticator_for(server)
+        url = self.balancer.url_for(server, url)
+        session = await self._ensure_session()
 
-        # Get valid authentication token
+        # Get valid authentication token (logging in through the same pool)
         try:
-            token = await self.authenticator.get_valid_token()
+            with measure_phase("auth"):
+                token = await authenticator.get_valid_token(session.connector)
+        except (SAPConnectionError, SAPTimeoutError):
+            # Unreachable gateway, not a credentials problem
+            raise
         except Exception as e:
             raise SAPAuthenticationError(
                 f"Failed to get authentication token: {str(e)}"
             )
 
         # Prepare headers
-        request_headers = self.authenticator.get_auth_headers(token)
+        request_headers = authenticator.get_auth_headers(token)
+        request_headers["Accept-Encoding"] = (
+            ACCEPT_ENCODING if self.config.compression else "identity"
+        )
         if headers:
             request_headers.update(headers)
 
-        # Prepare session
-        session = await self._ensure_session()
-
-        # Set cookies from token
-        for name, value in token.cookies.items():
-            session.cookie_jar.update_cookies({name: value})
-
-        # Prepare data
-        if isinstance(data, dict):
-            data = json.dumps(data)
-            request_headers["Content-Type"] = "application/json"
+        # Streamed responses (read_response=False) stay on aiohttp
+        transport: Union[aiohttp.ClientSession, HTTP2Session] = session
+        if self._http2 is not None and read_response:
+            transport = self._http2
 
-        # Ensure sap-client parameter is always included
-        if params is None:
-            params = {}
-        if "sap-client" not in params:
-            params["sap-client"] = self.config.client
+        service, entity = _service_and_entity(url)
 
         try:
-            async with session.request(
-                method=method,
-                url=url,
-                headers=request_headers,
-                data=data,
-                params=params,
-            ) as response:
-
-                # Handle authentication errors
-                if response.status == 401:
-                    logger.warning("Authentication token expired, refreshing...")
-                    await self.authenticator.invalidate_token()
-                    # Retry with new token
-                    return await self._make_request(
-                        method,
-                        url,
-                        headers,
-                        data,
-                        params,
-                        retry_count + 1,
-                        read_response,
-                    )
-
-                # Handle other errors
-                if response.status >= 400:
-                    error_text = await response.text()
-                    raise SAPRequestError(
-                        f"SAP request failed: {response.status} - {error_text}",
-                        status_code=response.status,
-                        response_data={"url": url, "method": method},
-                    )
-
-                # Read response body if requested (to avoid connection closing issues)
-                if read_response:
-                    response_text = await response.text()
-                    return response_text
-                else:
+            with start_span(
+                "sap.request",
+                {
+                    "http.request.method": method,
+                    "url.template": url_template(url),
+                    "server.address": server.host,
+                    "server.port": server.port,
+                    "sap.retry_count": attempt,
+                    "sap.hedged": hedged or None,
+                },
+            ) as span, track_sap_request(
+                server.host, service, entity, method
+            ) as outcome:
+                request_start = time.perf_counter()
+                # Session cookies go with each request rather than into the
+                # shared cookie jar, since every server has its own login
+                async with transport.request(
+                    method=method,
+                    url=url,
+                    headers=request_headers,
+                    data=data,
+                    params=params,
+                    cookies=token.cookies,
+                ) as response:
+                    # Time until response headers arrive (the whole response on HTTP/2)
+                    record_phase("network", time.perf_counter() - request_start)
+                    span.set_attribute("http.response.status_code", response.status)
+                    outcome["status"] = str(response.status)
+
+                    # Handle authentication errors
+                    if response.status == 401:
+                        logger.warning("Authentication token expired, refreshing...")
+                        await authenticator.invalidate_token()
+                        raise SAPRequestError(
+                            "SAP request failed: 401 - Unauthorized",
+                            status_code=401,
+                            response_data={"url": url, "method": method},
+                        )
+
+                    # Handle other errors (412: stale If-Match ETag)
+                    if response.status >= 400:
+                        error_text = await response.text()
+                        error_class = (
+                            SAPConcurrencyError if response.status == 412 else SAPRequestError
+                        )
+                        raise error_class(
+                            f"SAP request failed: {response.status} - {error_text}",
+                            status_code=response.status,
+                            response_data={
+                                "url": url,
+                                "method": method,
+                                "retry_after": parse_retry_after(
+                                    response.headers.get("Retry-After")
+                                ),
+                            },
+                        )
+
+                    # Read response body if requested (to avoid connection closing issues)
+                    if read_response:
+                        with measure_phase("download"):
+                            body = await response.read()
+                            response_text = await response.text()
+                        wire_bytes = _wire_bytes(response, len(body))
+                        span.set_attribute("http.response.body.size", wire_bytes)
+                        encoding = response.headers.get("Content-Encoding")
+                        if encoding:
+                            span.set_attribute(
+                                "http.response.header.content-encoding", encoding
+                            )
+                        outcome["bytes"] = len(body)
+                        outcome["wire_bytes"] = wire_bytes
+                        return response_text
                     return response
 
         except asyncio.TimeoutError:
             raise SAPTimeoutError(f"Request timeout for {method} {url}")
+        except aiohttp.ClientConnectorError as e:
+            raise SAPConnectionError(
+                f"Connection error: {str(e)}", response_data={"not_sent": True}
+            )
         except aiohttp.ClientError as e:
-            if retry_count < self.config.retry_attempts - 1:
-                logger.warning(
-                    f"Request failed, retrying "
-                    f"({retry_count + 1}/{self.config.retry_attempts}): {str(e)}"
-                )
-                await asyncio.sleep(2**retry_count)  # Exponential backoff
-                return await self._make_request(
-                    method, url, headers, data, params, retry_count + 1, read_response
-                )
-            else:
-                raise SAPConnectionError(f"Connection error: {str(e)}")
+            raise SAPConnectionError(f"Connection error: {str(e)}")
+
+    async def key_predicate(
+        self, service_path: str, entity_set: str, entity_key: KeyValue
+    ) -> str:
+        """Key predicate of an entity, typed from the service $metadata
+
+        Composite keys are given as a dict or as Key1='a',Key2=10 (see
+        keys.py); without $metadata the key is sent as a string.
+
+        Raises:
+            SAPValidationError: If the key does not match the key properties
+        """
+        model = await get_service_model(self, service_path)
+        entity_model = model.entity_sets.get(entity_set) if model is not None else None
+        return format_key(
+            entity_key,
+            entity_model.keys if entity_model is not None else (),
+            model.version if model is not None else "v2",
+        )
+
+    async def entity_url(self, service_path: str, entity_set: str, entity_key: KeyValue) -> str:
+        """URL of an entity (see key_predicate)"""
+        predicate = await self.key_predicate(service_path, entity_set, entity_key)
+        return f"{self.odata_base}{service_path}/{entity_set}({predicate})"
 
     async def get_service_metadata(self, service_path: str) -> Dict[str, Any]:
         """Get OData service metadata"""
         url = f"{self.odata_base}{service_path}/$metadata"
 
         headers = {"Accept": "application/xml"}
-        xml_content = await self._make_request(
-            "GET", url, headers=headers, read_response=True
-        )
 
-        # Parse XML metadata
-        try:
-            metadata = xmltodict.parse(xml_content)
-            logger.info(f"Retrieved metadata for service: {service_path}")
-            return cast(Dict[str, Any], metadata)
-        except Exception as e:
-            raise SAPValidationError(f"Failed to parse metadata XML: {str(e)}")
+        def parse(xml_content: str) -> Any:
+            try:
+                return xmltodict.parse(xml_content)
+            except Exception as e:
+                raise SAPValidationError(f"Failed to parse metadata XML: {str(e)}")
+
+        metadata = await self._get_parsed(url, headers, parse=parse)
+        logger.info(f"Retrieved metadata for service: {service_path}")
+        return cast(Dict[str, Any], metadata)
 
     async def list_services(self) -> List[Dict[str, Any]]:
         """List available OData services"""
@@ -255,10 +756,7 @@ class SAPClient:
         # Add Accept header for JSON format
         headers = {"Accept": "application/json"}
 
-        response_text = await self._make_request(
-            "GET", url, headers=headers, read_response=True
-        )
-        data = json.loads(response_text)
+        data = await self._get_parsed(url, headers)
 
         # Extract service information
         services = []
@@ -285,8 +783,14 @@ class SAPClient:
         top: Optional[int] = None,
         skip: Optional[int] = None,
         headers: Optional[Dict[str, str]] = None,
+        expand: Optional[List[str]] = None,
     ) -> Dict[str, Any]:
-        """Query an OData entity set"""
+        """Query an OData entity set
+
+        Args:
+            expand: Navigation paths to return inline ($expand); see
+                expand.py for validation and the batched fallback
+        """
 
         # Build URL
         url = f"{self.odata_base}{service_path}/{entity_set}"
@@ -304,7 +808,8 @@ class SAPClient:
                 filter_expressions = []
                 for key, value in filters.items():
                     if isinstance(value, str):
-                        filter_expressions.append(f"{key} eq '{value}'")
+                        quoted = value.replace("'", "''")
+                        filter_expressions.append(f"{key} eq '{quoted}'")
                     else:
                         filter_expressions.append(f"{key} eq {value}")
                 if filter_expressions:
@@ -319,17 +824,38 @@ class SAPClient:
         if skip is not None:
             params["$skip"] = str(skip)
 
+        if expand:
+            params["$expand"] = ",".join(expand)
+
         # Add format parameter for JSON response
         params["$format"] = "json"
 
-        response_text = await self._make_request(
-            "GET", url, headers=headers, params=params, read_response=True
-        )
-        data = json.loads(response_text)
+        data = await self._get_parsed(url, headers, params)
 
         logger.info(f"Queried entity set {entity_set} from service {service_path}")
         return cast(Dict[str, Any], data)
 
+    async def get_json(
+        self,
+        url: str,
+        params: Optional[Dict[str, str]] = None,
+        headers: Optional[Dict[str, str]] = None,
+    ) -> Dict[str, Any]:
+        """GET a JSON resource by URL, such as a next or delta link from SAP
+
+        The URL's query is merged into params, so a link that already
+        carries sap-client does not send it twice.
+        """
+        split = urlsplit(url)
+        merged = dict(parse_qsl(split.query, keep_blank_values=True))
+        merged.update(params or {})
+        request_headers = {"Accept": "application/json", **(headers or {})}
+
+        data = await self._get_parsed(
+            split._replace(query="").geturl(), request_headers, merged
+        )
+        return cast(Dict[str, Any], data)
+
     async def create_entity(
         self, service_path: str, entity_set: str, entity_data: Dict[str, Any]
     ) -> Dict[str, Any]:
@@ -352,14 +878,21 @@ class SAPClient:
         self,
         service_path: str,
         entity_set: str,
-        entity_key: str,
+        entity_key: KeyValue,
         entity_data: Dict[str, Any],
+        etag: Optional[str] = None,
     ) -> Dict[str, Any]:
-        """Update an existing entity"""
+        """Replace an existing entity (PUT); see patch_entity for partial updates
 
-        url = f"{self.odata_base}{service_path}/{entity_set}('{entity_key}')"
+        Raises:
+            SAPConcurrencyError: If etag is given and the entity changed since (412)
+        """
+
+        url = await self.entity_url(service_path, entity_set, entity_key)
 
         headers = {"Content-Type": "application/json", "Accept": "application/json"}
+        if etag:
+            headers["If-Match"] = etag
 
         response_text = await self._make_request(
             "PUT", url, headers=headers, data=entity_data, read_response=True
@@ -372,29 +905,232 @@ class SAPClient:
         else:
             return {"status": "updated"}
 
+    async def patch_entity(
+        self,
+        service_path: str,
+        entity_set: str,
+        entity_key: KeyValue,
+        changes: Dict[str, Any],
+        etag: Optional[str] = None,
+        original: Optional[Dict[str, Any]] = None,
+        version: str = "v2",
+    ) -> Dict[str, Any]:
+        """Update only the given properties (PATCH on v4, MERGE on v2)
+
+        The ETag is sent as If-Match, so a concurrent change is detected
+        without reading the entity again. With `original`, the entity as
+        read earlier, only properties whose value differs are sent and its
+        ETag is used unless etag is given. etag="*" updates unconditionally.
+
+        Returns:
+            status ("updated" or "unchanged") and the new ETag if SAP sent one
+
+        Raises:
+            SAPConcurrencyError: If the entity changed since the ETag was read (412)
+        """
+        if original is not None:
+            changes = changed_properties(original, changes)
+            etag = etag or etag_of(original)
+            if not changes:
+                return {"status": "unchanged", "etag": etag}
+
+        url = await self.entity_url(service_path, entity_set, entity_key)
+
+        headers = {"Accept": "application/json"}
+        if etag:
+            headers["If-Match"] = etag
+        if version == "v4":
+            method = "PATCH"
+        else:
+            # Tunnelled through POST, as SAP Gateway expects for v2
+            method = "POST"
+            headers["X-HTTP-Method"] = "MERGE"
+
+        response = await self._make_request(
+            method, url, headers=headers, data=changes, read_response=False
+        )
+
+        logger.info(f"Updated {len(changes)} properties of {entity_key} in {entity_set}")
+        return {
+            "status": "updated",
+            "etag": cast(aiohttp.ClientResponse, response).headers.get("ETag"),
+        }
+
     async def delete_entity(
-        self, service_path: str, entity_set: str, entity_key: str
+        self,
+        service_path: str,
+        entity_set: str,
+        entity_key: KeyValue,
+        etag: Optional[str] = None,
     ) -> bool:
-        """Delete an entity"""
+        """Delete an entity
+
+        Raises:
+            SAPConcurrencyError: If etag is given and the entity changed since (412)
+        """
 
-        url = f"{self.odata_base}{service_path}/{entity_set}('{entity_key}')"
+        url = await self.entity_url(service_path, entity_set, entity_key)
+        headers = {"If-Match": etag} if etag else None
 
         # DELETE typically returns 204 No Content (empty response)
-        response_text = await self._make_request("DELETE", url, read_response=True)
+        response_text = await self._make_request(
+            "DELETE", url, headers=headers, read_response=True
+        )
 
         logger.info(f"Deleted entity {entity_key} from {entity_set}")
         return True
 
+    async def execute_batch(
+        self, service_path: str, changesets: List[List[BatchOperation]]
+    ) -> List[List[BatchResponse]]:
+        """Send changesets in one $batch request
+
+        Returns:
+            Per changeset, the response to each operation, or a single error
+            response if the gateway rolled the changeset back
+
+        Raises:
+            SAPRequestError: If the $batch request failed or its response
+                does not match the changesets
+        """
+        url = f"{self.odata_base}{service_path}/$batch"
+        content_type, body = build_batch(changesets)
+        headers = {"Content-Type": content_type, "Accept": "multipart/mixed"}
+
+        response_text = await self._make_request(
+            "POST", url, headers=headers, data=body, read_response=True
+        )
+        with measure_phase("parse"):
+            responses = parse_batch_response(cast(str, response_text))
+        if len(responses) != len(changesets):
+            raise SAPRequestError(
+                f"$batch response has {len(responses)} parts for "
+                f"{len(changesets)} changesets"
+            )
+        return responses
+
+    async def bulk_write(
+        self,
+        service_path: str,
+        operations: List[BatchOperation],
+        chunk_size: Optional[int] = None,
+        max_parallel: Optional[int] = None,
+    ) -> BulkWriteResult:
+        """Apply many writes as $batch changesets of chunk_size operations
+
+        Up to max_parallel $batch requests are in flight at once (defaults:
+        SAP_BATCH_SIZE and SAP_BATCH_PARALLELISM). Only failed changesets
+        are resent: one that failed with a transient status (429, 502, 503,
+        504) is retried whole with backoff, one rejected by an operation is
+        split in halves until the failing operations are isolated, so every
+        other operation is still applied.
+
+        Keys are typed from the service $metadata; an operation whose key
+        does not match the key properties fails without being sent.
+
+        Returns:
+            The outcome of each operation, in order
+        """
+        chunk_size = chunk_size or self.config.batch_size
+        semaphore = asyncio.Semaphore(max_parallel or self.config.batch_parallelism)
+        policy = self.retry_policy
+        items: List[Optional[BatchItemResult]] = [None] * len(operations)
+        result = BulkWriteResult(items=[])
+
+        def fail(indices: List[int], status: Optional[int], error: str) -> None:
+            for index in indices:
+                items[index] = BatchItemResult(
+                    index, operations[index], False, status, error=error
+                )
+
+        pending: List[int] = []
+        for index, operation in enumerate(operations):
+            if operation.key is not None and operation.key_predicate is None:
+                try:
+                    operation.key_predicate = await self.key_predicate(
+                        service_path, operation.entity_set, operation.key
+                    )
+                except SAPValidationError as e:
+                    fail([index], None, str(e))
+                    continue
+            pending.append(index)
+
+        async def run_chunk(indices: List[int], attempt: int = 1) -> None:
+            async with semaphore:
+                result.batches += 1
+                try:
+                    (responses,) = await self.execute_batch(
+                        service_path, [[operations[index] for index in indices]]
+                    )
+                except SAPError as e:
+                    # Already retried by _make_request where that is safe
+                    fail(indices, e.status_code, str(e))
+                    return
+
+            if len(responses) == len(indices) and all(r.ok for r in responses):
+                for index, response in zip(indices, responses):
+                    items[index] = BatchItemResult(
+                        index, operations[index], True, response.status, response.json()
+                    )
+                return
+
+            if not responses:
+                fail(indices, None, "Empty changeset in $batch response")
+                return
+            # The changeset was rolled back
+            failure = responses[-1]
+            error = SAPRequestError(
+                failure.error_message(),
+                status_code=failure.status,
+                response_data={
+                    "retry_after": parse_retry_after(failure.headers.get("retry-after"))
+                },
+            )
+            if failure.status in RETRYABLE_STATUSES and attempt < policy.max_attempts:
+                delay = policy.backoff(attempt, error)
+                if delay is not None and policy.budget.try_acquire():
+                    SAP_RETRIES.inc(host=self.config.host, reason=f"changeset_{failure.status}")
+                    await asyncio.sleep(delay)
+                    await run_chunk(indices, attempt + 1)
+                    return
+            if len(indices) > 1 and failure.status not in RETRYABLE_STATUSES:
+                SAP_RETRIES.inc(host=self.config.host, reason="changeset_split")
+                middle = len(indices) // 2
+                await asyncio.gather(run_chunk(indices[:middle]), run_chunk(indices[middle:]))
+                return
+            fail(indices, failure.status, str(error))
+
+        await asyncio.gather(
+            *(
+                run_chunk(pending[start:start + chunk_size])
+                for start in range(0, len(pending), chunk_size)
+            )
+        )
+
+        result.items = cast(List[BatchItemResult], items)
+        for item in result.items:
+            SAP_BATCH_OPERATIONS.inc(
+                service=service_path,
+                entity=item.operation.entity_set,
+                outcome="succeeded" if item.success else "failed",
+            )
+        logger.info(
+            f"Bulk write to {service_path}: {len(result.succeeded)}/{len(operations)} "
+            f"operations applied in {result.batches} $batch requests"
+        )
+        return result
+
     async def get_entity(
         self,
         service_path: str,
         entity_set: str,
-        entity_key: str,
+        entity_key: KeyValue,
         select_fields: Optional[List[str]] = None,
+        expand: Optional[List[str]] = None,
     ) -> Dict[str, Any]:
-        """Get a specific entity by key"""
+        """Get a specific entity by key, with the navigation paths in expand inline"""
 
-        url = f"{self.odata_base}{service_path}/{entity_set}('{entity_key}')"
+        url = await self.entity_url(service_path, entity_set, entity_key)
 
         # Add Accept header for JSON format
         headers = {"Accept": "application/json"}
@@ -402,15 +1138,11 @@ class SAPClient:
         params = {"$format": "json"}
         if select_fields:
             params["$select"] = ",".join(select_fields)
+        if expand:
+            params["$expand"] = ",".join(expand)
 
         try:
-            response_text = await self._make_request(
-                "GET", url, headers=headers, params=params, read_response=True
-            )
-            logger.debug(f"Response text: {response_text[:500]}")
-
-            # Parse JSON from the text
-            data = json.loads(response_text)
+            data = await self._get_parsed(url, headers, params)
 
             logger.info(f"Retrieved entity {entity_key} from {entity_set}")
             return cast(Dict[str, Any], data)
@@ -418,3 +1150,42 @@ class SAPClient:
         except Exception as e:
             logger.error(f"Error in get_entity: {str(e)}")
             raise
+
+
+async def warm_up_systems(system_ids: Optional[List[str]] = None) -> Dict[str, Any]:
+    """Warm up the connections to SAP systems (all configured systems if None)
+
+    Runs on the event loop that will serve requests, since connection pools
+    are per event loop. Failures are logged and reported, never raised.
+
+    Returns:
+        SAPClient.warm_up results (or an error) by system ID
+    """
+    results: Dict[str, Any] = {}
+    try:
+        system_ids = system_ids or list_system_ids()
+    except Exception as e:
+        logger.warning(f"SAP connection warm-up skipped: {e}")
+        return results
+
+    async def warm_up_system(system_id: str) -> Any:
+        try:
+            system = get_system_profile(system_id)
+        except ServiceConfigurationError as e:
+            return {"error": str(e)}
+        client = SAPClient(system.connection, system=system)
+        try:
+            return await client.warm_up()
+        finally:
+            await client.close()
+
+    start = time.perf_counter()
+    for system_id, result in zip(
+        system_ids, await asyncio.gather(*(warm_up_system(i) for i in system_ids))
+    ):
+        results[system_id] = result
+    logger.info(
+        f"Warmed up connections to {len(results)} SAP system(s) in "
+        f"{time.perf_counter() - start:.3f}s: {results}"
+    )
+    return results
@@ -0,0 +1,53 @@
+"""Observability helpers for SAP Gateway Connector"""
+
+from .metrics import (
+    Counter,
+    Gauge,
+    Histogram,
+    MetricsRegistry,
+    dump_metrics,
+    metrics_registry,
+)
+from .recorder import TraceRecorder, load_trace, trace_recorder
+from .stats import (
+    PHASES,
+    LatencyHistogram,
+    PhaseTimings,
+    collect_phase_timings,
+    measure_phase,
+    record_phase,
+)
+from .tracing import (
+    HAS_OPENTELEMETRY,
+    configure_offline_exporter,
+    get_tracer,
+    start_span,
+    url_template,
+)
+
+__all__ = [
+    # Metrics
+    "Counter",
+    "Gauge",
+    "Histogram",
+    "MetricsRegistry",
+    "dump_metrics",
+    "metrics_registry",
+    # Trace recording
+    "TraceRecorder",
+    "load_trace",
+    "trace_recorder",
+    # Stats
+    "PHASES",
+    "LatencyHistogram",
+    "PhaseTimings",
+    "collect_phase_timings",
+    "measure_phase",
+    "record_phase",
+    # Tracing
+    "HAS_OPENTELEMETRY",
+    "configure_offline_exporter",
+    "get_tracer",
+    "start_span",
+    "url_template",
+]
@@ -0,0 +1,445 @@
+"""Prometheus-style metrics for SAP Gateway Connector
+
+A small in-process registry of counters, gauges and histograms that can be
+rendered in the Prometheus text exposition format (served by the HTTP
+transport) or dumped as a dict (stdio and agent modes).
+"""
+
+import asyncio
+import math
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+SIZE_BUCKETS = (1_000, 10_000, 100_000, 1_000_000, 10_000_000, 100_000_000)
+
+
+def _escape_label_value(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class Metric:
+    """Base class for labelled metrics"""
+
+    type_name = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _label_key(self, labels: Dict[str, Any]) -> Tuple[str, ...]:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(
+                f"Metric '{self.name}' expects labels {list(self.labelnames)}, "
+                f"got {sorted(labels)}"
+            )
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _format_labels(
+        self, key: Tuple[str, ...], extra: Optional[Tuple[str, str]] = None
+    ) -> str:
+        pairs = list(zip(self.labelnames, key, strict=True))
+        if extra:
+            pairs.append(extra)
+        if not pairs:
+            return ""
+        body = ",".join(f'{k}="{_escape_label_value(v)}"' for k, v in pairs)
+        return "{" + body + "}"
+
+    def samples(self) -> Iterable[Tuple[str, str, float]]:
+        """Yield (suffix, formatted labels, value) samples"""
+        raise NotImplementedError
+
+    def collect(self) -> List[Dict[str, Any]]:
+        """Get current values as a list of dicts"""
+        raise NotImplementedError
+
+    def reset(self) -> None:
+        """Clear all recorded values"""
+        raise NotImplementedError
+
+    def render(self) -> str:
+        """Render in Prometheus text exposition format"""
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.type_name}",
+        ]
+        for suffix, labels, value in self.samples():
+            lines.append(f"{self.name}{suffix}{labels} {_format_value(value)}")
+        return "\n".join(lines)
+
+
+class Counter(Metric):
+    """Monotonically increasing counter"""
+
+    type_name = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: Any) -> None:
+        """Increment the counter"""
+        if amount < 0:
+            raise ValueError("Counters can only be incremented")
+        key = self._label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def get(self, **labels: Any) -> float:
+        """Get the current value for a label set"""
+        return self._values.get(self._label_key(labels), 0.0)
+
+    def samples(self) -> Iterable[Tuple[str, str, float]]:
+        with self._lock:
+            items = list(self._values.items())
+        for key, value in items:
+            yield "", self._format_labels(key), value
+
+    def collect(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            items = list(self._values.items())
+        return [
+            {"labels": dict(zip(self.labelnames, key, strict=True)), "value": value}
+            for key, value in items
+        ]
+
+    def reset(self) -> None:
+        with self._lock:
+            self._values.clear()
+
+
+class Gauge(Counter):
+    """Value that can go up and down"""
+
+    type_name = "gauge"
+
+    def inc(self, amount: float = 1.0, **labels: Any) -> None:
+        """Increase the gauge"""
+        key = self._label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels: Any) -> None:
+        """Decrease the gauge"""
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels: Any) -> None:
+        """Set the gauge to a value"""
+        key = self._label_key(labels)
+        with self._lock:
+            self._values[key] = value
+
+
+class Histogram(Metric):
+    """Histogram with fixed cumulative buckets"""
+
+    type_name = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        self._values: Dict[Tuple[str, ...], Dict[str, Any]] = {}
+
+    def observe(self, value: float, **labels: Any) -> None:
+        """Record an observation"""
+        key = self._label_key(labels)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = {
+                    "counts": [0] * len(self.buckets),
+                    "sum": 0.0,
+                    "count": 0,
+                }
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    entry["counts"][index] += 1
+                    break
+            entry["sum"] += value
+            entry["count"] += 1
+
+    def samples(self) -> Iterable[Tuple[str, str, float]]:
+        with self._lock:
+            items = [(k, dict(v, counts=list(v["counts"]))) for k, v in self._values.items()]
+        for key, entry in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets, entry["counts"], strict=True):
+                cumulative += count
+                yield "_bucket", self._format_labels(
+                    key, ("le", _format_value(bound))
+                ), cumulative
+            yield "_sum", self._format_labels(key), entry["sum"]
+            yield "_count", self._format_labels(key), entry["count"]
+
+    def collect(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            items = list(self._values.items())
+        return [
+            {
+                "labels": dict(zip(self.labelnames, key, strict=True)),
+                "count": entry["count"],
+                "sum": entry["sum"],
+                "buckets": {
+                    _format_value(bound): count
+                    for bound, count in zip(self.buckets, entry["counts"], strict=True)
+                },
+            }
+            for key, entry in items
+        ]
+
+    def reset(self) -> None:
+        with self._lock:
+            self._values.clear()
+
+
+class MetricsRegistry:
+    """Registry of named metrics"""
+
+    def __init__(self) -> None:
+        self._metrics: Dict[str, Metric] = {}
+        self._lock = threading.Lock()
+
+    def _get_or_create(self, cls: type, name: str, *args: Any, **kwargs: Any) -> Any:
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, *args, **kwargs)
+            elif type(metric) is not cls:
+                raise ValueError(f"Metric '{name}' already registered as {metric.type_name}")
+            return metric
+
+    def counter(
+        self, name: str, documentation: str, labelnames: Sequence[str] = ()
+    ) -> Counter:
+        """Get or create a counter"""
+        return self._get_or_create(Counter, name, documentation, labelnames)
+
+    def gauge(
+        self, name: str, documentation: str, labelnames: Sequence[str] = ()
+    ) -> Gauge:
+        """Get or create a gauge"""
+        return self._get_or_create(Gauge, name, documentation, labelnames)
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        """Get or create a histogram"""
+        return self._get_or_create(Histogram, name, documentation, labelnames, buckets)
+
+    def get(self, name: str) -> Optional[Metric]:
+        """Get a registered metric by name"""
+        return self._metrics.get(name)
+
+    def render(self) -> str:
+        """Render all metrics in Prometheus text exposition format"""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return "\n".join(metric.render() for metric in metrics) + "\n"
+
+    def collect(self) -> Dict[str, Any]:
+        """Get all metrics as a dict"""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return {
+            metric.name: {
+                "type": metric.type_name,
+                "help": metric.documentation,
+                "values": metric.collect(),
+            }
+            for metric in metrics
+        }
+
+    def reset(self) -> None:
+        """Clear recorded values of all metrics"""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        for metric in metrics:
+            metric.reset()
+
+
+# Global metrics registry instance
+metrics_registry = MetricsRegistry()
+
+# Connector metrics
+SAP_REQUESTS = metrics_registry.counter(
+    "sap_requests_total",
+    "SAP Gateway HTTP requests by service, entity set, method and status",
+    ["service", "entity", "method", "status"],
+)
+SAP_REQUEST_DURATION = metrics_registry.histogram(
+    "sap_request_duration_seconds",
+    "SAP Gateway HTTP request duration",
+    ["service", "entity", "method"],
+)
+SAP_RESPONSE_BYTES = metrics_registry.histogram(
+    "sap_response_size_bytes",
+    "SAP Gateway response body size",
+    ["service", "entity"],
+    buckets=SIZE_BUCKETS,
+)
+SAP_RESPONSE_WIRE_BYTES = metrics_registry.histogram(
+    "sap_response_wire_size_bytes",
+    "SAP Gateway response body size as transferred (compressed)",
+    ["service", "entity"],
+    buckets=SIZE_BUCKETS,
+)
+SAP_RETRIES = metrics_registry.counter(
+    "sap_retries_total", "SAP request retries by reason", ["host", "reason"]
+)
+SAP_RETRIES_SUPPRESSED = metrics_registry.counter(
+    "sap_retries_suppressed_total",
+    "Retries not attempted because of the retry budget or a long Retry-After",
+    ["host", "reason"],
+)
+SAP_COALESCED_REQUESTS = metrics_registry.counter(
+    "sap_coalesced_requests_total",
+    "GETs answered by an identical request already in flight",
+    ["service", "entity"],
+)
+SAP_BATCH_OPERATIONS = metrics_registry.counter(
+    "sap_batch_operations_total",
+    "Bulk write operations sent in $batch changesets, by final outcome",
+    ["service", "entity", "outcome"],
+)
+SAP_NAVIGATION_FETCHES = metrics_registry.counter(
+    "sap_navigation_fetches_total",
+    "Navigation properties read for $expand, per parent entity, by mode: inline "
+    "($expand) or batch ($batch GETs where the service does not expand)",
+    ["entity", "navigation", "mode"],
+)
+SAP_REPLICA_SYNC_ROWS = metrics_registry.counter(
+    "sap_replica_sync_rows_total",
+    "Rows written to (upserted) or removed from (deleted) local replicas by sync",
+    ["entity", "change"],
+)
+SAP_REPLICA_READS = metrics_registry.counter(
+    "sap_replica_reads_total",
+    "Reads of replicated entities by result: hit (served locally), miss (not in "
+    "the replica), stale (replica not synced recently) or bypass (query not "
+    "servable locally)",
+    ["entity", "result"],
+)
+SAP_CIRCUIT_STATE = metrics_registry.gauge(
+    "sap_circuit_state",
+    "Circuit breaker state (0 closed, 1 half-open, 2 open)",
+    ["circuit"],
+)
+SAP_CIRCUIT_REJECTIONS = metrics_registry.counter(
+    "sap_circuit_rejections_total",
+    "Requests failed fast because a circuit was open",
+    ["circuit"],
+)
+SAP_ADMISSION_QUEUED = metrics_registry.gauge(
+    "sap_admission_queued",
+    "SAP requests waiting for a rate limit token or concurrency slot",
+    ["host"],
+)
+SAP_ADMISSION_WAIT = metrics_registry.histogram(
+    "sap_admission_wait_seconds", "Time SAP requests waited for admission", ["host"]
+)
+SAP_ADMISSION_REJECTIONS = metrics_registry.counter(
+    "sap_admission_rejections_total",
+    "SAP requests failed because they waited past the queue timeout",
+    ["host"],
+)
+SAP_SERVER_UP = metrics_registry.gauge(
+    "sap_server_up",
+    "Whether an application server is in load balancing rotation (1) or down (0)",
+    ["system", "server"],
+)
+SAP_SERVER_IN_FLIGHT = metrics_registry.gauge(
+    "sap_server_requests_in_flight",
+    "Requests in flight per application server",
+    ["system", "server"],
+)
+SAP_AUTH_REFRESHES = metrics_registry.counter(
+    "sap_auth_refreshes_total", "SAP logins performed to obtain a CSRF token", ["host"]
+)
+SAP_OPEN_CONNECTIONS = metrics_registry.gauge(
+    "sap_open_connections", "Connections currently in use for SAP requests", ["host"]
+)
+SAP_CONNECTION_LIMIT = metrics_registry.gauge(
+    "sap_connection_pool_limit", "Connection pool size per SAP host", ["host"]
+)
+TOOL_CALLS = metrics_registry.counter(
+    "sap_tool_calls_total", "Tool calls by tool and outcome", ["tool", "outcome"]
+)
+TOOL_CALLS_IN_FLIGHT = metrics_registry.gauge(
+    "sap_tool_calls_in_flight", "Tool calls currently executing", ["tool"]
+)
+
+
+@contextmanager
+def track_sap_request(
+    host: str, service: str, entity: str, method: str
+) -> Iterator[Dict[str, Any]]:
+    """Record connection usage, outcome and duration of one SAP request
+
+    The caller fills in "status" (HTTP status), "bytes" (response body size)
+    and "wire_bytes" (body size as transferred) on the yielded dict.
+    """
+    outcome: Dict[str, Any] = {"status": "error", "bytes": None, "wire_bytes": None}
+    SAP_OPEN_CONNECTIONS.inc(host=host)
+    start = time.perf_counter()
+    try:
+        yield outcome
+    except asyncio.TimeoutError:
+        outcome["status"] = "timeout"
+        raise
+    finally:
+        SAP_OPEN_CONNECTIONS.dec(host=host)
+        SAP_REQUESTS.inc(
+            service=service, entity=entity, method=method, status=outcome["status"]
+        )
+        SAP_REQUEST_DURATION.observe(
+            time.perf_counter() - start, service=service, entity=entity, method=method
+        )
+        if outcome["bytes"] is not None:
+            SAP_RESPONSE_BYTES.observe(outcome["bytes"], service=service, entity=entity)
+        if outcome["wire_bytes"] is not None:
+            SAP_RESPONSE_WIRE_BYTES.observe(
+                outcome["wire_bytes"], service=service, entity=entity
+            )
+
+
+def dump_metrics(fmt: str = "prometheus") -> Any:
+    """Dump all connector metrics
+
+    Args:
+        fmt: 'prometheus' for text exposition format, 'json' for a dict
+
+    Returns:
+        Exposition text or dict of metrics
+
+    Example:
+        >>> print(dump_metrics())
+        # HELP sap_requests_total SAP Gateway HTTP requests ...
+    """
+    if fmt == "json":
+        return metrics_registry.collect()
+    if fmt == "prometheus":
+        return metrics_registry.render()
+    raise ValueError("fmt must be 'prometheus' or 'json'")
@@ -0,0 +1,123 @@
+"""Tool-call trace recording for SAP Gateway Connector
+
+Captures the arguments and timing of every tool call (through
+ToolRegistry.call_tool and the agent's function tools) into a compact JSON
+lines file that benchmarks/replay.py can replay against the mock gateway.
+
+File format: a header line followed by one line per call:
+
+    {"trace": "sap-tool-calls", "version": 1, "started": "2025-01-01T00:00:00+00:00"}
+    {"t": 0.0, "tool": "sap_query", "args": {"service": "Z_SRV", ...}, "dur": 0.412}
+
+"t" is the call start in seconds since recording started, "dur" its duration.
+
+Recording is off unless SAP_TRACE_RECORD_PATH is set or start() is called.
+Arguments are stored as given, so traces can contain business data.
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, TextIO, Union
+
+logger = logging.getLogger(__name__)
+
+TRACE_FORMAT = "sap-tool-calls"
+TRACE_VERSION = 1
+TRACE_PATH_ENV = "SAP_TRACE_RECORD_PATH"
+
+
+class TraceRecorder:
+    """Appends tool calls to a trace file while recording is active"""
+
+    def __init__(self, path: Optional[Union[str, Path]] = None):
+        self._lock = threading.Lock()
+        self._file: Optional[TextIO] = None
+        self._origin = 0.0
+        self.path: Optional[Path] = None
+        if path:
+            try:
+                self.start(path)
+            except OSError as e:
+                logger.warning(f"Tool-call trace recording disabled: {e}")
+
+    @property
+    def active(self) -> bool:
+        """Whether calls are currently being recorded"""
+        return self._file is not None
+
+    def start(self, path: Union[str, Path]) -> None:
+        """Start recording to a new trace file (replacing any existing one)"""
+        with self._lock:
+            self._close()
+            self.path = Path(path)
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._file = open(self.path, "w", encoding="utf-8", buffering=1)
+            self._origin = time.perf_counter()
+            header = {
+                "trace": TRACE_FORMAT,
+                "version": TRACE_VERSION,
+                "started": datetime.now(timezone.utc).isoformat(),
+            }
+            self._file.write(json.dumps(header) + "\n")
+        logger.info(f"Recording tool-call trace to {self.path}")
+
+    def stop(self) -> Optional[Path]:
+        """Stop recording; returns the trace file path"""
+        with self._lock:
+            self._close()
+        return self.path
+
+    def _close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def record(
+        self,
+        tool_name: str,
+        arguments: Optional[Dict[str, Any]],
+        started: float,
+        duration: float,
+    ) -> None:
+        """Record one call; `started` is a time.perf_counter() value"""
+        if self._file is None:
+            return
+        event = {
+            "t": round(max(started - self._origin, 0.0), 6),
+            "tool": tool_name,
+            "args": {k: v for k, v in (arguments or {}).items() if v is not None},
+            "dur": round(duration, 6),
+        }
+        line = json.dumps(event, separators=(",", ":"), default=str) + "\n"
+        with self._lock:
+            if self._file is not None:
+                try:
+                    self._file.write(line)
+                except OSError as e:
+                    logger.warning(f"Failed to write trace to {self.path}: {e}")
+
+
+def load_trace(path: Union[str, Path]) -> List[Dict[str, Any]]:
+    """Load the call events of a trace file, ordered by start time
+
+    Raises:
+        ValueError: If the file is not a tool-call trace
+    """
+    with open(path, encoding="utf-8") as f:
+        lines: Iterator[str] = (line for line in f if line.strip())
+        header = json.loads(next(lines, "{}"))
+        if header.get("trace") != TRACE_FORMAT:
+            raise ValueError(f"{path} is not a tool-call trace")
+        if header.get("version") != TRACE_VERSION:
+            raise ValueError(f"Unsupported trace version: {header.get('version')}")
+        events = [json.loads(line) for line in lines]
+    return sorted(events, key=lambda event: event["t"])
+
+
+# Global trace recorder, enabled by SAP_TRACE_RECORD_PATH
+trace_recorder = TraceRecorder(os.getenv(TRACE_PATH_ENV))
@@ -0,0 +1,185 @@
+"""Latency histograms and per-call phase timings"""
+
+import math
+import time
+from array import array
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, Optional
+
+# Phases a single tool call is broken down into
+PHASES = ("auth", "network", "download", "parse", "transform")
+
+
+class LatencyHistogram:
+    """HDR-style log-linear latency histogram with constant memory
+
+    Values are recorded in microseconds into power-of-two buckets, each split
+    into linear sub-buckets, so the relative error stays bounded by the number
+    of significant figures regardless of how many samples are recorded.
+    """
+
+    def __init__(
+        self,
+        max_value_us: int = 3_600_000_000,
+        significant_figures: int = 2,
+    ):
+        if not 1 <= significant_figures <= 5:
+            raise ValueError("significant_figures must be between 1 and 5")
+
+        largest_single_unit = 2 * 10**significant_figures
+        sub_bucket_count_magnitude = math.ceil(math.log2(largest_single_unit))
+        self._sub_bucket_count = 1 << sub_bucket_count_magnitude
+        self._sub_bucket_half_count = self._sub_bucket_count // 2
+        self._sub_bucket_half_magnitude = sub_bucket_count_magnitude - 1
+        self._sub_bucket_mask = self._sub_bucket_count - 1
+
+        # Number of power-of-two buckets needed to cover max_value_us
+        smallest_untrackable = self._sub_bucket_count
+        bucket_count = 1
+        while smallest_untrackable <= max_value_us:
+            smallest_untrackable <<= 1
+            bucket_count += 1
+
+        self.max_value_us = max_value_us
+        self._counts_len = (bucket_count + 1) * self._sub_bucket_half_count
+        self.reset()
+
+    def reset(self) -> None:
+        """Clear all recorded values"""
+        self._counts = array("Q", bytes(8 * self._counts_len))
+        self.count = 0
+        self._total_us = 0
+        self._min_us: Optional[int] = None
+        self._max_us = 0
+
+    def _counts_index(self, value_us: int) -> int:
+        bucket_index = (value_us | self._sub_bucket_mask).bit_length() - (
+            self._sub_bucket_half_magnitude + 1
+        )
+        sub_bucket_index = value_us >> bucket_index
+        return (bucket_index << self._sub_bucket_half_magnitude) + sub_bucket_index
+
+    def _highest_equivalent_value(self, index: int) -> int:
+        bucket_index = (index >> self._sub_bucket_half_magnitude) - 1
+        sub_bucket_index = (index & (self._sub_bucket_half_count - 1)) + (
+            self._sub_bucket_half_count
+        )
+        if bucket_index < 0:
+            sub_bucket_index -= self._sub_bucket_half_count
+            bucket_index = 0
+        return (sub_bucket_index << bucket_index) + (1 << bucket_index) - 1
+
+    def record(self, seconds: float) -> None:
+        """Record a duration given in seconds"""
+        value_us = min(max(int(seconds * 1_000_000), 0), self.max_value_us)
+        self._counts[self._counts_index(value_us)] += 1
+        self.count += 1
+        self._total_us += value_us
+        if self._min_us is None or value_us < self._min_us:
+            self._min_us = value_us
+        if value_us > self._max_us:
+            self._max_us = value_us
+
+    def merge(self, other: "LatencyHistogram") -> None:
+        """Add all values recorded in another histogram with the same layout"""
+        if other._counts_len != self._counts_len:
+            raise ValueError("Cannot merge histograms with different layouts")
+        for index, value in enumerate(other._counts):
+            if value:
+                self._counts[index] += value
+        self.count += other.count
+        self._total_us += other._total_us
+        if other._min_us is not None and (
+            self._min_us is None or other._min_us < self._min_us
+        ):
+            self._min_us = other._min_us
+        self._max_us = max(self._max_us, other._max_us)
+
+    def percentile(self, percentile: float) -> float:
+        """Get the value (in seconds) at the given percentile (0-100)"""
+        if self.count == 0:
+            return 0.0
+
+        target = max(1, math.ceil(percentile / 100.0 * self.count))
+        cumulative = 0
+        for index, value in enumerate(self._counts):
+            if not value:
+                continue
+            cumulative += value
+            if cumulative >= target:
+                value_us = min(self._highest_equivalent_value(index), self._max_us)
+                return value_us / 1_000_000
+        return self._max_us / 1_000_000
+
+    @property
+    def mean(self) -> float:
+        """Mean recorded value in seconds"""
+        return self._total_us / self.count / 1_000_000 if self.count else 0.0
+
+    @property
+    def max(self) -> float:
+        """Largest recorded value in seconds"""
+        return self._max_us / 1_000_000
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Summarize the histogram (durations in seconds)"""
+        return {
+            "count": self.count,
+            "min": (self._min_us or 0) / 1_000_000,
+            "max": self.max,
+            "mean": self.mean,
+            "p50": self.percentile(50),
+            "p90": self.percentile(90),
+            "p95": self.percentile(95),
+            "p99": self.percentile(99),
+        }
+
+
+class PhaseTimings:
+    """Accumulates time spent in each phase of a single tool call"""
+
+    def __init__(self) -> None:
+        self.durations: Dict[str, float] = {}
+
+    def add(self, phase: str, seconds: float) -> None:
+        """Add time spent in a phase"""
+        self.durations[phase] = self.durations.get(phase, 0.0) + seconds
+
+
+_current_timings: ContextVar[Optional[PhaseTimings]] = ContextVar(
+    "sap_phase_timings", default=None
+)
+
+
+@contextmanager
+def collect_phase_timings() -> Iterator[PhaseTimings]:
+    """Collect phase timings recorded by the connector within this block"""
+    timings = PhaseTimings()
+    token = _current_timings.set(timings)
+    try:
+        yield timings
+    finally:
+        _current_timings.reset(token)
+
+
+def record_phase(phase: str, seconds: float) -> None:
+    """Attribute a duration to a phase of the current tool call, if any"""
+    timings = _current_timings.get()
+    if timings is not None:
+        timings.add(phase, seconds)
+
+
+@contextmanager
+def measure_phase(phase: str) -> Iterator[None]:
+    """Time the enclosed block and attribute it to a phase of the current call"""
+    timings = _current_timings.get()
+    if timings is None:
+        yield
+        return
+
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.add(phase, time.perf_counter() - start)
@@ -0,0 +1,166 @@
+"""OpenTelemetry tracing for SAP Gateway Connector
+
+Spans are emitted through the OpenTelemetry API when it is installed (it is
+pulled in by opentelemetry-instrumentation-google-genai), so they end up in
+whatever tracer provider the host process configured, e.g. Agent Engine with
+enable_tracing=True. Without the API every helper degrades to a no-op.
+"""
+
+import json
+import logging
+import re
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional, Sequence, Union
+from urllib.parse import urlsplit
+
+logger = logging.getLogger(__name__)
+
+try:
+    from opentelemetry import trace as otel_trace
+
+    HAS_OPENTELEMETRY = True
+except ImportError:  # pragma: no cover - depends on environment
+    otel_trace = None  # type: ignore[assignment]
+    HAS_OPENTELEMETRY = False
+
+try:
+    from opentelemetry.sdk.trace import ReadableSpan, TracerProvider
+    from opentelemetry.sdk.trace.export import (
+        SimpleSpanProcessor,
+        SpanExporter,
+        SpanExportResult,
+    )
+    from opentelemetry.sdk.trace.export.in_memory_span_exporter import (
+        InMemorySpanExporter,
+    )
+
+    HAS_OPENTELEMETRY_SDK = True
+except ImportError:  # pragma: no cover - depends on environment
+    HAS_OPENTELEMETRY_SDK = False
+
+TRACER_NAME = "sap_agent.sap_gw_connector"
+
+# Entity keys in OData URLs, e.g. zsd004Set('91000092')
+_KEY_PREDICATE_PATTERN = re.compile(r"\([^/]*\)")
+
+
+class _NoOpSpan:
+    """Stand-in span used when OpenTelemetry is not installed"""
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        pass
+
+    def set_attributes(self, attributes: Dict[str, Any]) -> None:
+        pass
+
+    def add_event(self, name: str, attributes: Optional[Dict[str, Any]] = None) -> None:
+        pass
+
+    def record_exception(self, exception: BaseException) -> None:
+        pass
+
+    def is_recording(self) -> bool:
+        return False
+
+
+_NOOP_SPAN = _NoOpSpan()
+
+
+def get_tracer() -> Any:
+    """Get the connector tracer (None when OpenTelemetry is unavailable)"""
+    if not HAS_OPENTELEMETRY:
+        return None
+    return otel_trace.get_tracer(TRACER_NAME)
+
+
+@contextmanager
+def start_span(
+    name: str, attributes: Optional[Dict[str, Any]] = None
+) -> Iterator[Any]:
+    """Start a span as the current span
+
+    Exceptions raised in the block are recorded on the span and re-raised.
+
+    Example:
+        >>> with start_span("sap.transform", {"sap.output_format": "json"}) as span:
+        ...     span.set_attribute("sap.row_count", 10)
+    """
+    tracer = get_tracer()
+    if tracer is None:
+        yield _NOOP_SPAN
+        return
+
+    clean_attributes = {k: v for k, v in (attributes or {}).items() if v is not None}
+    with tracer.start_as_current_span(name, attributes=clean_attributes) as span:
+        yield span
+
+
+def url_template(url: str) -> str:
+    """Reduce a request URL to a low-cardinality template for span attributes
+
+    Example:
+        >>> url_template("https://sap:44300/sap/opu/odata/SAP/Z_SRV/zsd004Set('91000092')?$format=json")
+        '/sap/opu/odata/SAP/Z_SRV/zsd004Set({key})'
+    """
+    path = urlsplit(url).path
+    return _KEY_PREDICATE_PATTERN.sub("({key})", path)
+
+
+if HAS_OPENTELEMETRY_SDK:
+
+    class JsonLinesSpanExporter(SpanExporter):
+        """Span exporter that appends finished spans to a JSON lines file"""
+
+        def __init__(self, path: Union[str, Path]):
+            self.path = Path(path)
+
+        def export(self, spans: Sequence[ReadableSpan]) -> "SpanExportResult":
+            try:
+                with open(self.path, "a", encoding="utf-8") as f:
+                    for span in spans:
+                        f.write(json.dumps(json.loads(span.to_json())) + "\n")
+                return SpanExportResult.SUCCESS
+            except OSError as e:
+                logger.warning(f"Failed to export spans to {self.path}: {e}")
+                return SpanExportResult.FAILURE
+
+        def shutdown(self) -> None:
+            pass
+
+
+def configure_offline_exporter(path: Optional[Union[str, Path]] = None) -> Any:
+    """Capture connector spans locally without an OpenTelemetry collector
+
+    Attaches an exporter to the global SDK tracer provider, installing one if
+    the process has not configured tracing yet.
+
+    Args:
+        path: If given, finished spans are appended to this JSON lines file.
+              Otherwise they are kept in memory.
+
+    Returns:
+        The exporter; an InMemorySpanExporter exposes get_finished_spans()
+
+    Raises:
+        RuntimeError: If opentelemetry-sdk is not installed
+
+    Example:
+        >>> exporter = configure_offline_exporter()
+        >>> # ... run tool calls ...
+        >>> [span.name for span in exporter.get_finished_spans()]
+    """
+    if not HAS_OPENTELEMETRY_SDK:
+        raise RuntimeError(
+            "opentelemetry-sdk is required for offline trace export "
+            "(pip install opentelemetry-sdk)"
+        )
+
+    provider = otel_trace.get_tracer_provider()
+    if not isinstance(provider, TracerProvider):
+        provider = TracerProvider()
+        otel_trace.set_tracer_provider(provider)
+
+    exporter = InMemorySpanExporter() if path is None else JsonLinesSpanExporter(path)
+    provider.add_span_processor(SimpleSpanProcessor(exporter))
+    return exporter
@@ -3,7 +3,7 @@
 from enum import Enum
 from typing import Any, Dict, List, Optional, Union
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 
 
 class GWMethodType(str, Enum):
@@ -50,7 +50,13 @@ class GWError(BaseModel):
 
 
 class ToolInfo(BaseModel):
-    """Tool information schema"""
+    """Tool information schema
+
+    Built once per registered tool and shared by every tools/list, so it
+    is frozen; treat inputSchema as read-only too.
+    """
+
+    model_config = ConfigDict(frozen=True)
 
     name: str = Field(..., description="Tool name")
     description: str = Field(..., description="Tool description")
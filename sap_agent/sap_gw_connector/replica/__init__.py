@@ -0,0 +1,23 @@
+"""Local replicas of SAP entity sets"""
+
+from .reads import EntityReplica, get_entity_replica, read_entity, read_query
+from .refresher import ReplicaRefresher, start_replica_refresher
+from .store import ReplicaStore, SyncState, compact_row, get_replica_store
+from .sync import EntitySync, SyncResult, parse_timestamp, sync_entity
+
+__all__ = [
+    "EntityReplica",
+    "get_entity_replica",
+    "read_entity",
+    "read_query",
+    "ReplicaRefresher",
+    "start_replica_refresher",
+    "ReplicaStore",
+    "SyncState",
+    "compact_row",
+    "get_replica_store",
+    "EntitySync",
+    "SyncResult",
+    "parse_timestamp",
+    "sync_entity",
+]
@@ -0,0 +1,185 @@
+"""Serve reads of replicated entity sets from the local replica
+
+Entities with a `replica` block in services.yaml are answered locally when
+their replica was synced within max_staleness:
+
+- sap_get_entity by key
+- sap_query with no $filter, or a $filter of `eq`/`ne` comparisons of the
+  key field or an indexed property with a string literal, joined by `and`;
+  $select, $top and $skip are applied locally
+
+Anything else, a key that is not in the replica and a query without
+results are read from SAP. The first read of a replicated entity starts
+the background refresher (see refresher.py).
+
+Responses have the shape SAP returns ({"d": ...} on v2, plain JSON on v4)
+without __metadata and deferred navigation links.
+"""
+
+import asyncio
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from sap_agent.sap_gw_connector.config.schemas import EntityConfig, ServiceConfig
+from sap_agent.sap_gw_connector.core.exceptions import ODataFilterError
+from sap_agent.sap_gw_connector.core.keys import parse_key
+from sap_agent.sap_gw_connector.core.odata_filter import (
+    Compare,
+    Literal,
+    Property,
+    conjuncts,
+    parse_filter,
+)
+from sap_agent.sap_gw_connector.observability.metrics import SAP_REPLICA_READS
+from sap_agent.sap_gw_connector.replica.refresher import start_replica_refresher
+from sap_agent.sap_gw_connector.replica.store import (
+    ReplicaStore,
+    get_replica_store,
+    row_key,
+)
+
+
+def parse_conditions(filter_expr: Optional[str]) -> Optional[List[Tuple[str, str, str]]]:
+    """(property, op, value) of a simple $filter, None if it is not simple
+
+    Example:
+        >>> parse_conditions("Mtart eq 'FERT' and Matkl ne 'O''Neil'")
+        [('Mtart', 'eq', 'FERT'), ('Matkl', 'ne', "O'Neil")]
+    """
+    conditions: List[Tuple[str, str, str]] = []
+    if not filter_expr or not filter_expr.strip():
+        return conditions
+    try:
+        node = parse_filter(filter_expr)
+    except ODataFilterError:
+        return None
+    for term in conjuncts(node):
+        if not isinstance(term, Compare) or term.op not in ("eq", "ne"):
+            return None
+        left, right = term.left, term.right
+        if isinstance(left, Literal):
+            left, right = right, left
+        if not (
+            isinstance(left, Property)
+            and "/" not in left.path
+            and isinstance(right, Literal)
+            and isinstance(right.value, str)
+            and right.text.startswith("'")
+        ):
+            return None
+        conditions.append((left.path, term.op, right.value))
+    return conditions
+
+
+def _select(row: Dict[str, Any], select_fields: Optional[List[str]]) -> Dict[str, Any]:
+    if not select_fields:
+        return row
+    names = [name.strip() for name in select_fields]
+    return {name: row[name] for name in names if name in row}
+
+
+class EntityReplica:
+    """Reads of one replicated entity set"""
+
+    def __init__(
+        self,
+        service: ServiceConfig,
+        entity: EntityConfig,
+        store: Optional[ReplicaStore] = None,
+    ):
+        if entity.replica is None:
+            raise ValueError(f"Entity set '{entity.name}' has no replica configured")
+        self.service = service
+        self.entity = entity
+        self.config = entity.replica
+        self.store = store or get_replica_store()
+        self.name = f"{service.id}/{entity.name}"
+        self.filterable = {entity.key_field, *self.config.indexes}
+
+    def is_fresh(self) -> bool:
+        """Synced completely within max_staleness"""
+        state = self.store.get_state(self.name)
+        return state is not None and time.time() - state.synced_at <= self.config.staleness_limit
+
+    def get(
+        self, entity_key: str, select_fields: Optional[List[str]] = None
+    ) -> Optional[Dict[str, Any]]:
+        """The entity as SAP returns it, None if it must be read from SAP
+
+        Composite keys are given in predicate form, in any property order.
+        """
+        if not self.is_fresh():
+            SAP_REPLICA_READS.inc(entity=self.name, result="stale")
+            return None
+        values = parse_key(str(entity_key), [])
+        key = row_key(values) if isinstance(values, dict) else values
+        row = self.store.get(self.name, key)
+        if row is None:
+            SAP_REPLICA_READS.inc(entity=self.name, result="miss")
+            return None
+        SAP_REPLICA_READS.inc(entity=self.name, result="hit")
+        row = _select(row, select_fields)
+        return row if self.service.version == "v4" else {"d": row}
+
+    def query(
+        self,
+        filter_expr: Optional[str] = None,
+        select_fields: Optional[List[str]] = None,
+        top: Optional[int] = None,
+        skip: Optional[int] = None,
+    ) -> Optional[Dict[str, Any]]:
+        """The query result as SAP returns it, None if it must be read from SAP"""
+        conditions = parse_conditions(filter_expr)
+        if conditions is None or any(name not in self.filterable for name, _, _ in conditions):
+            SAP_REPLICA_READS.inc(entity=self.name, result="bypass")
+            return None
+        if not self.is_fresh():
+            SAP_REPLICA_READS.inc(entity=self.name, result="stale")
+            return None
+        rows = self.store.query(self.name, conditions, limit=top, offset=skip or 0)
+        if not rows:
+            SAP_REPLICA_READS.inc(entity=self.name, result="miss")
+            return None
+        SAP_REPLICA_READS.inc(entity=self.name, result="hit")
+        rows = [_select(row, select_fields) for row in rows]
+        return {"value": rows} if self.service.version == "v4" else {"d": {"results": rows}}
+
+
+def get_entity_replica(service: ServiceConfig, entity_set: str) -> Optional[EntityReplica]:
+    """Replica of an entity set, None if it has none configured
+
+    Starts the background refresher if it is not running yet.
+    """
+    entity = service.get_entity(entity_set)
+    if entity is None or entity.replica is None:
+        return None
+    start_replica_refresher()
+    return EntityReplica(service, entity)
+
+
+async def read_entity(
+    service: ServiceConfig,
+    entity_set: str,
+    entity_key: str,
+    select_fields: Optional[List[str]] = None,
+) -> Optional[Dict[str, Any]]:
+    """An entity from its replica, None if not replicated or to be read from SAP"""
+    replica = get_entity_replica(service, entity_set)
+    if replica is None:
+        return None
+    return await asyncio.to_thread(replica.get, entity_key, select_fields)
+
+
+async def read_query(
+    service: ServiceConfig,
+    entity_set: str,
+    filter_expr: Optional[str] = None,
+    select_fields: Optional[List[str]] = None,
+    top: Optional[int] = None,
+    skip: Optional[int] = None,
+) -> Optional[Dict[str, Any]]:
+    """A query result from the replica, None if not replicated or to be read from SAP"""
+    replica = get_entity_replica(service, entity_set)
+    if replica is None:
+        return None
+    return await asyncio.to_thread(replica.query, filter_expr, select_fields, top, skip)
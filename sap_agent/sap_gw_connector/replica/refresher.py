@@ -0,0 +1,141 @@
+"""Scheduled refresh of the entity sets configured with a replica
+
+A daemon thread with its own event loop (connection pools are per event
+loop) syncs every entity that has a `replica` block in services.yaml once
+its refresh_interval has passed since the last sync, in the best mode the
+service offers (see sync.py). An entity that was never synced is loaded on
+the first tick. A failed sync is retried after RETRY_INTERVAL seconds at
+most, so reads fall back to SAP until the replica is fresh again.
+
+The refresher starts with the first read of a replicated entity (see
+reads.py); services.yaml is re-read on every tick.
+"""
+
+import asyncio
+import logging
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from sap_agent.sap_gw_connector.config.loader import get_services_config
+from sap_agent.sap_gw_connector.config.schemas import EntityConfig, ServiceConfig
+from sap_agent.sap_gw_connector.config.settings import get_services_config_path
+from sap_agent.sap_gw_connector.core.connections import close_connectors
+from sap_agent.sap_gw_connector.core.sap_client import SAPClient
+from sap_agent.sap_gw_connector.replica.store import ReplicaStore, get_replica_store
+from sap_agent.sap_gw_connector.replica.sync import EntitySync
+
+logger = logging.getLogger(__name__)
+
+# Longest wait between two checks of the schedule, and before a failed
+# sync is retried
+TICK_INTERVAL = 30.0
+RETRY_INTERVAL = 300.0
+
+
+def replicated_entities() -> List[Tuple[ServiceConfig, EntityConfig]]:
+    """(service, entity) pairs of services.yaml with a replica block"""
+    services_config = get_services_config(get_services_config_path())
+    return [
+        (service, entity)
+        for service in services_config.services
+        for entity in service.entities
+        if entity.replica is not None
+    ]
+
+
+class ReplicaRefresher:
+    """Background thread keeping the configured replicas fresh"""
+
+    def __init__(self, store: Optional[ReplicaStore] = None):
+        self.store = store or get_replica_store()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        # Earliest time of the next attempt after a failed sync, by entity
+        self._retry_at: Dict[str, float] = {}
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> None:
+        if self.running:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=lambda: asyncio.run(self._run()), name="sap-replica-refresher", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        self._stop.set()
+        if self._loop is not None and self._wakeup is not None:
+            try:
+                self._loop.call_soon_threadsafe(self._wakeup.set)
+            except RuntimeError:
+                pass  # Loop already closed
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _due(self, name: str, refresh_interval: float, now: float) -> float:
+        """Seconds until the entity is due (<= 0 when due now)"""
+        state = self.store.get_state(name)
+        due_at = 0.0 if state is None else state.synced_at + refresh_interval
+        return max(due_at, self._retry_at.get(name, 0.0)) - now
+
+    async def refresh_due(self) -> float:
+        """Sync every replica that is due; returns seconds until the next one is"""
+        wait = TICK_INTERVAL
+        for service, entity in replicated_entities():
+            replica = entity.replica
+            assert replica is not None
+            name = f"{service.id}/{entity.name}"
+            remaining = self._due(name, replica.refresh_interval, time.time())
+            if remaining <= 0:
+                try:
+                    self.store.ensure_indexes([entity.key_field, *replica.indexes])
+                    async with SAPClient.for_service(service) as client:
+                        await EntitySync(client, service, entity, self.store).run()
+                    await asyncio.to_thread(self.store.analyze)
+                    self._retry_at.pop(name, None)
+                    remaining = replica.refresh_interval
+                except Exception as e:
+                    logger.warning(f"Refresh of replica {name} failed: {e}")
+                    remaining = min(replica.refresh_interval, RETRY_INTERVAL)
+                    self._retry_at[name] = time.time() + remaining
+            wait = min(wait, remaining)
+        return wait
+
+    async def _run(self) -> None:
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        try:
+            while not self._stop.is_set():
+                try:
+                    wait = await self.refresh_due()
+                except Exception as e:
+                    logger.error(f"Replica refresh failed: {e}")
+                    wait = TICK_INTERVAL
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), max(wait, 1.0))
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            self._loop = self._wakeup = None
+            await close_connectors()
+
+
+_refresher: Optional[ReplicaRefresher] = None
+_refresher_lock = threading.Lock()
+
+
+def start_replica_refresher() -> ReplicaRefresher:
+    """Start the refresher of the process (a no-op when it is running)"""
+    global _refresher
+    with _refresher_lock:
+        if _refresher is None:
+            _refresher = ReplicaRefresher()
+        _refresher.start()
+        return _refresher
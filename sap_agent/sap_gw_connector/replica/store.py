@@ -0,0 +1,253 @@
+"""SQLite store for local replicas of SAP entity sets
+
+Rows are kept as compact JSON (without __metadata, deferred navigation links
+and @odata annotations) by entity and key (see row_key), next to the sync
+state of each entity: the delta link or change-date watermark to continue
+from. Entities are named "<service id>/<entity set>".
+
+The store is safe to share between threads; every write is one transaction,
+so a sync interrupted between pages resumes from the last saved state.
+Properties that reads filter on get expression indexes on (entity, property).
+"""
+
+import json
+import logging
+import re
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from sap_agent.sap_gw_connector.config.settings import GWServerConfig
+from sap_agent.sap_gw_connector.core.keys import format_key
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS rows (
+    entity TEXT NOT NULL,
+    key TEXT NOT NULL,
+    data TEXT NOT NULL,
+    PRIMARY KEY (entity, key)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS sync_state (
+    entity TEXT PRIMARY KEY,
+    mode TEXT NOT NULL,
+    delta_link TEXT,
+    watermark TEXT,
+    synced_at REAL NOT NULL
+);
+"""
+
+# Comparison operators of a condition -> SQL; IS NOT keeps rows where the
+# property is null, as OData ne does
+_SQL_OPERATORS = {"eq": "=", "ne": "IS NOT"}
+
+
+_PROPERTY_NAME_PATTERN = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
+
+def _property_expression(name: str) -> str:
+    """json_extract over a property; must match the index expression exactly"""
+    if not _PROPERTY_NAME_PATTERN.match(name):
+        raise ValueError(f"Invalid property name: {name!r}")
+    return f"json_extract(data, '$.{name}')"
+
+
+def compact_row(row: Dict[str, Any]) -> Dict[str, Any]:
+    """A row without OData metadata and deferred navigation links"""
+    return {
+        name: value
+        for name, value in row.items()
+        if name != "__metadata"
+        and not name.startswith("@odata.")
+        and not (isinstance(value, dict) and "__deferred" in value)
+    }
+
+
+def row_key(key: Dict[str, Any]) -> str:
+    """Key column of a row from its key property values
+
+    The value of a single key property, else the predicate form with string
+    literals in name order, so any order of the same values gives one key.
+
+    Example:
+        >>> row_key({"Ebelp": "00010", "Ebeln": "4500000010"})
+        "Ebeln='4500000010',Ebelp='00010'"
+    """
+    if len(key) == 1:
+        return str(next(iter(key.values())))
+    return format_key(dict(sorted(key.items())), [])
+
+
+@dataclass
+class SyncState:
+    """Where the next sync of an entity continues from
+
+    Attributes:
+        mode: "delta" (delta_link), "watermark" (rows changed since
+            watermark, an ISO 8601 timestamp) or "full" (reload every time)
+    """
+
+    mode: str
+    delta_link: Optional[str] = None
+    watermark: Optional[str] = None
+    synced_at: float = 0.0
+
+
+class ReplicaStore:
+    """Entity set replicas and their sync state in one SQLite file"""
+
+    def __init__(self, path: str):
+        self.path = path
+        if path != ":memory:":
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        with self._lock:
+            if path != ":memory:":
+                self._connection.execute("PRAGMA journal_mode=WAL")
+                self._connection.execute("PRAGMA synchronous=NORMAL")
+            self._connection.executescript(SCHEMA)
+
+    def close(self) -> None:
+        with self._lock:
+            self._connection.close()
+
+    def get_state(self, entity: str) -> Optional[SyncState]:
+        """Sync state of an entity, None if it was never synced completely"""
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT mode, delta_link, watermark, synced_at FROM sync_state WHERE entity = ?",
+                (entity,),
+            ).fetchone()
+        return SyncState(*row) if row else None
+
+    def apply(
+        self,
+        entity: str,
+        upserts: Iterable[Tuple[str, Dict[str, Any]]],
+        deletes: Iterable[str] = (),
+        state: Optional[SyncState] = None,
+        replace: bool = False,
+    ) -> None:
+        """Write changed rows, in one transaction
+
+        Args:
+            upserts: (key, row) pairs to insert or replace
+            deletes: Keys to remove
+            state: Sync state to save with the rows
+            replace: Drop the entity's rows and sync state first (a full reload)
+        """
+        with self._lock, self._connection:
+            if replace:
+                self._connection.execute("DELETE FROM rows WHERE entity = ?", (entity,))
+                self._connection.execute("DELETE FROM sync_state WHERE entity = ?", (entity,))
+            self._connection.executemany(
+                "INSERT OR REPLACE INTO rows (entity, key, data) VALUES (?, ?, ?)",
+                ((entity, key, json.dumps(row)) for key, row in upserts),
+            )
+            self._connection.executemany(
+                "DELETE FROM rows WHERE entity = ? AND key = ?",
+                ((entity, key) for key in deletes),
+            )
+            if state is not None:
+                self._connection.execute(
+                    "INSERT OR REPLACE INTO sync_state "
+                    "(entity, mode, delta_link, watermark, synced_at) VALUES (?, ?, ?, ?, ?)",
+                    (
+                        entity,
+                        state.mode,
+                        state.delta_link,
+                        state.watermark,
+                        state.synced_at or time.time(),
+                    ),
+                )
+
+    def get(self, entity: str, key: str) -> Optional[Dict[str, Any]]:
+        """One row by key"""
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT data FROM rows WHERE entity = ? AND key = ?", (entity, key)
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def ensure_indexes(self, properties: Iterable[str]) -> None:
+        """Index rows on (entity, property), for properties named like OData identifiers"""
+        with self._lock, self._connection:
+            for name in properties:
+                self._connection.execute(
+                    f"CREATE INDEX IF NOT EXISTS rows_{name} "
+                    f"ON rows (entity, {_property_expression(name)})"
+                )
+
+    def analyze(self) -> None:
+        """Refresh the planner statistics, so filters use the property indexes
+
+        Sampling is bounded by analysis_limit, so this stays cheap on large
+        replicas.
+        """
+        with self._lock:
+            self._connection.execute("PRAGMA analysis_limit=1000")
+            self._connection.execute("ANALYZE rows")
+
+    def query(
+        self,
+        entity: str,
+        conditions: Sequence[Tuple[str, str, Any]] = (),
+        limit: Optional[int] = None,
+        offset: int = 0,
+    ) -> List[Dict[str, Any]]:
+        """Rows matching every (property, eq|ne, value) condition, by key
+
+        Conditions are only fast on properties passed to ensure_indexes. The
+        key column is not compared: on composite keys it holds the predicate
+        form of all key properties (see row_key).
+        """
+        clauses = ["entity = ?"]
+        values: List[Any] = [entity]
+        for name, op, value in conditions:
+            clauses.append(f"{_property_expression(name)} {_SQL_OPERATORS[op]} ?")
+            values.append(value)
+        values.extend([-1 if limit is None else limit, offset])
+        with self._lock:
+            rows = self._connection.execute(
+                f"SELECT data FROM rows WHERE {' AND '.join(clauses)} "
+                "ORDER BY key LIMIT ? OFFSET ?",
+                values,
+            ).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def rows(self, entity: str) -> List[Dict[str, Any]]:
+        """All rows of an entity, by key"""
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT data FROM rows WHERE entity = ? ORDER BY key", (entity,)
+            ).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def count(self, entity: str) -> int:
+        with self._lock:
+            (count,) = self._connection.execute(
+                "SELECT COUNT(*) FROM rows WHERE entity = ?", (entity,)
+            ).fetchone()
+        return int(count)
+
+
+# Stores by file path
+_stores: Dict[str, ReplicaStore] = {}
+_stores_lock = threading.Lock()
+
+
+def get_replica_store(path: Optional[str] = None) -> ReplicaStore:
+    """Get the store shared by the process (SAP_GW_REPLICA_PATH if path is None)"""
+    if path is None:
+        path = GWServerConfig().replica_path  # type: ignore[call-arg]
+    with _stores_lock:
+        store = _stores.get(path)
+        if store is None:
+            store = _stores[path] = ReplicaStore(path)
+            logger.info(f"Opened replica store {path}")
+        return store
@@ -0,0 +1,300 @@
+"""Incremental sync of SAP entity sets into the replica store
+
+The first sync loads the whole entity set (following server-side paging).
+Later syncs transfer only what changed, in the best mode the service offers:
+
+- delta: the last page carried a delta link (__delta with !deltatoken on
+  SAP v2, @odata.deltaLink with $deltatoken on v4, requested with
+  Prefer: odata.track-changes). Following it returns the changed rows and
+  tombstones of deleted ones, plus the next delta link. An expired or
+  rejected token triggers a full reload.
+- watermark: the entity has a change_field in services.yaml. Rows with
+  change_field >= the latest value seen are fetched; deletions are not
+  detected this way, so schedule an occasional full sync.
+- full: neither is available, so every sync reloads the entity set.
+
+The delta link or watermark is saved in the store with the last page, so a
+sync resumes where the previous run (or process) left off.
+
+Run from the command line (e.g. from cron):
+    python -m sap_agent.sap_gw_connector.replica.sync Z_MATERIAL_SRV MaterialSet
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import re
+import time
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urljoin
+
+from sap_agent.sap_gw_connector.config.loader import get_services_config
+from sap_agent.sap_gw_connector.config.schemas import EntityConfig, ServiceConfig
+from sap_agent.sap_gw_connector.config.settings import get_services_config_path
+from sap_agent.sap_gw_connector.core.connections import close_connectors
+from sap_agent.sap_gw_connector.core.exceptions import SAPRequestError
+from sap_agent.sap_gw_connector.core.keys import key_of, parse_key
+from sap_agent.sap_gw_connector.core.metadata import get_entity_set_model
+from sap_agent.sap_gw_connector.core.odata_filter import parse_timestamp
+from sap_agent.sap_gw_connector.core.sap_client import SAPClient
+from sap_agent.sap_gw_connector.observability.metrics import SAP_REPLICA_SYNC_ROWS
+from sap_agent.sap_gw_connector.replica.store import (
+    ReplicaStore,
+    SyncState,
+    compact_row,
+    get_replica_store,
+    row_key,
+)
+
+logger = logging.getLogger(__name__)
+
+# Statuses SAP answers an expired or unknown delta token with
+EXPIRED_TOKEN_STATUSES = frozenset({400, 404, 410})
+
+_KEY_IN_URI_PATTERN = re.compile(r"\(([^()]*)\)$")
+
+
+def _filter_literal(watermark: datetime, version: str) -> str:
+    """Watermark as an Edm.DateTime (v2) or Edm.DateTimeOffset (v4) literal"""
+    utc = watermark.astimezone(timezone.utc).replace(tzinfo=None)
+    if version == "v4":
+        return utc.isoformat() + "Z"
+    return f"datetime'{utc.isoformat()}'"
+
+
+_Page = Tuple[List[Dict[str, Any]], List[Dict[str, Any]], Optional[str], Optional[str]]
+
+
+def _page(data: Dict[str, Any]) -> _Page:
+    """Rows, tombstones, next link and delta link of a v2 or v4 response page"""
+    if "d" in data:
+        body = data["d"]
+        if isinstance(body, list):
+            return body, [], None, None
+        return (
+            body.get("results", []),
+            body.get("__deleted", []),
+            body.get("__next"),
+            body.get("__delta"),
+        )
+    rows: List[Dict[str, Any]] = []
+    removed: List[Dict[str, Any]] = []
+    for entry in data.get("value", []):
+        deleted = (
+            "@removed" in entry
+            or "@odata.removed" in entry
+            or str(entry.get("@odata.context", "")).endswith("$deletedEntity")
+        )
+        (removed if deleted else rows).append(entry)
+    return rows, removed, data.get("@odata.nextLink"), data.get("@odata.deltaLink")
+
+
+@dataclass
+class SyncResult:
+    """What one sync of an entity transferred"""
+
+    entity: str
+    mode: str
+    upserted: int = 0
+    deleted: int = 0
+    pages: int = 0
+    seconds: float = 0.0
+    # Mode of the next sync: delta, watermark or full
+    next_mode: str = "full"
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+class EntitySync:
+    """Keeps the replica of one entity set up to date"""
+
+    def __init__(
+        self,
+        client: SAPClient,
+        service: ServiceConfig,
+        entity: EntityConfig,
+        store: Optional[ReplicaStore] = None,
+    ):
+        self.client = client
+        self.service = service
+        self.entity = entity
+        self.store = store or get_replica_store()
+        self.name = f"{service.id}/{entity.name}"
+        self.url = f"{client.odata_base}{service.path}/{entity.name}"
+        # Key properties, from $metadata (key_field without it)
+        self.key_names = [entity.key_field]
+
+    async def _load_key_names(self) -> None:
+        model = await get_entity_set_model(self.client, self.service.path, self.entity.name)
+        if model is not None and model.keys:
+            self.key_names = model.key_names
+
+    def _key_of(self, row: Dict[str, Any]) -> str:
+        """Key of a row, or of a tombstone that only carries its URI
+
+        Raises:
+            SAPRequestError: If the entry has neither its key properties nor
+                a URI whose key predicate names all of them
+        """
+        key = key_of(row, self.key_names)
+        if key is not None:
+            return row_key(key)
+        uri = row.get("__metadata", {}).get("uri") or row.get("@odata.id") or row.get("id", "")
+        match = _KEY_IN_URI_PATTERN.search(str(uri))
+        if not match:
+            raise SAPRequestError(f"Deleted entry of {self.name} without a key: {row}")
+        values = parse_key(match.group(1), self.key_names)
+        if not isinstance(values, dict):
+            values = {self.key_names[0]: values} if len(self.key_names) == 1 else {}
+        if sorted(values) != sorted(self.key_names):
+            raise SAPRequestError(
+                f"Deleted entry of {self.name} does not name the key properties "
+                f"{', '.join(self.key_names)} in its URI: {uri}"
+            )
+        return row_key(values)
+
+    async def run(self, full: bool = False) -> SyncResult:
+        """Sync the entity set: by delta link, watermark, or a full reload
+
+        Args:
+            full: Reload even if a delta link or watermark is saved
+        """
+        start = time.perf_counter()
+        await self._load_key_names()
+        state = None if full else self.store.get_state(self.name)
+        if state is not None and state.delta_link:
+            try:
+                result = await self._pull("delta", state.delta_link)
+            except SAPRequestError as e:
+                if e.status_code not in EXPIRED_TOKEN_STATUSES:
+                    raise
+                logger.warning(f"Delta token of {self.name} rejected, reloading: {e}")
+                result = await self._pull("full", self.url, reload=True)
+        elif state is not None and state.watermark and self.entity.change_field:
+            result = await self._pull("watermark", self.url, watermark=state.watermark)
+        else:
+            result = await self._pull("full", self.url, reload=True)
+
+        result.seconds = time.perf_counter() - start
+        SAP_REPLICA_SYNC_ROWS.inc(result.upserted, entity=self.name, change="upserted")
+        SAP_REPLICA_SYNC_ROWS.inc(result.deleted, entity=self.name, change="deleted")
+        logger.info(
+            f"Synced {self.name} ({result.mode}): {result.upserted} rows changed, "
+            f"{result.deleted} deleted in {result.pages} pages, {result.seconds:.3f}s"
+        )
+        return result
+
+    async def _pull(
+        self,
+        mode: str,
+        url: str,
+        reload: bool = False,
+        watermark: Optional[str] = None,
+    ) -> SyncResult:
+        """Fetch every page from url and apply it to the store"""
+        result = SyncResult(entity=self.name, mode=mode)
+        change_field = self.entity.change_field
+        latest = parse_timestamp(watermark) if watermark else None
+
+        params: Optional[Dict[str, str]] = None
+        headers: Dict[str, str] = {}
+        if mode != "delta":
+            params = {"$format": "json"} if self.service.version != "v4" else {}
+            if mode == "watermark" and latest is not None:
+                literal = _filter_literal(latest, self.service.version)
+                params["$filter"] = f"{change_field} ge {literal}"
+            elif self.service.version == "v4":
+                headers["Prefer"] = "odata.track-changes"
+
+        next_url: Optional[str] = url
+        while next_url is not None:
+            data = await self.client.get_json(next_url, params, headers)
+            rows, removed, next_link, delta_link = _page(data)
+            result.pages += 1
+
+            upserts = [(self._key_of(row), compact_row(row)) for row in rows]
+            deletes = [self._key_of(entry) for entry in removed]
+            if change_field:
+                for row in rows:
+                    changed_at = parse_timestamp(row.get(change_field))
+                    if changed_at is not None and (latest is None or changed_at > latest):
+                        latest = changed_at
+
+            state = None
+            if next_link is None:
+                if delta_link:
+                    state = SyncState("delta", delta_link=urljoin(next_url, delta_link))
+                elif change_field and latest is not None:
+                    state = SyncState("watermark", watermark=latest.isoformat())
+                else:
+                    state = SyncState("full")
+                result.next_mode = state.mode
+
+            await asyncio.to_thread(
+                self.store.apply,
+                self.name,
+                upserts,
+                deletes,
+                state,
+                reload and result.pages == 1,
+            )
+            result.upserted += len(upserts)
+            result.deleted += len(deletes)
+
+            # Next links carry the whole query
+            next_url = urljoin(next_url, next_link) if next_link else None
+            params = None
+        return result
+
+
+async def sync_entity(
+    service_id: str,
+    entity_name: str,
+    full: bool = False,
+    store: Optional[ReplicaStore] = None,
+) -> SyncResult:
+    """Sync one entity set of a service in services.yaml
+
+    Raises:
+        ValueError: If the service or entity set is not configured
+    """
+    services_config = get_services_config(get_services_config_path())
+    service = services_config.get_service(service_id)
+    if service is None:
+        raise ValueError(f"Service '{service_id}' not found in configuration")
+    entity = service.get_entity(entity_name)
+    if entity is None:
+        raise ValueError(f"Entity set '{entity_name}' not found in service '{service_id}'")
+
+    async with SAPClient.for_service(service) as client:
+        return await EntitySync(client, service, entity, store).run(full=full)
+
+
+def main() -> None:
+    """Sync an entity set from the command line and print the result"""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("service", help="Service ID in services.yaml")
+    parser.add_argument("entity_set", help="Entity set name")
+    parser.add_argument("--db", help="Replica file (default: SAP_GW_REPLICA_PATH)")
+    parser.add_argument("--full", action="store_true", help="Reload the whole entity set")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    store = get_replica_store(args.db)
+
+    async def run() -> SyncResult:
+        try:
+            return await sync_entity(args.service, args.entity_set, args.full, store)
+        finally:
+            await close_connectors()
+
+    result = asyncio.run(run())
+    print(json.dumps(result.to_dict(), indent=2))
+
+
+if __name__ == "__main__":
+    main()
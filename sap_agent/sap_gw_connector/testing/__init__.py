@@ -0,0 +1,8 @@
+"""Test support for SAP Gateway Connector"""
+
+from .gateway import MockGatewaySettings, MockSAPGateway
+
+__all__ = [
+    "MockGatewaySettings",
+    "MockSAPGateway",
+]
@@ -0,0 +1,1149 @@
+"""Local SAP Gateway stand-in for offline end-to-end and load testing
+
+Serves the subset of SAP Gateway behaviour the connector relies on, generated
+from the entities in services.yaml:
+
+- Basic authentication and CSRF token fetch (X-CSRF-Token: Fetch)
+- The /sap/public/ping health check (unauthenticated)
+- The IWFND catalog service and its $metadata
+- Service $metadata built from the configured entity sets
+- Entity set queries with $filter (see core/odata_filter.py), $select, $top,
+  $skip, $inlinecount and server-side paging via __next
+- Single entity reads, create/update (PUT, PATCH, MERGE)/delete and $batch
+  with changesets
+- Navigation properties: Entity(key)/Navigation returns generated child
+  rows, and $expand returns them inline (or is rejected with 501, as by
+  services without an expanded entity set implementation)
+- Optional ETags (__metadata.etag / @odata.etag and the ETag header) with
+  If-Match checks on writes
+- Optional delta links (!deltatoken on v2, $deltatoken on v4) returning the
+  rows changed since the token and tombstones for deleted ones
+- gzip/deflate response compression when the client accepts it (as ICM does)
+- Configurable latency, link bandwidth, payload sizes and injected failures
+
+Example:
+    >>> async with MockSAPGateway(settings=MockGatewaySettings(rows=1000)) as gw:
+    ...     async with SAPClient(gw.connection_config(), gw.gateway_config()) as client:
+    ...         await client.query_entity_set("/SAP/Z_SALES_ORDER_GENAI_SRV", "zsd004Set")
+
+Run standalone:
+    python -m sap_agent.sap_gw_connector.testing.gateway --port 50000 --rows 10000
+"""
+
+import argparse
+import asyncio
+import base64
+import copy
+import hashlib
+import json
+import logging
+import random
+import re
+import uuid
+import zlib
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl, quote, unquote, urlencode
+
+from aiohttp import web
+
+from sap_agent.sap_gw_connector.config.loader import get_services_config
+from sap_agent.sap_gw_connector.config.schemas import (
+    EntityConfig,
+    GatewayConfig,
+    ServiceConfig,
+    ServicesYAMLConfig,
+)
+from sap_agent.sap_gw_connector.config.settings import (
+    SAPConnectionConfig,
+    get_services_config_path,
+)
+from sap_agent.sap_gw_connector.core.exceptions import ODataFilterError
+from sap_agent.sap_gw_connector.core.odata_filter import compile_filter, parse_timestamp
+
+logger = logging.getLogger(__name__)
+
+ODATA_PREFIX = "/sap/opu/odata"
+PING_PATH = "/sap/public/ping"
+CATALOG_SERVICE = "/IWFND/CATALOGSERVICE;v=2"
+SESSION_COOKIE = "SAP_SESSIONID_MCK_100"
+MODIFYING_METHODS = {"POST", "PUT", "PATCH", "MERGE", "DELETE"}
+
+_KEY_PREDICATE_PATTERN = re.compile(r"^(?P<entity>[^(/]+)(?:\((?P<key>.*)\))?(?:/(?P<rest>.*))?$")
+_HTTP_REASONS = {
+    200: "OK",
+    201: "Created",
+    204: "No Content",
+    400: "Bad Request",
+    401: "Unauthorized",
+    403: "Forbidden",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    410: "Gone",
+    412: "Precondition Failed",
+    428: "Precondition Required",
+    429: "Too Many Requests",
+    500: "Internal Server Error",
+    501: "Not Implemented",
+    502: "Bad Gateway",
+    503: "Service Unavailable",
+    504: "Gateway Timeout",
+}
+
+
+@dataclass
+class MockGatewaySettings:
+    """Behaviour of the mock gateway"""
+
+    username: str = "MOCKUSER"
+    password: str = "mockpass"
+    client: str = "100"
+    # Added to every HTTP request (a $batch counts once)
+    latency: float = 0.0
+    latency_jitter: float = 0.0
+    # Generated rows per entity set, overridable per entity set name
+    rows: int = 100
+    rows_per_entity: Dict[str, int] = field(default_factory=dict)
+    # Server-side page size; larger results are paged with __next
+    page_size: int = 5000
+    # Width string values are padded to, to control payload size
+    field_width: int = 0
+    seed: int = 42
+    # Fault injection: fraction of data requests (not the login requests)
+    # answered with error_status, with Retry-After if retry_after is set
+    error_rate: float = 0.0
+    error_status: int = 503
+    retry_after: Optional[float] = None
+    # Fraction of requests delayed by an extra slow_latency seconds
+    slow_rate: float = 0.0
+    slow_latency: float = 0.0
+    # Compress response bodies of at least compress_min_size bytes
+    compress: bool = True
+    compress_min_size: int = 1024
+    # Simulated link bandwidth for response bodies in bytes/second (0: unlimited)
+    bandwidth: float = 0.0
+    # Concurrency tokens: entities carry ETags and writes must send a
+    # matching If-Match (412 if stale, 428 if missing)
+    etags: bool = False
+    # Delta links on the last page of unfiltered queries (__delta on v2,
+    # @odata.deltaLink on v4)
+    delta: bool = False
+    # Child rows returned for each navigation property of an entity
+    navigation_rows: int = 3
+    # Answer $expand inline; if False it is rejected with 501
+    expand: bool = True
+    # Key properties by entity set name, for composite keys (default: key_field)
+    key_fields: Dict[str, List[str]] = field(default_factory=dict)
+
+
+class _MockRequestError(Exception):
+    pass
+
+
+def _odata_error(status: int, message: str) -> Tuple[int, Dict[str, str], bytes]:
+    body = {
+        "error": {
+            "code": f"MOCK/{status}",
+            "message": {"lang": "en", "value": message},
+        }
+    }
+    return status, {"Content-Type": "application/json"}, json.dumps(body).encode()
+
+
+def _json_response(
+    status: int, payload: Any, headers: Optional[Dict[str, str]] = None
+) -> Tuple[int, Dict[str, str], bytes]:
+    response_headers = {"Content-Type": "application/json"}
+    response_headers.update(headers or {})
+    return status, response_headers, json.dumps(payload).encode()
+
+
+def _parse_literal(literal: str) -> Any:
+    """Parse an OData URI literal into a Python value"""
+    literal = literal.strip()
+    if literal.startswith("'") and literal.endswith("'"):
+        return literal[1:-1].replace("''", "'")
+    prefixed = re.match(r"^(datetime|datetimeoffset|guid)'(.*)'$", literal, re.IGNORECASE)
+    if prefixed:
+        return prefixed.group(2)
+    if literal in ("true", "false"):
+        return literal == "true"
+    if literal == "null":
+        return None
+    try:
+        number = literal.rstrip("mMdDfFlL")
+        return int(number) if re.fullmatch(r"-?\d+", number) else float(number)
+    except ValueError:
+        return literal
+
+
+def _split_top_level(text: str, separator: str) -> List[str]:
+    """Split on a separator outside quotes"""
+    parts: List[str] = []
+    current: List[str] = []
+    in_quotes = False
+    index = 0
+    while index < len(text):
+        char = text[index]
+        if char == "'":
+            in_quotes = not in_quotes
+        if not in_quotes and text.startswith(separator, index):
+            parts.append("".join(current))
+            current = []
+            index += len(separator)
+            continue
+        current.append(char)
+        index += 1
+    parts.append("".join(current))
+    return parts
+
+
+class _EntityStore:
+    """Generated rows for one entity set"""
+
+    def __init__(
+        self,
+        service: ServiceConfig,
+        entity: EntityConfig,
+        row_count: int,
+        settings: MockGatewaySettings,
+    ):
+        self.service = service
+        self.entity = entity
+        self.key_fields = list(settings.key_fields.get(entity.name, [entity.key_field]))
+        fields = self.key_fields + [
+            f for f in (entity.default_select or []) if f not in self.key_fields
+        ]
+        self.properties = {name: self._property_type(name) for name in fields}
+        self.rows: Dict[Tuple[str, ...], Dict[str, Any]] = {}
+        # Change log for delta links: key -> version of its last change
+        self.version = 0
+        self.changed: Dict[Tuple[str, ...], int] = {}
+        self.deleted: Dict[Tuple[str, ...], int] = {}
+        self._settings = settings
+        self._random = random.Random(f"{settings.seed}:{service.id}:{entity.name}")
+        for index in range(row_count):
+            row = self._generate_row(index)
+            self.rows[self.key_of(row)] = row
+
+    @staticmethod
+    def _property_type(name: str) -> str:
+        lowered = name.lower()
+        if lowered.endswith("dat") or lowered.endswith("date"):
+            return "Edm.DateTime"
+        return "Edm.String"
+
+    def _generate_row(self, index: int) -> Dict[str, Any]:
+        row: Dict[str, Any] = {}
+        base_date = datetime(2024, 1, 1, tzinfo=timezone.utc)
+        for name, edm_type in self.properties.items():
+            if name in self.key_fields and edm_type == "Edm.DateTime":
+                day = base_date + timedelta(days=index)
+                row[name] = f"/Date({int(day.timestamp() * 1000)})/"
+            elif name in self.key_fields:
+                row[name] = f"{index + 1:010d}"
+            elif edm_type == "Edm.DateTime":
+                day = base_date + timedelta(days=self._random.randint(0, 730))
+                row[name] = f"/Date({int(day.timestamp() * 1000)})/"
+            else:
+                value = f"{name}{self._random.randint(0, 999):03d}"
+                row[name] = value.ljust(self._settings.field_width, "X")
+        return row
+
+    def key_of(self, row: Dict[str, Any]) -> Tuple[str, ...]:
+        return tuple(str(row.get(name, "")) for name in self.key_fields)
+
+    def parse_key(self, predicate: str) -> Tuple[str, ...]:
+        """Parse a key predicate such as 'A' or K1='A',K2=10"""
+        parts = _split_top_level(predicate, ",")
+        if len(parts) == 1 and len(_split_top_level(parts[0], "=")) == 1:
+            return (self._key_value(self.key_fields[0], _parse_literal(parts[0])),)
+        named: Dict[str, Any] = {}
+        for part in parts:
+            name, *literal = _split_top_level(part, "=")
+            named[name.strip()] = _parse_literal("=".join(literal))
+        return tuple(self._key_value(name, named.get(name, "")) for name in self.key_fields)
+
+    def _key_value(self, name: str, value: Any) -> str:
+        """Key value as stored in rows (/Date(ms)/ for dates)"""
+        if self.properties.get(name) == "Edm.DateTime":
+            timestamp = parse_timestamp(value)
+            if timestamp is not None:
+                return f"/Date({int(timestamp.timestamp() * 1000)})/"
+        return str(value)
+
+    def put(self, key: Tuple[str, ...], row: Dict[str, Any]) -> None:
+        self.version += 1
+        self.rows[key] = row
+        self.changed[key] = self.version
+        self.deleted.pop(key, None)
+
+    def remove(self, key: Tuple[str, ...]) -> bool:
+        if self.rows.pop(key, None) is None:
+            return False
+        self.version += 1
+        self.changed.pop(key, None)
+        self.deleted[key] = self.version
+        return True
+
+    def snapshot(self) -> Any:
+        return copy.deepcopy((self.rows, self.version, self.changed, self.deleted))
+
+    def restore(self, snapshot: Any) -> None:
+        self.rows, self.version, self.changed, self.deleted = snapshot
+
+    @staticmethod
+    def etag(row: Dict[str, Any]) -> str:
+        digest = hashlib.sha1(json.dumps(row, sort_keys=True).encode()).hexdigest()
+        return f"W/\"'{digest[:16]}'\""
+
+    def _key_literal(self, name: str, value: Any) -> str:
+        if self.properties.get(name) == "Edm.DateTime":
+            timestamp = parse_timestamp(value)
+            if timestamp is not None:
+                return f"datetime'{timestamp.replace(tzinfo=None).isoformat()}'"
+        return "'" + str(value).replace("'", "''") + "'"
+
+    def format_key(self, row: Dict[str, Any]) -> str:
+        if len(self.key_fields) == 1:
+            return self._key_literal(self.key_fields[0], row[self.key_fields[0]])
+        return ",".join(
+            f"{name}={self._key_literal(name, row[name])}" for name in self.key_fields
+        )
+
+
+class MockSAPGateway:
+    """In-process SAP Gateway stand-in built from services configuration"""
+
+    def __init__(
+        self,
+        services_config: Optional[ServicesYAMLConfig] = None,
+        settings: Optional[MockGatewaySettings] = None,
+    ):
+        self.services_config = services_config or get_services_config(
+            get_services_config_path()
+        )
+        self.settings = settings or MockGatewaySettings()
+        self.requests: Counter = Counter()
+        self.host = "127.0.0.1"
+        self.port: Optional[int] = None
+        # Session cookie -> CSRF token
+        self._csrf_tokens: Dict[str, str] = {}
+        self._valid_tokens: set = set()
+        self._stores: Dict[Tuple[str, str], _EntityStore] = {}
+        self._runner: Optional[web.AppRunner] = None
+        auth_endpoint = self.services_config.gateway.auth_endpoint
+        self._login_path = auth_endpoint.build_auth_validation_path().lower()
+        self._auth_header = "Basic " + base64.b64encode(
+            f"{self.settings.username}:{self.settings.password}".encode()
+        ).decode()
+
+    # ------------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------------
+
+    def create_app(self) -> web.Application:
+        """Create the aiohttp application"""
+        app = web.Application(client_max_size=64 * 1024 * 1024)
+        app.router.add_route("*", ODATA_PREFIX + "/{tail:.*}", self._handle)
+        app.router.add_get(PING_PATH, self._handle_ping)
+        return app
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> int:
+        """Start serving; returns the bound port"""
+        self._runner = web.AppRunner(self.create_app(), access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        server = site._server
+        sockets = server.sockets if isinstance(server, asyncio.Server) else ()
+        self.host = host
+        self.port = sockets[0].getsockname()[1] if sockets else port
+        logger.info(f"Mock SAP Gateway listening on http://{host}:{self.port}")
+        return self.port
+
+    async def stop(self) -> None:
+        """Stop serving"""
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def __aenter__(self) -> "MockSAPGateway":
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        await self.stop()
+
+    def connection_config(self, **overrides: Any) -> SAPConnectionConfig:
+        """Connection settings pointing at this gateway"""
+        values: Dict[str, Any] = {
+            "host": self.host,
+            "port": self.port or 0,
+            "scheme": "http",
+            "client": self.settings.client,
+            "username": self.settings.username,
+            "password": self.settings.password,
+        }
+        values.update(overrides)
+        return SAPConnectionConfig(**values)
+
+    def gateway_config(self) -> GatewayConfig:
+        """Gateway URL configuration pointing at this gateway"""
+        gateway = self.services_config.gateway.model_copy(deep=True)
+        gateway.base_url_pattern = "http://{host}:{port}" + ODATA_PREFIX
+        return gateway
+
+    # ------------------------------------------------------------------
+    # Data
+    # ------------------------------------------------------------------
+
+    def _find_service(self, path: str) -> Tuple[Optional[ServiceConfig], str]:
+        lowered = path.lower()
+        best: Optional[ServiceConfig] = None
+        for service in self.services_config.services:
+            prefix = service.path.lower()
+            if lowered == prefix or lowered.startswith(prefix + "/"):
+                if best is None or len(service.path) > len(best.path):
+                    best = service
+        if best is None:
+            return None, ""
+        return best, path[len(best.path):].lstrip("/")
+
+    def store(self, service: ServiceConfig, entity_name: str) -> Optional[_EntityStore]:
+        """Get (generating on first use) the rows of an entity set"""
+        key = (service.id, entity_name)
+        if key not in self._stores:
+            entity = service.get_entity(entity_name)
+            if entity is None:
+                return None
+            rows = self.settings.rows_per_entity.get(entity_name, self.settings.rows)
+            self._stores[key] = _EntityStore(service, entity, rows, self.settings)
+        return self._stores[key]
+
+    # ------------------------------------------------------------------
+    # HTTP handling
+    # ------------------------------------------------------------------
+
+    async def _delay(self) -> None:
+        delay = self.settings.latency
+        if self.settings.latency_jitter:
+            delay += random.uniform(0, self.settings.latency_jitter)
+        if self.settings.slow_rate and random.random() < self.settings.slow_rate:
+            self.requests["slow"] += 1
+            delay += self.settings.slow_latency
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    def _check_auth(self, request: web.Request) -> Optional[web.Response]:
+        cookie = request.cookies.get(SESSION_COOKIE)
+        if request.headers.get("Authorization") == self._auth_header:
+            return None
+        if cookie and cookie in self._csrf_tokens:
+            return None
+        return web.Response(
+            status=401,
+            text="Unauthorized",
+            headers={"WWW-Authenticate": 'Basic realm="SAP NetWeaver Application Server"'},
+        )
+
+    async def _encode(
+        self, request: web.Request, payload: bytes, headers: Dict[str, str]
+    ) -> bytes:
+        """Compress a response body with the first encoding the client accepts"""
+        if not self.settings.compress or len(payload) < self.settings.compress_min_size:
+            return payload
+        accepted = [
+            value.split(";", 1)[0].strip().lower()
+            for value in request.headers.get("Accept-Encoding", "").split(",")
+        ]
+        encoding = next((name for name in ("gzip", "deflate") if name in accepted), None)
+        if encoding is None:
+            return payload
+        wbits = 16 + zlib.MAX_WBITS if encoding == "gzip" else zlib.MAX_WBITS
+
+        def compress() -> bytes:
+            compressor = zlib.compressobj(6, zlib.DEFLATED, wbits)
+            return compressor.compress(payload) + compressor.flush()
+
+        if len(payload) > 1_000_000:
+            body = await asyncio.get_running_loop().run_in_executor(None, compress)
+        else:
+            body = compress()
+        self.requests["compressed"] += 1
+        headers["Content-Encoding"] = encoding
+        headers["Vary"] = "Accept-Encoding"
+        return body
+
+    async def _handle_ping(self, request: web.Request) -> web.Response:
+        return web.Response(text="Server reached.")
+
+    async def _handle(self, request: web.Request) -> web.StreamResponse:
+        self.requests[request.method] += 1
+        await self._delay()
+
+        unauthorized = self._check_auth(request)
+        if unauthorized is not None:
+            return unauthorized
+
+        csrf_fetch = request.headers.get("X-CSRF-Token", "").lower() == "fetch"
+        if (
+            not csrf_fetch
+            and request.path.lower() != self._login_path
+            and self.settings.error_rate
+            and random.random() < self.settings.error_rate
+        ):
+            self.requests["injected_error"] += 1
+            status, headers, payload = _odata_error(
+                self.settings.error_status, "Injected failure"
+            )
+            if self.settings.retry_after is not None:
+                headers["Retry-After"] = f"{self.settings.retry_after:g}"
+            return web.Response(status=status, body=payload, headers=headers)
+
+        response_headers: Dict[str, str] = {}
+        session_id = request.cookies.get(SESSION_COOKIE)
+        new_session: Optional[str] = None
+
+        if csrf_fetch:
+            if session_id not in self._csrf_tokens:
+                session_id = uuid.uuid4().hex
+                self._csrf_tokens[session_id] = uuid.uuid4().hex
+                self._valid_tokens.add(self._csrf_tokens[session_id])
+                new_session = session_id
+            self.requests["csrf_fetch"] += 1
+            response_headers["X-CSRF-Token"] = self._csrf_tokens[session_id]
+        elif request.method in MODIFYING_METHODS:
+            if request.headers.get("X-CSRF-Token") not in self._valid_tokens:
+                self.requests["csrf_rejected"] += 1
+                return web.Response(
+                    status=403,
+                    text="CSRF token validation failed",
+                    headers={"X-CSRF-Token": "Required"},
+                )
+
+        path = "/" + request.match_info["tail"]
+        query = dict(parse_qsl(request.query_string, keep_blank_values=True))
+        body = await request.read()
+        method = request.headers.get("X-HTTP-Method", request.method).upper()
+        request_headers = {name.lower(): value for name, value in request.headers.items()}
+
+        if path.lower().endswith("/$batch") and request.method == "POST":
+            status, headers, payload = self._handle_batch(
+                path[: -len("/$batch")], request.headers.get("Content-Type", ""), body
+            )
+        else:
+            status, headers, payload = self.dispatch(method, path, query, body, request_headers)
+
+        response_headers.update(headers)
+        payload = await self._encode(request, payload, response_headers)
+        if self.settings.bandwidth > 0:
+            await asyncio.sleep(len(payload) / self.settings.bandwidth)
+        response = web.Response(status=status, body=payload, headers=response_headers)
+        if new_session:
+            response.set_cookie(SESSION_COOKIE, new_session, path="/")
+        return response
+
+    def dispatch(
+        self,
+        method: str,
+        path: str,
+        query: Dict[str, str],
+        body: bytes = b"",
+        headers: Optional[Dict[str, str]] = None,
+    ) -> Tuple[int, Dict[str, str], bytes]:
+        """Handle one OData request (also used for $batch parts)
+
+        Args:
+            headers: Request headers with lower-case names
+        """
+        if path.lower().startswith(CATALOG_SERVICE.lower()):
+            return self._handle_catalog(path[len(CATALOG_SERVICE):])
+
+        service, resource = self._find_service(path)
+        if service is None:
+            return _odata_error(404, f"No service found for path {path}")
+
+        if resource in ("", "$metadata"):
+            if resource == "":
+                return _json_response(
+                    200,
+                    {"d": {"EntitySets": [entity.name for entity in service.entities]}},
+                )
+            return 200, {"Content-Type": "application/xml"}, self._service_metadata(
+                service
+            ).encode()
+
+        match = _KEY_PREDICATE_PATTERN.match(resource)
+        if not match:
+            return _odata_error(400, f"Invalid resource path {resource}")
+        store = self.store(service, match.group("entity"))
+        if store is None:
+            return _odata_error(404, f"Resource not found for segment '{match.group('entity')}'")
+
+        key_predicate = match.group("key")
+        rest = match.group("rest")
+        if rest == "$count" and key_predicate is None:
+            rows = self._filter_rows(store, query.get("$filter"))
+            return 200, {"Content-Type": "text/plain"}, str(len(rows)).encode()
+        if rest:
+            if key_predicate is None or method != "GET" or rest not in store.entity.navigations:
+                return _odata_error(400, f"Navigation '{rest}' is not supported by the mock gateway")
+            row = store.rows.get(store.parse_key(key_predicate))
+            if row is None:
+                return _odata_error(404, f"Resource not found for key {key_predicate}")
+            children = self._navigation_rows(service, store, row, rest)
+            if service.version == "v4":
+                return _json_response(200, {"value": children})
+            return _json_response(200, {"d": {"results": children}})
+
+        try:
+            expand = self._expand_list(store, query)
+        except _MockRequestError as e:
+            return _odata_error(400 if self.settings.expand else 501, str(e))
+
+        if key_predicate is None:
+            if method == "GET":
+                return self._query(service, store, path, query, expand)
+            if method == "POST":
+                return self._create(service, store, body)
+            return _odata_error(405, f"Method {method} not allowed on entity set")
+
+        key = store.parse_key(key_predicate)
+        if method == "GET":
+            row = store.rows.get(key)
+            if row is None:
+                return _odata_error(404, f"Resource not found for key {key_predicate}")
+            etag_header = {"ETag": store.etag(row)} if self.settings.etags else {}
+            return _json_response(
+                200, self._envelope_entity(service, store, row, query, expand), etag_header
+            )
+        if method in ("PUT", "PATCH", "MERGE", "DELETE") and self.settings.etags:
+            row = store.rows.get(key)
+            if_match = (headers or {}).get("if-match")
+            if row is not None and if_match is None:
+                return _odata_error(428, "Precondition required: send If-Match")
+            if row is not None and if_match not in ("*", store.etag(row)):
+                return _odata_error(412, "Precondition failed: the entity was changed")
+        if method in ("PUT", "PATCH", "MERGE"):
+            return self._update(store, key, body, replace=method == "PUT")
+        if method == "DELETE":
+            if not store.remove(key):
+                return _odata_error(404, f"Resource not found for key {key_predicate}")
+            return 204, {}, b""
+        return _odata_error(405, f"Method {method} not allowed on entity")
+
+    # ------------------------------------------------------------------
+    # Catalog and metadata
+    # ------------------------------------------------------------------
+
+    def _handle_catalog(self, resource: str) -> Tuple[int, Dict[str, str], bytes]:
+        resource = resource.lstrip("/")
+        if resource == "$metadata":
+            metadata = (
+                '<?xml version="1.0" encoding="utf-8"?>'
+                '<edmx:Edmx Version="1.0" xmlns:edmx="http://schemas.microsoft.com/ado/2007/06/edmx">'
+                '<edmx:DataServices m:DataServiceVersion="2.0" '
+                'xmlns:m="http://schemas.microsoft.com/ado/2007/08/dataservices/metadata">'
+                '<Schema Namespace="CATALOGSERVICE" xmlns="http://schemas.microsoft.com/ado/2008/09/edm">'
+                '<EntityType Name="Service"><Key><PropertyRef Name="ID"/></Key>'
+                '<Property Name="ID" Type="Edm.String" Nullable="false"/>'
+                '<Property Name="Title" Type="Edm.String"/>'
+                '<Property Name="Version" Type="Edm.String"/>'
+                '<Property Name="TechnicalServiceName" Type="Edm.String"/>'
+                "</EntityType>"
+                '<EntityContainer Name="CATALOGSERVICE" m:IsDefaultEntityContainer="true">'
+                '<EntitySet Name="ServiceCollection" EntityType="CATALOGSERVICE.Service"/>'
+                "</EntityContainer></Schema></edmx:DataServices></edmx:Edmx>"
+            )
+            return 200, {"Content-Type": "application/xml"}, metadata.encode()
+        if resource.startswith("ServiceCollection"):
+            results = [
+                {
+                    "ID": service.id,
+                    "Title": service.name,
+                    "Version": "1",
+                    "TechnicalServiceName": service.id,
+                }
+                for service in self.services_config.services
+            ]
+            return _json_response(200, {"d": {"results": results}})
+        return _odata_error(404, f"Catalog resource {resource} not found")
+
+    def _service_metadata(self, service: ServiceConfig) -> str:
+        namespace = service.id
+        entity_types = []
+        entity_sets = []
+        for entity in service.entities:
+            store = self.store(service, entity.name)
+            assert store is not None
+            type_name = entity.name[:-3] if entity.name.endswith("Set") else entity.name
+            keys = "".join(f'<PropertyRef Name="{name}"/>' for name in store.key_fields)
+            properties = "".join(
+                f'<Property Name="{name}" Type="{edm_type}"'
+                + (' Nullable="false"' if name in store.key_fields else "")
+                + "/>"
+                for name, edm_type in store.properties.items()
+            )
+            navigations = "".join(
+                f'<NavigationProperty Name="{nav}" Relationship="{namespace}.{type_name}_{nav}" '
+                f'FromRole="FromRole_{nav}" ToRole="ToRole_{nav}"/>'
+                for nav in entity.navigations
+            )
+            entity_types.append(
+                f'<EntityType Name="{type_name}"><Key>{keys}</Key>{properties}{navigations}</EntityType>'
+            )
+            entity_sets.append(
+                f'<EntitySet Name="{entity.name}" EntityType="{namespace}.{type_name}"/>'
+            )
+        return (
+            '<?xml version="1.0" encoding="utf-8"?>'
+            '<edmx:Edmx Version="1.0" xmlns:edmx="http://schemas.microsoft.com/ado/2007/06/edmx">'
+            '<edmx:DataServices m:DataServiceVersion="2.0" '
+            'xmlns:m="http://schemas.microsoft.com/ado/2007/08/dataservices/metadata">'
+            f'<Schema Namespace="{namespace}" xmlns="http://schemas.microsoft.com/ado/2008/09/edm">'
+            + "".join(entity_types)
+            + f'<EntityContainer Name="{namespace}_Entities" m:IsDefaultEntityContainer="true">'
+            + "".join(entity_sets)
+            + "</EntityContainer></Schema></edmx:DataServices></edmx:Edmx>"
+        )
+
+    # ------------------------------------------------------------------
+    # Reads
+    # ------------------------------------------------------------------
+
+    def _filter_rows(
+        self, store: _EntityStore, filter_expr: Optional[str]
+    ) -> List[Dict[str, Any]]:
+        rows = list(store.rows.values())
+        if not filter_expr:
+            return rows
+        try:
+            predicate = compile_filter(filter_expr)
+        except ODataFilterError as e:
+            raise _MockRequestError(f"Invalid $filter: {e}") from e
+        return [row for row in rows if predicate(row)]
+
+    def _entity_uri(self, service: ServiceConfig, store: _EntityStore, row: Dict[str, Any]) -> str:
+        return (
+            f"http://{self.host}:{self.port}{ODATA_PREFIX}{service.path}/"
+            f"{store.entity.name}({store.format_key(row)})"
+        )
+
+    def _navigation_rows(
+        self, service: ServiceConfig, store: _EntityStore, row: Dict[str, Any], navigation: str
+    ) -> List[Dict[str, Any]]:
+        """Generated children of an entity for a navigation property"""
+        uri = f"{self._entity_uri(service, store, row)}/{navigation}"
+        children = []
+        for index in range(self.settings.navigation_rows):
+            child: Dict[str, Any] = {
+                store.entity.key_field: row[store.entity.key_field],
+                "ItemNo": f"{(index + 1) * 10:06d}",
+            }
+            if service.version != "v4":
+                child = {
+                    "__metadata": {"uri": f"{uri}({index + 1})", "type": f"{service.id}.{navigation}"},
+                    **child,
+                }
+            children.append(child)
+        return children
+
+    def _expand_list(self, store: _EntityStore, query: Dict[str, str]) -> List[str]:
+        """Navigations of $expand (only the first segment of each path is expanded)"""
+        expand = query.get("$expand")
+        if not expand:
+            return []
+        if not self.settings.expand:
+            raise _MockRequestError("$expand is not implemented for this entity set")
+        navigations = []
+        for path in expand.split(","):
+            navigation = path.strip().split("/", 1)[0]
+            if navigation not in store.entity.navigations:
+                raise _MockRequestError(f"Property '{navigation}' is not a navigation property")
+            navigations.append(navigation)
+        return navigations
+
+    def _shape_row(
+        self,
+        service: ServiceConfig,
+        store: _EntityStore,
+        row: Dict[str, Any],
+        select: Optional[List[str]],
+        expand: Optional[List[str]] = None,
+    ) -> Dict[str, Any]:
+        uri = self._entity_uri(service, store, row)
+        if service.version == "v4":
+            shaped: Dict[str, Any] = {}
+        else:
+            shaped = {
+                "__metadata": {
+                    "id": uri,
+                    "uri": uri,
+                    "type": f"{service.id}.{store.entity.name}",
+                }
+            }
+        if self.settings.etags:
+            if service.version == "v4":
+                shaped["@odata.etag"] = store.etag(row)
+            else:
+                shaped["__metadata"]["etag"] = store.etag(row)
+        for name, value in row.items():
+            if select is None or name in select:
+                shaped[name] = value
+        for nav in store.entity.navigations:
+            if select is not None and nav not in select:
+                continue
+            if expand and nav in expand:
+                children = self._navigation_rows(service, store, row, nav)
+                shaped[nav] = children if service.version == "v4" else {"results": children}
+            elif service.version != "v4":
+                shaped[nav] = {"__deferred": {"uri": f"{uri}/{nav}"}}
+        return shaped
+
+    @staticmethod
+    def _select_list(query: Dict[str, str]) -> Optional[List[str]]:
+        select = query.get("$select")
+        if not select:
+            return None
+        return [name.strip() for name in select.split(",") if name.strip()]
+
+    def _envelope_entity(
+        self,
+        service: ServiceConfig,
+        store: _EntityStore,
+        row: Dict[str, Any],
+        query: Dict[str, str],
+        expand: Optional[List[str]] = None,
+    ) -> Dict[str, Any]:
+        shaped = self._shape_row(service, store, row, self._select_list(query), expand)
+        if service.version == "v4":
+            return shaped
+        return {"d": shaped}
+
+    def _query(
+        self,
+        service: ServiceConfig,
+        store: _EntityStore,
+        path: str,
+        query: Dict[str, str],
+        expand: Optional[List[str]] = None,
+    ) -> Tuple[int, Dict[str, str], bytes]:
+        token = query.get("!deltatoken", query.get("$deltatoken"))
+        if token is not None:
+            return self._delta(service, store, path, token.strip("'"))
+        try:
+            rows = self._filter_rows(store, query.get("$filter"))
+            skip = int(query.get("$skip", query.get("$skiptoken", 0)) or 0)
+            top = int(query["$top"]) if "$top" in query else None
+        except (_MockRequestError, ValueError) as e:
+            return _odata_error(400, str(e))
+
+        total = len(rows)
+        remaining = rows[skip:]
+        if top is not None:
+            remaining = remaining[:top]
+        page = remaining[: self.settings.page_size]
+        select = self._select_list(query)
+        results = [self._shape_row(service, store, row, select, expand) for row in page]
+
+        next_link = None
+        if len(remaining) > len(page):
+            next_query = {k: v for k, v in query.items() if k not in ("$skip", "$skiptoken")}
+            next_query["$skiptoken"] = str(skip + len(page))
+            if top is not None:
+                next_query["$top"] = str(top - len(page))
+            next_link = (
+                f"http://{self.host}:{self.port}{ODATA_PREFIX}{path}?"
+                + urlencode(next_query, quote_via=quote, safe="$,'")
+            )
+
+        delta_link = None
+        if self.settings.delta and next_link is None and "$filter" not in query:
+            delta_link = self._delta_link(service, store, path)
+
+        inline_count = query.get("$inlinecount") == "allpages" or query.get("$count") == "true"
+        if service.version == "v4":
+            payload: Dict[str, Any] = {"value": results}
+            if inline_count:
+                payload["@odata.count"] = total
+            if next_link:
+                payload["@odata.nextLink"] = next_link
+            if delta_link:
+                payload["@odata.deltaLink"] = delta_link
+            return _json_response(200, payload)
+
+        data: Dict[str, Any] = {"results": results}
+        if inline_count:
+            data["__count"] = str(total)
+        if next_link:
+            data["__next"] = next_link
+        if delta_link:
+            data["__delta"] = delta_link
+        return _json_response(200, {"d": data})
+
+    def _delta_link(self, service: ServiceConfig, store: _EntityStore, path: str) -> str:
+        if service.version == "v4":
+            token = f"$deltatoken={store.version}"
+        else:
+            token = f"!deltatoken='{store.version}'"
+        return f"http://{self.host}:{self.port}{ODATA_PREFIX}{path}?{token}"
+
+    def _delta(
+        self, service: ServiceConfig, store: _EntityStore, path: str, token: str
+    ) -> Tuple[int, Dict[str, str], bytes]:
+        """Rows changed and tombstones of rows deleted since a delta token"""
+        if not token.isdigit() or int(token) > store.version:
+            return _odata_error(410, f"Delta token {token} is invalid or expired")
+        since = int(token)
+        results = [
+            self._shape_row(service, store, store.rows[key], None)
+            for key, version in store.changed.items()
+            if version > since
+        ]
+        deleted = [
+            dict(zip(store.key_fields, key, strict=True))
+            for key, version in store.deleted.items()
+            if version > since
+        ]
+        delta_link = self._delta_link(service, store, path)
+        if service.version == "v4":
+            removed = [{"@removed": {"reason": "deleted"}, **entry} for entry in deleted]
+            return _json_response(
+                200, {"value": results + removed, "@odata.deltaLink": delta_link}
+            )
+        tombstones = [
+            {"__metadata": {"uri": self._entity_uri(service, store, entry)}, **entry}
+            for entry in deleted
+        ]
+        return _json_response(
+            200, {"d": {"results": results, "__deleted": tombstones, "__delta": delta_link}}
+        )
+
+    # ------------------------------------------------------------------
+    # Writes
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _parse_body(body: bytes) -> Dict[str, Any]:
+        try:
+            payload = json.loads(body or b"{}")
+        except ValueError as e:
+            raise _MockRequestError(f"Invalid JSON payload: {e}") from e
+        if not isinstance(payload, dict):
+            raise _MockRequestError("Payload must be a JSON object")
+        payload.pop("__metadata", None)
+        return payload
+
+    def _create(
+        self, service: ServiceConfig, store: _EntityStore, body: bytes
+    ) -> Tuple[int, Dict[str, str], bytes]:
+        try:
+            payload = self._parse_body(body)
+        except _MockRequestError as e:
+            return _odata_error(400, str(e))
+        key = store.key_of(payload)
+        if not all(key):
+            return _odata_error(400, "Key properties must be provided")
+        if key in store.rows:
+            return _odata_error(400, f"Entity with key {key} already exists")
+        row = {name: payload.get(name, "") for name in store.properties}
+        row.update(payload)
+        store.put(key, row)
+        uri = self._entity_uri(service, store, row)
+        return _json_response(
+            201, self._envelope_entity(service, store, row, {}), {"Location": uri}
+        )
+
+    def _update(
+        self, store: _EntityStore, key: Tuple[str, ...], body: bytes, replace: bool
+    ) -> Tuple[int, Dict[str, str], bytes]:
+        row = store.rows.get(key)
+        if row is None:
+            return _odata_error(404, f"Resource not found for key {key}")
+        try:
+            payload = self._parse_body(body)
+        except _MockRequestError as e:
+            return _odata_error(400, str(e))
+        if replace:
+            new_row = {name: "" for name in store.properties}
+            new_row.update({name: row[name] for name in store.key_fields})
+        else:
+            new_row = dict(row)
+        new_row.update({k: v for k, v in payload.items() if k not in store.key_fields})
+        store.put(key, new_row)
+        return 204, {"ETag": store.etag(new_row)} if self.settings.etags else {}, b""
+
+    # ------------------------------------------------------------------
+    # $batch
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _boundary(content_type: str) -> Optional[str]:
+        match = re.search(r'boundary="?([^";]+)"?', content_type)
+        return match.group(1) if match else None
+
+    @staticmethod
+    def _split_multipart(body: str, boundary: str) -> List[str]:
+        parts = []
+        for chunk in body.split(f"--{boundary}")[1:]:
+            if chunk.startswith("--"):
+                break
+            parts.append(chunk.strip("\r\n"))
+        return parts
+
+    @staticmethod
+    def _split_headers(text: str) -> Tuple[Dict[str, str], str]:
+        head, _, rest = text.replace("\r\n", "\n").partition("\n\n")
+        headers: Dict[str, str] = {}
+        for line in head.split("\n"):
+            name, sep, value = line.partition(":")
+            if sep:
+                headers[name.strip().lower()] = value.strip()
+        return headers, rest
+
+    def _execute_part(self, service_path: str, http_text: str) -> Tuple[int, Dict[str, str], bytes]:
+        request_line, _, rest = http_text.replace("\r\n", "\n").partition("\n")
+        parts = request_line.split(" ")
+        if len(parts) < 2:
+            return _odata_error(400, f"Invalid batch request line: {request_line}")
+        method, target = parts[0].upper(), parts[1]
+        headers, body = self._split_headers(rest)
+        method = headers.get("x-http-method", method).upper()
+        resource, _, query_string = target.partition("?")
+        if resource.startswith("http"):
+            resource = resource.split(ODATA_PREFIX, 1)[-1]
+        elif not resource.startswith("/"):
+            resource = f"{service_path}/{unquote(resource)}"
+        query = dict(parse_qsl(query_string, keep_blank_values=True))
+        return self.dispatch(method, resource, query, body.strip().encode(), headers)
+
+    @staticmethod
+    def _format_part(status: int, headers: Dict[str, str], body: bytes) -> str:
+        lines = [
+            "Content-Type: application/http",
+            "Content-Transfer-Encoding: binary",
+            "",
+            f"HTTP/1.1 {status} {_HTTP_REASONS.get(status, '')}".rstrip(),
+        ]
+        lines.extend(f"{name}: {value}" for name, value in headers.items())
+        lines.append(f"Content-Length: {len(body)}")
+        lines.append("")
+        lines.append(body.decode())
+        return "\r\n".join(lines)
+
+    def _handle_batch(
+        self, service_path: str, content_type: str, body: bytes
+    ) -> Tuple[int, Dict[str, str], bytes]:
+        boundary = self._boundary(content_type)
+        if not boundary:
+            return _odata_error(400, "Missing multipart boundary")
+
+        response_boundary = f"batchresponse_{uuid.uuid4().hex}"
+        output: List[str] = []
+        for part in self._split_multipart(body.decode(), boundary):
+            headers, content = self._split_headers(part)
+            part_type = headers.get("content-type", "")
+            if part_type.startswith("multipart/mixed"):
+                output.append(self._handle_changeset(service_path, part_type, content))
+            else:
+                status, part_headers, part_body = self._execute_part(service_path, content)
+                output.append(self._format_part(status, part_headers, part_body))
+
+        payload = "".join(f"--{response_boundary}\r\n{part}\r\n" for part in output)
+        payload += f"--{response_boundary}--\r\n"
+        return 202, {"Content-Type": f"multipart/mixed; boundary={response_boundary}"}, payload.encode()
+
+    def _handle_changeset(self, service_path: str, content_type: str, content: str) -> str:
+        boundary = self._boundary(content_type) or ""
+        snapshot = {key: store.snapshot() for key, store in self._stores.items()}
+        responses = []
+        for part in self._split_multipart(content, boundary):
+            _, http_text = self._split_headers(part)
+            status, headers, body = self._execute_part(service_path, http_text)
+            if status >= 400:
+                # A failed operation rolls back the whole changeset
+                for key, state in snapshot.items():
+                    self._stores[key].restore(state)
+                return self._format_part(status, headers, body)
+            responses.append(self._format_part(status, headers, body))
+
+        changeset_boundary = f"changesetresponse_{uuid.uuid4().hex}"
+        body_text = "".join(f"--{changeset_boundary}\r\n{r}\r\n" for r in responses)
+        body_text += f"--{changeset_boundary}--"
+        return (
+            f"Content-Type: multipart/mixed; boundary={changeset_boundary}\r\n\r\n{body_text}"
+        )
+
+
+async def _serve(args: argparse.Namespace) -> None:
+    settings = MockGatewaySettings(
+        username=args.username,
+        password=args.password,
+        latency=args.latency_ms / 1000.0,
+        latency_jitter=args.jitter_ms / 1000.0,
+        rows=args.rows,
+        page_size=args.page_size,
+        field_width=args.field_width,
+        error_rate=args.error_rate,
+        error_status=args.error_status,
+        retry_after=args.retry_after,
+        compress=not args.no_compress,
+        bandwidth=args.bandwidth_mbps * 125_000,
+        etags=args.etags,
+        delta=args.delta,
+        expand=not args.no_expand,
+    )
+    gateway = MockSAPGateway(settings=settings)
+    port = await gateway.start(args.host, args.port)
+    print(
+        f"Mock SAP Gateway on http://{args.host}:{port}{ODATA_PREFIX} "
+        f"(user {settings.username}, client {settings.client})"
+    )
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await gateway.stop()
+
+
+def cli_main() -> None:
+    """CLI entry point for the mock gateway"""
+    parser = argparse.ArgumentParser(description="Local SAP Gateway stand-in")
+    parser.add_argument("--host", default="127.0.0.1", help="Bind address")
+    parser.add_argument("--port", type=int, default=50000, help="Port")
+    parser.add_argument("--username", default="MOCKUSER", help="Basic auth user")
+    parser.add_argument("--password", default="mockpass", help="Basic auth password")
+    parser.add_argument("--rows", type=int, default=100, help="Rows per entity set")
+    parser.add_argument("--page-size", type=int, default=5000, help="Server-side page size")
+    parser.add_argument("--field-width", type=int, default=0, help="Pad string values to this width")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Added latency per request")
+    parser.add_argument("--jitter-ms", type=float, default=0.0, help="Random extra latency")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests failed")
+    parser.add_argument("--error-status", type=int, default=503, help="Status of injected failures")
+    parser.add_argument("--retry-after", type=float, help="Retry-After seconds on injected failures")
+    parser.add_argument("--no-compress", action="store_true", help="Never compress responses")
+    parser.add_argument(
+        "--etags", action="store_true", help="Send ETags and require If-Match on writes"
+    )
+    parser.add_argument(
+        "--delta", action="store_true", help="Send delta links for incremental sync"
+    )
+    parser.add_argument(
+        "--no-expand", action="store_true", help="Reject $expand with 501"
+    )
+    parser.add_argument(
+        "--bandwidth-mbps", type=float, default=0.0, help="Simulated link bandwidth (0: unlimited)"
+    )
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    try:
+        asyncio.run(_serve(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    cli_main()
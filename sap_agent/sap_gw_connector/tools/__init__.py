@@ -1,34 +1,57 @@
-"""SAP Gateway Tools - Modular tool registration"""
+"""SAP Gateway Tools - Modular tool registration
 
+Tools are registered from their declarations (declarations.py), so listing
+them does not import SAPClient, aiohttp or the config loader. Each tool's
+module is imported on its first call, and the tool classes below on first
+access.
+"""
+
+import importlib
 import logging
+from typing import Any
 
-from .base import SAPTool, ToolRegistry, tool_registry
-from .auth_tool import SAPAuthenticateTool
-from .query_tool import SAPQueryTool
-from .entity_tool import SAPGetEntityTool
-from .service_tool import SAPListServicesTool
+from .base import LazyTool, SAPTool, ToolDeclaration, ToolRegistry, tool_registry
+from .declarations import TOOL_DECLARATIONS
 
 logger = logging.getLogger(__name__)
 
 __all__ = [
     "SAPTool",
+    "LazyTool",
+    "ToolDeclaration",
     "ToolRegistry",
     "tool_registry",
     "SAPAuthenticateTool",
     "SAPQueryTool",
     "SAPGetEntityTool",
+    "SAPMultiQueryTool",
+    "SAPBulkWriteTool",
     "SAPListServicesTool",
+    "SAPStatsTool",
     "register_sap_tools",
 ]
 
+# Tool class name -> "module:ClassName"
+_TOOL_CLASSES = {
+    declaration.implementation.partition(":")[2]: declaration.implementation
+    for declaration in TOOL_DECLARATIONS
+}
+
+
+def __getattr__(name: str) -> Any:
+    """Import tool classes on first access"""
+    implementation = _TOOL_CLASSES.get(name)
+    if implementation is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    module_name, _, class_name = implementation.partition(":")
+    return getattr(importlib.import_module(module_name), class_name)
+
 
 def register_sap_tools() -> None:
     """Register all SAP tools with the global registry"""
-    tool_registry.register(SAPAuthenticateTool())
-    tool_registry.register(SAPQueryTool())
-    tool_registry.register(SAPGetEntityTool())
-    tool_registry.register(SAPListServicesTool())
-    logger.info("Registered 4 SAP tools")
+    for declaration in TOOL_DECLARATIONS:
+        tool_registry.register(LazyTool(declaration))
+    logger.info(f"Registered {len(TOOL_DECLARATIONS)} SAP tools")
 
 
 # Auto-register on import
@@ -4,6 +4,7 @@ import logging
 from typing import Any, Dict
 
 from sap_agent.sap_gw_connector.tools.base import SAPTool
+from sap_agent.sap_gw_connector.tools.declarations import SAP_AUTHENTICATE
 from sap_agent.sap_gw_connector.core.sap_client import SAPClient
 
 logger = logging.getLogger(__name__)
@@ -12,20 +13,7 @@ logger = logging.getLogger(__name__)
 class SAPAuthenticateTool(SAPTool):
     """Tool for authenticating with SAP Gateway"""
 
-    @property
-    def name(self) -> str:
-        return "sap_authenticate"
-
-    @property
-    def description(self) -> str:
-        return "Authenticate with SAP Gateway using username and password"
-
-    @property
-    def input_schema(self) -> Dict[str, Any]:
-        return {
-            "type": "object",
-            "properties": {},
-        }
+    declaration = SAP_AUTHENTICATE
 
     async def execute(self, params: Dict[str, Any]) -> Dict[str, Any]:
         """Execute authentication"""
@@ -1,36 +1,81 @@
 """SAP Tool base classes and registry"""
 
+import importlib
+import json
 import logging
+import threading
 import time
 import uuid
 from abc import ABC, abstractmethod
-from typing import Any, Dict, List, Optional
-
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+
+from sap_agent.sap_gw_connector.observability.metrics import TOOL_CALLS, TOOL_CALLS_IN_FLIGHT
+from sap_agent.sap_gw_connector.observability.recorder import trace_recorder
+from sap_agent.sap_gw_connector.observability.stats import (
+    PHASES,
+    LatencyHistogram,
+    PhaseTimings,
+    collect_phase_timings,
+)
+from sap_agent.sap_gw_connector.observability.tracing import start_span
 from sap_agent.sap_gw_connector.protocol.schemas import ToolCallRequest, ToolCallResponse, ToolInfo
 
 logger = logging.getLogger(__name__)
 
 
+class ToolDeclaration:
+    """Name, description and input schema of a tool, and its implementation
+
+    Args:
+        implementation: "module:ClassName" of the SAPTool subclass
+    """
+
+    def __init__(
+        self,
+        name: str,
+        description: str,
+        input_schema: Dict[str, Any],
+        implementation: str,
+    ):
+        self.name = name
+        self.description = description
+        self.input_schema = input_schema
+        self.implementation = implementation
+
+
 class SAPTool(ABC):
-    """Base class for all SAP Gateway tools"""
+    """Base class for all SAP Gateway tools
+
+    Subclasses set `declaration` or override name, description and
+    input_schema.
+    """
+
+    declaration: Optional[ToolDeclaration] = None
+    _tool_info: Optional[ToolInfo] = None
+
+    def _declared(self) -> ToolDeclaration:
+        if self.declaration is None:
+            raise NotImplementedError(
+                f"{type(self).__name__} must set declaration or override "
+                "name, description and input_schema"
+            )
+        return self.declaration
 
     @property
-    @abstractmethod
     def name(self) -> str:
         """Tool name for registration"""
-        pass
+        return self._declared().name
 
     @property
-    @abstractmethod
     def description(self) -> str:
         """Tool description"""
-        pass
+        return self._declared().description
 
     @property
-    @abstractmethod
     def input_schema(self) -> Dict[str, Any]:
         """JSON Schema for tool inputs"""
-        pass
+        return self._declared().input_schema
 
     @abstractmethod
     async def execute(self, params: Dict[str, Any]) -> Dict[str, Any]:
@@ -38,10 +83,43 @@ class SAPTool(ABC):
         pass
 
     def to_tool_info(self) -> ToolInfo:
-        """Convert to ToolInfo schema"""
-        return ToolInfo(
-            name=self.name, description=self.description, inputSchema=self.input_schema
-        )
+        """ToolInfo of the tool, built on first use"""
+        if self._tool_info is None:
+            self._tool_info = ToolInfo(
+                name=self.name, description=self.description, inputSchema=self.input_schema
+            )
+        return self._tool_info
+
+
+class LazyTool(SAPTool):
+    """Declared tool whose implementation module is imported on its first call"""
+
+    def __init__(self, declaration: ToolDeclaration):
+        self.declaration = declaration
+        self._tool: Optional[SAPTool] = None
+        self._lock = threading.Lock()
+
+    @property
+    def loaded(self) -> bool:
+        return self._tool is not None
+
+    def load(self) -> SAPTool:
+        """Import and instantiate the implementation (once)"""
+        with self._lock:
+            if self._tool is None:
+                module_name, _, class_name = self._declared().implementation.partition(":")
+                start = time.perf_counter()
+                tool_class = getattr(importlib.import_module(module_name), class_name)
+                self._tool = tool_class()
+                logger.info(
+                    f"Loaded tool '{self.name}' from {module_name} "
+                    f"in {time.perf_counter() - start:.3f}s"
+                )
+            return self._tool
+
+    async def execute(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        """Execute the implementation, importing it on the first call"""
+        return await self.load().execute(params)
 
 
 class ToolRegistry:
@@ -49,7 +127,13 @@ class ToolRegistry:
 
     def __init__(self):
         self._tools: Dict[str, SAPTool] = {}
+        # ToolInfo of each tool, built at registration
+        self._tool_infos: Dict[str, ToolInfo] = {}
+        # Serialized tools/list result, built on first request after a change
+        self._tools_json: Optional[bytes] = None
         self._execution_stats: Dict[str, Dict[str, Any]] = {}
+        # Incremented on every (un)registration, for caches of tools/list
+        self.version = 0
 
     def register(self, tool: SAPTool) -> None:
         """Register a tool"""
@@ -57,19 +141,34 @@ class ToolRegistry:
             logger.warning(f"Tool '{tool.name}' already registered, overwriting")
 
         self._tools[tool.name] = tool
-        self._execution_stats[tool.name] = {
+        self._tool_infos[tool.name] = tool.to_tool_info()
+        self._execution_stats[tool.name] = self._new_stats()
+        self._changed()
+        logger.info(f"Registered tool: {tool.name}")
+
+    def _changed(self) -> None:
+        self._tools_json = None
+        self.version += 1
+
+    @staticmethod
+    def _new_stats() -> Dict[str, Any]:
+        """Create an empty statistics entry for a tool"""
+        return {
             "call_count": 0,
             "total_duration": 0.0,
             "error_count": 0,
             "last_called": None,
+            "latency": LatencyHistogram(),
+            "phases": {phase: LatencyHistogram() for phase in PHASES},
         }
-        logger.info(f"Registered tool: {tool.name}")
 
     def unregister(self, tool_name: str) -> bool:
         """Unregister a tool"""
         if tool_name in self._tools:
             del self._tools[tool_name]
+            del self._tool_infos[tool_name]
             del self._execution_stats[tool_name]
+            self._changed()
             logger.info(f"Unregistered tool: {tool_name}")
             return True
         return False
@@ -80,7 +179,16 @@ class ToolRegistry:
 
     def list_tools(self) -> List[ToolInfo]:
         """List all registered tools"""
-        return [tool.to_tool_info() for tool in self._tools.values()]
+        return list(self._tool_infos.values())
+
+    def list_tools_json(self) -> bytes:
+        """tools/list result ({"tools": [...]}) as JSON, serialized once per change"""
+        body = self._tools_json
+        if body is None:
+            body = self._tools_json = json.dumps(
+                {"tools": [info.model_dump() for info in self._tool_infos.values()]}
+            ).encode("utf-8")
+        return body
 
     def get_tool_names(self) -> List[str]:
         """Get list of registered tool names"""
@@ -103,16 +211,11 @@ class ToolRegistry:
             )
 
         # Execute tool with performance tracking
-        start_time = time.time()
+        start_time = time.perf_counter()
         try:
-            result = await tool.execute(request.arguments)
-            duration = time.time() - start_time
-
-            # Update statistics
-            stats = self._execution_stats[tool_name]
-            stats["call_count"] += 1
-            stats["total_duration"] += duration
-            stats["last_called"] = time.time()
+            with self.track(tool_name, request.arguments):
+                result = await tool.execute(request.arguments)
+            duration = time.perf_counter() - start_time
 
             logger.info(
                 f"Tool '{tool_name}' executed successfully in {duration:.3f}s "
@@ -126,12 +229,7 @@ class ToolRegistry:
             )
 
         except Exception as e:
-            duration = time.time() - start_time
-
-            # Update error statistics
-            stats = self._execution_stats[tool_name]
-            stats["error_count"] += 1
-            stats["last_called"] = time.time()
+            duration = time.perf_counter() - start_time
 
             error_msg = f"Tool execution failed: {str(e)}"
             logger.error(
@@ -143,6 +241,47 @@ class ToolRegistry:
                 content=[{"type": "text", "text": error_msg}], isError=True
             )
 
+    @contextmanager
+    def track(
+        self, tool_name: str, arguments: Optional[Dict[str, Any]] = None
+    ) -> Iterator[PhaseTimings]:
+        """Record latency and phase timings for one execution of a tool
+
+        Also used by the agent's direct function tools, which do not go
+        through call_tool, so statistics are created on demand. The call and
+        its arguments are added to the trace recording, if one is active.
+        """
+        stats = self._execution_stats.get(tool_name)
+        if stats is None:
+            stats = self._execution_stats[tool_name] = self._new_stats()
+
+        start_time = time.perf_counter()
+        TOOL_CALLS_IN_FLIGHT.inc(tool=tool_name)
+        with start_span(
+            f"sap.tool {tool_name}", {"sap.tool.name": tool_name}
+        ), collect_phase_timings() as timings:
+            try:
+                yield timings
+            except BaseException:
+                stats["error_count"] += 1
+                TOOL_CALLS.inc(tool=tool_name, outcome="error")
+                raise
+            else:
+                stats["call_count"] += 1
+                stats["total_duration"] += time.perf_counter() - start_time
+                TOOL_CALLS.inc(tool=tool_name, outcome="success")
+            finally:
+                duration = time.perf_counter() - start_time
+                TOOL_CALLS_IN_FLIGHT.dec(tool=tool_name)
+                stats["latency"].record(duration)
+                stats["last_called"] = time.time()
+                for phase, seconds in timings.durations.items():
+                    histogram = stats["phases"].get(phase)
+                    if histogram is None:
+                        histogram = stats["phases"][phase] = LatencyHistogram()
+                    histogram.record(seconds)
+                trace_recorder.record(tool_name, arguments, start_time, duration)
+
     def get_statistics(self) -> Dict[str, Dict[str, Any]]:
         """Get execution statistics for all tools"""
         stats = {}
@@ -153,16 +292,31 @@ class ToolRegistry:
             )
             error_rate = raw_stats["error_count"] / call_count if call_count > 0 else 0
 
+            latency = raw_stats["latency"]
             stats[tool_name] = {
                 "call_count": call_count,
                 "error_count": raw_stats["error_count"],
                 "error_rate": error_rate,
                 "average_duration": avg_duration,
+                "p50_duration": latency.percentile(50),
+                "p95_duration": latency.percentile(95),
+                "p99_duration": latency.percentile(99),
+                "max_duration": latency.max,
                 "last_called": raw_stats["last_called"],
+                "phases": {
+                    phase: histogram.to_dict()
+                    for phase, histogram in raw_stats["phases"].items()
+                    if histogram.count
+                },
             }
 
         return stats
 
+    def reset_statistics(self) -> None:
+        """Reset execution statistics for all tools"""
+        for tool_name in self._execution_stats:
+            self._execution_stats[tool_name] = self._new_stats()
+
 
 # Global tool registry instance
 tool_registry = ToolRegistry()
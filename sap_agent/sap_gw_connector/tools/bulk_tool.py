@@ -0,0 +1,65 @@
+"""SAP Bulk Write Tool"""
+
+import logging
+from typing import Any, Dict
+
+from sap_agent.sap_gw_connector.config.loader import get_services_config
+from sap_agent.sap_gw_connector.config.settings import get_services_config_path
+from sap_agent.sap_gw_connector.core.batch import BatchOperation
+from sap_agent.sap_gw_connector.core.sap_client import SAPClient
+from sap_agent.sap_gw_connector.tools.base import SAPTool
+from sap_agent.sap_gw_connector.tools.declarations import SAP_BULK_WRITE
+
+logger = logging.getLogger(__name__)
+
+
+class SAPBulkWriteTool(SAPTool):
+    """Tool for creating, updating and deleting many entities in $batch changesets"""
+
+    declaration = SAP_BULK_WRITE
+
+    async def execute(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        """Apply the operations and report failed ones"""
+        try:
+            services_config = get_services_config(get_services_config_path())
+
+            service_config = services_config.get_service(params["service"])
+            if not service_config:
+                available_services = services_config.list_service_ids()
+                return {
+                    "success": False,
+                    "error": f"Service '{params['service']}' not found in configuration. "
+                    f"Available services: {', '.join(available_services)}",
+                }
+            if not service_config.get_entity(params["entity_set"]):
+                available_entities = [e.name for e in service_config.entities]
+                return {
+                    "success": False,
+                    "error": f"Entity set '{params['entity_set']}' not found in service '{params['service']}'. "
+                    f"Available entities: {', '.join(available_entities)}",
+                }
+
+            operations = [
+                BatchOperation.from_dict(spec, params["entity_set"], service_config.version)
+                for spec in params["operations"]
+            ]
+            if not operations:
+                return {"success": False, "error": "No operations given"}
+
+            async with SAPClient.for_service(service_config) as client:
+                result = await client.bulk_write(
+                    service_config.path,
+                    operations,
+                    chunk_size=params.get("chunk_size"),
+                    max_parallel=params.get("max_parallel"),
+                )
+
+            return {
+                "service": params["service"],
+                "entity_set": params["entity_set"],
+                **result.to_dict(),
+            }
+
+        except Exception as e:
+            logger.error(f"Bulk write failed: {e}")
+            return {"success": False, "error": str(e)}
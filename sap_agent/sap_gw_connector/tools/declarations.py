@@ -0,0 +1,274 @@
+"""SAP tool declarations
+
+Name, description and input schema of every SAP tool, and the class that
+implements it. The registry lists tools from these declarations and imports
+an implementation module (with SAPClient, aiohttp and the config loader)
+only when its tool is first called.
+"""
+
+from typing import List
+
+from sap_agent.sap_gw_connector.tools.base import ToolDeclaration
+
+_PACKAGE = "sap_agent.sap_gw_connector.tools"
+
+SAP_AUTHENTICATE = ToolDeclaration(
+    name="sap_authenticate",
+    description="Authenticate with SAP Gateway using username and password",
+    input_schema={
+        "type": "object",
+        "properties": {},
+    },
+    implementation=f"{_PACKAGE}.auth_tool:SAPAuthenticateTool",
+)
+
+SAP_QUERY = ToolDeclaration(
+    name="sap_query",
+    description="Query SAP OData service entity sets with optional filters",
+    input_schema={
+        "type": "object",
+        "properties": {
+            "service": {"type": "string", "description": "OData service name"},
+            "entity_set": {
+                "type": "string",
+                "description": "Entity set name to query",
+            },
+            "filter": {
+                "type": "string",
+                "description": "OData filter expression (optional)",
+            },
+            "select": {
+                "type": "string",
+                "description": "Comma-separated list of fields to select (optional, "
+                "defaults to the entity's default fields)",
+            },
+            "top": {
+                "type": "integer",
+                "description": "Maximum number of records to return (optional, capped "
+                "at SAP_QUERY_MAX_TOP)",
+            },
+            "skip": {
+                "type": "integer",
+                "description": "Number of records to skip (optional)",
+            },
+            "expand": {
+                "type": "string",
+                "description": "Comma-separated navigation properties to return with "
+                "each record (optional, e.g., ToItems for orders with their items)",
+            },
+            "format": {
+                "type": "string",
+                "enum": ["json", "json_compact"],
+                "description": "Output format: 'json' returns raw OData response, 'json_compact' removes __metadata and __deferred navigation links for token efficiency (default: json_compact)",
+                "default": "json_compact",
+            },
+        },
+        "required": ["service", "entity_set"],
+    },
+    implementation=f"{_PACKAGE}.query_tool:SAPQueryTool",
+)
+
+SAP_GET_ENTITY = ToolDeclaration(
+    name="sap_get_entity",
+    description="Retrieve a single entity from SAP OData service by key (e.g., OrderID)",
+    input_schema={
+        "type": "object",
+        "properties": {
+            "service": {"type": "string", "description": "OData service name"},
+            "entity_set": {
+                "type": "string",
+                "description": "Entity set name (e.g., zsd004Set)",
+            },
+            "entity_key": {
+                "type": "string",
+                "description": "Entity key value (e.g., OrderID like '91000092'); for "
+                "composite keys name each property: Ebeln='4500000010',Ebelp='00010'",
+            },
+            "select": {
+                "type": "string",
+                "description": "Comma-separated list of fields to select (optional)",
+            },
+            "expand": {
+                "type": "string",
+                "description": "Comma-separated navigation properties to return with "
+                "the entity (optional, e.g., ToItems)",
+            },
+        },
+        "required": ["service", "entity_set", "entity_key"],
+    },
+    implementation=f"{_PACKAGE}.entity_tool:SAPGetEntityTool",
+)
+
+SAP_MULTI_QUERY = ToolDeclaration(
+    name="sap_multi_query",
+    description=(
+        "Run several independent SAP reads (queries and reads by key, across "
+        "services) concurrently in one call and return all results together"
+    ),
+    input_schema={
+        "type": "object",
+        "properties": {
+            "reads": {
+                "type": "array",
+                "description": "Reads to run (at most 20)",
+                "items": {
+                    "type": "object",
+                    "properties": {
+                        "id": {
+                            "type": "string",
+                            "description": "Name of the read in the results (optional, "
+                            "defaults to its position)",
+                        },
+                        "operation": {
+                            "type": "string",
+                            "enum": ["query", "get"],
+                            "description": "query filters an entity set like sap_query, "
+                            "get reads one entity by key like sap_get_entity (default: "
+                            "get if entity_key is given, else query)",
+                        },
+                        "service": {"type": "string", "description": "OData service name"},
+                        "entity_set": {"type": "string", "description": "Entity set name"},
+                        "entity_key": {
+                            "type": "string",
+                            "description": "Entity key value (get); for composite keys "
+                            "Name1='a',Name2='b'",
+                        },
+                        "filter": {
+                            "type": "string",
+                            "description": "OData filter expression (query, optional)",
+                        },
+                        "select": {
+                            "type": "string",
+                            "description": "Comma-separated list of fields to select (optional)",
+                        },
+                        "top": {
+                            "type": "integer",
+                            "description": "Maximum number of records (query, optional)",
+                        },
+                        "skip": {
+                            "type": "integer",
+                            "description": "Number of records to skip (query, optional)",
+                        },
+                        "expand": {
+                            "type": "string",
+                            "description": "Comma-separated navigation properties (optional)",
+                        },
+                        "format": {
+                            "type": "string",
+                            "enum": ["json", "json_compact"],
+                            "description": "Output format of a query (default: json_compact)",
+                        },
+                    },
+                    "required": ["service", "entity_set"],
+                },
+            },
+            "max_parallel": {
+                "type": "integer",
+                "description": "Reads in flight at once per SAP system (optional)",
+            },
+        },
+        "required": ["reads"],
+    },
+    implementation=f"{_PACKAGE}.multi_query_tool:SAPMultiQueryTool",
+)
+
+SAP_BULK_WRITE = ToolDeclaration(
+    name="sap_bulk_write",
+    description=(
+        "Create, update or delete many entities of an SAP OData entity set in "
+        "$batch changesets; reports which operations failed"
+    ),
+    input_schema={
+        "type": "object",
+        "properties": {
+            "service": {"type": "string", "description": "OData service name"},
+            "entity_set": {
+                "type": "string",
+                "description": "Entity set name (e.g., zsd004Set)",
+            },
+            "operations": {
+                "type": "array",
+                "description": "Writes to apply",
+                "items": {
+                    "type": "object",
+                    "properties": {
+                        "operation": {
+                            "type": "string",
+                            "enum": ["create", "update", "patch", "delete"],
+                            "description": "update replaces the entity, patch "
+                            "changes only the properties in data",
+                        },
+                        "key": {
+                            "type": "string",
+                            "description": "Entity key value (update, patch and delete); "
+                            "for composite keys Name1='a',Name2='b'",
+                        },
+                        "data": {
+                            "type": "object",
+                            "description": "Entity properties (create, update and patch)",
+                        },
+                        "etag": {
+                            "type": "string",
+                            "description": "ETag of the entity as read; the write "
+                            "fails if it changed since (optional)",
+                        },
+                    },
+                    "required": ["operation"],
+                },
+            },
+            "chunk_size": {
+                "type": "integer",
+                "description": "Operations per changeset (optional)",
+            },
+            "max_parallel": {
+                "type": "integer",
+                "description": "$batch requests in flight at once (optional)",
+            },
+        },
+        "required": ["service", "entity_set", "operations"],
+    },
+    implementation=f"{_PACKAGE}.bulk_tool:SAPBulkWriteTool",
+)
+
+SAP_LIST_SERVICES = ToolDeclaration(
+    name="sap_list_services",
+    description="List all available SAP OData services configured in services.yaml",
+    input_schema={"type": "object", "properties": {}},
+    implementation=f"{_PACKAGE}.service_tool:SAPListServicesTool",
+)
+
+SAP_STATS = ToolDeclaration(
+    name="sap_stats",
+    description=(
+        "Report call counts, error rates, latency percentiles (p50/p95/p99) "
+        "and per-phase timings (auth, network, download, parse, transform) "
+        "for SAP tools, plus SAP circuit breaker states, rate limit queues "
+        "and application server health"
+    ),
+    input_schema={
+        "type": "object",
+        "properties": {
+            "tool": {
+                "type": "string",
+                "description": "Only report statistics for this tool (optional)",
+            },
+            "reset": {
+                "type": "boolean",
+                "description": "Reset statistics for all tools after reporting (default: false)",
+                "default": False,
+            },
+        },
+    },
+    implementation=f"{_PACKAGE}.stats_tool:SAPStatsTool",
+)
+
+# Registration order of tools/list
+TOOL_DECLARATIONS: List[ToolDeclaration] = [
+    SAP_AUTHENTICATE,
+    SAP_QUERY,
+    SAP_GET_ENTITY,
+    SAP_MULTI_QUERY,
+    SAP_BULK_WRITE,
+    SAP_LIST_SERVICES,
+    SAP_STATS,
+]
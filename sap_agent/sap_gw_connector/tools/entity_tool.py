@@ -4,9 +4,12 @@ import logging
 from typing import Any, Dict
 
 from sap_agent.sap_gw_connector.tools.base import SAPTool
+from sap_agent.sap_gw_connector.tools.declarations import SAP_GET_ENTITY
+from sap_agent.sap_gw_connector.core.expand import expand_paths, get_expanded
 from sap_agent.sap_gw_connector.core.sap_client import SAPClient
 from sap_agent.sap_gw_connector.config.loader import get_services_config
 from sap_agent.sap_gw_connector.config.settings import get_services_config_path
+from sap_agent.sap_gw_connector.replica.reads import read_entity
 
 logger = logging.getLogger(__name__)
 
@@ -14,43 +17,11 @@ logger = logging.getLogger(__name__)
 class SAPGetEntityTool(SAPTool):
     """Tool for retrieving a single SAP entity by key"""
 
-    @property
-    def name(self) -> str:
-        return "sap_get_entity"
-
-    @property
-    def description(self) -> str:
-        return "Retrieve a single entity from SAP OData service by key (e.g., OrderID)"
-
-    @property
-    def input_schema(self) -> Dict[str, Any]:
-        return {
-            "type": "object",
-            "properties": {
-                "service": {"type": "string", "description": "OData service name"},
-                "entity_set": {
-                    "type": "string",
-                    "description": "Entity set name (e.g., zsd004Set)",
-                },
-                "entity_key": {
-                    "type": "string",
-                    "description": "Entity key value (e.g., OrderID like '91000092')",
-                },
-                "select": {
-                    "type": "string",
-                    "description": "Comma-separated list of fields to select (optional)",
-                },
-            },
-            "required": ["service", "entity_set", "entity_key"],
-        }
+    declaration = SAP_GET_ENTITY
 
     async def execute(self, params: Dict[str, Any]) -> Dict[str, Any]:
         """Retrieve entity by key"""
         try:
-            from sap_agent.sap_gw_connector.config.settings import get_config
-
-            config = get_config(require_sap=True)
-
             # Load services configuration
             services_config = get_services_config(get_services_config_path())
 
@@ -82,19 +53,50 @@ class SAPGetEntityTool(SAPTool):
             if "select" in params:
                 select_fields = [f.strip() for f in params["select"].split(",")]
 
-            async with SAPClient(config.sap) as client:
+            # Replicated master data is served locally (without navigations)
+            cached = None
+            if not params.get("expand"):
+                cached = await read_entity(
+                    service_config, params["entity_set"], params["entity_key"], select_fields
+                )
+            if cached is not None:
+                return {
+                    "success": True,
+                    "service": params["service"],
+                    "entity_set": params["entity_set"],
+                    "entity_key": params["entity_key"],
+                    "key_field": entity_config.key_field,
+                    "data": cached,
+                    "source": "replica",
+                }
+
+            async with SAPClient.for_service(service_config) as client:
                 # Authenticate first
                 auth_success = await client.authenticate()
                 if not auth_success:
                     return {"success": False, "error": "Authentication failed"}
 
-                # Get entity by key
-                result = await client.get_entity(
-                    service_path=service_path,
-                    entity_set=params["entity_set"],
-                    entity_key=params["entity_key"],
-                    select_fields=select_fields,
+                # Get entity by key, with its navigations inline or fetched
+                # with $batch where the service does not expand them
+                paths = await expand_paths(
+                    client, service_config, params["entity_set"], params.get("expand")
                 )
+                if paths:
+                    result, _ = await get_expanded(
+                        client,
+                        service_config,
+                        params["entity_set"],
+                        params["entity_key"],
+                        paths,
+                        select_fields,
+                    )
+                else:
+                    result = await client.get_entity(
+                        service_path=service_path,
+                        entity_set=params["entity_set"],
+                        entity_key=params["entity_key"],
+                        select_fields=select_fields,
+                    )
 
                 return {
                     "success": True,
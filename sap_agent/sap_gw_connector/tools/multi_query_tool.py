@@ -0,0 +1,42 @@
+"""SAP Multi-Entity Read Tool"""
+
+import logging
+from typing import Any, Dict
+
+from sap_agent.sap_gw_connector.config.loader import get_services_config
+from sap_agent.sap_gw_connector.config.settings import get_services_config_path
+from sap_agent.sap_gw_connector.core.multi_query import parse_reads, run_reads
+from sap_agent.sap_gw_connector.tools.base import SAPTool
+from sap_agent.sap_gw_connector.tools.declarations import SAP_MULTI_QUERY
+from sap_agent.sap_gw_connector.tools.query_tool import SAPQueryTool
+
+logger = logging.getLogger(__name__)
+
+
+class SAPMultiQueryTool(SAPTool):
+    """Tool for running several independent reads concurrently in one call"""
+
+    declaration = SAP_MULTI_QUERY
+
+    async def execute(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        """Run the reads and combine their results"""
+        try:
+            services_config = get_services_config(get_services_config_path())
+            reads = parse_reads(params.get("reads") or [])
+
+            results = await run_reads(services_config, reads, params.get("max_parallel"))
+
+            # Query results are shaped like sap_query's, reads by key like sap_get_entity's
+            transform = SAPQueryTool()._transform_response
+            failed = sum(1 for result in results if not result.success)
+            return {
+                "success": not failed,
+                "total": len(results),
+                "succeeded": len(results) - failed,
+                "failed": failed,
+                "results": [result.to_dict(transform) for result in results],
+            }
+
+        except Exception as e:
+            logger.error(f"Multi-entity read failed: {e}")
+            return {"success": False, "error": str(e)}
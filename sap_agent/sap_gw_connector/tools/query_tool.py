@@ -4,9 +4,14 @@ import logging
 from typing import Any, Dict, List
 
 from sap_agent.sap_gw_connector.config.loader import get_services_config
-from sap_agent.sap_gw_connector.config.settings import get_config
+from sap_agent.sap_gw_connector.config.settings import get_services_config_path
+from sap_agent.sap_gw_connector.core.query_planner import execute_plan, plan_query
 from sap_agent.sap_gw_connector.core.sap_client import SAPClient
+from sap_agent.sap_gw_connector.observability.stats import measure_phase
+from sap_agent.sap_gw_connector.observability.tracing import start_span
+from sap_agent.sap_gw_connector.replica.reads import read_query
 from sap_agent.sap_gw_connector.tools.base import SAPTool
+from sap_agent.sap_gw_connector.tools.declarations import SAP_QUERY
 
 logger = logging.getLogger(__name__)
 
@@ -14,49 +19,7 @@ logger = logging.getLogger(__name__)
 class SAPQueryTool(SAPTool):
     """Tool for querying SAP OData services"""
 
-    @property
-    def name(self) -> str:
-        return "sap_query"
-
-    @property
-    def description(self) -> str:
-        return "Query SAP OData service entity sets with optional filters"
-
-    @property
-    def input_schema(self) -> Dict[str, Any]:
-        return {
-            "type": "object",
-            "properties": {
-                "service": {"type": "string", "description": "OData service name"},
-                "entity_set": {
-                    "type": "string",
-                    "description": "Entity set name to query",
-                },
-                "filter": {
-                    "type": "string",
-                    "description": "OData filter expression (optional)",
-                },
-                "select": {
-                    "type": "string",
-                    "description": "Comma-separated list of fields to select (optional)",
-                },
-                "top": {
-                    "type": "integer",
-                    "description": "Maximum number of records to return (optional)",
-                },
-                "skip": {
-                    "type": "integer",
-                    "description": "Number of records to skip (optional)",
-                },
-                "format": {
-                    "type": "string",
-                    "enum": ["json", "json_compact"],
-                    "description": "Output format: 'json' returns raw OData response, 'json_compact' removes __metadata and __deferred navigation links for token efficiency (default: json_compact)",
-                    "default": "json_compact",
-                },
-            },
-            "required": ["service", "entity_set"],
-        }
+    declaration = SAP_QUERY
 
     def _transform_response(
         self, data: Dict[str, Any], output_format: str
@@ -79,70 +42,80 @@ class SAPQueryTool(SAPTool):
         if not results:
             # Handle single entity response (no results array)
             if "d" in data and isinstance(data["d"], dict):
-                entity = data["d"]
-                clean_entity = {}
-                for key, value in entity.items():
-                    # Skip metadata
-                    if key == "__metadata":
-                        continue
-                    # Skip deferred navigation links
-                    if isinstance(value, dict) and "__deferred" in value:
-                        continue
-                    clean_entity[key] = value
-                return {"result": clean_entity}
+                return {"result": self._clean_entity(data["d"])}
             return data
 
         # Process results array
-        clean_results: List[Dict[str, Any]] = []
-        for item in results:
-            clean_item: Dict[str, Any] = {}
-            for key, value in item.items():
-                # Skip metadata
-                if key == "__metadata":
-                    continue
+        clean_results: List[Dict[str, Any]] = [self._clean_entity(item) for item in results]
+
+        return {"results": clean_results, "count": len(clean_results)}
+
+    @classmethod
+    def _clean_entity(cls, entity: Dict[str, Any]) -> Dict[str, Any]:
+        """Entity without __metadata and deferred navigation links"""
+        clean_entity: Dict[str, Any] = {}
+        for key, value in entity.items():
+            # Skip metadata
+            if key == "__metadata":
+                continue
+            if isinstance(value, dict):
                 # Skip deferred navigation links
-                if isinstance(value, dict) and "__deferred" in value:
+                if "__deferred" in value:
                     continue
                 # Keep expanded navigation properties (they have actual data)
-                clean_item[key] = value
-            clean_results.append(clean_item)
-
-        return {"results": clean_results, "count": len(clean_results)}
+                if isinstance(value.get("results"), list):
+                    value = [cls._clean_entity(item) for item in value["results"]]
+                elif "__metadata" in value:
+                    value = cls._clean_entity(value)
+            clean_entity[key] = value
+        return clean_entity
 
     async def execute(self, params: Dict[str, Any]) -> Dict[str, Any]:
         """Execute OData query"""
         try:
-            # Get SAP connection configuration
-            config = get_config(require_sap=True)
-            sap_config = config.sap
-            services_config = get_services_config()
+            services_config = get_services_config(get_services_config_path())
 
-            # Find service path
+            # Find service
             service_info = services_config.get_service(params["service"])
             if not service_info:
                 raise ValueError(f"Service '{params['service']}' not found in configuration")
-            service_path = service_info.path
 
-            # Build query parameters
-            filters = {"$filter": params["filter"]} if "filter" in params else None
             select_fields = params["select"].split(",") if "select" in params else None
-            top = params.get("top")
-            skip = params.get("skip")
             output_format = params.get("format", "json_compact")
 
-            # Execute query using SAPClient
-            async with SAPClient(config=sap_config) as client:
-                result = await client.query_entity_set(
-                    service_path=service_path,
-                    entity_set=params["entity_set"],
-                    filters=filters,
-                    select_fields=select_fields,
-                    top=top,
-                    skip=skip,
+            # Execute query against the system serving the service, after
+            # planning it (default $select, $top limit, key reads, cache, $expand)
+            async with SAPClient.for_service(service_info) as client:
+                plan = plan_query(
+                    service_info,
+                    params["entity_set"],
+                    params.get("filter"),
+                    select_fields,
+                    params.get("top"),
+                    params.get("skip"),
+                    client.config.query_max_top,
+                    params.get("expand"),
                 )
+                # Replicated master data is served locally when the filter is simple
+                result = None
+                if not plan.expand:
+                    result = await read_query(
+                        service_info, plan.entity_set, plan.filter, plan.select, plan.top, plan.skip
+                    )
+                if result is not None:
+                    plan.strategy = "replica"
+                else:
+                    result = await execute_plan(client, plan)
 
             # Transform response based on format
-            return self._transform_response(result, output_format)
+            with start_span(
+                "sap.transform", {"sap.output_format": output_format}
+            ), measure_phase("transform"):
+                response = self._transform_response(result, output_format)
+            if plan.strategy == "replica" and output_format != "json":
+                response["source"] = "replica"
+            response["plan"] = plan.explain()
+            return response
 
         except Exception as e:
             logger.error(f"Query failed: {e}")
@@ -4,6 +4,7 @@ import logging
 from typing import Any, Dict
 
 from sap_agent.sap_gw_connector.tools.base import SAPTool
+from sap_agent.sap_gw_connector.tools.declarations import SAP_LIST_SERVICES
 from sap_agent.sap_gw_connector.config.loader import get_services_config
 from sap_agent.sap_gw_connector.config.settings import get_services_config_path
 
@@ -13,17 +14,7 @@ logger = logging.getLogger(__name__)
 class SAPListServicesTool(SAPTool):
     """Tool for listing available SAP OData services"""
 
-    @property
-    def name(self) -> str:
-        return "sap_list_services"
-
-    @property
-    def description(self) -> str:
-        return "List all available SAP OData services configured in services.yaml"
-
-    @property
-    def input_schema(self) -> Dict[str, Any]:
-        return {"type": "object", "properties": {}}
+    declaration = SAP_LIST_SERVICES
 
     async def execute(self, params: Dict[str, Any]) -> Dict[str, Any]:
         """List available services from configuration"""
@@ -41,6 +32,7 @@ class SAPListServicesTool(SAPTool):
                         "path": service.path,
                         "version": service.version,
                         "description": service.description,
+                        "system": service.system,
                         "entities": [
                             {
                                 "name": entity.name,
@@ -0,0 +1,47 @@
+"""SAP Tool Statistics Tool"""
+
+import logging
+from typing import Any, Dict
+
+from sap_agent.sap_gw_connector.core.admission import get_admission_states
+from sap_agent.sap_gw_connector.core.circuit_breaker import get_circuit_states
+from sap_agent.sap_gw_connector.core.load_balancer import get_load_balancer_states
+from sap_agent.sap_gw_connector.tools.base import SAPTool, tool_registry
+from sap_agent.sap_gw_connector.tools.declarations import SAP_STATS
+
+logger = logging.getLogger(__name__)
+
+
+class SAPStatsTool(SAPTool):
+    """Tool for reporting tool latency statistics"""
+
+    declaration = SAP_STATS
+
+    async def execute(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        """Return execution statistics from the tool registry"""
+        try:
+            statistics = tool_registry.get_statistics()
+            tool_name = params.get("tool")
+            if tool_name:
+                if tool_name not in statistics:
+                    return {
+                        "success": False,
+                        "error": f"No statistics for tool '{tool_name}'. "
+                        f"Available: {', '.join(statistics)}",
+                    }
+                statistics = {tool_name: statistics[tool_name]}
+
+            if params.get("reset"):
+                tool_registry.reset_statistics()
+
+            return {
+                "success": True,
+                "statistics": statistics,
+                "circuit_breakers": get_circuit_states(),
+                "admission": get_admission_states(),
+                "load_balancers": get_load_balancer_states(),
+            }
+
+        except Exception as e:
+            logger.error(f"Failed to get statistics: {e}")
+            return {"success": False, "error": str(e)}
@@ -0,0 +1,79 @@
+"""HTTP observability endpoints for the Gateway Server
+
+Serves the connector's health and Prometheus metrics next to the stdio
+transport (`--metrics-port`):
+
+    GET /health   HealthResponse
+    GET /metrics  Prometheus text exposition format
+
+Tools are not served over HTTP; MCP clients use the stdio transport.
+"""
+
+import logging
+from datetime import datetime
+
+from aiohttp import web
+
+from sap_agent.sap_gw_connector.core.circuit_breaker import get_circuit_states
+from sap_agent.sap_gw_connector.core.load_balancer import get_load_balancer_states
+from sap_agent.sap_gw_connector.observability.metrics import dump_metrics
+from sap_agent.sap_gw_connector.protocol.schemas import HealthResponse
+from sap_agent.sap_gw_connector.tools import tool_registry
+
+logger = logging.getLogger(__name__)
+
+SERVER_VERSION = "0.1.0"
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+async def handle_health(request: web.Request) -> web.Response:
+    """Report server health, degraded while any SAP circuit is open or server down"""
+    circuits = {
+        f"circuit:{name}": state["state"] for name, state in get_circuit_states().items()
+    }
+    servers = {
+        f"server:{system}/{name}": "up" if server["healthy"] else "down"
+        for system, state in get_load_balancer_states().items()
+        for name, server in state["servers"].items()
+    }
+    degraded = "open" in circuits.values() or "down" in servers.values()
+    health = HealthResponse(
+        status="degraded" if degraded else "ok",
+        version=SERVER_VERSION,
+        timestamp=datetime.utcnow().isoformat(),
+        dependencies={
+            "tools": str(len(tool_registry.get_tool_names())),
+            **circuits,
+            **servers,
+        },
+    )
+    return web.json_response(health.model_dump())
+
+
+async def handle_metrics(request: web.Request) -> web.Response:
+    """Expose connector metrics in Prometheus text exposition format"""
+    return web.Response(
+        body=dump_metrics().encode("utf-8"),
+        headers={"Content-Type": PROMETHEUS_CONTENT_TYPE},
+    )
+
+
+def create_app() -> web.Application:
+    """Create the application serving /metrics and /health"""
+    app = web.Application()
+    app.router.add_get("/metrics", handle_metrics)
+    app.router.add_get("/health", handle_health)
+    return app
+
+
+async def start_metrics_server(host: str, port: int) -> web.AppRunner:
+    """Start the /metrics and /health endpoints on the running event loop
+
+    Returns:
+        The app runner; call cleanup() on it to stop the server
+    """
+    runner = web.AppRunner(create_app())
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    logger.info(f"Metrics endpoint listening on http://{host}:{port}/metrics")
+    return runner
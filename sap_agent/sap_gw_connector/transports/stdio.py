@@ -5,6 +5,7 @@ import sys
 print("[DEBUG] sap_gw_connector.transports.stdio module loaded", file=sys.stderr)
 
 import asyncio
+import importlib
 import logging
 from pathlib import Path
 import argparse
@@ -14,6 +15,7 @@ from mcp import types
 from mcp.server import Server
 from mcp.server.stdio import stdio_server
 
+from sap_agent.sap_gw_connector.observability.metrics import dump_metrics
 from sap_agent.sap_gw_connector.tools import tool_registry
 from sap_agent.sap_gw_connector.protocol.schemas import ToolCallRequest
 from sap_agent.sap_gw_connector.config.settings import SAPConnectionConfig, GWServerConfig, SecurityConfig, AppConfig
@@ -46,7 +48,36 @@ def find_env_file() -> Path | None:
         return None
 
 
-async def main(sap_connection_args: dict) -> None:
+# MCP tools of the registry version they were built for
+_mcp_tools: tuple[int, list[types.Tool]] = (-1, [])
+
+
+def _list_mcp_tools() -> list[types.Tool]:
+    """MCP tools of the registered tools, rebuilt only when the registry changes"""
+    global _mcp_tools
+    version, tools = _mcp_tools
+    if version != tool_registry.version:
+        tools = [
+            types.Tool(name=tool.name, description=tool.description, inputSchema=tool.inputSchema)
+            for tool in tool_registry.list_tools()
+        ]
+        _mcp_tools = (tool_registry.version, tools)
+    return list(tools)
+
+
+async def _warm_up() -> None:
+    """Connect to the SAP systems in the background
+
+    The SAP client is imported in a worker thread rather than at module
+    level, so the server answers initialize and tools/list meanwhile.
+    """
+    sap_client = await asyncio.to_thread(
+        importlib.import_module, "sap_agent.sap_gw_connector.core.sap_client"
+    )
+    await sap_client.warm_up_systems()
+
+
+async def main(sap_connection_args: dict, metrics_port: int | None = None) -> None:
     """Main entry point for stdio MCP server"""
     sys.stderr.write("[DEBUG] Entering async main...\n")
 
@@ -87,15 +118,7 @@ async def main(sap_connection_args: dict) -> None:
     async def list_tools() -> list[types.Tool]:
         """List all available tools"""
         try:
-            tool_list = tool_registry.list_tools()
-            return [
-                types.Tool(
-                    name=tool.name,
-                    description=tool.description,
-                    inputSchema=tool.inputSchema,
-                )
-                for tool in tool_list
-            ]
+            return _list_mcp_tools()
         except Exception as e:
             sys.stderr.write(f"[DEBUG] Error listing tools: {e}\n")
             raise
@@ -118,13 +141,37 @@ async def main(sap_connection_args: dict) -> None:
             sys.stderr.write(f"[DEBUG] Tool call failed: {e}\n")
             return [types.TextContent(type="text", text=f"Error: {str(e)}")]
 
+    # Optionally expose Prometheus metrics over HTTP alongside stdio
+    metrics_runner = None
+    if metrics_port is not None:
+        from sap_agent.sap_gw_connector.transports.http import start_metrics_server
+
+        metrics_runner = await start_metrics_server("127.0.0.1", metrics_port)
+
+    # Connect to the SAP systems while the client initializes the session
+    warm_up_task = None
+    if global_app_config.server.warm_up:
+        warm_up_task = asyncio.create_task(_warm_up())
+
     # Run the server
     logger.info("Starting SAP Gateway stdio server...")
     sys.stderr.write("[DEBUG] Starting stdio server run loop...\n")
-    async with stdio_server() as (read_stream, write_stream):
-        await server.run(
-            read_stream, write_stream, server.create_initialization_options()
-        )
+    try:
+        async with stdio_server() as (read_stream, write_stream):
+            await server.run(
+                read_stream, write_stream, server.create_initialization_options()
+            )
+    finally:
+        if warm_up_task is not None and not warm_up_task.done():
+            warm_up_task.cancel()
+        if "sap_agent.sap_gw_connector.core.connections" in sys.modules:
+            from sap_agent.sap_gw_connector.core.connections import close_connectors
+
+            await close_connectors()
+        if metrics_runner is not None:
+            await metrics_runner.cleanup()
+        # Dump final metrics for offline inspection
+        sys.stderr.write(dump_metrics())
 
 
 def cli_main() -> None:
@@ -146,6 +193,7 @@ def cli_main() -> None:
     parser.add_argument("--sap-verify-ssl", type=bool, default=False, help="Verify SSL certificates")
     parser.add_argument("--sap-timeout", type=int, default=30, help="Request timeout in seconds")
     parser.add_argument("--sap-retry-attempts", type=int, default=3, help="Number of retry attempts")
+    parser.add_argument("--metrics-port", type=int, default=None, help="Serve Prometheus metrics and health on this localhost port")
     
     try:
         args = parser.parse_args()
@@ -171,7 +219,7 @@ def cli_main() -> None:
 
     # Run async main
     try:
-        asyncio.run(main(sap_connection_args))
+        asyncio.run(main(sap_connection_args, metrics_port=args.metrics_port))
     except Exception as e:
         sys.stderr.write(f"[DEBUG] Uncaught exception in main loop: {e}\n")
         raise
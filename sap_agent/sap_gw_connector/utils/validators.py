@@ -6,9 +6,12 @@ from urllib.parse import urlparse
 
 from pydantic import ValidationError
 
+from sap_agent.sap_gw_connector.core.exceptions import ODataFilterError
+from sap_agent.sap_gw_connector.core.odata_filter import parse_filter
+
 
 def validate_odata_filter(filter_expr: str) -> bool:
-    """Validate OData filter expression syntax
+    """Validate OData filter expression syntax (see core/odata_filter.py)
 
     Args:
         filter_expr: OData filter expression (e.g., "OrderID eq '12345'")
@@ -22,21 +25,11 @@ def validate_odata_filter(filter_expr: str) -> bool:
         >>> validate_odata_filter("OrderID = 12345")  # Invalid syntax
         False
     """
-    # Basic validation - check for common OData operators
-    odata_operators = [
-        r"\beq\b",  # equals
-        r"\bne\b",  # not equals
-        r"\bgt\b",  # greater than
-        r"\bge\b",  # greater than or equal
-        r"\blt\b",  # less than
-        r"\ble\b",  # less than or equal
-        r"\band\b",  # logical and
-        r"\bor\b",  # logical or
-        r"\bnot\b",  # logical not
-    ]
-
-    pattern = "|".join(odata_operators)
-    return bool(re.search(pattern, filter_expr, re.IGNORECASE))
+    try:
+        parse_filter(filter_expr)
+    except ODataFilterError:
+        return False
+    return True
 
 
 def validate_entity_key(key: str) -> bool:
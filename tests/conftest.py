@@ -0,0 +1,73 @@
+"""Shared fixtures: a mock SAP Gateway (testing/gateway.py) and a client for it"""
+
+from typing import AsyncIterator
+
+import pytest
+import pytest_asyncio
+
+from sap_agent.sap_gw_connector.config.loader import get_services_config
+from sap_agent.sap_gw_connector.config.schemas import ServiceConfig, ServicesYAMLConfig
+from sap_agent.sap_gw_connector.config.settings import SecurityConfig
+from sap_agent.sap_gw_connector.core import (
+    admission,
+    circuit_breaker,
+    expand,
+    load_balancer,
+    retry,
+)
+from sap_agent.sap_gw_connector.core.sap_client import SAPClient
+from sap_agent.sap_gw_connector.testing.gateway import (
+    MockGatewaySettings,
+    MockSAPGateway,
+)
+
+
+@pytest.fixture(autouse=True)
+def fresh_sap_state(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Retry budgets, circuit breakers, admission controllers, load
+    balancers and navigations SAP does not expand are shared by host; start
+    each test with empty ones"""
+    monkeypatch.setattr(retry, "_retry_budgets", {})
+    monkeypatch.setattr(circuit_breaker, "_circuit_breakers", {})
+    monkeypatch.setattr(admission, "_admission_controllers", {})
+    monkeypatch.setattr(load_balancer, "_load_balancers", {})
+    monkeypatch.setattr(expand, "_not_expandable", set())
+
+
+@pytest.fixture
+def services_config() -> ServicesYAMLConfig:
+    """The services.yaml shipped with the agent"""
+    return get_services_config()
+
+
+@pytest.fixture
+def sales_service(services_config: ServicesYAMLConfig) -> ServiceConfig:
+    service = services_config.get_service("Z_SALES_ORDER_GENAI_SRV")
+    assert service is not None
+    return service
+
+
+@pytest.fixture
+def gateway_settings() -> MockGatewaySettings:
+    """Mock gateway behaviour; override in a module to change it"""
+    return MockGatewaySettings(rows=20)
+
+
+@pytest_asyncio.fixture
+async def gateway(
+    services_config: ServicesYAMLConfig, gateway_settings: MockGatewaySettings
+) -> AsyncIterator[MockSAPGateway]:
+    async with MockSAPGateway(services_config, gateway_settings) as gw:
+        yield gw
+
+
+@pytest_asyncio.fixture
+async def client(gateway: MockSAPGateway) -> AsyncIterator[SAPClient]:
+    """Client of the mock gateway, without client-side rate limits"""
+    security = SecurityConfig(rate_limit_per_minute=0, max_concurrent_sessions=0)  # type: ignore[call-arg]
+    async with SAPClient(
+        gateway.connection_config(retry_backoff_base=0.01, retry_backoff_max=0.05),
+        gateway.gateway_config(),
+        security_config=security,
+    ) as sap_client:
+        yield sap_client
@@ -0,0 +1,168 @@
+"""Client-side rate limits and the fair admission queue (core/admission.py)"""
+
+import asyncio
+import time
+from typing import Any, Dict, List
+
+import pytest
+
+from sap_agent.sap_gw_connector.config.schemas import ServiceConfig
+from sap_agent.sap_gw_connector.config.settings import SecurityConfig
+from sap_agent.sap_gw_connector.core.admission import (
+    AdmissionController,
+    TokenBucket,
+    session_scope,
+)
+from sap_agent.sap_gw_connector.core.exceptions import SAPRateLimitError
+from sap_agent.sap_gw_connector.core.sap_client import SAPClient
+from sap_agent.sap_gw_connector.testing.gateway import (
+    MockGatewaySettings,
+    MockSAPGateway,
+)
+
+SALES_ENTITY = "zsd004Set"
+
+
+@pytest.fixture
+def gateway_settings() -> MockGatewaySettings:
+    return MockGatewaySettings(rows=20, latency=0.05)
+
+
+def _controller(**limits: Any) -> AdmissionController:
+    settings: Dict[str, Any] = {
+        "rate_limit_per_minute": 0,
+        "rate_limit_burst": 1,
+        "service_rate_limit_per_minute": 0,
+        "max_concurrent": 0,
+        "queue_timeout": 5.0,
+        **limits,
+    }
+    return AdmissionController("test@sap", "sap", **settings)
+
+
+class TestTokenBucket:
+    def test_burst_then_refill_at_rate(self) -> None:
+        bucket = TokenBucket(rate_per_minute=60, burst=2)
+        now = time.monotonic()
+        for _ in range(2):
+            assert bucket.ready(now)
+            bucket.take(now)
+        assert not bucket.ready(now)
+        assert bucket.time_until_token(now) == pytest.approx(1.0)
+        assert bucket.ready(now + 1.0)
+
+    def test_tokens_do_not_exceed_the_burst(self) -> None:
+        bucket = TokenBucket(rate_per_minute=60, burst=2)
+        now = time.monotonic() + 3600
+        assert bucket.ready(now)
+        assert bucket.tokens == 2.0
+
+    def test_zero_rate_disables(self) -> None:
+        bucket = TokenBucket(rate_per_minute=0, burst=1)
+        now = time.monotonic()
+        bucket.take(now)
+        assert bucket.ready(now) and bucket.time_until_token(now) == 0.0
+
+
+class TestAdmissionController:
+    @pytest.mark.asyncio
+    async def test_sessions_are_admitted_round_robin(self) -> None:
+        controller = _controller(max_concurrent=1)
+        order: List[str] = []
+        release = asyncio.Event()
+
+        async def request(session: str, name: str) -> None:
+            with session_scope(session):
+                async with controller.admit():
+                    order.append(name)
+                    if name == "holder":
+                        await release.wait()
+
+        holder = asyncio.create_task(request("a", "holder"))
+        await asyncio.sleep(0)
+        busy = [asyncio.create_task(request("a", f"a{i}")) for i in range(3)]
+        await asyncio.sleep(0)
+        other = asyncio.create_task(request("b", "b0"))
+        await asyncio.sleep(0.01)
+        assert controller.snapshot()["queued"] == 4
+
+        release.set()
+        await asyncio.gather(holder, *busy, other)
+        assert order == ["holder", "a0", "b0", "a1", "a2"]
+        assert controller.snapshot()["in_flight"] == 0
+
+    @pytest.mark.asyncio
+    async def test_rate_limit_spaces_requests(self) -> None:
+        controller = _controller(rate_limit_per_minute=1200, rate_limit_burst=1)
+        start = time.perf_counter()
+        for _ in range(3):
+            async with controller.admit():
+                pass
+        # One token from the burst, then one every 50 ms
+        assert time.perf_counter() - start >= 0.09
+
+    @pytest.mark.asyncio
+    async def test_service_limit_does_not_hold_up_other_services(self) -> None:
+        controller = _controller(service_rate_limit_per_minute=60, rate_limit_burst=1)
+        async with controller.admit("/SAP/A"):
+            pass
+        start = time.perf_counter()
+        async with controller.admit("/SAP/B"):
+            pass
+        assert time.perf_counter() - start < 0.5
+        controller.queue_timeout = 0.05
+        with pytest.raises(SAPRateLimitError):
+            async with controller.admit("/SAP/A"):
+                pass
+
+    @pytest.mark.asyncio
+    async def test_queue_timeout(self) -> None:
+        controller = _controller(max_concurrent=1, queue_timeout=0.05)
+        async with controller.admit():
+            with pytest.raises(SAPRateLimitError) as raised:
+                async with controller.admit():
+                    pass
+        assert raised.value.status_code == 429
+        assert controller.snapshot() == {
+            "in_flight": 0,
+            "queued": 0,
+            "sessions_waiting": 0,
+            "tokens": None,
+            "admitted": 1,
+            "rejected": 1,
+        }
+
+    @pytest.mark.asyncio
+    async def test_cancelled_waiter_leaves_the_queue(self) -> None:
+        controller = _controller(max_concurrent=1)
+        async with controller.admit():
+            waiter = asyncio.create_task(controller.admit().__aenter__())
+            await asyncio.sleep(0.01)
+            waiter.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await waiter
+        assert controller.snapshot()["queued"] == 0
+        async with controller.admit():
+            pass
+
+
+@pytest.mark.asyncio
+async def test_concurrency_limit_serializes_client_requests(
+    gateway: MockSAPGateway, sales_service: ServiceConfig
+) -> None:
+    security = SecurityConfig(rate_limit_per_minute=0, max_concurrent_sessions=1)  # type: ignore[call-arg]
+    async with SAPClient(
+        gateway.connection_config(), gateway.gateway_config(), security_config=security
+    ) as client:
+        start = time.perf_counter()
+        results = await asyncio.gather(
+            *(
+                client.query_entity_set(sales_service.path, SALES_ENTITY, top=top)
+                for top in (1, 2, 3)
+            )
+        )
+        elapsed = time.perf_counter() - start
+        assert [len(data["d"]["results"]) for data in results] == [1, 2, 3]
+        # Each request waits out the 50 ms latency of the one before it
+        assert elapsed >= 0.15
+        assert client.admission.snapshot()["in_flight"] == 0
@@ -0,0 +1,191 @@
+"""$batch changesets (core/batch.py) and SAPClient.bulk_write split and retry"""
+
+from typing import Dict, List, Tuple
+
+import pytest
+
+from sap_agent.sap_gw_connector.config.schemas import ServiceConfig
+from sap_agent.sap_gw_connector.core.batch import (
+    BatchOperation,
+    build_batch,
+    parse_batch_response,
+)
+from sap_agent.sap_gw_connector.core.exceptions import (
+    SAPRequestError,
+    SAPValidationError,
+)
+from sap_agent.sap_gw_connector.core.sap_client import SAPClient
+from sap_agent.sap_gw_connector.testing.gateway import MockSAPGateway
+
+SALES_PATH = "/SAP/Z_SALES_ORDER_GENAI_SRV"
+SALES_ENTITY = "zsd004Set"
+
+
+def _keys(gateway: MockSAPGateway, service: ServiceConfig, count: int) -> List[str]:
+    store = gateway.store(service, SALES_ENTITY)
+    assert store is not None
+    return [key[0] for key in list(store.rows)[:count]]
+
+
+def _updates(keys: List[str], status: str = "B") -> List[BatchOperation]:
+    return [
+        BatchOperation.from_dict(
+            {"operation": "update", "key": key, "data": {"Status": status}}, SALES_ENTITY
+        )
+        for key in keys
+    ]
+
+
+def _status(gateway: MockSAPGateway, service: ServiceConfig, key: str) -> str:
+    store = gateway.store(service, SALES_ENTITY)
+    assert store is not None
+    return store.rows[(key,)]["Status"]
+
+
+class TestBatchOperation:
+    def test_partial_update_is_merge_on_v2_and_patch_on_v4(self) -> None:
+        spec = {"operation": "patch", "key": "1", "data": {"Status": "B"}}
+        assert BatchOperation.from_dict(spec, SALES_ENTITY).method == "MERGE"
+        assert BatchOperation.from_dict(spec, SALES_ENTITY, version="v4").method == "PATCH"
+
+    def test_etag_is_sent_as_if_match(self) -> None:
+        operation = BatchOperation.from_dict(
+            {"operation": "delete", "key": "1", "etag": 'W/"x"'}, SALES_ENTITY
+        )
+        assert operation.data is None
+        assert operation.headers == {"If-Match": 'W/"x"'}
+
+    def test_composite_key_resource(self) -> None:
+        operation = BatchOperation.from_dict(
+            {"operation": "delete", "key": {"Ebeln": "45", "Ebelp": "10"}}, "POItemSet"
+        )
+        assert operation.resource == "POItemSet(Ebeln='45',Ebelp='10')"
+
+    @pytest.mark.parametrize(
+        "spec",
+        [
+            {"operation": "upsert", "key": "1", "data": {}},
+            {"operation": "update", "data": {"Status": "B"}},
+            {"operation": "create", "data": "Status=B"},
+        ],
+    )
+    def test_invalid_operations_are_rejected(self, spec: Dict[str, object]) -> None:
+        with pytest.raises(SAPValidationError):
+            BatchOperation.from_dict(spec, SALES_ENTITY)
+
+
+class TestBatchBody:
+    def test_one_changeset_per_list_and_gets_outside_changesets(self) -> None:
+        read = BatchOperation("GET", SALES_ENTITY, key="1", navigation="ToItems")
+        content_type, body = build_batch([_updates(["1", "2"]), [read]])
+
+        boundary = content_type.split("boundary=", 1)[1]
+        assert body.count(f"--{boundary}\r\n") == 2
+        assert body.endswith(f"--{boundary}--\r\n")
+        assert body.count("Content-Type: multipart/mixed; boundary=changeset_") == 1
+        assert f"PUT {SALES_ENTITY}('2') HTTP/1.1" in body
+        assert f"GET {SALES_ENTITY}('1')/ToItems HTTP/1.1" in body
+
+    def test_parse_rejected_changeset_and_retrieval(self) -> None:
+        body = (
+            "--batch_1\r\n"
+            "Content-Type: application/http\r\n\r\n"
+            "HTTP/1.1 400 Bad Request\r\nContent-Type: application/json\r\n\r\n"
+            '{"error": {"message": {"value": "Status is locked"}}}\r\n'
+            "--batch_1\r\n"
+            "Content-Type: multipart/mixed; boundary=changeset_1\r\n\r\n"
+            "--changeset_1\r\n"
+            "Content-Type: application/http\r\n\r\n"
+            "HTTP/1.1 204 No Content\r\n\r\n\r\n"
+            "--changeset_1--\r\n"
+            "--batch_1--\r\n"
+        )
+        rejected, applied = parse_batch_response(body)
+        assert [response.status for response in rejected] == [400]
+        assert rejected[0].error_message() == "Status is locked"
+        assert [response.ok for response in applied] == [True]
+
+    def test_invalid_status_line(self) -> None:
+        body = "--batch_1\r\nContent-Type: application/http\r\n\r\nHTTP/1.1\r\n\r\n--batch_1--\r\n"
+        with pytest.raises(SAPRequestError, match="Invalid \\$batch response line"):
+            parse_batch_response(body)
+
+
+class TestBulkWrite:
+    @pytest.mark.asyncio
+    async def test_all_operations_applied(
+        self, gateway: MockSAPGateway, client: SAPClient, sales_service: ServiceConfig
+    ) -> None:
+        keys = _keys(gateway, sales_service, 6)
+
+        result = await client.bulk_write(SALES_PATH, _updates(keys), chunk_size=3)
+
+        assert not result.failed
+        assert result.batches == 2
+        assert all(_status(gateway, sales_service, key) == "B" for key in keys)
+
+    @pytest.mark.asyncio
+    async def test_rejected_changeset_is_split_to_isolate_the_failure(
+        self, gateway: MockSAPGateway, client: SAPClient, sales_service: ServiceConfig
+    ) -> None:
+        keys = _keys(gateway, sales_service, 4)
+        # The second operation updates an entity that does not exist
+        keys[1] = "MISSING"
+
+        result = await client.bulk_write(SALES_PATH, _updates(keys), chunk_size=4)
+
+        assert [item.index for item in result.failed] == [1]
+        assert result.failed[0].status == 404
+        # The changeset, its halves, then the half holding the failure
+        assert result.batches == 5
+        for index in (0, 2, 3):
+            assert _status(gateway, sales_service, keys[index]) == "B"
+        assert result.failed_operations()[0].key == "MISSING"
+
+    @pytest.mark.asyncio
+    async def test_transient_changeset_failure_is_retried_whole(
+        self,
+        gateway: MockSAPGateway,
+        client: SAPClient,
+        sales_service: ServiceConfig,
+        monkeypatch: pytest.MonkeyPatch,
+    ) -> None:
+        keys = _keys(gateway, sales_service, 3)
+        handle_changeset = gateway._handle_changeset
+        calls: List[Tuple[str, str]] = []
+
+        def unavailable_once(service_path: str, content_type: str, content: str) -> str:
+            calls.append((service_path, content_type))
+            if len(calls) == 1:
+                return (
+                    "Content-Type: application/http\r\n\r\n"
+                    "HTTP/1.1 503 Service Unavailable\r\nRetry-After: 0\r\n\r\n"
+                )
+            return handle_changeset(service_path, content_type, content)
+
+        monkeypatch.setattr(gateway, "_handle_changeset", unavailable_once)
+
+        result = await client.bulk_write(SALES_PATH, _updates(keys), chunk_size=3)
+
+        assert not result.failed
+        assert result.batches == 2
+        assert len(calls) == 2
+        assert all(_status(gateway, sales_service, key) == "B" for key in keys)
+
+    @pytest.mark.asyncio
+    async def test_invalid_key_fails_without_being_sent(
+        self, gateway: MockSAPGateway, client: SAPClient, sales_service: ServiceConfig
+    ) -> None:
+        operations = _updates(_keys(gateway, sales_service, 1))
+        operations.append(
+            BatchOperation.from_dict(
+                {"operation": "update", "key": {"Posnr": "10"}, "data": {"Status": "B"}},
+                SALES_ENTITY,
+            )
+        )
+
+        result = await client.bulk_write(SALES_PATH, operations)
+
+        assert [item.index for item in result.failed] == [1]
+        assert result.failed[0].status is None
+        assert result.batches == 1
@@ -0,0 +1,144 @@
+"""Circuit breakers (core/circuit_breaker.py): open, half-open and close"""
+
+import asyncio
+import time
+
+import pytest
+
+from sap_agent.sap_gw_connector.config.schemas import ServiceConfig
+from sap_agent.sap_gw_connector.config.settings import SecurityConfig
+from sap_agent.sap_gw_connector.core.circuit_breaker import (
+    CircuitBreaker,
+    CircuitState,
+    circuit_guard,
+    get_circuit_states,
+)
+from sap_agent.sap_gw_connector.core.exceptions import (
+    SAPConnectionError,
+    SAPRequestError,
+    SAPTimeoutError,
+)
+from sap_agent.sap_gw_connector.core.sap_client import SAPClient
+from sap_agent.sap_gw_connector.testing.gateway import (
+    MockGatewaySettings,
+    MockSAPGateway,
+)
+
+SALES_ENTITY = "zsd004Set"
+
+
+@pytest.fixture
+def gateway_settings() -> MockGatewaySettings:
+    # 500 is not retried, so every call is one failure
+    return MockGatewaySettings(rows=5, error_rate=1.0, error_status=500)
+
+
+def _fail(breaker: CircuitBreaker, error: Exception) -> None:
+    with pytest.raises(type(error)):
+        with circuit_guard([breaker]):
+            raise error
+
+
+def _succeed(breaker: CircuitBreaker) -> None:
+    with circuit_guard([breaker]):
+        pass
+
+
+def _open(breaker: CircuitBreaker) -> None:
+    for _ in range(breaker.failure_threshold):
+        _fail(breaker, SAPRequestError("down", status_code=503))
+    assert breaker.state == CircuitState.OPEN
+
+
+class TestCircuitBreaker:
+    def test_opens_after_consecutive_failures(self) -> None:
+        breaker = CircuitBreaker("test", failure_threshold=3)
+        _fail(breaker, SAPRequestError("down", status_code=503))
+        _fail(breaker, SAPRequestError("down", status_code=503))
+        _succeed(breaker)
+        _fail(breaker, SAPRequestError("down", status_code=503))
+        assert breaker.state == CircuitState.CLOSED
+
+        _succeed(breaker)
+        _open(breaker)
+        with pytest.raises(SAPConnectionError) as raised:
+            _succeed(breaker)
+        assert raised.value.response_data["circuit_open"]
+        assert breaker.snapshot()["rejected"] == 1
+
+    def test_client_errors_do_not_count(self) -> None:
+        breaker = CircuitBreaker("test", failure_threshold=1)
+        _fail(breaker, SAPRequestError("not found", status_code=404))
+        _fail(breaker, SAPRequestError("unauthorized", status_code=401))
+        assert breaker.state == CircuitState.CLOSED
+
+    def test_service_breaker_ignores_connection_errors(self) -> None:
+        breaker = CircuitBreaker("test", failure_threshold=1, count_connection_errors=False)
+        _fail(breaker, SAPConnectionError("refused"))
+        assert breaker.state == CircuitState.CLOSED
+        _fail(breaker, SAPTimeoutError("timed out"))
+        assert breaker.state == CircuitState.OPEN
+
+    def test_successful_probe_closes(self) -> None:
+        breaker = CircuitBreaker("test", failure_threshold=2, reset_timeout=0.05)
+        _open(breaker)
+        time.sleep(0.06)
+        assert breaker.state == CircuitState.HALF_OPEN
+
+        probe = breaker.before_call()
+        assert probe
+        # Only half_open_probes calls get through while the probe runs
+        with pytest.raises(SAPConnectionError, match="half-open"):
+            breaker.before_call()
+        breaker.record(probe, success=True)
+        assert breaker.snapshot()["state"] == "closed"
+        _succeed(breaker)
+
+    def test_failed_probe_reopens(self) -> None:
+        breaker = CircuitBreaker("test", failure_threshold=2, reset_timeout=0.05)
+        _open(breaker)
+        time.sleep(0.06)
+        _fail(breaker, SAPRequestError("down", status_code=503))
+        assert breaker.state == CircuitState.OPEN
+        assert breaker.snapshot()["times_opened"] == 2
+
+    def test_abandoned_probe_is_released(self) -> None:
+        breaker = CircuitBreaker("test", failure_threshold=1, reset_timeout=0.05)
+        _open(breaker)
+        time.sleep(0.06)
+        with pytest.raises(asyncio.CancelledError):
+            with circuit_guard([breaker]):
+                raise asyncio.CancelledError()
+        assert breaker.state == CircuitState.HALF_OPEN
+        assert breaker.before_call()
+
+    def test_disabled_breaker_never_opens(self) -> None:
+        breaker = CircuitBreaker("test", failure_threshold=0)
+        for _ in range(10):
+            _fail(breaker, SAPRequestError("down", status_code=503))
+        assert breaker.state == CircuitState.CLOSED
+
+
+@pytest.mark.asyncio
+async def test_failing_service_fails_fast_until_a_probe_succeeds(
+    gateway: MockSAPGateway, sales_service: ServiceConfig
+) -> None:
+    security = SecurityConfig(rate_limit_per_minute=0, max_concurrent_sessions=0)  # type: ignore[call-arg]
+    config = gateway.connection_config(circuit_failure_threshold=2, circuit_reset_timeout=0.1)
+    async with SAPClient(config, gateway.gateway_config(), security_config=security) as client:
+        for _ in range(2):
+            with pytest.raises(SAPRequestError):
+                await client.query_entity_set(sales_service.path, SALES_ENTITY, top=1)
+
+        with pytest.raises(SAPConnectionError) as raised:
+            await client.query_entity_set(sales_service.path, SALES_ENTITY, top=1)
+        assert raised.value.response_data["circuit_open"]
+        assert gateway.requests["injected_error"] == 2
+        circuit = f"{gateway.host}{sales_service.path}"
+        assert get_circuit_states()[circuit]["state"] == "open"
+
+        gateway.settings.error_rate = 0.0
+        await asyncio.sleep(0.1)
+        data = await client.query_entity_set(sales_service.path, SALES_ENTITY, top=1)
+        assert len(data["d"]["results"]) == 1
+        assert get_circuit_states()[circuit]["state"] == "closed"
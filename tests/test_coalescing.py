@@ -0,0 +1,142 @@
+"""Coalescing of identical in-flight reads (core/coalescing.py)"""
+
+import asyncio
+from typing import Any, Dict, List, Optional
+
+import pytest
+
+from sap_agent.sap_gw_connector.config.schemas import ServiceConfig
+from sap_agent.sap_gw_connector.config.settings import SecurityConfig
+from sap_agent.sap_gw_connector.core.coalescing import RequestCoalescer, copy_json
+from sap_agent.sap_gw_connector.core.sap_client import SAPClient
+from sap_agent.sap_gw_connector.testing.gateway import (
+    MockGatewaySettings,
+    MockSAPGateway,
+)
+
+SALES_ENTITY = "zsd004Set"
+
+
+@pytest.fixture
+def gateway_settings() -> MockGatewaySettings:
+    return MockGatewaySettings(rows=20, latency=0.05)
+
+
+class _Fetch:
+    """Counts calls and returns a fresh nested result after a short wait"""
+
+    def __init__(self, error: Optional[Exception] = None) -> None:
+        self.calls = 0
+        self.error = error
+
+    async def __call__(self) -> Dict[str, Any]:
+        self.calls += 1
+        await asyncio.sleep(0.02)
+        if self.error is not None:
+            raise self.error
+        return {"d": {"results": [{"Vbeln": "1", "Items": [1, 2]}]}}
+
+
+class TestRequestCoalescer:
+    @pytest.mark.asyncio
+    async def test_identical_reads_share_one_fetch(self) -> None:
+        coalescer = RequestCoalescer()
+        fetch = _Fetch()
+        results = await asyncio.gather(*(coalescer.run("key", fetch) for _ in range(3)))
+        assert fetch.calls == 1
+        assert results[0] == results[1] == results[2]
+        assert len(coalescer) == 0
+
+    @pytest.mark.asyncio
+    async def test_callers_get_their_own_copy(self) -> None:
+        coalescer = RequestCoalescer()
+        first, second = await asyncio.gather(
+            coalescer.run("key", _Fetch()), coalescer.run("key", _Fetch())
+        )
+        first["d"]["results"][0]["Vbeln"] = "changed"
+        first["d"]["results"][0]["Items"].append(3)
+        assert second == {"d": {"results": [{"Vbeln": "1", "Items": [1, 2]}]}}
+
+    @pytest.mark.asyncio
+    async def test_unshared_result_is_not_copied(self) -> None:
+        coalescer = RequestCoalescer()
+        result: Dict[str, List[Any]] = {"value": []}
+
+        async def fetch() -> Dict[str, List[Any]]:
+            return result
+
+        assert await coalescer.run("key", fetch) is result
+
+    @pytest.mark.asyncio
+    async def test_different_keys_are_fetched_separately(self) -> None:
+        coalescer = RequestCoalescer()
+        fetch = _Fetch()
+        await asyncio.gather(coalescer.run("a", fetch), coalescer.run("b", fetch))
+        assert fetch.calls == 2
+
+    @pytest.mark.asyncio
+    async def test_error_reaches_every_caller(self) -> None:
+        coalescer = RequestCoalescer()
+        fetch = _Fetch(ValueError("broken"))
+        results = await asyncio.gather(
+            coalescer.run("key", fetch), coalescer.run("key", fetch), return_exceptions=True
+        )
+        assert fetch.calls == 1
+        assert all(isinstance(result, ValueError) for result in results)
+
+    @pytest.mark.asyncio
+    async def test_cancelled_caller_does_not_cancel_the_others(self) -> None:
+        coalescer = RequestCoalescer()
+        fetch = _Fetch()
+        leader = asyncio.ensure_future(coalescer.run("key", fetch))
+        follower = asyncio.ensure_future(coalescer.run("key", fetch))
+        await asyncio.sleep(0)
+        leader.cancel()
+        result = await follower
+        assert result["d"]["results"][0]["Vbeln"] == "1"
+        assert leader.cancelled() and fetch.calls == 1
+
+    @pytest.mark.asyncio
+    async def test_last_caller_cancels_the_fetch(self) -> None:
+        coalescer = RequestCoalescer()
+        started = asyncio.Event()
+
+        async def fetch() -> None:
+            started.set()
+            await asyncio.sleep(10)
+
+        caller = asyncio.ensure_future(coalescer.run("key", fetch))
+        await started.wait()
+        caller.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await caller
+        await asyncio.sleep(0)
+        assert len(coalescer) == 0
+
+    def test_copy_json(self) -> None:
+        value = {"a": [{"b": 1}], "c": "x"}
+        copied = copy_json(value)
+        assert copied == value
+        assert copied["a"] is not value["a"] and copied["a"][0] is not value["a"][0]
+
+
+@pytest.mark.asyncio
+async def test_concurrent_identical_queries_send_one_get(
+    gateway: MockSAPGateway, sales_service: ServiceConfig
+) -> None:
+    security = SecurityConfig(rate_limit_per_minute=0, max_concurrent_sessions=0)  # type: ignore[call-arg]
+    config = gateway.connection_config(query_cache_ttl=0)
+    async with SAPClient(config, gateway.gateway_config(), security_config=security) as client:
+        # Log in first, so only the data GETs are counted
+        await client.query_entity_set(sales_service.path, SALES_ENTITY, top=1)
+        gets = gateway.requests["GET"]
+
+        results = await asyncio.gather(
+            *(client.query_entity_set(sales_service.path, SALES_ENTITY, top=5) for _ in range(4))
+        )
+
+    assert gateway.requests["GET"] - gets == 1
+    rows = [data["d"]["results"] for data in results]
+    assert all(len(result) == 5 for result in rows)
+    rows[0][0]["Vbeln"] = "changed"
+    assert all(result[0]["Vbeln"] != "changed" for result in rows[1:])
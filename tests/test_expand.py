@@ -0,0 +1,105 @@
+"""$expand of navigation properties and its batched fallback (core/expand.py)"""
+
+import pytest
+
+from sap_agent.sap_gw_connector.config.schemas import ServiceConfig, ServicesYAMLConfig
+from sap_agent.sap_gw_connector.config.settings import SecurityConfig
+from sap_agent.sap_gw_connector.core.exceptions import SAPValidationError
+from sap_agent.sap_gw_connector.core.expand import (
+    expand_paths,
+    get_expanded,
+    parse_expand,
+    query_expanded,
+)
+from sap_agent.sap_gw_connector.core.sap_client import SAPClient
+from sap_agent.sap_gw_connector.testing.gateway import (
+    MockGatewaySettings,
+    MockSAPGateway,
+)
+
+PO_ENTITY = "PurchaseOrderSet"
+
+
+@pytest.fixture
+def purchase_orders(services_config: ServicesYAMLConfig) -> ServiceConfig:
+    service = services_config.get_service("Z_PURCHASE_ORDER_SRV")
+    assert service is not None
+    return service
+
+
+def test_parse_expand() -> None:
+    assert parse_expand(None) == []
+    assert parse_expand("ToItems, ToVendor/ToAddress,ToItems,") == [
+        "ToItems",
+        "ToVendor/ToAddress",
+    ]
+    assert parse_expand(["ToItems"]) == ["ToItems"]
+    with pytest.raises(SAPValidationError):
+        parse_expand("ToItems($select=Matnr)")
+
+
+@pytest.mark.asyncio
+async def test_expand_paths_are_checked(
+    client: SAPClient, purchase_orders: ServiceConfig
+) -> None:
+    paths = await expand_paths(client, purchase_orders, PO_ENTITY, "ToItems/ToProduct")
+    assert paths == ["ToItems/ToProduct"]
+    with pytest.raises(SAPValidationError, match="ToItems, ToVendor"):
+        await expand_paths(client, purchase_orders, PO_ENTITY, "ToPartner")
+
+
+@pytest.mark.asyncio
+async def test_inline_expand(
+    gateway: MockSAPGateway, client: SAPClient, purchase_orders: ServiceConfig
+) -> None:
+    data, batched = await query_expanded(
+        client, purchase_orders, PO_ENTITY, ["ToItems"], top=4
+    )
+    assert batched == []
+    rows = data["d"]["results"]
+    assert [len(row["ToItems"]["results"]) for row in rows] == [3, 3, 3, 3]
+    assert gateway.requests["POST"] == 0
+
+
+class TestBatchedFallback:
+    @pytest.fixture
+    def gateway_settings(self) -> MockGatewaySettings:
+        return MockGatewaySettings(rows=20, expand=False)
+
+    @pytest.mark.asyncio
+    async def test_rejected_expand_is_read_with_batch(
+        self, gateway: MockSAPGateway, purchase_orders: ServiceConfig
+    ) -> None:
+        security = SecurityConfig(rate_limit_per_minute=0, max_concurrent_sessions=0)  # type: ignore[call-arg]
+        config = gateway.connection_config(batch_size=4, query_cache_ttl=0)
+        async with SAPClient(config, gateway.gateway_config(), security_config=security) as client:
+            data, batched = await query_expanded(
+                client,
+                purchase_orders,
+                PO_ENTITY,
+                ["ToItems", "ToVendor"],
+                select_fields=["Ebeln"],
+                top=5,
+            )
+            assert batched == ["ToItems", "ToVendor"]
+            rows = data["d"]["results"]
+            assert len(rows) == 5
+            for row in rows:
+                # Shaped as when expanded inline
+                items = row["ToItems"]["results"]
+                assert len(items) == 3 and len(row["ToVendor"]["results"]) == 3
+                assert items[0]["__metadata"]["uri"].startswith(
+                    row["__metadata"]["uri"] + "/ToItems"
+                )
+            # 10 navigation reads, 4 per $batch
+            assert gateway.requests["POST"] == 3
+
+            # The navigation is remembered: no second $expand attempt
+            gets = gateway.requests["GET"]
+            entity, batched = await get_expanded(
+                client, purchase_orders, PO_ENTITY, rows[0]["Ebeln"], ["ToItems"]
+            )
+            assert batched == ["ToItems"]
+            assert len(entity["d"]["ToItems"]["results"]) == 3
+            assert gateway.requests["GET"] - gets == 1
+            assert gateway.requests["POST"] == 4
@@ -0,0 +1,193 @@
+"""Typed and composite key predicates (core/keys.py)"""
+
+import uuid
+from datetime import datetime, timezone
+from decimal import Decimal
+from typing import Any
+
+import pytest
+
+from sap_agent.sap_gw_connector.config.schemas import ServicesYAMLConfig
+from sap_agent.sap_gw_connector.core import sap_client
+from sap_agent.sap_gw_connector.core.exceptions import SAPValidationError
+from sap_agent.sap_gw_connector.core.keys import (
+    format_key,
+    format_literal,
+    key_of,
+    parse_key,
+)
+from sap_agent.sap_gw_connector.core.sap_client import SAPClient
+from sap_agent.sap_gw_connector.testing.gateway import (
+    MockGatewaySettings,
+    MockSAPGateway,
+)
+
+FLIGHT_KEY = [("Carrid", "Edm.String"), ("Connid", "Edm.String"), ("Fldate", "Edm.DateTime")]
+PO_ITEM_KEY = [("Ebeln", "Edm.String"), ("Ebelp", "Edm.String")]
+
+
+@pytest.fixture
+def gateway_settings() -> MockGatewaySettings:
+    return MockGatewaySettings(rows=5, key_fields={"POItemSet": ["Ebeln", "Ebelp"]})
+
+
+class TestParseKey:
+    def test_single_value(self) -> None:
+        assert parse_key("4500000010", ["Ebeln"]) == "4500000010"
+        assert parse_key("('4500000010')", ["Ebeln"]) == "4500000010"
+
+    def test_predicate_form(self) -> None:
+        expected = {"Ebeln": "4500000010", "Ebelp": "00010"}
+        assert parse_key("Ebeln='4500000010',Ebelp='00010'", ["Ebeln", "Ebelp"]) == expected
+        assert parse_key("(Ebeln=4500000010, Ebelp=00010)", ["Ebeln", "Ebelp"]) == expected
+
+    def test_quoted_commas_and_prefixed_literals(self) -> None:
+        key = parse_key("Carrid='L,H',Fldate=datetime'2024-05-01T00:00:00'", ["Carrid", "Fldate"])
+        assert key == {"Carrid": "L,H", "Fldate": "2024-05-01T00:00:00"}
+
+    def test_string_key_containing_equals_sign(self) -> None:
+        # Only names of key properties make the predicate form
+        assert parse_key("Note=urgent", ["Id"]) == "Note=urgent"
+
+    def test_predicate_form_without_metadata(self) -> None:
+        expected = {"Ebeln": "4500000010", "Ebelp": "00010"}
+        assert parse_key("Ebeln='4500000010',Ebelp='00010'", []) == expected
+        assert parse_key("'L,H'", []) == "L,H"
+
+
+class TestFormatLiteral:
+    @pytest.mark.parametrize(
+        ("value", "edm_type", "version", "expected"),
+        [
+            ("O'Neil", "Edm.String", "v2", "'O''Neil'"),
+            ("17", "Edm.Int32", "v2", "17"),
+            (17, "Edm.Int64", "v2", "17L"),
+            ("17L", "Edm.Int64", "v4", "17"),
+            ("12.50", "Edm.Decimal", "v2", "12.50M"),
+            (Decimal("12.5"), "Edm.Decimal", "v4", "12.5"),
+            (1.5, "Edm.Double", "v2", "1.5d"),
+            (True, "Edm.Boolean", "v2", "true"),
+            (
+                "6F9619FF-8B86-D011-B42D-00C04FC964FF",
+                "Edm.Guid",
+                "v2",
+                "guid'6f9619ff-8b86-d011-b42d-00c04fc964ff'",
+            ),
+            ("/Date(1714521600000)/", "Edm.DateTime", "v2", "datetime'2024-05-01T00:00:00'"),
+            ("20240501", "Edm.DateTime", "v2", "datetime'2024-05-01T00:00:00'"),
+            (
+                datetime(2024, 5, 1, 12, tzinfo=timezone.utc),
+                "Edm.DateTimeOffset",
+                "v4",
+                "2024-05-01T12:00:00Z",
+            ),
+            ("2024-05-01T12:00:00Z", "Edm.Date", "v4", "2024-05-01"),
+            ("9:30", "Edm.Time", "v2", "time'PT09H30M00S'"),
+        ],
+    )
+    def test_typed_literals(self, value: object, edm_type: str, version: str, expected: str) -> None:
+        assert format_literal(value, edm_type, version) == expected
+
+    @pytest.mark.parametrize(
+        ("value", "edm_type"),
+        [
+            ("abc", "Edm.Int32"),
+            ("1.5", "Edm.Int16"),
+            ("NaN", "Edm.Decimal"),
+            ("ten", "Edm.Double"),
+            ("yes", "Edm.Boolean"),
+            ("not-a-guid", "Edm.Guid"),
+            ("yesterday", "Edm.DateTime"),
+            ("noon", "Edm.Time"),
+            (None, "Edm.String"),
+        ],
+    )
+    def test_invalid_values(self, value: object, edm_type: str) -> None:
+        with pytest.raises(SAPValidationError):
+            format_literal(value, edm_type, name="Key1")
+
+    def test_conversion_error_is_chained(self) -> None:
+        with pytest.raises(SAPValidationError) as raised:
+            format_literal("abc", "Edm.Int32", name="Bookid")
+        assert "Bookid" in str(raised.value)
+        assert isinstance(raised.value.__cause__, ValueError)
+
+
+class TestFormatKey:
+    def test_single_typed_key(self) -> None:
+        assert format_key(17, [("Bookid", "Edm.Int32")]) == "17"
+        guid = uuid.UUID("6f9619ff-8b86-d011-b42d-00c04fc964ff")
+        assert format_key(guid, [("Id", "Edm.Guid")], version="v4") == str(guid)
+
+    def test_composite_key_from_dict_and_string(self) -> None:
+        key = {"Carrid": "LH", "Connid": "0400", "Fldate": "2024-05-01"}
+        expected = "Carrid='LH',Connid='0400',Fldate=datetime'2024-05-01T00:00:00'"
+        assert format_key(key, FLIGHT_KEY) == expected
+        assert format_key("Fldate=20240501,Carrid=LH,Connid=0400", FLIGHT_KEY) == expected
+
+    def test_single_key_given_by_name(self) -> None:
+        assert format_key({"Matnr": "M-01"}, [("Matnr", "Edm.String")]) == "'M-01'"
+
+    def test_without_metadata_values_are_strings(self) -> None:
+        assert format_key(17, []) == "'17'"
+        assert format_key({"Ebeln": "45", "Ebelp": 10}, []) == "Ebeln='45',Ebelp='10'"
+        assert format_key("Ebeln='45',Ebelp=10", []) == "Ebeln='45',Ebelp='10'"
+
+    def test_composite_key_needs_every_property(self) -> None:
+        with pytest.raises(SAPValidationError, match="Composite key"):
+            format_key("00010", PO_ITEM_KEY)
+        with pytest.raises(SAPValidationError, match="missing Ebeln"):
+            format_key({"Ebelp": "00010"}, PO_ITEM_KEY)
+        with pytest.raises(SAPValidationError, match="unknown Posnr"):
+            format_key({"Ebeln": "45", "Ebelp": "10", "Posnr": "1"}, PO_ITEM_KEY)
+
+    def test_key_of(self) -> None:
+        row = {"Ebeln": "45", "Ebelp": "10", "Matnr": "M-01"}
+        assert key_of(row, ["Ebeln", "Ebelp"]) == {"Ebeln": "45", "Ebelp": "10"}
+        assert key_of(row, ["Ebeln", "Etenr"]) is None
+        assert key_of(row, []) is None
+
+
+@pytest.mark.asyncio
+async def test_composite_key_read_typed_from_metadata(
+    gateway: MockSAPGateway, client: SAPClient, services_config: ServicesYAMLConfig
+) -> None:
+    service = services_config.get_service("Z_PURCHASE_ORDER_SRV")
+    assert service is not None
+    store = gateway.store(service, "POItemSet")
+    assert store is not None
+    ebeln, ebelp = next(iter(store.rows))
+
+    predicate = await client.key_predicate(service.path, "POItemSet", f"Ebelp={ebelp},Ebeln={ebeln}")
+    assert predicate == f"Ebeln='{ebeln}',Ebelp='{ebelp}'"
+
+    data = await client.get_entity(service.path, "POItemSet", {"Ebeln": ebeln, "Ebelp": ebelp})
+    entity = data.get("d", data)
+    assert (entity["Ebeln"], entity["Ebelp"]) == (ebeln, ebelp)
+
+    with pytest.raises(SAPValidationError):
+        await client.key_predicate(service.path, "POItemSet", ebelp)
+
+
+@pytest.mark.asyncio
+async def test_composite_key_read_without_metadata(
+    gateway: MockSAPGateway,
+    client: SAPClient,
+    services_config: ServicesYAMLConfig,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    async def no_metadata(*args: Any) -> None:
+        return None
+
+    monkeypatch.setattr(sap_client, "get_service_model", no_metadata)
+    service = services_config.get_service("Z_PURCHASE_ORDER_SRV")
+    assert service is not None
+    store = gateway.store(service, "POItemSet")
+    assert store is not None
+    ebeln, ebelp = next(iter(store.rows))
+
+    key = f"Ebeln='{ebeln}',Ebelp='{ebelp}'"
+    assert await client.key_predicate(service.path, "POItemSet", key) == key
+    data = await client.get_entity(service.path, "POItemSet", key)
+    entity = data.get("d", data)
+    assert (entity["Ebeln"], entity["Ebelp"]) == (ebeln, ebelp)
@@ -0,0 +1,132 @@
+"""Application server selection and health (core/load_balancer.py)"""
+
+import socket
+import time
+
+import aiohttp
+import pytest
+
+from sap_agent.sap_gw_connector.config.schemas import ServiceConfig
+from sap_agent.sap_gw_connector.config.settings import SecurityConfig
+from sap_agent.sap_gw_connector.config.systems import SystemProfile
+from sap_agent.sap_gw_connector.core.exceptions import SAPConnectionError
+from sap_agent.sap_gw_connector.core.load_balancer import LoadBalancer
+from sap_agent.sap_gw_connector.core.sap_client import SAPClient
+from sap_agent.sap_gw_connector.testing.gateway import MockSAPGateway
+
+SALES_ENTITY = "zsd004Set"
+
+
+def _unused_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _balancer(
+    *ports: int, strategy: str = "least_outstanding", health_check_interval: float = 30.0
+) -> LoadBalancer:
+    servers = [("127.0.0.1", port) for port in ports]
+    return LoadBalancer(
+        "test", servers, "http", strategy, health_check_interval=health_check_interval
+    )
+
+
+class TestPick:
+    def test_least_outstanding(self) -> None:
+        balancer = _balancer(1, 2)
+        first, second = balancer.servers
+        with balancer.track(first):
+            assert balancer.pick() is second
+            with balancer.track(second), balancer.track(second):
+                assert balancer.pick() is first
+        assert (first.outstanding, second.outstanding) == (0, 0)
+        assert first.requests == 1 and first.latency is not None
+
+    def test_ties_go_to_the_lower_latency(self) -> None:
+        balancer = _balancer(1, 2)
+        balancer.servers[0].latency = 0.5
+        balancer.servers[1].latency = 0.1
+        assert balancer.pick() is balancer.servers[1]
+
+    def test_latency_weighted_prefers_fast_servers(self) -> None:
+        balancer = _balancer(1, 2, strategy="latency_weighted")
+        balancer.servers[0].latency = 1.0
+        balancer.servers[1].latency = 0.01
+        picks = [balancer.pick() for _ in range(200)]
+        assert picks.count(balancer.servers[1]) > 150
+
+    def test_unknown_strategy(self) -> None:
+        with pytest.raises(ValueError):
+            _balancer(1, strategy="round_robin")
+
+    def test_url_for_rewrites_other_servers(self) -> None:
+        balancer = _balancer(1, 2)
+        first, second = balancer.servers
+        path = "/sap/opu/odata/SAP/X/Set?$skiptoken=5"
+        assert balancer.url_for(second, first.base_url + path) == second.base_url + path
+        assert balancer.url_for(first, first.base_url + path) == first.base_url + path
+
+
+class TestHealth:
+    def test_connection_error_takes_server_out_of_rotation(self) -> None:
+        balancer = _balancer(1, 2)
+        first, second = balancer.servers
+        with pytest.raises(SAPConnectionError):
+            with balancer.track(first):
+                raise SAPConnectionError("refused")
+        assert not first.healthy and first.failures == 1
+        assert all(balancer.pick() is second for _ in range(5))
+        assert balancer.pick_other(second) is None
+        assert balancer.snapshot()["servers"][first.name]["healthy"] is False
+
+    def test_all_down_tries_the_longest_failed(self) -> None:
+        balancer = _balancer(1, 2)
+        first, second = balancer.servers
+        balancer.mark_down(first)
+        time.sleep(0.01)
+        balancer.mark_down(second)
+        assert balancer.pick() is first
+
+    def test_probe_is_claimed_once_per_interval(self) -> None:
+        balancer = _balancer(1, 2, health_check_interval=0.05)
+        balancer.mark_down(balancer.servers[0])
+        assert balancer.due_for_probe() == []
+        time.sleep(0.06)
+        assert balancer.due_for_probe() == [balancer.servers[0]]
+        assert balancer.due_for_probe() == []
+
+    @pytest.mark.asyncio
+    async def test_probe_marks_servers_up_and_down(self, gateway: MockSAPGateway) -> None:
+        balancer = _balancer(gateway.port or 0, _unused_port())
+        live, dead = balancer.servers
+        balancer.mark_down(live)
+        async with aiohttp.ClientSession() as session:
+            results = await balancer.probe(session, balancer.servers)
+        assert results == {live.name: True, dead.name: False}
+        assert live.healthy and not dead.healthy
+
+
+@pytest.mark.asyncio
+async def test_requests_fail_over_to_a_live_server(
+    gateway: MockSAPGateway, sales_service: ServiceConfig
+) -> None:
+    security = SecurityConfig(rate_limit_per_minute=0, max_concurrent_sessions=0)  # type: ignore[call-arg]
+    dead_port = _unused_port()
+    connection = gateway.connection_config(port=dead_port, retry_backoff_base=0.01)
+    system = SystemProfile(
+        id="failover",
+        connection=connection,
+        servers=[(gateway.host, dead_port), (gateway.host, gateway.port or 0)],
+    )
+    async with SAPClient(
+        connection, gateway.gateway_config(), security_config=security, system=system
+    ) as client:
+        dead, live = client.balancer.servers
+        # Send the first request to the dead server
+        live.latency = 10.0
+        for _ in range(3):
+            data = await client.query_entity_set(sales_service.path, SALES_ENTITY, top=1)
+            assert len(data["d"]["results"]) == 1
+    assert not dead.healthy and dead.failures == 1
+    assert live.requests >= 3
@@ -0,0 +1,167 @@
+"""Concurrent reads of sap_multi_query (core/multi_query.py)"""
+
+import time
+from typing import Any, Dict, List, Optional
+
+import pytest
+
+from sap_agent.sap_gw_connector.config.loader import ServiceConfigurationError
+from sap_agent.sap_gw_connector.config.schemas import ServiceConfig, ServicesYAMLConfig
+from sap_agent.sap_gw_connector.config.settings import SecurityConfig
+from sap_agent.sap_gw_connector.core.exceptions import SAPValidationError
+from sap_agent.sap_gw_connector.core.multi_query import (
+    MAX_READS,
+    ReadSpec,
+    parse_reads,
+    run_reads,
+)
+from sap_agent.sap_gw_connector.core.sap_client import SAPClient
+from sap_agent.sap_gw_connector.testing.gateway import (
+    MockGatewaySettings,
+    MockSAPGateway,
+)
+
+SALES_SERVICE = "Z_SALES_ORDER_GENAI_SRV"
+PO_SERVICE = "Z_PURCHASE_ORDER_SRV"
+
+
+@pytest.fixture
+def gateway_settings() -> MockGatewaySettings:
+    return MockGatewaySettings(rows=20, latency=0.05)
+
+
+@pytest.fixture
+def clients_by_system(
+    gateway: MockSAPGateway, monkeypatch: pytest.MonkeyPatch
+) -> List[Optional[str]]:
+    """Point SAPClient.for_service at the mock gateway; lists the systems of
+    the clients created. Services of system "offline" have no connection."""
+    created: List[Optional[str]] = []
+    security = SecurityConfig(rate_limit_per_minute=0, max_concurrent_sessions=0)  # type: ignore[call-arg]
+
+    def for_service(service: ServiceConfig, **kwargs: Any) -> SAPClient:
+        if service.system == "offline":
+            raise ServiceConfigurationError("No connection settings for SAP system 'offline'")
+        created.append(service.system)
+        return SAPClient(
+            gateway.connection_config(query_cache_ttl=0),
+            gateway.gateway_config(),
+            security_config=security,
+        )
+
+    monkeypatch.setattr(SAPClient, "for_service", for_service)
+    return created
+
+
+def _transform(data: Dict[str, Any], format: str) -> Dict[str, Any]:
+    return {"count": len(data["d"]["results"]), "format": format}
+
+
+class TestParseReads:
+    def test_operation_defaults_by_entity_key(self) -> None:
+        reads = parse_reads(
+            [
+                {"service": "S", "entity_set": "A", "entity_key": "1", "id": "order"},
+                {"service": "S", "entity_set": "B", "select": "X, Y,", "top": 5},
+            ]
+        )
+        assert [(read.operation, read.id) for read in reads] == [("get", "order"), ("query", "1")]
+        assert reads[1].select == ["X", "Y"] and reads[1].top == 5
+        assert reads[1].format == "json_compact"
+
+    @pytest.mark.parametrize(
+        "spec, message",
+        [
+            ({"service": "S", "entity_set": "A", "operation": "delete"}, "unknown operation"),
+            ({"entity_set": "A"}, "missing service"),
+            ({"service": "S", "entity_set": "A", "operation": "get"}, "missing entity_key"),
+        ],
+    )
+    def test_invalid_read(self, spec: Dict[str, Any], message: str) -> None:
+        with pytest.raises(SAPValidationError, match=f"Read 0: {message}"):
+            ReadSpec.from_dict(spec)
+
+    def test_reads_of_a_call(self) -> None:
+        read = {"service": "S", "entity_set": "A"}
+        with pytest.raises(SAPValidationError, match="No reads"):
+            parse_reads([])
+        with pytest.raises(SAPValidationError, match=f"at most {MAX_READS}"):
+            parse_reads([read] * (MAX_READS + 1))
+        with pytest.raises(SAPValidationError, match="Duplicate read ids: x"):
+            parse_reads([{**read, "id": "x"}, {**read, "id": "x"}])
+
+
+class TestRunReads:
+    @pytest.mark.asyncio
+    async def test_queries_and_gets_share_one_client(
+        self, services_config: ServicesYAMLConfig, clients_by_system: List[Optional[str]]
+    ) -> None:
+        reads = parse_reads(
+            [
+                {"service": SALES_SERVICE, "entity_set": "zsd004Set", "top": 3, "id": "orders"},
+                {"service": PO_SERVICE, "entity_set": "PurchaseOrderSet", "entity_key": "0000000002"},
+                {"service": PO_SERVICE, "entity_set": "POItemSet", "filter": "Matnr eq 'none'"},
+            ]
+        )
+        results = await run_reads(services_config, reads)
+        assert clients_by_system == [None]
+        assert all(result.success for result in results), [r.error for r in results]
+
+        orders = results[0].to_dict(_transform)
+        assert (orders["id"], orders["count"]) == ("orders", 3)
+        assert "plan" in orders and "source" not in orders
+        order = results[1].to_dict(_transform)
+        assert order["entity_key"] == "0000000002"
+        assert order["data"]["d"]["Ebeln"] == "0000000002"
+        assert results[2].to_dict(_transform)["count"] == 0
+
+    @pytest.mark.asyncio
+    async def test_failed_reads_do_not_stop_the_others(
+        self, services_config: ServicesYAMLConfig, clients_by_system: List[Optional[str]]
+    ) -> None:
+        offline = services_config.get_service(PO_SERVICE)
+        assert offline is not None
+        config = services_config.model_copy(
+            update={
+                "services": [
+                    *services_config.services,
+                    offline.model_copy(update={"id": "OFFLINE_SRV", "system": "offline"}),
+                ]
+            }
+        )
+        reads = parse_reads(
+            [
+                {"service": "NO_SUCH_SRV", "entity_set": "A"},
+                {"service": "OFFLINE_SRV", "entity_set": "PurchaseOrderSet"},
+                {"service": PO_SERVICE, "entity_set": "NoSuchSet", "entity_key": "1"},
+                {"service": PO_SERVICE, "entity_set": "PurchaseOrderSet", "filter": "Ebeln eq"},
+                {"service": SALES_SERVICE, "entity_set": "zsd004Set", "top": 2},
+            ]
+        )
+        results = await run_reads(config, reads)
+        errors = [result.error or "" for result in results]
+        assert "Service 'NO_SUCH_SRV' not found" in errors[0]
+        assert "No connection settings" in errors[1]
+        assert "'NoSuchSet' not found" in errors[2]
+        assert errors[3] and results[3].to_dict(_transform)["success"] is False
+        assert results[4].success and results[4].to_dict(_transform)["count"] == 2
+        assert clients_by_system == [None]
+
+    @pytest.mark.asyncio
+    async def test_max_parallel_limits_reads_in_flight(
+        self, services_config: ServicesYAMLConfig, clients_by_system: List[Optional[str]]
+    ) -> None:
+        reads = parse_reads(
+            [{"service": SALES_SERVICE, "entity_set": "zsd004Set", "top": top} for top in (1, 2, 3)]
+        )
+        start = time.perf_counter()
+        results = await run_reads(services_config, reads, max_parallel=3)
+        concurrent = time.perf_counter() - start
+        start = time.perf_counter()
+        await run_reads(services_config, reads, max_parallel=1)
+        serial = time.perf_counter() - start
+
+        assert [result.to_dict(_transform)["count"] for result in results] == [1, 2, 3]
+        # Each read waits out the 50 ms latency of the one before it
+        assert serial >= 0.15
+        assert concurrent < serial
@@ -0,0 +1,153 @@
+"""$filter parsing and local evaluation (core/odata_filter.py)"""
+
+from datetime import datetime, timezone
+from typing import Any, Dict, List
+
+import pytest
+
+from sap_agent.sap_gw_connector.core.exceptions import ODataFilterError, SAPRequestError
+from sap_agent.sap_gw_connector.core.odata_filter import (
+    BoolOp,
+    Compare,
+    Literal,
+    Not,
+    Property,
+    compile_filter,
+    conjunction,
+    conjuncts,
+    parse_filter,
+)
+from sap_agent.sap_gw_connector.core.sap_client import SAPClient
+
+CUSTOMERS: List[Dict[str, Any]] = [
+    {"Kunnr": "1", "Name1": "ACME", "Land1": "DE", "Netwr": "150.00", "Erdat": "/Date(1704067200000)/"},
+    {"Kunnr": "2", "Name1": "O'Neil", "Land1": "US", "Netwr": "80.50", "Erdat": "20240315"},
+    {"Kunnr": "3", "Name1": "Xenon", "Land1": "DE", "Netwr": None, "Erdat": None},
+]
+
+
+def _matches(expression: str) -> List[str]:
+    return [row["Kunnr"] for row in compile_filter(expression).filter(CUSTOMERS)]
+
+
+class TestParse:
+    def test_and_binds_tighter_than_or(self) -> None:
+        node = parse_filter("A eq 1 or B eq 2 and C eq 3")
+        assert isinstance(node, BoolOp) and node.op == "or"
+        assert isinstance(node.right, BoolOp) and node.right.op == "and"
+
+    def test_not_binds_tighter_than_comparisons(self) -> None:
+        node = parse_filter("not A eq 'x'")
+        assert node == Compare("eq", Not(Property("A")), Literal("x", "'x'"))
+
+    @pytest.mark.parametrize(
+        "expression",
+        [
+            "not (A eq 'x')",
+            "not startswith(Name1, 'X') and Land1 eq 'DE'",
+            "not (A eq 1 or B eq 2)",
+            "(A add 1) mul 2 gt 10",
+            "A sub (B sub C) eq 0",
+            "substringof('O''Neil', Name1)",
+            "Erdat ge datetime'2024-01-01T00:00:00'",
+            "ToItems/any(i: i/Menge gt 10)",
+        ],
+    )
+    def test_to_odata_round_trips(self, expression: str) -> None:
+        node = parse_filter(expression)
+        assert node.to_odata() == expression
+        assert parse_filter(node.to_odata()) == node
+
+    def test_negated_comparison_keeps_its_parentheses(self) -> None:
+        node = Not(Compare("eq", Property("A"), Literal("x", "'x'")))
+        assert node.to_odata() == "not (A eq 'x')"
+
+    def test_literals(self) -> None:
+        node = parse_filter("A eq 10 and B eq 2.5m and C eq null and D eq guid'ABC-1'")
+        values = [term.right.value for term in conjuncts(node)]  # type: ignore[attr-defined]
+        assert values == [10, 2.5, None, "abc-1"]
+
+    def test_properties(self) -> None:
+        node = parse_filter("Netwr gt 100 or ToCustomer/Land1 eq 'DE'")
+        assert node.properties() == {"Netwr", "ToCustomer/Land1"}
+
+    def test_conjuncts_and_conjunction(self) -> None:
+        terms = conjuncts(parse_filter("A eq 1 and (B eq 2 and C eq 3)"))
+        assert [str(term) for term in terms] == ["A eq 1", "B eq 2", "C eq 3"]
+        combined = conjunction(terms)
+        assert combined is not None and str(combined) == "A eq 1 and B eq 2 and C eq 3"
+        assert conjunction([]) is None
+
+    @pytest.mark.parametrize(
+        "expression",
+        ["", "A eq", "A = 1", "A eq 'open", "(A eq 1", "A eq 1 B", "Erdat eq datetime'nope'"],
+    )
+    def test_invalid_filters_are_rejected(self, expression: str) -> None:
+        with pytest.raises(ODataFilterError):
+            parse_filter(expression)
+
+
+class TestEvaluate:
+    @pytest.mark.parametrize(
+        ("expression", "expected"),
+        [
+            ("Land1 eq 'DE'", ["1", "3"]),
+            ("Land1 eq 'DE' and not startswith(Name1, 'X')", ["1"]),
+            ("not (Land1 eq 'DE')", ["2"]),
+            ("Name1 eq 'O''Neil'", ["2"]),
+            ("substringof('cm', tolower(Name1))", ["1"]),
+            ("Netwr gt 100", ["1"]),
+            ("Netwr mul 2 lt 200", ["2"]),
+            ("Netwr eq null", ["3"]),
+            ("Netwr ne null", ["1", "2"]),
+            ("Erdat ge datetime'2024-02-01T00:00:00'", ["2"]),
+            ("year(Erdat) eq 2024 and month(Erdat) eq 1", ["1"]),
+            ("length(Name1) eq 5 or Kunnr eq '1'", ["1", "3"]),
+        ],
+    )
+    def test_rows(self, expression: str, expected: List[str]) -> None:
+        assert _matches(expression) == expected
+
+    def test_ordering_with_null_is_false(self) -> None:
+        assert _matches("Netwr lt 1000") == ["1", "2"]
+        assert _matches("not (Netwr lt 1000)") == ["3"]
+
+    def test_mask_over_columns_matches_rows(self) -> None:
+        expression = "Land1 eq 'DE' and Netwr ge 100 or Name1 eq 'O''Neil'"
+        columns = {name: [row[name] for row in CUSTOMERS] for name in CUSTOMERS[0]}
+        predicate = compile_filter(expression)
+        assert predicate.mask(columns) == [predicate(row) for row in CUSTOMERS]
+        assert predicate.mask(columns) == [True, True, False]
+
+    def test_navigation_path(self) -> None:
+        predicate = compile_filter("ToCustomer/Land1 eq 'DE'")
+        assert predicate({"ToCustomer": {"Land1": "DE"}})
+        assert not predicate({"ToCustomer": None})
+
+    def test_parsed_expression(self) -> None:
+        node = parse_filter("Land1 eq 'US'")
+        assert compile_filter(node)(CUSTOMERS[1])
+
+    def test_date_literal_against_timestamp(self) -> None:
+        predicate = compile_filter("Erdat eq 2024-01-01")
+        assert predicate({"Erdat": datetime(2024, 1, 1, tzinfo=timezone.utc)})
+
+    @pytest.mark.parametrize(
+        "expression",
+        ["ToItems/any(i: i/Menge gt 10)", "geo.distance(Location, Point) lt 5", "length(A, B) eq 1"],
+    )
+    def test_not_evaluable_locally(self, expression: str) -> None:
+        parse_filter(expression)
+        with pytest.raises(ODataFilterError):
+            compile_filter(expression)
+
+
+@pytest.mark.asyncio
+async def test_filters_sent_to_sap_are_not_parsed_first(client: SAPClient) -> None:
+    # The v4 in operator is not understood locally; SAP (here the mock
+    # gateway, which cannot parse it either) answers the request
+    with pytest.raises(SAPRequestError) as raised:
+        await client.query_entity_set(
+            "/SAP/Z_CUSTOMER_SRV", "CustomerSet", {"$filter": "Land1 in ('DE', 'US')"}
+        )
+    assert raised.value.status_code == 400
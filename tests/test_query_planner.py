@@ -0,0 +1,164 @@
+"""Query planning (core/query_planner.py): clamping, defaults and key reads"""
+
+from typing import Any, Dict, List, Optional, Tuple
+
+import pytest
+
+from sap_agent.sap_gw_connector.config.schemas import ServiceConfig, ServicesYAMLConfig
+from sap_agent.sap_gw_connector.core import query_planner
+from sap_agent.sap_gw_connector.core.exceptions import SAPRequestError
+from sap_agent.sap_gw_connector.core.query_planner import execute_plan, plan_query
+from sap_agent.sap_gw_connector.core.sap_client import SAPClient
+from sap_agent.sap_gw_connector.testing.gateway import (
+    MockGatewaySettings,
+    MockSAPGateway,
+)
+
+
+@pytest.fixture
+def gateway_settings() -> MockGatewaySettings:
+    # As on SAP, key_field (Ebelp) is only part of the purchase order item key
+    return MockGatewaySettings(rows=20, key_fields={"POItemSet": ["Ebeln", "Ebelp"]})
+
+
+def _service(services_config: ServicesYAMLConfig, service_id: str) -> ServiceConfig:
+    service = services_config.get_service(service_id)
+    assert service is not None
+    return service
+
+
+def _row(
+    gateway: MockSAPGateway, service: ServiceConfig, entity_set: str, index: int = 0
+) -> Tuple[Tuple[str, ...], Dict[str, Any]]:
+    store = gateway.store(service, entity_set)
+    assert store is not None
+    return list(store.rows.items())[index]
+
+
+def _rows(data: Dict[str, Any]) -> List[Dict[str, Any]]:
+    return data["d"]["results"]
+
+
+async def _execute(
+    client: SAPClient, service: ServiceConfig, entity_set: str, filter_expr: Optional[str]
+) -> Tuple[query_planner.QueryPlan, Dict[str, Any]]:
+    plan = plan_query(service, entity_set, filter_expr, None, None, None, 100)
+    data = await execute_plan(client, plan)
+    return plan, data
+
+
+class TestPlanQuery:
+    def test_top_is_clamped_and_default_select_used(self, sales_service: ServiceConfig) -> None:
+        plan = plan_query(sales_service, "zsd004Set", None, None, 5000, None, 1000)
+        assert plan.top == 1000
+        assert plan.select is not None and plan.select[0] == "Vbeln"
+        assert plan.notes == [
+            "No $select given: used default_select from services.yaml",
+            "$top 5000 clamped to 1000",
+        ]
+
+    def test_missing_top_is_limited(self, sales_service: ServiceConfig) -> None:
+        plan = plan_query(sales_service, "zsd004Set", None, ["Vbeln"], None, None, 50)
+        assert (plan.top, plan.select) == (50, ["Vbeln"])
+        assert plan_query(sales_service, "zsd004Set", None, None, None, None, 0).top is None
+
+    def test_filters_are_not_checked_while_planning(self, sales_service: ServiceConfig) -> None:
+        plan = plan_query(sales_service, "zsd004Set", "Vkorg in ('1000', '2000')", None, 10, None, 100)
+        assert plan.filter == "Vkorg in ('1000', '2000')"
+        assert plan.terms is None
+
+
+class TestKeyRead:
+    @pytest.mark.asyncio
+    async def test_filter_fixing_the_key_is_read_by_key(
+        self, gateway: MockSAPGateway, client: SAPClient, services_config: ServicesYAMLConfig
+    ) -> None:
+        service = _service(services_config, "Z_MATERIAL_SRV")
+        (matnr,), row = _row(gateway, service, "MaterialSet")
+
+        plan, data = await _execute(
+            client, service, "MaterialSet", f"Matnr eq '{matnr}' and Mtart eq '{row['Mtart']}'"
+        )
+
+        assert plan.strategy == "key_read"
+        assert plan.key == {"Matnr": matnr}
+        assert str(plan.local_filter) == f"Mtart eq '{row['Mtart']}'"
+        assert [result["Matnr"] for result in _rows(data)] == [matnr]
+
+    @pytest.mark.asyncio
+    async def test_local_part_of_the_filter_is_applied(
+        self, gateway: MockSAPGateway, client: SAPClient, services_config: ServicesYAMLConfig
+    ) -> None:
+        service = _service(services_config, "Z_MATERIAL_SRV")
+        (matnr,), _ = _row(gateway, service, "MaterialSet")
+
+        plan, data = await _execute(
+            client, service, "MaterialSet", f"Matnr eq '{matnr}' and Mtart eq 'NO-SUCH-TYPE'"
+        )
+
+        assert plan.strategy == "key_read"
+        assert _rows(data) == []
+
+    @pytest.mark.asyncio
+    async def test_missing_entity_is_an_empty_result(
+        self, client: SAPClient, services_config: ServicesYAMLConfig
+    ) -> None:
+        service = _service(services_config, "Z_MATERIAL_SRV")
+
+        plan, data = await _execute(client, service, "MaterialSet", "Matnr eq 'NO-SUCH-MATERIAL'")
+
+        assert plan.strategy == "key_read"
+        assert _rows(data) == []
+
+    @pytest.mark.asyncio
+    async def test_composite_key_needs_every_key_property(
+        self, gateway: MockSAPGateway, client: SAPClient, services_config: ServicesYAMLConfig
+    ) -> None:
+        service = _service(services_config, "Z_PURCHASE_ORDER_SRV")
+        (ebeln, ebelp), _ = _row(gateway, service, "POItemSet")
+
+        partial, data = await _execute(client, service, "POItemSet", f"Ebelp eq '{ebelp}'")
+        assert partial.strategy == "query"
+        assert all(result["Ebelp"] == ebelp for result in _rows(data))
+
+        full, data = await _execute(
+            client, service, "POItemSet", f"Ebeln eq '{ebeln}' and Ebelp eq '{ebelp}'"
+        )
+        assert full.strategy == "key_read"
+        assert full.key == {"Ebeln": ebeln, "Ebelp": ebelp}
+        assert [(r["Ebeln"], r["Ebelp"]) for r in _rows(data)] == [(ebeln, ebelp)]
+
+    @pytest.mark.asyncio
+    async def test_without_metadata_the_query_is_sent(
+        self,
+        gateway: MockSAPGateway,
+        client: SAPClient,
+        services_config: ServicesYAMLConfig,
+        monkeypatch: pytest.MonkeyPatch,
+    ) -> None:
+        async def no_metadata(*args: Any) -> None:
+            return None
+
+        monkeypatch.setattr(query_planner, "get_entity_set_model", no_metadata)
+        service = _service(services_config, "Z_PURCHASE_ORDER_SRV")
+        _, row = _row(gateway, service, "POItemSet")
+
+        plan, data = await _execute(client, service, "POItemSet", f"Ebelp eq '{row['Ebelp']}'")
+
+        assert plan.strategy == "query"
+        assert plan.key is None
+        assert len(_rows(data)) >= 1
+
+    @pytest.mark.asyncio
+    async def test_unparseable_filter_is_sent_unchanged(
+        self, client: SAPClient, services_config: ServicesYAMLConfig
+    ) -> None:
+        service = _service(services_config, "Z_MATERIAL_SRV")
+        plan = plan_query(service, "MaterialSet", "Matnr in ('A', 'B')", None, None, None, 100)
+
+        # The mock gateway rejects the v4 in operator, as a v2 service would
+        with pytest.raises(SAPRequestError) as raised:
+            await execute_plan(client, plan)
+
+        assert plan.strategy == "query"
+        assert raised.value.status_code == 400
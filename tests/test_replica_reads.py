@@ -0,0 +1,155 @@
+"""Reads served from entity set replicas (replica/reads.py)"""
+
+import time
+from typing import Any, Iterator
+
+import pytest
+import pytest_asyncio
+
+from sap_agent.sap_gw_connector.config.schemas import (
+    EntityConfig,
+    ReplicaConfig,
+    ServiceConfig,
+    ServicesYAMLConfig,
+)
+from sap_agent.sap_gw_connector.core.sap_client import SAPClient
+from sap_agent.sap_gw_connector.replica.reads import (
+    EntityReplica,
+    parse_conditions,
+    read_entity,
+)
+from sap_agent.sap_gw_connector.replica.store import ReplicaStore, SyncState
+from sap_agent.sap_gw_connector.replica.sync import EntitySync
+from sap_agent.sap_gw_connector.testing.gateway import (
+    MockGatewaySettings,
+    MockSAPGateway,
+)
+
+
+@pytest.fixture
+def gateway_settings() -> MockGatewaySettings:
+    return MockGatewaySettings(rows=10, key_fields={"POItemSet": ["Ebeln", "Ebelp"]})
+
+
+@pytest.fixture
+def store() -> Iterator[ReplicaStore]:
+    replica_store = ReplicaStore(":memory:")
+    yield replica_store
+    replica_store.close()
+
+
+def _service(services_config: ServicesYAMLConfig, service_id: str) -> ServiceConfig:
+    service = services_config.get_service(service_id)
+    assert service is not None
+    return service
+
+
+def _replicated(service: ServiceConfig, name: str, **replica: Any) -> EntityConfig:
+    entity = service.get_entity(name)
+    assert entity is not None
+    return entity.model_copy(update={"replica": ReplicaConfig(**replica)})
+
+
+@pytest.fixture
+def purchase_orders(services_config: ServicesYAMLConfig) -> ServiceConfig:
+    return _service(services_config, "Z_PURCHASE_ORDER_SRV")
+
+
+@pytest_asyncio.fixture
+async def po_items(
+    gateway: MockSAPGateway,
+    client: SAPClient,
+    store: ReplicaStore,
+    purchase_orders: ServiceConfig,
+) -> EntityReplica:
+    """Synced POItemSet replica, with one item number in two purchase orders"""
+    entity = _replicated(purchase_orders, "POItemSet", indexes=["Matnr"])
+    mock_store = gateway.store(purchase_orders, "POItemSet")
+    assert mock_store is not None
+    (_, ebelp), row = next(iter(mock_store.rows.items()))
+    mock_store.put(("4599999999", ebelp), {**row, "Ebeln": "4599999999"})
+    store.ensure_indexes([entity.key_field, "Matnr"])
+    await EntitySync(client, purchase_orders, entity, store).run()
+    return EntityReplica(purchase_orders, entity, store)
+
+
+def test_parse_conditions() -> None:
+    assert parse_conditions(None) == []
+    assert parse_conditions("Mtart eq 'FERT' and Matkl ne 'O''Neil'") == [
+        ("Mtart", "eq", "FERT"),
+        ("Matkl", "ne", "O'Neil"),
+    ]
+    assert parse_conditions("'FERT' eq Mtart") == [("Mtart", "eq", "FERT")]
+    for filter_expr in (
+        "Menge gt '5'",
+        "Mtart eq 'FERT' or Matkl eq 'X'",
+        "Menge eq 5",
+        "ToItems/Matnr eq 'X'",
+        "Mtart eq",
+    ):
+        assert parse_conditions(filter_expr) is None, filter_expr
+
+
+class TestEntityReplica:
+    @pytest.mark.asyncio
+    async def test_get_composite_key_in_any_order(self, po_items: EntityReplica) -> None:
+        first = po_items.get("Ebeln='0000000001',Ebelp='0000000001'")
+        assert first is not None and first["d"]["Ebeln"] == "0000000001"
+        assert po_items.get("Ebelp='0000000001',Ebeln='0000000001'") == first
+        other = po_items.get("Ebeln=4599999999,Ebelp=0000000001", ["Ebeln", "Matnr"])
+        assert other is not None and sorted(other["d"]) == ["Ebeln", "Matnr"]
+        assert po_items.get("Ebeln='0000000099',Ebelp='0000000001'") is None
+
+    @pytest.mark.asyncio
+    async def test_query_by_part_of_a_composite_key(self, po_items: EntityReplica) -> None:
+        data = po_items.query("Ebelp eq '0000000001'", ["Ebeln", "Ebelp"])
+        assert data is not None
+        assert sorted(row["Ebeln"] for row in data["d"]["results"]) == [
+            "0000000001",
+            "4599999999",
+        ]
+        page = po_items.query(top=3, skip=9)
+        assert page is not None and len(page["d"]["results"]) == 2
+        assert po_items.query("Matnr ne 'none'") is not None
+
+    @pytest.mark.asyncio
+    async def test_unsupported_filters_bypass(self, po_items: EntityReplica) -> None:
+        assert po_items.query("Menge gt '5'") is None
+        # Not indexed
+        assert po_items.query("Meins eq 'EA'") is None
+        assert po_items.query("Ebelp eq 'none'") is None
+
+    @pytest.mark.asyncio
+    async def test_stale_replica_is_not_read(
+        self, po_items: EntityReplica, store: ReplicaStore
+    ) -> None:
+        synced_at = time.time() - po_items.config.staleness_limit - 1
+        store.apply(po_items.name, [], state=SyncState("full", synced_at=synced_at))
+        assert not po_items.is_fresh()
+        assert po_items.get("Ebeln='0000000001',Ebelp='0000000001'") is None
+        assert po_items.query() is None
+
+
+def test_v4_shape(services_config: ServicesYAMLConfig, store: ReplicaStore) -> None:
+    finance = _service(services_config, "Z_FINANCE_SRV")
+    replica = EntityReplica(finance, _replicated(finance, "GLAccountSet"), store)
+    row = {"Hkont": "0000400000", "Txt20": "Material costs"}
+    store.apply(replica.name, [("0000400000", row)], state=SyncState("full"))
+    assert replica.get("'0000400000'") == row
+    assert replica.query("Hkont eq '0000400000'") == {"value": [row]}
+
+
+def test_entity_without_replica(services_config: ServicesYAMLConfig) -> None:
+    service = _service(services_config, "Z_PURCHASE_ORDER_SRV")
+    entity = service.get_entity("POItemSet")
+    assert entity is not None
+    with pytest.raises(ValueError):
+        EntityReplica(service, entity)
+
+
+@pytest.mark.asyncio
+async def test_read_entity_of_unreplicated_entity_set(
+    services_config: ServicesYAMLConfig,
+) -> None:
+    service = _service(services_config, "Z_PURCHASE_ORDER_SRV")
+    assert await read_entity(service, "POItemSet", "Ebeln='1',Ebelp='1'") is None
@@ -0,0 +1,179 @@
+"""Delta and watermark sync of entity set replicas (replica/sync.py)"""
+
+from typing import Any, Dict, Iterator, Tuple
+
+import pytest
+
+from sap_agent.sap_gw_connector.config.schemas import (
+    EntityConfig,
+    ServiceConfig,
+    ServicesYAMLConfig,
+)
+from sap_agent.sap_gw_connector.core.exceptions import SAPRequestError
+from sap_agent.sap_gw_connector.core.sap_client import SAPClient
+from sap_agent.sap_gw_connector.replica.store import ReplicaStore, SyncState, row_key
+from sap_agent.sap_gw_connector.replica.sync import EntitySync
+from sap_agent.sap_gw_connector.testing.gateway import (
+    MockGatewaySettings,
+    MockSAPGateway,
+)
+
+PO_ITEM_NAME = "Z_PURCHASE_ORDER_SRV/POItemSet"
+
+
+@pytest.fixture
+def gateway_settings() -> MockGatewaySettings:
+    return MockGatewaySettings(
+        rows=20, page_size=8, delta=True, key_fields={"POItemSet": ["Ebeln", "Ebelp"]}
+    )
+
+
+@pytest.fixture
+def store() -> Iterator[ReplicaStore]:
+    replica_store = ReplicaStore(":memory:")
+    yield replica_store
+    replica_store.close()
+
+
+@pytest.fixture
+def purchase_orders(services_config: ServicesYAMLConfig) -> ServiceConfig:
+    service = services_config.get_service("Z_PURCHASE_ORDER_SRV")
+    assert service is not None
+    return service
+
+
+def _entity(service: ServiceConfig, name: str, **update: Any) -> EntityConfig:
+    entity = service.get_entity(name)
+    assert entity is not None
+    return entity.model_copy(update=update)
+
+
+def _first(
+    gateway: MockSAPGateway, service: ServiceConfig, entity_set: str
+) -> Tuple[Tuple[str, ...], Dict[str, Any]]:
+    mock_store = gateway.store(service, entity_set)
+    assert mock_store is not None
+    return next(iter(mock_store.rows.items()))
+
+
+class TestDeltaSync:
+    @pytest.mark.asyncio
+    async def test_full_load_then_changes_by_delta_link(
+        self,
+        gateway: MockSAPGateway,
+        client: SAPClient,
+        store: ReplicaStore,
+        purchase_orders: ServiceConfig,
+    ) -> None:
+        sync = EntitySync(client, purchase_orders, _entity(purchase_orders, "POItemSet"), store)
+        first = await sync.run()
+        assert (first.mode, first.next_mode) == ("full", "delta")
+        assert (first.upserted, first.pages) == (20, 3)
+        assert sync.key_names == ["Ebeln", "Ebelp"]
+
+        mock_store = gateway.store(purchase_orders, "POItemSet")
+        assert mock_store is not None
+        (ebeln, ebelp), row = _first(gateway, purchase_orders, "POItemSet")
+        mock_store.put((ebeln, ebelp), {**row, "Menge": "999"})
+        # Same item number in another purchase order
+        other = {**row, "Ebeln": "4599999999"}
+        mock_store.put(("4599999999", ebelp), other)
+        removed = list(mock_store.rows)[5]
+        mock_store.remove(removed)
+
+        second = await sync.run()
+        assert (second.mode, second.upserted, second.deleted) == ("delta", 2, 1)
+        assert store.count(PO_ITEM_NAME) == 20
+        changed = store.get(PO_ITEM_NAME, row_key({"Ebeln": ebeln, "Ebelp": ebelp}))
+        assert changed is not None and changed["Menge"] == "999"
+        kept = store.get(PO_ITEM_NAME, row_key({"Ebeln": "4599999999", "Ebelp": ebelp}))
+        assert kept is not None and kept["Ebeln"] == "4599999999"
+        removed_key = dict(zip(["Ebeln", "Ebelp"], removed, strict=True))
+        assert store.get(PO_ITEM_NAME, row_key(removed_key)) is None
+
+    @pytest.mark.asyncio
+    async def test_expired_delta_token_reloads(
+        self, client: SAPClient, store: ReplicaStore, purchase_orders: ServiceConfig
+    ) -> None:
+        sync = EntitySync(client, purchase_orders, _entity(purchase_orders, "POItemSet"), store)
+        await sync.run()
+        state = store.get_state(PO_ITEM_NAME)
+        assert state is not None and state.delta_link
+        expired = state.delta_link.replace("!deltatoken='", "!deltatoken='9999")
+        store.apply(PO_ITEM_NAME, [], state=SyncState("delta", delta_link=expired))
+
+        result = await sync.run()
+        assert result.mode == "full"
+        assert store.count(PO_ITEM_NAME) == 20
+
+
+class TestWatermarkSync:
+    @pytest.fixture
+    def gateway_settings(self) -> MockGatewaySettings:
+        return MockGatewaySettings(rows=20)
+
+    @pytest.mark.asyncio
+    async def test_only_rows_changed_since_the_watermark_are_fetched(
+        self,
+        gateway: MockSAPGateway,
+        client: SAPClient,
+        store: ReplicaStore,
+        purchase_orders: ServiceConfig,
+    ) -> None:
+        entity = _entity(purchase_orders, "PurchaseOrderSet", change_field="Bedat")
+        sync = EntitySync(client, purchase_orders, entity, store)
+        first = await sync.run()
+        assert (first.mode, first.next_mode, first.upserted) == ("full", "watermark", 20)
+
+        mock_store = gateway.store(purchase_orders, "PurchaseOrderSet")
+        assert mock_store is not None
+        key, row = _first(gateway, purchase_orders, "PurchaseOrderSet")
+        # 2030-01-01, later than every generated date
+        mock_store.put(key, {**row, "Bukrs": "9999", "Bedat": "/Date(1893456000000)/"})
+
+        second = await sync.run()
+        assert second.mode == "watermark"
+        # The new row, and rows changed at the previous watermark itself
+        assert 1 <= second.upserted < 20
+        changed = store.get("Z_PURCHASE_ORDER_SRV/PurchaseOrderSet", key[0])
+        assert changed is not None and changed["Bukrs"] == "9999"
+        state = store.get_state("Z_PURCHASE_ORDER_SRV/PurchaseOrderSet")
+        assert state is not None and state.watermark == "2030-01-01T00:00:00+00:00"
+
+    @pytest.mark.asyncio
+    async def test_without_delta_or_change_field_every_sync_is_full(
+        self, client: SAPClient, store: ReplicaStore, purchase_orders: ServiceConfig
+    ) -> None:
+        sync = EntitySync(client, purchase_orders, _entity(purchase_orders, "PurchaseOrderSet"), store)
+        await sync.run()
+        result = await sync.run()
+        assert (result.mode, result.next_mode, result.upserted) == ("full", "full", 20)
+
+
+class TestTombstoneKeys:
+    def _sync(self, client: SAPClient, store: ReplicaStore, service: ServiceConfig) -> EntitySync:
+        sync = EntitySync(client, service, _entity(service, "POItemSet"), store)
+        sync.key_names = ["Ebeln", "Ebelp"]
+        return sync
+
+    @pytest.mark.asyncio
+    async def test_key_from_uri(
+        self, client: SAPClient, store: ReplicaStore, purchase_orders: ServiceConfig
+    ) -> None:
+        sync = self._sync(client, store, purchase_orders)
+        tombstone = {"__metadata": {"uri": "http://sap/POItemSet(Ebelp='00010',Ebeln='45')"}}
+        assert sync._key_of(tombstone) == "Ebeln='45',Ebelp='00010'"
+        assert sync._key_of({"@odata.id": "POItemSet(Ebeln='45',Ebelp='00010')"}) == (
+            "Ebeln='45',Ebelp='00010'"
+        )
+
+    @pytest.mark.asyncio
+    async def test_uri_without_every_key_property_fails(
+        self, client: SAPClient, store: ReplicaStore, purchase_orders: ServiceConfig
+    ) -> None:
+        sync = self._sync(client, store, purchase_orders)
+        for uri in ("http://sap/POItemSet('00010')", "http://sap/POItemSet(Ebelp='00010')"):
+            with pytest.raises(SAPRequestError, match="does not name the key properties"):
+                sync._key_of({"__metadata": {"uri": uri}})
+        with pytest.raises(SAPRequestError, match="without a key"):
+            sync._key_of({"Menge": "1"})
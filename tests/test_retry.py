@@ -0,0 +1,218 @@
+"""Retries, the per-host retry budget and hedged reads (core/retry.py)"""
+
+import time
+import uuid
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+from typing import Any, AsyncIterator, List
+
+import pytest
+
+from sap_agent.sap_gw_connector.config.schemas import ServiceConfig, ServicesYAMLConfig
+from sap_agent.sap_gw_connector.config.settings import (
+    SAPConnectionConfig,
+    SecurityConfig,
+)
+from sap_agent.sap_gw_connector.config.systems import SystemProfile
+from sap_agent.sap_gw_connector.core.exceptions import (
+    SAPConnectionError,
+    SAPRequestError,
+)
+from sap_agent.sap_gw_connector.core.retry import (
+    RetryBudget,
+    RetryPolicy,
+    parse_retry_after,
+)
+from sap_agent.sap_gw_connector.core.sap_client import SAPClient
+from sap_agent.sap_gw_connector.observability.metrics import SAP_RETRIES
+from sap_agent.sap_gw_connector.testing.gateway import (
+    MockGatewaySettings,
+    MockSAPGateway,
+)
+
+SALES_ENTITY = "zsd004Set"
+
+
+def _security() -> SecurityConfig:
+    return SecurityConfig(rate_limit_per_minute=0, max_concurrent_sessions=0)  # type: ignore[call-arg]
+
+
+def _policy() -> RetryPolicy:
+    config = SAPConnectionConfig(host="sap.invalid", username="u", password="p")  # type: ignore[call-arg]
+    return RetryPolicy(config)
+
+
+@asynccontextmanager
+async def _failing_gateway(
+    services_config: ServicesYAMLConfig, **settings: Any
+) -> AsyncIterator[MockSAPGateway]:
+    async with MockSAPGateway(
+        services_config, MockGatewaySettings(rows=5, error_rate=1.0, **settings)
+    ) as gateway:
+        yield gateway
+
+
+@asynccontextmanager
+async def _client(gateway: MockSAPGateway, **config: Any) -> AsyncIterator[SAPClient]:
+    config = {"retry_backoff_base": 0.01, "retry_backoff_max": 0.05, **config}
+    async with SAPClient(
+        gateway.connection_config(**config), gateway.gateway_config(), security_config=_security()
+    ) as client:
+        yield client
+
+
+class TestParseRetryAfter:
+    def test_seconds_and_http_date(self) -> None:
+        assert parse_retry_after("5") == 5.0
+        assert parse_retry_after("-1") == 0.0
+        retry_at = datetime.now(timezone.utc) + timedelta(seconds=120)
+        seconds = parse_retry_after(format_datetime(retry_at, usegmt=True))
+        assert seconds is not None and 100 < seconds <= 120
+
+    def test_missing_or_invalid(self) -> None:
+        assert parse_retry_after(None) is None
+        assert parse_retry_after("soon") is None
+
+
+class TestRetryBudget:
+    def test_retries_are_a_fraction_of_requests(self) -> None:
+        budget = RetryBudget(ratio=0.5, min_retries=0)
+        assert not budget.try_acquire()
+        for _ in range(4):
+            budget.record_request()
+        assert [budget.try_acquire() for _ in range(3)] == [True, True, False]
+        assert budget.snapshot() == {"requests": 4, "retries": 2, "allowed": 2.0}
+
+    def test_minimum_retries_without_traffic(self) -> None:
+        budget = RetryBudget(ratio=0.0, min_retries=2)
+        assert [budget.try_acquire() for _ in range(3)] == [True, True, False]
+
+    def test_window_slides(self) -> None:
+        budget = RetryBudget(ratio=0.0, min_retries=1, window=0.05)
+        assert budget.try_acquire() and not budget.try_acquire()
+        time.sleep(0.06)
+        assert budget.try_acquire()
+
+
+class TestRetries:
+    @pytest.mark.asyncio
+    async def test_transient_errors_are_retried_until_attempts_run_out(
+        self, services_config: ServicesYAMLConfig, sales_service: ServiceConfig
+    ) -> None:
+        async with _failing_gateway(services_config, error_status=503) as gateway:
+            async with _client(gateway, retry_attempts=3) as client:
+                with pytest.raises(SAPRequestError) as raised:
+                    await client.query_entity_set(sales_service.path, SALES_ENTITY, top=1)
+        assert raised.value.status_code == 503
+        assert gateway.requests["injected_error"] == 3
+
+    @pytest.mark.asyncio
+    async def test_permanent_errors_are_not_retried(
+        self, services_config: ServicesYAMLConfig, sales_service: ServiceConfig
+    ) -> None:
+        async with _failing_gateway(services_config, error_status=500) as gateway:
+            async with _client(gateway, retry_attempts=3) as client:
+                with pytest.raises(SAPRequestError):
+                    await client.query_entity_set(sales_service.path, SALES_ENTITY, top=1)
+        assert gateway.requests["injected_error"] == 1
+
+    @pytest.mark.asyncio
+    async def test_retry_after_is_waited_for(
+        self, services_config: ServicesYAMLConfig, sales_service: ServiceConfig
+    ) -> None:
+        async with _failing_gateway(services_config, error_status=429, retry_after=0.1) as gateway:
+            async with _client(gateway, retry_attempts=2) as client:
+                start = time.perf_counter()
+                with pytest.raises(SAPRequestError):
+                    await client.query_entity_set(sales_service.path, SALES_ENTITY, top=1)
+        assert time.perf_counter() - start >= 0.1
+        assert gateway.requests["injected_error"] == 2
+
+    @pytest.mark.asyncio
+    async def test_long_retry_after_fails_fast(
+        self, services_config: ServicesYAMLConfig, sales_service: ServiceConfig
+    ) -> None:
+        async with _failing_gateway(services_config, error_status=503, retry_after=60) as gateway:
+            async with _client(gateway, retry_attempts=3, retry_after_max=5) as client:
+                with pytest.raises(SAPRequestError):
+                    await client.query_entity_set(sales_service.path, SALES_ENTITY, top=1)
+        assert gateway.requests["injected_error"] == 1
+
+    @pytest.mark.asyncio
+    async def test_exhausted_budget_stops_retries(
+        self, services_config: ServicesYAMLConfig, sales_service: ServiceConfig
+    ) -> None:
+        async with _failing_gateway(services_config, error_status=503) as gateway:
+            async with _client(gateway, retry_attempts=5) as client:
+                client.retry_policy.budget = RetryBudget(ratio=0.0, min_retries=1)
+                with pytest.raises(SAPRequestError):
+                    await client.query_entity_set(sales_service.path, SALES_ENTITY, top=1)
+        assert gateway.requests["injected_error"] == 2
+
+    @pytest.mark.parametrize(
+        ("method", "status", "retried"),
+        [("GET", 502, True), ("POST", 502, False), ("POST", 503, True), ("POST", 429, True)],
+    )
+    def test_writes_are_retried_only_when_not_processed(
+        self, method: str, status: int, retried: bool
+    ) -> None:
+        error = SAPRequestError("failed", status_code=status)
+        assert (_policy().retry_reason(method, error) is not None) == retried
+
+    def test_open_circuit_is_not_retried(self) -> None:
+        error = SAPConnectionError("open", response_data={"circuit_open": True})
+        assert _policy().retry_reason("GET", error) is None
+
+
+class TestHedging:
+    @asynccontextmanager
+    async def _hedging_client(
+        self, slow: MockSAPGateway, fast: MockSAPGateway
+    ) -> AsyncIterator[SAPClient]:
+        connection = slow.connection_config(hedge_after=0.05)
+        system = SystemProfile(
+            id=f"hedge-{uuid.uuid4().hex}",
+            connection=connection,
+            servers=[(slow.host, slow.port or 0), (fast.host, fast.port or 0)],
+        )
+        async with SAPClient(
+            connection, slow.gateway_config(), security_config=_security(), system=system
+        ) as client:
+            # The slow server is picked first: the fast one looks slower
+            client.balancer.servers[1].latency = 10.0
+            yield client
+
+    @asynccontextmanager
+    async def _servers(
+        self, services_config: ServicesYAMLConfig
+    ) -> AsyncIterator[List[MockSAPGateway]]:
+        async with MockSAPGateway(services_config, MockGatewaySettings(rows=5, latency=0.5)) as slow:
+            async with MockSAPGateway(services_config, MockGatewaySettings(rows=5)) as fast:
+                yield [slow, fast]
+
+    @pytest.mark.asyncio
+    async def test_slow_read_is_hedged_on_another_server(
+        self, services_config: ServicesYAMLConfig, sales_service: ServiceConfig
+    ) -> None:
+        async with self._servers(services_config) as (slow, fast):
+            async with self._hedging_client(slow, fast) as client:
+                hedges = SAP_RETRIES.get(host=slow.host, reason="hedge")
+                start = time.perf_counter()
+                data = await client.query_entity_set(sales_service.path, SALES_ENTITY, top=1)
+                elapsed = time.perf_counter() - start
+        assert len(data["d"]["results"]) == 1
+        assert elapsed < 0.5
+        assert fast.requests["GET"] >= 1
+        assert SAP_RETRIES.get(host=slow.host, reason="hedge") == hedges + 1
+
+    @pytest.mark.asyncio
+    async def test_hedges_come_from_the_retry_budget(
+        self, services_config: ServicesYAMLConfig, sales_service: ServiceConfig
+    ) -> None:
+        async with self._servers(services_config) as (slow, fast):
+            async with self._hedging_client(slow, fast) as client:
+                client.retry_policy.budget = RetryBudget(ratio=0.0, min_retries=0)
+                data = await client.query_entity_set(sales_service.path, SALES_ENTITY, top=1)
+        assert len(data["d"]["results"]) == 1
+        assert fast.requests["GET"] == 0
@@ -0,0 +1,95 @@
+"""Cached tool schemas and tools/list results (tools/base.py, transports/stdio.py)"""
+
+import json
+from typing import Any, Dict, List
+
+import pytest
+
+from sap_agent.sap_gw_connector.tools import (
+    LazyTool,
+    SAPTool,
+    ToolDeclaration,
+    ToolRegistry,
+)
+from sap_agent.sap_gw_connector.tools.declarations import TOOL_DECLARATIONS
+from sap_agent.sap_gw_connector.transports import stdio
+
+
+def _declaration(name: str) -> ToolDeclaration:
+    return ToolDeclaration(
+        name=name,
+        description=f"The {name} tool",
+        input_schema={"type": "object", "properties": {}},
+        implementation="tests.test_tool_registry:_EchoTool",
+    )
+
+
+class _EchoTool(SAPTool):
+    declaration = _declaration("echo")
+
+    async def execute(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        return params
+
+
+def _names(registry: ToolRegistry) -> List[str]:
+    return [tool["name"] for tool in json.loads(registry.list_tools_json())["tools"]]
+
+
+def test_tool_info_is_built_once() -> None:
+    tool = _EchoTool()
+    info = tool.to_tool_info()
+    assert tool.to_tool_info() is info
+    assert (info.name, info.description) == ("echo", "The echo tool")
+
+
+def test_listing_declared_tools_does_not_load_them() -> None:
+    tools = [LazyTool(declaration) for declaration in TOOL_DECLARATIONS]
+    registry = ToolRegistry()
+    for tool in tools:
+        registry.register(tool)
+    assert _names(registry) == [declaration.name for declaration in TOOL_DECLARATIONS]
+    assert not any(tool.loaded for tool in tools)
+
+
+def test_tools_json_is_rebuilt_after_a_change() -> None:
+    registry = ToolRegistry()
+    registry.register(LazyTool(_declaration("first")))
+    body = registry.list_tools_json()
+    assert registry.list_tools_json() is body
+    version = registry.version
+
+    registry.register(LazyTool(_declaration("second")))
+    assert registry.version == version + 1
+    assert _names(registry) == ["first", "second"]
+
+    # Re-registering replaces the schema
+    changed = _declaration("first")
+    changed.description = "Changed"
+    registry.register(LazyTool(changed))
+    assert json.loads(registry.list_tools_json())["tools"][0]["description"] == "Changed"
+
+    assert registry.unregister("second")
+    assert _names(registry) == ["first"]
+    body, version = registry.list_tools_json(), registry.version
+    assert not registry.unregister("second")
+    assert registry.version == version and registry.list_tools_json() is body
+
+
+def test_mcp_tools_follow_the_registry_version(monkeypatch: pytest.MonkeyPatch) -> None:
+    registry = ToolRegistry()
+    registry.register(LazyTool(_declaration("first")))
+    monkeypatch.setattr(stdio, "tool_registry", registry)
+    monkeypatch.setattr(stdio, "_mcp_tools", (-1, []))
+
+    tools = stdio._list_mcp_tools()
+    assert [tool.name for tool in tools] == ["first"]
+    assert tools[0].inputSchema == {"type": "object", "properties": {}}
+    # Built once per version; callers get their own list
+    cached = stdio._mcp_tools[1]
+    assert stdio._list_mcp_tools() == tools and stdio._mcp_tools[1] is cached
+    assert stdio._list_mcp_tools() is not cached
+
+    registry.register(LazyTool(_declaration("second")))
+    assert [tool.name for tool in stdio._list_mcp_tools()] == ["first", "second"]
+    registry.unregister("first")
+    assert [tool.name for tool in stdio._list_mcp_tools()] == ["second"]